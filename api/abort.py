@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import operator
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from .binout import W2B_SUFFIX, read_series
+from .models import ProgressPoint
+
+
+# Early-abort rules, evaluated while a run is live. Written as text, e.g.
+#   "dt < 1 for 10000 steps"   progress-line time step below 1 s, sustained over 10000 model steps
+#   "viol > 30"                timestep-violation percentage of the progress line
+#   "volume_error > 1e-3"      |%VOLerror| of any waterbody in flowbal.csv (or flowbal.csv.w2b)
+#   "wall > 7200"              wall-clock seconds since the run started
+#   "file w2.err"              the model wrote to w2.err
+# A trailing "for <n> steps" or "for <n> s" requires the condition to hold over that span of consecutive samples.
+ABORT_RULES_ENV = "W2_ABORT_RULES"  # server-wide default rules, separated by ';'
+PROGRESS_METRICS = {
+    "dt": "dt",
+    "viol": "viol_percent",
+    "percent": "percent",
+    "step": "step",
+    "elapsed": "elapsed_days",
+}
+OTHER_METRICS = ("volume_error", "wall")
+_OPS: Dict[str, Callable[[float, float], bool]] = {
+    "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+}
+_RULE_RE = re.compile(
+    r"^(?P<metric>[a-z_]+)\s*(?P<op><=|>=|<|>)\s*(?P<value>[-+0-9.eE]+)"
+    r"(?:\s+for\s+(?P<span>[0-9.eE+]+)\s*(?P<unit>steps?|s|sec|seconds?))?$"
+)
+_FILE_RE = re.compile(r"^file\s+(?P<path>\S+)$")
+
+
+@dataclass
+class AbortRule:
+    text: str
+    metric: str  # a PROGRESS_METRICS key, "volume_error", "wall" or "file"
+    op: str = ">"
+    value: float = 0.0
+    steps: int = 0  # condition must hold over this many model steps
+    seconds: float = 0.0  # ... or this many wall-clock seconds
+    path: Optional[str] = None  # for "file"
+
+    def holds(self, x: float) -> bool:
+        return _OPS[self.op](x, self.value)
+
+
+def parse_rule(text: str) -> AbortRule:
+    t = " ".join(text.strip().split())
+    m = _FILE_RE.match(t)
+    if m:
+        path = m.group("path")
+        if Path(path).is_absolute() or ".." in Path(path).parts:
+            raise ValueError(f"abort rule file must be relative to the run directory: {text!r}")
+        return AbortRule(text=t, metric="file", path=path)
+    m = _RULE_RE.match(t.lower())
+    if not m:
+        raise ValueError(f"cannot parse abort rule {text!r} (expected e.g. 'dt < 1 for 10000 steps' or 'file w2.err')")
+    metric = m.group("metric")
+    if metric not in PROGRESS_METRICS and metric not in OTHER_METRICS:
+        known = ", ".join(list(PROGRESS_METRICS) + list(OTHER_METRICS) + ["file"])
+        raise ValueError(f"unknown abort metric {metric!r} (known: {known})")
+    rule = AbortRule(text=t, metric=metric, op=m.group("op"), value=float(m.group("value")))
+    if m.group("span"):
+        if metric not in PROGRESS_METRICS:
+            raise ValueError(f"'for ...' applies to progress metrics only: {text!r}")
+        if m.group("unit").startswith("step"):
+            rule.steps = int(float(m.group("span")))
+        else:
+            rule.seconds = float(m.group("span"))
+    return rule
+
+
+def parse_rules(spec: Union[None, str, Iterable[str]]) -> List[AbortRule]:
+    """Rules from a ';'-separated string or a list of strings (each may also hold ';'-separated rules)."""
+    if not spec:
+        return []
+    items = [spec] if isinstance(spec, str) else list(spec)
+    return [parse_rule(part) for item in items for part in item.split(";") if part.strip()]
+
+
+@dataclass
+class _Streak:
+    step: int
+    wall: float
+
+
+@dataclass
+class AbortMonitor:
+    """Evaluates a run's rules against its live progress points, flow balance and files."""
+
+    rules: List[AbortRule]
+    _streaks: Dict[int, _Streak] = field(default_factory=dict)
+    _flow_pos: int = 0
+    _flow_rows: int = 0
+
+    def on_progress(self, p: ProgressPoint, wall: float) -> Optional[str]:
+        for n, rule in enumerate(self.rules):
+            if rule.metric not in PROGRESS_METRICS:
+                continue
+            x = float(getattr(p, PROGRESS_METRICS[rule.metric]))
+            if not rule.holds(x):
+                self._streaks.pop(n, None)
+                continue
+            streak = self._streaks.setdefault(n, _Streak(p.step, wall))
+            if p.step - streak.step >= rule.steps and wall - streak.wall >= rule.seconds:
+                since = f" since step {streak.step}" if rule.steps or rule.seconds else ""
+                return f"{rule.text} ({rule.metric} {x:g} at step {p.step}{since})"
+        return None
+
+    def on_wall(self, wall: float) -> Optional[str]:
+        for rule in self.rules:
+            if rule.metric == "wall" and rule.holds(wall):
+                return f"{rule.text} (wall {wall:.0f} s)"
+        return None
+
+    def check_files(self, workdir: Path) -> Optional[str]:
+        for rule in self.rules:
+            if rule.metric != "file":
+                continue
+            p = workdir / rule.path
+            try:
+                if p.is_file() and p.stat().st_size > 0:
+                    return f"{rule.text} ({rule.path} written)"
+            except OSError:
+                continue
+        return None
+
+    def check_flowbal(self, workdir: Path) -> Optional[str]:
+        rules = [r for r in self.rules if r.metric == "volume_error"]
+        if not rules:
+            return None
+        for jday, jw, err in self._new_flowbal_rows(workdir):
+            for rule in rules:
+                if rule.holds(abs(err)):
+                    return f"{rule.text} (%VOLerror {err:g} in waterbody {jw} at JDAY {jday:g})"
+        return None
+
+    def _new_flowbal_rows(self, workdir: Path) -> List[tuple]:
+        rows = []
+        binary = workdir / ("flowbal.csv" + W2B_SUFFIX)
+        if binary.is_file():
+            # buffered in blocks by the model; decode what has been flushed so far
+            try:
+                series = read_series(binary)
+            except (OSError, ValueError):
+                return rows
+            nc = series.ncols
+            for r in range(self._flow_rows, series.nrows):
+                row = series.values[r * nc:(r + 1) * nc]
+                if nc >= 11:
+                    rows.append((row[0], int(row[1]), row[10]))
+            self._flow_rows = series.nrows
+            return rows
+        text = workdir / "flowbal.csv"
+        try:
+            with open(text, "r", encoding="latin-1") as f:
+                f.seek(self._flow_pos)
+                while True:
+                    line = f.readline()
+                    if not line.endswith("\n"):
+                        break  # incomplete line, read it again next time
+                    self._flow_pos = f.tell()
+                    parts = [s.strip() for s in line.split(",")]
+                    if len(parts) < 11:
+                        continue
+                    try:
+                        rows.append((float(parts[0]), int(parts[1]), float(parts[10])))
+                    except ValueError:
+                        continue  # header
+        except FileNotFoundError:
+            pass
+        return rows
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import bisect
+import fnmatch
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+MANIFEST_NAME = ".manifest.json"
+MANIFEST_VERSION = 1
+EXPORTS_DIR = ".exports"  # cached archives (api/export.py), not listed as artifacts
+FIELDS_DIR = ".fields"  # chunked field store (api/fieldchunks.py), not listed as artifacts
+# Compressed artifacts (api/retention.py) are gzip files of independent members, one per COMPRESS_BLOCK bytes
+# of the original, so a byte range is served by decompressing only the members it covers.
+COMPRESS_SUFFIX = ".gz"
+COMPRESS_BLOCK = 1 << 20
+KINDS = ("inputs", "outputs", "logs")
+# Written by the runner and the model next to the outputs
+LOG_NAMES = {"stdout.log", "w2_progress.log", "w2_error.log", "w2.err", "w2.wrn", "pre.err", "pre.wrn"}
+
+
+@dataclass
+class Entry:
+    path: str
+    size: int
+    mtime_ns: int
+    kind: str
+    sha256: Optional[str] = None  # computed on first download, kept while size and mtime are unchanged
+    stored: Optional[str] = None  # relative path of the compressed copy that replaced the file
+    blocks: Optional[List[int]] = None  # offsets of its gzip members
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "path": self.path,
+            "size": self.size,
+            "mtime": datetime.fromtimestamp(self.mtime_ns / 1e9).isoformat(),
+            "kind": self.kind,
+            "sha256": self.sha256,
+            "compressed": self.stored is not None,
+        }
+
+
+def read_stored(path: Path, blocks: List[int], start: int, stop: int) -> Iterator[bytes]:
+    """Bytes [start, stop) of the original of a compressed artifact."""
+    k = start // COMPRESS_BLOCK
+    with open(path, "rb") as f:
+        while start < stop and k < len(blocks):
+            f.seek(blocks[k])
+            comp = f.read(blocks[k + 1] - blocks[k]) if k + 1 < len(blocks) else f.read()
+            data = zlib.decompress(comp, 16 + zlib.MAX_WBITS)
+            base = k * COMPRESS_BLOCK
+            yield data[start - base:min(len(data), stop - base)]
+            start = base + COMPRESS_BLOCK
+            k += 1
+
+
+class Manifest:
+    """
+    Sorted index of the files under a run directory. While the run is live it is rescanned at most every
+    `max_age` seconds (unchanged files keep their entries and checksums); once the run is finalized it is
+    frozen and saved next to the artifacts as `.manifest.json`.
+    """
+
+    def __init__(self, root: Path, inputs: Iterable[str] = ()) -> None:
+        self.root = root
+        self.inputs = set(inputs)  # relative paths copied in from the input directory
+        self.entries: Dict[str, Entry] = {}
+        self.paths: List[str] = []
+        self.generation = 0  # bumped whenever the file set, a size or an mtime changes
+        self.final = False
+        self._scanned_at = -1e30
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, root: Path) -> Optional["Manifest"]:
+        try:
+            data = json.loads((root / MANIFEST_NAME).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != MANIFEST_VERSION:
+            return None
+        m = cls(root, data.get("inputs", []))
+        m.entries = {e["path"]: Entry(**e) for e in data.get("entries", [])}
+        m.paths = sorted(m.entries)
+        m.generation = int(data.get("generation", 0))
+        m.final = bool(data.get("final", False))
+        return m
+
+    def save(self) -> None:
+        data = {
+            "version": MANIFEST_VERSION,
+            "generation": self.generation,
+            "final": self.final,
+            "inputs": sorted(self.inputs),
+            "entries": [asdict(self.entries[p]) for p in self.paths],
+        }
+        tmp = self.root / (MANIFEST_NAME + ".tmp")
+        tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.root / MANIFEST_NAME)
+
+    def kind_of(self, rel: str) -> str:
+        if rel in self.inputs:
+            return "inputs"
+        if rel.rsplit("/", 1)[-1] in LOG_NAMES:
+            return "logs"
+        return "outputs"
+
+    def refresh(self, max_age: float = 2.0) -> None:
+        if self.final or time.monotonic() - self._scanned_at < max_age:
+            return
+        with self._lock:
+            if time.monotonic() - self._scanned_at < max_age:
+                return
+            self._scan()
+
+    def _scan(self) -> None:
+        found: Dict[str, Entry] = {}
+        changed = False
+        stored = {e.stored: e for e in self.entries.values() if e.stored}
+        stack = [("", self.root)]
+        while stack:
+            rel_dir, d = stack.pop()
+            try:
+                it = os.scandir(d)
+            except OSError:
+                continue
+            with it:
+                for de in it:
+                    rel = rel_dir + de.name
+                    if de.is_dir(follow_symlinks=False):
+                        if rel in (EXPORTS_DIR, FIELDS_DIR):
+                            continue
+                        stack.append((rel + "/", Path(de.path)))
+                        continue
+                    if not de.is_file() or rel in (MANIFEST_NAME, MANIFEST_NAME + ".tmp"):
+                        continue
+                    if rel in stored:
+                        found[stored[rel].path] = stored[rel]  # listed under its original name
+                        continue
+                    st = de.stat()
+                    old = self.entries.get(rel)
+                    if old is not None and old.size == st.st_size and old.mtime_ns == st.st_mtime_ns:
+                        found[rel] = old
+                    else:
+                        found[rel] = Entry(rel, st.st_size, st.st_mtime_ns, self.kind_of(rel))
+                        changed = True
+        if changed or len(found) != len(self.entries):
+            self.entries = found
+            self.paths = sorted(found)
+            self.generation += 1
+        self._scanned_at = time.monotonic()
+
+    def finalize(self) -> None:
+        with self._lock:
+            self._scan()
+            self.final = True
+            self.save()
+
+    def select(self, prefix: Optional[str] = None, glob: Optional[str] = None, kind: Optional[str] = None,
+               cursor: Optional[str] = None, limit: Optional[int] = None) -> Tuple[List[Entry], Optional[str]]:
+        """
+        Entries in path order after `cursor` (the last path of the previous page), restricted to `prefix`, an
+        fnmatch `glob` over the relative path ('*' also matches '/') and a kind. Returns the page and the
+        cursor of the next one (None on the last page).
+        """
+        paths = self.paths
+        start = bisect.bisect_left(paths, prefix) if prefix else 0
+        if cursor:
+            start = max(start, bisect.bisect_right(paths, cursor))
+        out: List[Entry] = []
+        for i in range(start, len(paths)):
+            p = paths[i]
+            if prefix and not p.startswith(prefix):
+                break
+            e = self.entries[p]
+            if (kind and e.kind != kind) or (glob and not fnmatch.fnmatchcase(p, glob)):
+                continue
+            if limit is not None and len(out) == limit:
+                return out, out[-1].path
+            out.append(e)
+        return out, None
+
+    def open(self, rel: str) -> BinaryIO:
+        """Read an artifact by its listed path, decompressing it if retention compressed it."""
+        e = self.entries.get(rel)
+        if e is not None and e.stored:
+            return gzip.open(self.root / e.stored, "rb")
+        return open(self.root / rel, "rb")
+
+    def checksum(self, rel: str) -> Optional[str]:
+        """sha256 of an artifact, cached in its entry while the file is unchanged."""
+        e = self.entries.get(rel)
+        if e is not None and e.stored:
+            return e.sha256
+        p = self.root / rel
+        try:
+            st = p.stat()
+        except OSError:
+            return None
+        if e is not None and e.sha256 and e.size == st.st_size and e.mtime_ns == st.st_mtime_ns:
+            return e.sha256
+        h = hashlib.sha256()
+        with open(p, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        if e is not None and e.size == st.st_size and e.mtime_ns == st.st_mtime_ns:
+            e.sha256 = h.hexdigest()
+            if self.final:
+                with self._lock:
+                    self.save()
+        return h.hexdigest()
+
+    def etag(self, *params: object) -> str:
+        key = json.dumps([self.generation, len(self.paths)] + [str(x) for x in params])
+        return '"' + hashlib.sha1(key.encode("utf-8")).hexdigest()[:20] + '"'
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import json
+import os
+import statistics
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .control import (CONTROL_NPT, ControlSummary, FieldRef, card_lines, fields, find_card, read_lines,
+                      read_summary)
+from .models import FINAL_STATUSES
+
+
+# Time-step tuning: short probe runs over candidate DLTMAX x DLTF settings, measured from the progress stream.
+# The fastest stable setting of each scenario family is kept in runs/dlt_tuning.json and applied to new runs
+# with dlt=auto (the family of their grid) or dlt=<family>.
+DLT_TUNING = "dlt_tuning.json"
+DLTMAX_CANDIDATES = (300.0, 600.0, 1200.0, 1800.0, 3600.0)
+DLTF_CANDIDATES = (0.8, 0.9)
+PER_LINE = 9  # DLTMAX and DLTF are read 9F8.0 per line, NDT values in all
+POLL_SECONDS = 2.0
+MIN_RATE_SPAN = 5.0  # wall seconds of progress needed to rate a probe from it (lines are stamped as tailed)
+PROBE_PROGRESS_LINES = 200  # screen outputs (progress lines) over a probe's window
+
+
+@dataclass(frozen=True)
+class DltSetting:
+    dltmax: float  # seconds, every DLT window
+    dltf: float  # fraction of the stable step taken, every DLT window
+
+
+def family_of(summary: ControlSummary) -> str:
+    """Default scenario family of a case: its grid, so cases on the same bathymetry share a tuning."""
+    return f"grid-{summary.nwb}x{summary.nbr}x{summary.imx}x{summary.kmx}"
+
+
+def dlt_overrides(lines: List[str], setting: DltSetting) -> List[Tuple[FieldRef, float]]:
+    """Overrides (see create_run) setting DLTMAX and DLTF of all NDT windows of a control file."""
+    ndt = int(fields(lines[find_card(lines, "DLT CON")])[0])
+    out: List[Tuple[FieldRef, float]] = []
+    for j in range(ndt):
+        out.append((FieldRef("DLT MAX", j % PER_LINE, j // PER_LINE), setting.dltmax))
+        out.append((FieldRef("DLT FRN", j % PER_LINE, j // PER_LINE), setting.dltf))
+    return out
+
+
+@dataclass
+class ProbeResult:
+    dltmax: float
+    dltf: float
+    run_id: Optional[str] = None
+    status: str = "queued"  # run status once final
+    days_per_second: Optional[float] = None  # simulated days per wall second, after the first 10% of the window
+    viol_mean: Optional[float] = None  # mean of the progress lines' viol (%)
+    viol_max: Optional[float] = None
+    dt_median: Optional[float] = None  # seconds
+    stable: bool = False
+
+    @property
+    def setting(self) -> DltSetting:
+        return DltSetting(self.dltmax, self.dltf)
+
+
+def measure(probe: ProbeResult, rows: List[Tuple[Any, ...]], max_viol: float, days: float,
+            wall_seconds: Optional[float]) -> None:
+    """
+    Fill in rate and violation statistics of a finished probe from its progress rows. A probe too short to
+    rate from its progress is rated by `days` simulated over its `wall_seconds` instead.
+    """
+    # rows: day, hour, percent, step, dt, viol_percent, elapsed_days, timestamp (api/models.py PROGRESS_COLUMNS)
+    rows = rows[len(rows) // 10:]  # model start-up and the first steps from the initial conditions
+    if len(rows) >= 2:
+        jday = [r[0] + r[1] / 24.0 for r in rows]
+        wall = rows[-1][7] - rows[0][7]
+        if wall >= MIN_RATE_SPAN and jday[-1] > jday[0]:
+            probe.days_per_second = (jday[-1] - jday[0]) / wall
+    if probe.days_per_second is None and wall_seconds:
+        probe.days_per_second = days / wall_seconds
+    if rows:
+        viol = [r[5] for r in rows]
+        probe.viol_mean = statistics.fmean(viol)
+        probe.viol_max = max(viol)
+        probe.dt_median = statistics.median(r[4] for r in rows)
+    probe.stable = (probe.status == "succeeded" and probe.days_per_second is not None
+                    and probe.viol_mean is not None and probe.viol_mean <= max_viol)
+
+
+class TuningStore:
+    """The chosen setting and its probe statistics per scenario family, as JSON."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, family: str) -> Optional[DltSetting]:
+        rec = self.load().get(family)
+        return DltSetting(float(rec["dltmax"]), float(rec["dltf"])) if rec else None
+
+    def put(self, family: str, probe: ProbeResult, job_id: str) -> None:
+        with self._lock:
+            data = self.load()
+            data[family] = dict(asdict(probe), job_id=job_id, tuned_at=datetime.utcnow().isoformat())
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text(json.dumps(data, indent=1, sort_keys=True), encoding="utf-8")
+            os.replace(tmp, self.path)
+
+
+@dataclass
+class TuningJob:
+    job_id: str
+    family: str
+    input_dir: Path
+    window_days: float
+    max_viol: float
+    batch_id: str = ""
+    status: str = "running"  # running | finished | failed
+    error: Optional[str] = None
+    chosen: Optional[ProbeResult] = None
+    probes: List[ProbeResult] = field(default_factory=list)
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id, "family": self.family, "input_dir": str(self.input_dir),
+            "window_days": self.window_days, "max_viol": self.max_viol, "batch_id": self.batch_id,
+            "status": self.status, "error": self.error, "created_at": self.created_at,
+            "finished_at": self.finished_at, "chosen": asdict(self.chosen) if self.chosen else None,
+            "probes": [asdict(p) for p in self.probes],
+        }
+
+
+def parse_job(spec: Dict[str, Any], job_id: str) -> Tuple[TuningJob, List[str]]:
+    """Validate an autotune spec (see POST /autotune); returns the job and the source control lines."""
+    input_dir = Path(str(spec["input_dir"])).expanduser().resolve()
+    summary = read_summary(input_dir)
+    if summary is None:
+        raise FileNotFoundError(f"no readable {CONTROL_NPT} in {input_dir}")
+    window = float(spec.get("window_days", 10.0))
+    if not 0.0 < window:
+        raise ValueError("window_days must be positive")
+    dltmax = [float(x) for x in spec.get("dltmax", DLTMAX_CANDIDATES)]
+    dltf = [float(x) for x in spec.get("dltf", DLTF_CANDIDATES)]
+    if not dltmax or not dltf or min(dltmax) <= 0.0 or not all(0.0 < f <= 1.0 for f in dltf):
+        raise ValueError("dltmax must be positive seconds and dltf fractions in (0, 1]")
+    job = TuningJob(job_id, str(spec.get("family") or family_of(summary)), input_dir,
+                    min(window, summary.days), float(spec.get("max_viol", 5.0)))
+    job.probes = [ProbeResult(m, f) for m in dltmax for f in dltf]
+    return job, read_lines(input_dir / CONTROL_NPT)
+
+
+class TuningRunner:
+    """
+    Runs the probes of a job as one batch (the manager's slots bound how many run at once), then keeps the
+    stable probe with the highest simulated-days-per-second and records it for the family.
+    """
+
+    def __init__(self, manager: Any, job: TuningJob, lines: List[str], store: TuningStore) -> None:
+        self.manager = manager
+        self.job = job
+        self.lines = lines
+        self.store = store
+        self.summary = read_summary(job.input_dir)
+
+    def progress_overrides(self) -> List[Tuple[FieldRef, float]]:
+        """
+        Probes are measured from their progress lines, which the CLI writes at the screen output interval (kept
+        by every output profile): from TMSTRT, PROBE_PROGRESS_LINES times over the window, for every water body.
+        """
+        lines, job = self.lines, self.job
+        scr = [fields(lines[i]) for i in card_lines(lines, "SCR PRIN")]
+        if any(not f or f[0].strip().upper() != "ON" for f in scr):
+            raise ValueError("probes are measured from progress lines: SCR PRINT must be ON for every water body")
+        nscr = max(int(float(f[1])) if len(f) > 1 and f[1].strip() else 1 for f in scr)
+        freq = job.window_days / PROBE_PROGRESS_LINES
+        out = [(FieldRef("SCR DATE", 0), self.summary.tmstrt)]
+        out += [(FieldRef("SCR FREQ", j), freq) for j in range(min(max(nscr, 1), PER_LINE))]
+        return out
+
+    def launch(self) -> None:
+        job = self.job
+        tmend = FieldRef("TIME CON", 1, 0)
+        try:
+            progress = self.progress_overrides()
+            for p in job.probes:
+                overrides = (dlt_overrides(self.lines, p.setting) + progress
+                             + [(tmend, self.summary.tmstrt + job.window_days)])
+                run = self.manager.create_run(job.input_dir, name=f"dlt-{p.dltmax:g}-{p.dltf:g}",
+                                              batch_id=job.batch_id, outputs="minimal", overrides=overrides)
+                p.run_id = run.run_id
+        except Exception as e:
+            for p in job.probes:
+                if p.run_id:
+                    self.manager.cancel(p.run_id)
+            job.status, job.error, job.finished_at = "failed", f"{type(e).__name__}: {e}", datetime.utcnow()
+            raise
+        threading.Thread(target=self._wait, name=f"autotune-{job.job_id}", daemon=True).start()
+
+    def _wait(self) -> None:
+        job = self.job
+        try:
+            while True:
+                runs = [self.manager.get(p.run_id) for p in job.probes]
+                if all(r is None or r.status in FINAL_STATUSES for r in runs):
+                    break
+                time.sleep(POLL_SECONDS)
+            for p, run in zip(job.probes, runs):
+                if run is None:
+                    p.status = "failed"
+                    continue
+                p.status = run.status
+                wall = ((run.finished_at - run.started_at).total_seconds()
+                        if run.finished_at and run.started_at else None)
+                measure(p, list(run.progress.rows(len(run.progress))), job.max_viol, job.window_days, wall)
+            stable = [p for p in job.probes if p.stable]
+            if stable:
+                job.chosen = max(stable, key=lambda p: p.days_per_second)
+                self.store.put(job.family, job.chosen, job.job_id)
+                job.status = "finished"
+            else:
+                job.status, job.error = "failed", f"no probe finished with mean viol <= {job.max_viol}%"
+        except Exception as e:  # surfaced in the job status
+            job.status, job.error = "failed", f"{type(e).__name__}: {e}"
+        job.finished_at = datetime.utcnow()
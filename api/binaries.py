@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .control import ControlSummary
+from .eta import HistoryModel
+
+
+# Model executables the API can run, kept in runs/binaries.json: a name, the path, build flags and
+# capabilities as given at registration, and the sha256 of the file (recomputed when it is rebuilt in place).
+# "default" is <repo>/w2_exe_linux unless registered otherwise. A run picks a variant with binary=<name>, or
+# binary=auto: the variant with the best recorded rate on the run's grid size (see HistoryModel.fastest).
+BINARIES = "binaries.json"
+DEFAULT_BINARY = "default"
+AUTO_BINARY = "auto"
+AUTO_EXCLUDE = "debug"  # capability of variants auto never picks
+
+
+@dataclass
+class Variant:
+    name: str
+    path: str
+    flags: str = ""  # e.g. "-O3 -qopenmp"
+    capabilities: List[str] = field(default_factory=list)  # e.g. openmp, avx512, debug, fpe-trap
+    sha256: Optional[str] = None
+    size: int = 0
+    mtime_ns: int = 0
+    registered_at: Optional[str] = None
+
+    def refresh(self) -> str:
+        """The sha256 of the file, rehashed only if its size or mtime changed. Raises OSError if it is missing."""
+        st = os.stat(self.path)
+        if self.sha256 is None or (st.st_size, st.st_mtime_ns) != (self.size, self.mtime_ns):
+            h = hashlib.sha256()
+            with open(self.path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+            self.sha256, self.size, self.mtime_ns = h.hexdigest(), st.st_size, st.st_mtime_ns
+        return self.sha256
+
+    def describe(self) -> Dict[str, Any]:
+        out = asdict(self)
+        path = Path(self.path)
+        out.update(exists=path.is_file(), executable=path.is_file() and os.access(path, os.X_OK))
+        return out
+
+
+def result_key(input_digest: Optional[str], binary_sha256: Optional[str]) -> Optional[str]:
+    """Identity of a run's results: the staged inputs and the executable that ran them."""
+    if not input_digest or not binary_sha256:
+        return None
+    return hashlib.sha256(f"{input_digest}:{binary_sha256}".encode("ascii")).hexdigest()
+
+
+class BinaryRegistry:
+    def __init__(self, path: Path, default: Path) -> None:
+        self.path = path
+        self.default = default
+        self._lock = threading.Lock()
+        self._variants: Dict[str, Variant] = {}
+        try:
+            for rec in json.loads(path.read_text(encoding="utf-8")):
+                v = Variant(**rec)
+                self._variants[v.name] = v
+        except (OSError, TypeError, ValueError):
+            pass
+        self._variants.setdefault(DEFAULT_BINARY, Variant(DEFAULT_BINARY, str(default)))
+
+    def _save(self) -> None:
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps([asdict(v) for v in self._variants.values()], indent=1), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def register(self, name: str, path: str, flags: str = "", capabilities: Optional[List[str]] = None) -> Variant:
+        if not name or not name.replace("-", "").replace("_", "").replace(".", "").isalnum() or name == AUTO_BINARY:
+            raise ValueError(f"invalid binary name {name!r}: letters, digits, '-', '_' and '.'; not {AUTO_BINARY!r}")
+        p = Path(path).expanduser().resolve()
+        if not p.is_file() or not os.access(p, os.X_OK):
+            raise FileNotFoundError(f"not an executable file: {p}")
+        v = Variant(name, str(p), flags, sorted({str(c).strip().lower() for c in capabilities or [] if str(c).strip()}),
+                    registered_at=datetime.utcnow().isoformat())
+        v.refresh()
+        with self._lock:
+            self._variants[name] = v
+            self._save()
+        return v
+
+    def remove(self, name: str) -> bool:
+        if name == DEFAULT_BINARY:
+            raise ValueError(f"the {DEFAULT_BINARY!r} binary cannot be removed")
+        with self._lock:
+            if self._variants.pop(name, None) is None:
+                return False
+            self._save()
+        return True
+
+    def list(self) -> List[Variant]:
+        with self._lock:
+            return list(self._variants.values())
+
+    def get(self, name: str) -> Optional[Variant]:
+        with self._lock:
+            return self._variants.get(name)
+
+    def resolve(self, name: Optional[str], summary: Optional[ControlSummary],
+                history: HistoryModel) -> Variant:
+        """
+        The variant a run uses, with its current sha256: `name`, "auto" or None (the default). Raises KeyError
+        for an unknown name and FileNotFoundError if the file is gone.
+        """
+        name = name or DEFAULT_BINARY
+        if name == AUTO_BINARY:
+            hashes = {}
+            for v in self.list():
+                if AUTO_EXCLUDE in v.capabilities:
+                    continue
+                try:
+                    hashes[v.refresh()] = v
+                except OSError:
+                    continue
+            best = history.fastest(summary, list(hashes)) if summary else None
+            v = hashes[best] if best else self.get(DEFAULT_BINARY)
+        else:
+            v = self.get(name)
+            if v is None:
+                raise KeyError(name)
+        try:
+            v.refresh()
+        except OSError:
+            raise FileNotFoundError(f"binary {v.name!r} not found at {v.path}")
+        return v
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import struct
+import sys
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+# Layout written by binary_output_cli.f90 (W2_OUTPUT_FORMAT=binary):
+#   b"W2BIN001" | int32 header length | header text | int32 ncols | ncols x float64 per row ...
+W2B_MAGIC = b"W2BIN001"
+W2B_SUFFIX = ".w2b"
+
+
+@dataclass
+class BinarySeries:
+    path: Path
+    title: str
+    columns: List[str]
+    units: List[str]
+    values: array = field(default_factory=lambda: array("d"))
+
+    @property
+    def ncols(self) -> int:
+        return len(self.columns)
+
+    @property
+    def nrows(self) -> int:
+        return len(self.values) // self.ncols if self.columns else 0
+
+    def column(self, name: str) -> List[float]:
+        j = self.columns.index(name)
+        return self.values[j::self.ncols].tolist()
+
+    def as_dict(self, columns: Optional[List[str]] = None) -> Dict[str, List[float]]:
+        names = columns or self.columns
+        return {name: self.column(name) for name in names}
+
+
+def _parse_header(text: str) -> Dict[str, str]:
+    meta: Dict[str, str] = {}
+    for line in text.splitlines():
+        key, sep, value = line.partition("=")
+        if sep:
+            meta[key.strip()] = value
+    return meta
+
+
+def read_series(path: Path) -> BinarySeries:
+    """Read a `.w2b` time-series file written by the model in binary output mode."""
+    with open(path, "rb") as f:
+        if f.read(8) != W2B_MAGIC:
+            raise ValueError(f"not a W2 binary series file: {path}")
+        (hlen,) = struct.unpack("<i", f.read(4))
+        meta = _parse_header(f.read(hlen).decode("latin-1"))
+        (ncols,) = struct.unpack("<i", f.read(4))
+        payload = f.read()
+
+    columns = [c.strip() for c in meta.get("columns", "").split(",")] if meta.get("columns") else []
+    units = [u.strip() for u in meta.get("units", "").split(",")] if meta.get("units") is not None else []
+    columns = (columns + [f"C{j + 1}" for j in range(len(columns), ncols)])[:ncols]
+    units = (units + [""] * ncols)[:ncols]
+
+    values = array("d")
+    usable = len(payload) - len(payload) % (8 * ncols) if ncols else 0
+    values.frombytes(payload[:usable])
+    if sys.byteorder != "little":
+        values.byteswap()
+    return BinarySeries(path=path, title=meta.get("title", "").strip(), columns=columns, units=units, values=values)
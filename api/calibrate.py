@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .control import CONTROL_NPT, FieldRef, find_field, read_lines, read_summary
+from .models import FINAL_STATUSES
+from .observations import ObservationSet
+from .outputs import ALWAYS_KEPT, parse_profile
+
+
+# Skill metric a study optimizes: rmse, mae and |bias| are minimized, nse and kge maximized
+METRICS = ("rmse", "mae", "bias", "nse", "kge")
+POLL_SECONDS = 2.0
+# Output groups (api/outputs.py) that write the files an observation set refers to
+_OUTPUT_GROUP_OF = (("tsr", "tsr"), ("spr", "spr"), ("two", "wdo"), ("qwo", "wdo"), ("cwo", "wdo"), ("dwo", "wdo"))
+
+
+def loss_of(metric: str, value: Optional[float]) -> Optional[float]:
+    if value is None:
+        return None
+    if metric in ("nse", "kge"):
+        return -value
+    return abs(value)
+
+
+def outputs_for(obs: ObservationSet) -> List[str]:
+    """The output groups a run needs to be scored against `obs`."""
+    groups = set()
+    for s in obs.series:
+        name = s.file.lower()
+        groups.update(g for prefix, g in _OUTPUT_GROUP_OF if name.startswith(prefix))
+    return sorted(groups)
+
+
+@dataclass
+class Parameter:
+    name: str
+    ref: FieldRef
+    low: float
+    high: float
+    log: bool = False  # search log(value) uniformly
+
+    def value(self, u: float) -> float:
+        if self.log:
+            return math.exp(math.log(self.low) + u * (math.log(self.high) - math.log(self.low)))
+        return self.low + u * (self.high - self.low)
+
+    def describe(self) -> Dict[str, Any]:
+        return {"name": self.name, "field": self.ref.describe(), "low": self.low, "high": self.high, "log": self.log}
+
+
+def parse_parameters(specs: List[Dict[str, Any]], control: Path) -> List[Parameter]:
+    """[{name, low, high, card?, line?, log?}]: `name` heads a field of a w2_con.npt card (e.g. CBHE)."""
+    lines = read_lines(control)
+    params = []
+    for spec in specs:
+        name = str(spec["name"])
+        low, high = float(spec["low"]), float(spec["high"])
+        log = bool(spec.get("log", False))
+        if not low < high:
+            raise ValueError(f"parameter {name}: low must be below high")
+        if log and low <= 0.0:
+            raise ValueError(f"parameter {name}: a log-scaled range must be positive")
+        line = spec.get("line")
+        ref = find_field(lines, name, spec.get("card"), int(line) if line is not None else None)
+        params.append(Parameter(name, ref, low, high, log))
+    if not params:
+        raise ValueError("a calibration needs at least one parameter")
+    if len({p.name for p in params}) != len(params):
+        raise ValueError("parameter names must be unique")
+    return params
+
+
+class AsyncDifferentialEvolution:
+    """
+    Differential evolution (rand/1/bin) over the unit cube without generations: every finished trial is told
+    at once and the next proposal is drawn from the population as it stands, so no worker waits on a barrier.
+    A trial proposed against target member i replaces it if it scores better.
+    """
+
+    def __init__(self, dim: int, population: int, rng: random.Random, f: float = 0.7, cr: float = 0.9) -> None:
+        self.dim = dim
+        self.population = max(population, 4)
+        self.rng = rng
+        self.f = f
+        self.cr = cr
+        self.members: List[Tuple[List[float], float]] = []
+        self._seeding = 0  # random proposals out for the initial population
+        self._next_target = 0
+
+    def ask(self) -> Tuple[List[float], Optional[int]]:
+        if len(self.members) + self._seeding < self.population or len(self.members) < 4:
+            self._seeding += 1
+            return [self.rng.random() for _ in range(self.dim)], None
+        target = self._next_target % len(self.members)
+        self._next_target += 1
+        others = [i for i in range(len(self.members)) if i != target]
+        a, b, c = (self.members[i][0] for i in self.rng.sample(others, 3))
+        x = self.members[target][0]
+        forced = self.rng.randrange(self.dim)
+        trial = []
+        for j in range(self.dim):
+            if j == forced or self.rng.random() < self.cr:
+                v = a[j] + self.f * (b[j] - c[j])
+                if v < 0.0 or v > 1.0:  # back between the base and the violated bound
+                    v = a[j] * self.rng.random() if v < 0.0 else a[j] + (1.0 - a[j]) * self.rng.random()
+                trial.append(v)
+            else:
+                trial.append(x[j])
+        return trial, target
+
+    def tell(self, x: List[float], target: Optional[int], loss: Optional[float]) -> None:
+        if target is None:
+            self._seeding -= 1
+            if loss is None:
+                return
+            if len(self.members) < self.population:
+                self.members.append((x, loss))
+            else:
+                worst = max(range(len(self.members)), key=lambda i: self.members[i][1])
+                if loss < self.members[worst][1]:
+                    self.members[worst] = (x, loss)
+        elif loss is not None and target < len(self.members) and loss < self.members[target][1]:
+            self.members[target] = (x, loss)
+
+
+@dataclass
+class Trial:
+    number: int
+    x: List[float]
+    target: Optional[int]
+    params: Dict[str, float]
+    run_id: Optional[str] = None
+    status: str = "running"  # running | done | pruned | failed
+    loss: Optional[float] = None
+    score: Optional[float] = None  # the metric itself
+    rung: int = 0  # rungs passed
+    pruned_at: Optional[float] = None  # simulated day
+
+    def describe(self) -> Dict[str, Any]:
+        return {"trial": self.number, "run_id": self.run_id, "status": self.status, "params": self.params,
+                "score": self.score, "rung": self.rung, "pruned_at": self.pruned_at}
+
+
+@dataclass
+class Study:
+    study_id: str
+    name: Optional[str]
+    input_dir: Path
+    obs_id: str
+    metric: str
+    params: List[Parameter]
+    budget: int
+    parallel: int
+    rungs: List[float]  # fractions of the simulated window at which members are compared
+    eta: int  # at each rung only the best 1/eta of the members that reached it go on
+    outputs: Any
+    priority: int
+    batch_id: str
+    seed: Optional[int] = None
+    population: int = 10
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    status: str = "running"  # running | stopping | finished | stopped | failed
+    error: Optional[str] = None
+    trials: List[Trial] = field(default_factory=list)
+    rung_losses: List[List[float]] = field(default_factory=list)
+    stop_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def best(self) -> Optional[Trial]:
+        done = [t for t in self.trials if t.status == "done" and t.loss is not None]
+        return min(done, key=lambda t: t.loss) if done else None
+
+    def describe(self, trials: bool = True) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for t in self.trials:
+            counts[t.status] = counts.get(t.status, 0) + 1
+        best = self.best()
+        out = {
+            "study_id": self.study_id, "name": self.name, "status": self.status, "error": self.error,
+            "input_dir": str(self.input_dir), "obs_id": self.obs_id, "metric": self.metric,
+            "batch_id": self.batch_id, "budget": self.budget, "parallel": self.parallel,
+            "rungs": self.rungs, "eta": self.eta, "created_at": self.created_at, "finished_at": self.finished_at,
+            "parameters": [p.describe() for p in self.params], "counts": counts,
+            "best": best.describe() if best else None,
+        }
+        if trials:
+            out["trials"] = [t.describe() for t in self.trials]
+        return out
+
+
+def parse_study(spec: Dict[str, Any], study_id: str, default_parallel: int) -> Study:
+    """Validate a calibration spec (see POST /calibrations) into a Study with no batch yet."""
+    input_dir = Path(str(spec["input_dir"])).expanduser().resolve()
+    control = input_dir / CONTROL_NPT
+    if not control.is_file():
+        raise FileNotFoundError(f"{CONTROL_NPT} not found in {input_dir}")
+    if read_summary(input_dir) is None:
+        raise ValueError(f"cannot read the grid and time window of {control}")
+    metric = str(spec.get("metric", "rmse")).lower()
+    if metric not in METRICS:
+        raise ValueError(f"metric must be one of {', '.join(METRICS)}")
+    rungs = sorted(float(r) for r in spec.get("rungs", [0.25, 0.5]))
+    if any(not 0.0 < r < 1.0 for r in rungs):
+        raise ValueError("rungs are fractions of the simulated window, between 0 and 1")
+    eta = int(spec.get("eta", 3))
+    if eta < 2:
+        raise ValueError("eta must be at least 2")
+    budget = int(spec.get("budget", 50))
+    parallel = int(spec.get("parallel") or default_parallel)
+    if budget < 1 or parallel < 1:
+        raise ValueError("budget and parallel must be positive")
+    outputs = spec.get("outputs")
+    parse_profile(outputs)
+    return Study(study_id=study_id, name=spec.get("name"), input_dir=input_dir, obs_id=str(spec["obs"]),
+                 metric=metric, params=parse_parameters(list(spec["parameters"]), control), budget=budget,
+                 parallel=parallel, rungs=rungs, eta=eta, outputs=outputs, priority=int(spec.get("priority", 0)),
+                 batch_id="", seed=spec.get("seed"), population=int(spec.get("population", 10)))
+
+
+class StudyRunner:
+    """
+    Drives a study on a RunManager: keeps `parallel` trials in flight, scores finished ones against the
+    observations, and prunes a live trial at each rung it reaches unless its skill over the observations up to
+    that day is among the best 1/eta of the trials scored there (asynchronous successive halving).
+    """
+
+    def __init__(self, manager: Any, study: Study, obs: ObservationSet) -> None:
+        self.manager = manager
+        self.study = study
+        self.obs = obs
+        self.summary = read_summary(study.input_dir)
+        self.optimizer = AsyncDifferentialEvolution(len(study.params), study.population,
+                                                    random.Random(study.seed))
+        study.rung_losses = [[] for _ in study.rungs]
+        if study.outputs is None:  # rungs are checked on the progress lines (screen output)
+            study.outputs = sorted(set(outputs_for(obs)) | ALWAYS_KEPT)
+
+    def start(self) -> None:
+        threading.Thread(target=self._loop, name=f"study-{self.study.study_id}", daemon=True).start()
+
+    def _loop(self) -> None:
+        s = self.study
+        try:
+            while True:
+                flying = [t for t in s.trials if t.status == "running"]
+                while not s.stop_event.is_set() and len(flying) < s.parallel and len(s.trials) < s.budget:
+                    flying.append(self._launch())
+                if not flying:
+                    break
+                for t in flying:
+                    self._check(t)
+                if s.stop_event.is_set():
+                    for t in flying:
+                        if t.status == "running":
+                            self.manager.cancel(t.run_id)
+                time.sleep(POLL_SECONDS)
+            s.status = "stopped" if s.stop_event.is_set() else "finished"
+        except Exception as e:  # surfaced in the study status
+            s.status, s.error = "failed", f"{type(e).__name__}: {e}"
+            for t in s.trials:
+                if t.status == "running" and t.run_id:
+                    self.manager.cancel(t.run_id)
+        s.finished_at = datetime.utcnow()
+
+    def _launch(self) -> Trial:
+        s = self.study
+        x, target = self.optimizer.ask()
+        params = {p.name: p.value(u) for p, u in zip(s.params, x)}
+        t = Trial(len(s.trials) + 1, x, target, params)
+        s.trials.append(t)
+        run = self.manager.create_run(s.input_dir, name=f"{s.name or s.study_id}-{t.number}", batch_id=s.batch_id,
+                                      priority=s.priority, outputs=s.outputs,
+                                      overrides=[(p.ref, params[p.name]) for p in s.params])
+        t.run_id = run.run_id
+        return t
+
+    def _loss(self, run: Any, until: Optional[float] = None) -> Tuple[Optional[float], Optional[float]]:
+        sk = self.manager.skill(run, self.study.obs_id, until=until)
+        score = sk["overall"][self.study.metric]
+        return loss_of(self.study.metric, score), score
+
+    def _finish(self, t: Trial, status: str, loss: Optional[float] = None) -> None:
+        t.status = status
+        t.loss = loss
+        self.optimizer.tell(t.x, t.target, loss if status == "done" else None)
+
+    def _check(self, t: Trial) -> None:
+        s = self.study
+        run = self.manager.get(t.run_id)
+        if run is None:
+            self._finish(t, "failed")
+            return
+        if run.status in FINAL_STATUSES:
+            if run.status == "succeeded":
+                for r in range(t.rung, len(s.rungs)):  # finished between polls: still a peer at the rungs it skipped
+                    if self.summary is not None:
+                        loss, _ = self._loss(run, until=self.summary.tmstrt + s.rungs[r] * self.summary.days)
+                        if loss is not None:
+                            s.rung_losses[r].append(loss)
+                t.rung = len(s.rungs)
+                loss, t.score = self._loss(run)
+                self._finish(t, "done" if loss is not None else "failed", loss)
+            else:
+                self._finish(t, "failed")
+            return
+        lp = run.last_progress()
+        if run.status != "running" or lp is None or self.summary is None:
+            return
+        while t.rung < len(s.rungs) and lp.percent >= 100.0 * s.rungs[t.rung]:
+            day = self.summary.tmstrt + s.rungs[t.rung] * self.summary.days
+            loss, score = self._loss(run, until=day)
+            t.rung += 1
+            if loss is None:
+                continue
+            peers = s.rung_losses[t.rung - 1]
+            peers.append(loss)
+            keep = max(1, len(peers) // s.eta)
+            if len(peers) >= s.eta and loss > sorted(peers)[keep - 1]:
+                t.score, t.pruned_at = score, day
+                self.manager.abort(t.run_id, f"pruned: {s.metric} {score:.4g} at day {day:.2f} "
+                                              f"(rung {t.rung} of study {s.study_id})")
+                self._finish(t, "pruned")
+                return
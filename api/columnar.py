@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import json
+import math
+import struct
+import sys
+from array import array
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+# Encodings of column-shaped responses (progress, series), picked by the `encoding` query or the Accept header:
+#   json     application/json, encoded with orjson when installed and never through FastAPI's per-value encoder
+#   msgpack  application/msgpack: {meta..., "columns": {name: [values]}}, floats as float64 and integers as int64
+#   arrow    application/vnd.apache.arrow.stream: one record batch, meta as JSON under schema metadata "w2"
+#            (needs the optional pyarrow package)
+#   raw      application/x-w2-columns: b"W2COL001" | uint32 header length | JSON header | column buffers
+#            The header is {"meta": {...}, "rows": n, "columns": [{"name", "dtype", "offset", "length"}]} with
+#            numpy dtype strings (e.g. "<f8") and byte offsets from the end of the header, which is padded with
+#            spaces so that every buffer starts 8-byte aligned; all values are little-endian.
+ENCODINGS = {
+    "json": "application/json",
+    "msgpack": "application/msgpack",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "raw": "application/x-w2-columns",
+}
+_ALIASES = {"application/x-msgpack": "msgpack", "application/vnd.apache.arrow.file": "arrow",
+            "application/octet-stream": "raw", "*/*": "json", "application/*": "json"}
+RAW_MAGIC = b"W2COL001"
+_SWAP = sys.byteorder != "little"
+
+# A column: its values as one or more buffers of one array typecode (arrays, or memoryviews over them)
+Column = Sequence[Any]
+
+
+def negotiate(encoding: Optional[str], accept: Optional[str]) -> str:
+    """
+    The encoding named by the `encoding` query, else the best match of the Accept header (by q, then order),
+    else json (as before these encodings, whatever the header asks for). Raises ValueError for an unknown
+    `encoding`, or arrow without pyarrow.
+    """
+    if encoding:
+        if encoding not in ENCODINGS:
+            raise ValueError(f"unknown encoding {encoding!r}; one of: {', '.join(ENCODINGS)}")
+        if encoding == "arrow":
+            check_arrow()
+        return encoding
+    if not accept:
+        return "json"
+    known = {mt: name for name, mt in ENCODINGS.items()}
+    known.update(_ALIASES)
+    ranked: List[Tuple[float, int, str]] = []
+    for i, part in enumerate(accept.split(",")):
+        mt, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for p in params:
+            k, _, v = p.partition("=")
+            if k.strip() == "q":
+                try:
+                    q = float(v)
+                except ValueError:
+                    q = 0.0
+        name = known.get(mt.lower())
+        if name == "arrow" and not arrow_available():
+            continue
+        if name and q > 0.0:
+            ranked.append((-q, i, name))
+    return min(ranked)[2] if ranked else "json"
+
+
+def _typecode(seg: Any) -> str:
+    return seg.typecode if isinstance(seg, array) else seg.format
+
+
+def _joined(col: Column, code: Optional[str] = None) -> array:
+    """The segments of a column as one array (of typecode `code` when given, else their own)."""
+    out = array(code or (_typecode(col[0]) if col else "d"))
+    for seg in col:
+        if _typecode(seg) == out.typecode:
+            out.frombytes(memoryview(seg).cast("B"))
+        else:
+            out.extend(seg)
+    return out
+
+
+def _dtype(code: str) -> str:
+    size = array(code).itemsize
+    kind = "f" if code in "fd" else "u" if code in "BHILQ" else "i"
+    return f"<{kind}{size}"
+
+
+def _rows(columns: Dict[str, Column]) -> int:
+    return max((sum(len(seg) for seg in col) for col in columns.values()), default=0)
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, (array, memoryview)):
+        return obj.tolist()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def _listed(col: Column) -> List[Any]:
+    """A column as a list for JSON, NaN as None (null)."""
+    a = _joined(col)
+    values = a.tolist()
+    if a.typecode in "fd" and any(map(math.isnan, values)):
+        values = [None if math.isnan(x) else x for x in values]
+    return values
+
+
+def encode_json(obj: Any) -> bytes:
+    """`obj` as JSON: orjson when installed, else the json module (datetimes as ISO 8601 either way)."""
+    try:
+        import orjson
+    except ImportError:
+        return json.dumps(obj, default=_json_default, separators=(",", ":")).encode("utf-8")
+    return orjson.dumps(obj, default=_json_default)
+
+
+def encode_raw(meta: Dict[str, Any], columns: Dict[str, Column]) -> bytes:
+    bufs: List[array] = []
+    specs: List[Dict[str, Any]] = []
+    offset = 0
+    for name, col in columns.items():
+        a = _joined(col)
+        if _SWAP:
+            a.byteswap()
+        specs.append({"name": name, "dtype": _dtype(a.typecode), "offset": offset, "length": len(a)})
+        bufs.append(a)
+        offset += -(-len(a) * a.itemsize // 8) * 8
+    header = json.dumps({"meta": meta, "rows": _rows(columns), "columns": specs},
+                        default=_json_default).encode("utf-8")
+    header += b" " * (-(len(RAW_MAGIC) + 4 + len(header)) % 8)
+    out = bytearray(RAW_MAGIC + struct.pack("<I", len(header)) + header)
+    for a in bufs:
+        out += a.tobytes()
+        out += bytes(-len(out) % 8)
+    return bytes(out)
+
+
+def _mp_head(out: bytearray, n: int, fix: int, small: Tuple[int, str], big: Tuple[int, str]) -> None:
+    """Header of a msgpack array or map of `n` entries: fix form, 16-bit or 32-bit length."""
+    if n <= 15:
+        out.append(fix | n)
+    elif n < 0x10000:
+        out += struct.pack(">B" + small[1], small[0], n)
+    else:
+        out += struct.pack(">B" + big[1], big[0], n)
+
+
+def _mp_pack(obj: Any, out: bytearray) -> None:
+    if obj is None:
+        out.append(0xC0)
+    elif obj is True or obj is False:
+        out.append(0xC3 if obj else 0xC2)
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -32 <= obj < 0:
+            out += struct.pack(">b", obj)
+        elif 1 << 63 <= obj < 1 << 64:
+            out += struct.pack(">BQ", 0xCF, obj)
+        else:
+            out += struct.pack(">Bq", 0xD3, obj)
+    elif isinstance(obj, float):
+        out += struct.pack(">Bd", 0xCB, obj)
+    elif isinstance(obj, (str, datetime)):
+        b = (obj.isoformat() if isinstance(obj, datetime) else obj).encode("utf-8")
+        if len(b) < 32:
+            out.append(0xA0 | len(b))
+        elif len(b) < 0x100:
+            out += struct.pack(">BB", 0xD9, len(b))
+        elif len(b) < 0x10000:
+            out += struct.pack(">BH", 0xDA, len(b))
+        else:
+            out += struct.pack(">BI", 0xDB, len(b))
+        out += b
+    elif isinstance(obj, dict):
+        _mp_head(out, len(obj), 0x80, (0xDE, "H"), (0xDF, "I"))
+        for k, v in obj.items():
+            _mp_pack(str(k), out)
+            _mp_pack(v, out)
+    elif isinstance(obj, (list, tuple)):
+        _mp_head(out, len(obj), 0x90, (0xDC, "H"), (0xDD, "I"))
+        for v in obj:
+            _mp_pack(v, out)
+    else:
+        raise TypeError(f"{type(obj).__name__} cannot be packed")
+
+
+def _mp_column(col: Column, out: bytearray) -> None:
+    """
+    A column as a msgpack array of float64 (0xcb) or int64 (0xd3) values, built by interleaving the type byte
+    with the big-endian buffer instead of packing value by value.
+    """
+    code = _typecode(col[0]) if col else "d"
+    a = _joined(col, "d" if code in "fd" else "q")
+    if sys.byteorder == "little":
+        a.byteswap()
+    raw = a.tobytes()
+    n = len(a)
+    _mp_head(out, n, 0x90, (0xDC, "H"), (0xDD, "I"))
+    packed = bytearray(9 * n)
+    packed[0::9] = bytes((0xCB if a.typecode == "d" else 0xD3,)) * n
+    for k in range(8):
+        packed[1 + k::9] = raw[k::8]
+    out += packed
+
+
+def encode_msgpack(meta: Dict[str, Any], columns: Dict[str, Column]) -> bytes:
+    out = bytearray()
+    _mp_head(out, len(meta) + 1, 0x80, (0xDE, "H"), (0xDF, "I"))
+    for k, v in meta.items():
+        _mp_pack(str(k), out)
+        _mp_pack(v, out)
+    _mp_pack("columns", out)
+    _mp_head(out, len(columns), 0x80, (0xDE, "H"), (0xDF, "I"))
+    for name, col in columns.items():
+        _mp_pack(name, out)
+        _mp_column(col, out)
+    return bytes(out)
+
+
+def arrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def check_arrow() -> None:
+    if not arrow_available():
+        raise ValueError("the arrow encoding needs the pyarrow package (pip install pyarrow)")
+
+
+def encode_arrow(meta: Dict[str, Any], columns: Dict[str, Column]) -> bytes:
+    import pyarrow as pa
+
+    arrays, names = [], []
+    for name, col in columns.items():
+        a = _joined(col)
+        if _SWAP:
+            a.byteswap()
+        kind = {"f": "float", "u": "uint", "i": "int"}[_dtype(a.typecode)[1]]
+        pa_type = getattr(pa, f"{kind}{8 * a.itemsize}")()
+        arrays.append(pa.Array.from_buffers(pa_type, len(a), [None, pa.py_buffer(a.tobytes())]))
+        names.append(name)
+    schema = pa.schema([pa.field(n, a.type) for n, a in zip(names, arrays)],
+                       metadata={"w2": json.dumps(meta, default=_json_default)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_batch(pa.record_batch(arrays, schema=schema))
+    return sink.getvalue().to_pybytes()
+
+
+def encode(fmt: str, meta: Dict[str, Any], columns: Dict[str, Column]) -> bytes:
+    """
+    Body of a column response in encoding `fmt`. JSON is `meta` plus "columns": {name: [values]} (the shape of
+    the existing JSON column responses).
+    """
+    if fmt == "raw":
+        return encode_raw(meta, columns)
+    if fmt == "msgpack":
+        return encode_msgpack(meta, columns)
+    if fmt == "arrow":
+        return encode_arrow(meta, columns)
+    return encode_json(dict(meta, columns={name: _listed(col) for name, col in columns.items()}))
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+
+# Fixed-format w2_con.npt: each card is a title line followed by data lines of 8-character fields,
+# the first field being a label column.
+CONTROL_NPT = "w2_con.npt"
+
+
+def read_lines(control: Path) -> List[str]:
+    return control.read_bytes().decode("latin-1").splitlines(keepends=True)
+
+
+def find_card(lines: List[str], card: str, start: int = 0) -> int:
+    """Index of the first data line of the card titled `card`."""
+    for i in range(start, len(lines)):
+        if lines[i][:8].strip() == card:
+            for j in range(i + 1, len(lines)):
+                if lines[j].strip():
+                    return j
+    raise ValueError(f"card {card!r} not found in {CONTROL_NPT}")
+
+
+def fields(line: str) -> List[str]:
+    body = line.rstrip("\r\n")
+    return [body[k:k + 8] for k in range(8, len(body), 8)]
+
+
+def set_field(line: str, k: int, value: str) -> str:
+    """`line` with field `k` (after the label column) replaced by the 8-character `value`."""
+    body = line.rstrip("\r\n")
+    eol = line[len(body):]
+    start = 8 + 8 * k
+    body = body.ljust(start + 8)
+    return body[:start] + value + body[start + 8:] + eol
+
+
+def format_number(x: float) -> str:
+    """
+    `x` right-justified in 8 characters, as F8.0 reads it back: fixed point if that keeps 3 significant
+    digits, else E notation.
+    """
+    for d in range(5, -1, -1):
+        text = f"{x:.{d}f}"
+        if len(text) <= 8 and (x == 0.0 or abs(x) >= 10.0 ** (2 - d)):
+            return text.rjust(8)
+    text = f"{x:.2E}" if x >= 0.0 else f"{x:.1E}"
+    if len(text) > 8:
+        raise ValueError(f"{x!r} does not fit an 8-character field")
+    return text.rjust(8)
+
+
+def card_lines(lines: List[str], card: str) -> range:
+    """Indices of the data lines of the card titled `card` (up to the next blank line)."""
+    first = find_card(lines, card)
+    last = first
+    while last < len(lines) and lines[last].strip():
+        last += 1
+    return range(first, last)
+
+
+@dataclass(frozen=True)
+class FieldRef:
+    card: str  # card title, first 8 characters
+    field: int  # index after the label column
+    line: Optional[int] = None  # data line of the card (water body, branch, ...); None for all of them
+
+    def describe(self) -> str:
+        return f"{self.card}[{self.field}]" + (f" line {self.line}" if self.line is not None else "")
+
+
+def find_field(lines: List[str], name: str, card: Optional[str] = None, line: Optional[int] = None) -> FieldRef:
+    """The field headed `name` on a card's title line (e.g. CBHE on HYD COEF), within `card` if given."""
+    want = name.strip().upper()
+    hits = []
+    for i, text in enumerate(lines[:-1]):
+        title = text[:8].strip()
+        if not title or (card and title != card.strip()) or not lines[i + 1].strip():
+            continue
+        heads = [h.strip().upper() for h in fields(text)]
+        if want in heads:
+            hits.append(FieldRef(title, heads.index(want), line))
+    if not hits:
+        raise ValueError(f"no card of {CONTROL_NPT} has a field {name!r}" + (f" on {card!r}" if card else ""))
+    if len({h.card for h in hits}) > 1:
+        raise ValueError(f"field {name!r} is on several cards ({', '.join(sorted({h.card for h in hits}))}); "
+                         "give the card")
+    return hits[0]
+
+
+def write_fields(control: Path, values: Sequence[Tuple[FieldRef, float]]) -> None:
+    """Set numeric fields of a (staged) w2_con.npt in place, keeping the fixed-format layout."""
+    lines = read_lines(control)
+    for ref, x in values:
+        rows = card_lines(lines, ref.card)
+        if ref.line is not None:
+            if not 0 <= ref.line < len(rows):
+                raise ValueError(f"{ref.card!r} has {len(rows)} data line(s), not line {ref.line}")
+            rows = [rows[ref.line]]
+        text = format_number(x)
+        for i in rows:
+            lines[i] = set_field(lines[i], ref.field, text)
+    control.write_bytes("".join(lines).encode("latin-1"))
+
+
+@dataclass(frozen=True)
+class ControlSummary:
+    nwb: int
+    nbr: int
+    imx: int
+    kmx: int
+    tmstrt: float
+    tmend: float
+
+    @property
+    def cells(self) -> int:
+        return self.imx * self.kmx
+
+    @property
+    def days(self) -> float:
+        return self.tmend - self.tmstrt
+
+
+def read_summary(input_dir: Path) -> Optional[ControlSummary]:
+    """Grid size and simulated window of a case, or None without a readable w2_con.npt."""
+    control = input_dir / CONTROL_NPT
+    if not control.is_file():
+        return None
+    try:
+        lines = read_lines(control)
+        grid = fields(lines[find_card(lines, "GRID")])
+        time = fields(lines[find_card(lines, "TIME CON")])
+        return ControlSummary(nwb=int(grid[0]), nbr=int(grid[1]), imx=int(grid[2]), kmx=int(grid[3]),
+                              tmstrt=float(time[0]), tmend=float(time[1]))
+    except (OSError, ValueError, IndexError):
+        return None
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import hashlib
+import heapq
+import json
+import statistics
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from .control import ControlSummary
+from .inputcache import W2C_SUFFIX
+
+
+ETA_HISTORY = "eta_history.jsonl"  # one record per successful run, under runs/
+QUEUE_ORDER_ENV = "W2_QUEUE_ORDER"  # fifo | sjf (shortest predicted first, default) | lpt (longest first)
+QUEUE_ORDERS = ("fifo", "sjf", "lpt")
+
+
+def input_digest(input_dir: Path) -> str:
+    """sha256 over the relative paths and contents of a case's input files (input-cache sidecars excluded)."""
+    h = hashlib.sha256()
+    for p in sorted(input_dir.rglob("*")):
+        if not p.is_file() or p.name.endswith(W2C_SUFFIX):
+            continue
+        h.update(p.relative_to(input_dir).as_posix().encode("utf-8") + b"\0")
+        with open(p, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _quantile(values: Sequence[float], q: float) -> float:
+    s = sorted(values)
+    x = q * (len(s) - 1)
+    lo = int(x)
+    hi = min(lo + 1, len(s) - 1)
+    return s[lo] + (s[hi] - s[lo]) * (x - lo)
+
+
+@dataclass
+class Estimate:
+    source: str  # "live" (rate of the running model), "history" (past runs) or "none"
+    eta_seconds: Optional[float] = None  # wall seconds until the run finishes
+    eta_low: Optional[float] = None  # 10th-90th percentile range of eta_seconds
+    eta_high: Optional[float] = None
+    rate: Optional[float] = None  # simulated days per wall second
+    remaining_days: Optional[float] = None
+    spans: int = 0  # rate samples behind a live estimate, matching records behind a historical one
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class RateEstimator:
+    """
+    Rolling simulated-days-per-wall-second of a run. Progress samples are grouped into spans of at least
+    `min_span` wall seconds over the last `window` seconds, and the ETA uses the median span rate with
+    the 10th-90th percentile rates as its range, so short bursts of small or large DLT do not swing it.
+    """
+
+    def __init__(self, window: float = 600.0, min_span: float = 2.0) -> None:
+        self.window = window
+        self.min_span = min_span
+        self._samples: Deque[Tuple[float, float]] = deque()
+
+    def add(self, wall: float, jday: float) -> None:
+        s = self._samples
+        if s and wall - s[-1][0] < 0.05:
+            s[-1] = (s[-1][0], jday)  # same poll of the progress log
+        else:
+            s.append((wall, jday))
+        while len(s) > 2 and wall - s[1][0] > self.window:
+            s.popleft()
+
+    def rates(self) -> List[float]:
+        out = []
+        s = self._samples
+        i = 0
+        for j in range(1, len(s)):
+            dw = s[j][0] - s[i][0]
+            if dw >= self.min_span:
+                out.append((s[j][1] - s[i][1]) / dw)
+                i = j
+        return out
+
+    def estimate(self, remaining_days: float) -> Optional[Estimate]:
+        rates = [r for r in self.rates() if r > 0.0]
+        if not rates:
+            return None
+        rate = statistics.median(rates)
+        lo, hi = _quantile(rates, 0.1), _quantile(rates, 0.9)
+        remaining_days = max(remaining_days, 0.0)
+        return Estimate("live", eta_seconds=remaining_days / rate, eta_low=remaining_days / hi,
+                        eta_high=remaining_days / lo, rate=rate, remaining_days=remaining_days, spans=len(rates))
+
+
+@dataclass
+class HistoryRecord:
+    digest: str
+    cells: int
+    days: float
+    wall_seconds: float
+    finished_at: str
+    binary: Optional[str] = None  # sha256 of the executable (api/binaries.py)
+
+
+class HistoryModel:
+    """
+    Wall times of finished runs, used to predict new ones: same inputs (digest) -> their wall times;
+    same grid -> simulated days per second of that grid; otherwise cell-days per second over all runs.
+    Runs of the same executable are preferred at each level.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.records: List[HistoryRecord] = []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self.records.append(HistoryRecord(**json.loads(line)))
+                    except (TypeError, ValueError):
+                        continue
+        except FileNotFoundError:
+            pass
+
+    def record(self, digest: str, summary: ControlSummary, wall_seconds: float, binary: Optional[str] = None) -> None:
+        if wall_seconds <= 0.0 or summary.days <= 0.0:
+            return
+        rec = HistoryRecord(digest, summary.cells, summary.days, wall_seconds, datetime.utcnow().isoformat(), binary)
+        self.records.append(rec)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(asdict(rec)) + "\n")
+
+    def predict(self, digest: Optional[str], summary: Optional[ControlSummary],
+                binary: Optional[str] = None) -> Optional[Estimate]:
+        records = [r for r in self.records if r.binary == binary] if binary else []
+        walls: List[float] = []
+        for recs in (records, self.records):
+            walls = [r.wall_seconds for r in recs if digest and r.digest == digest]
+            if walls:
+                break
+        if not walls and summary and summary.days > 0.0:
+            for recs in (records, self.records):
+                same_grid = [r for r in recs if r.cells == summary.cells]
+                if same_grid:
+                    walls = [summary.days * r.wall_seconds / r.days for r in same_grid]
+                    break
+            else:
+                recs = records or self.records
+                walls = [summary.days * summary.cells * r.wall_seconds / (r.days * r.cells) for r in recs]
+        if not walls:
+            return None
+        return Estimate("history", eta_seconds=statistics.median(walls), eta_low=_quantile(walls, 0.1),
+                        eta_high=_quantile(walls, 0.9), spans=len(walls))
+
+    def fastest(self, summary: ControlSummary, binaries: Sequence[str]) -> Optional[str]:
+        """
+        Of the executables `binaries` (sha256), the one with the highest median simulated days per second over
+        past runs on the same grid; failing that, cell-days per second on grids within a factor of 2 in cells.
+        None if none of them has such runs.
+        """
+        for near in (False, True):
+            rates: Dict[str, List[float]] = {}
+            for r in self.records:
+                if r.binary not in binaries:
+                    continue
+                if not near and r.cells == summary.cells:
+                    rates.setdefault(r.binary, []).append(r.days / r.wall_seconds)
+                elif near and summary.cells and 0.5 <= r.cells / summary.cells <= 2.0:
+                    rates.setdefault(r.binary, []).append(r.days * r.cells / r.wall_seconds)
+            if rates:
+                return max(rates, key=lambda b: statistics.median(rates[b]))
+        return None
+
+
+def simulate_queue(running: Sequence[float], queued: Sequence[float], slots: int) -> List[float]:
+    """
+    Finish times (seconds from now) of `queued` jobs started in order on the first free of `slots`, where
+    `running` holds the remaining seconds of the jobs occupying slots now.
+    """
+    free = sorted(list(running)[:slots]) + [0.0] * max(slots - len(running), 0)
+    heapq.heapify(free)
+    out = []
+    for d in queued:
+        t = heapq.heappop(free) + d
+        out.append(t)
+        heapq.heappush(free, t)
+    return out
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import io
+import json
+import os
+import queue
+import tarfile
+import threading
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+from .artifacts import Manifest
+
+
+EXPORT_FORMATS = {
+    "tar": "application/x-tar",
+    "tar.gz": "application/gzip",
+    "tar.zst": "application/zstd",  # needs the optional zstandard package
+    "zip": "application/zip",
+}
+CHUNK = 1 << 16
+QUEUE_CHUNKS = 64  # at most this many chunks are buffered between the archive writer and the response
+
+
+@dataclass
+class ExportItem:
+    manifest: Manifest
+    path: str  # as listed by the manifest
+    arcname: str
+    size: int
+    mtime: float
+
+
+def select_items(manifest: Manifest, include: Sequence[str] = (), kind: Optional[str] = None,
+                 skip_inputs: bool = False, prefix: str = "") -> List[ExportItem]:
+    """Files of a run matching any of the `include` globs (all files when empty), named `prefix` + path."""
+    items = []
+    for e in manifest.select(kind=kind)[0]:
+        if skip_inputs and e.kind == "inputs":
+            continue
+        if include and not any(fnmatch.fnmatchcase(e.path, g) for g in include):
+            continue
+        items.append(ExportItem(manifest, e.path, prefix + e.path, e.size, e.mtime_ns / 1e9))
+    return items
+
+
+def cache_key(*params: object) -> str:
+    return hashlib.sha1(json.dumps([str(p) for p in params]).encode("utf-8")).hexdigest()[:20]
+
+
+class _Closed(Exception):
+    pass
+
+
+class _QueueWriter(io.RawIOBase):
+    """Write-only stream handing fixed-size chunks to the response through a bounded queue."""
+
+    def __init__(self, q: "queue.Queue[Optional[bytes]]", stop: threading.Event, tee: Optional[io.BufferedWriter]):
+        self._q = q
+        self._stop = stop
+        self._tee = tee
+        self._buf = bytearray()
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos  # zipfile records local header offsets from this
+
+    def write(self, b) -> int:
+        n = len(b)
+        self._buf += b
+        self._pos += n
+        while len(self._buf) >= CHUNK:
+            self._put(bytes(self._buf[:CHUNK]))
+            del self._buf[:CHUNK]
+        return n
+
+    def flush_all(self) -> None:
+        if self._buf:
+            self._put(bytes(self._buf))
+            self._buf.clear()
+
+    def _put(self, chunk: bytes) -> None:
+        if self._tee is not None:
+            self._tee.write(chunk)
+        while True:
+            if self._stop.is_set():
+                raise _Closed()
+            try:
+                self._q.put(chunk, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+
+def _write_archive(items: Iterable[ExportItem], fmt: str, out: _QueueWriter) -> None:
+    if fmt == "zip":
+        with zipfile.ZipFile(out, mode="w", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+            for it in items:
+                zi = zipfile.ZipInfo(it.arcname, time.localtime(max(it.mtime, 315532800))[:6])
+                zi.compress_type = zipfile.ZIP_DEFLATED
+                zi.external_attr = 0o644 << 16
+                zi.file_size = it.size
+                with it.manifest.open(it.path) as src, zf.open(zi, "w", force_zip64=it.size > (1 << 31)) as dst:
+                    for chunk in iter(lambda: src.read(CHUNK), b""):
+                        dst.write(chunk)
+        return
+    zwriter = None
+    target: io.RawIOBase = out
+    if fmt == "tar.zst":
+        import zstandard
+
+        zwriter = zstandard.ZstdCompressor().stream_writer(out, closefd=False)
+        target = zwriter
+    with tarfile.open(fileobj=target, mode="w|gz" if fmt == "tar.gz" else "w|", format=tarfile.PAX_FORMAT) as tf:
+        for it in items:
+            ti = tarfile.TarInfo(it.arcname)
+            ti.size, ti.mtime, ti.mode = it.size, it.mtime, 0o644
+            with it.manifest.open(it.path) as src:
+                tf.addfile(ti, src)
+    if zwriter is not None:
+        zwriter.close()
+
+
+def check_format(fmt: str) -> None:
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if fmt == "tar.zst":
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            raise ValueError("tar.zst export needs the zstandard package (pip install zstandard)")
+
+
+def stream_archive(items: List[ExportItem], fmt: str, cache: Optional[Path] = None) -> Iterator[bytes]:
+    """
+    Archive `items` on the fly: a writer thread builds the archive into a bounded queue that this generator
+    drains, so memory stays at QUEUE_CHUNKS * CHUNK whatever the archive size. With `cache`, the bytes are
+    also written to `cache` (renamed into place only once complete).
+    """
+    check_format(fmt)
+    q: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=QUEUE_CHUNKS)
+    stop = threading.Event()
+    errors: List[BaseException] = []
+    part = cache.with_name(cache.name + f".{os.getpid()}.{threading.get_ident()}.part") if cache else None
+    tee = None
+    if part is not None:
+        part.parent.mkdir(parents=True, exist_ok=True)
+        tee = open(part, "wb")
+
+    def run() -> None:
+        out = _QueueWriter(q, stop, tee)
+        try:
+            _write_archive(items, fmt, out)
+            out.flush_all()
+        except _Closed:
+            return
+        except BaseException as e:  # surfaced to the response below
+            errors.append(e)
+        while not stop.is_set():
+            try:
+                q.put(None, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    t = threading.Thread(target=run, daemon=True)
+    t.start()
+    complete = False
+    try:
+        while True:
+            chunk = q.get()
+            if chunk is None:
+                break
+            yield chunk
+        if errors:
+            raise errors[0]
+        complete = True
+    finally:
+        stop.set()
+        t.join()
+        if tee is not None:
+            tee.close()
+            if complete:
+                os.replace(part, cache)
+            else:
+                part.unlink(missing_ok=True)
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .artifacts import FIELDS_DIR
+from .habitat import W2F_NAME, FieldStore, Snapshot
+
+
+# Transposed copy of a run's field snapshots (fields.w2f, W2_FIELD_SNAPSHOT=on) for extraction along time. Every
+# field is laid on the full kmx x imx grid (cells above the surface, below the bottom or outside the active
+# segments are NaN) and cut into chunks of CHUNK_TIMES snapshots x CHUNK_LAYERS layers x CHUNK_SEGMENTS segments,
+# float32 little-endian, values in time, layer, segment order within a chunk.
+# <workdir>/.fields/ holds index.json and one file per field: rows of chunks, one row per CHUNK_TIMES snapshots,
+# chunks within a row by layer block then segment block. A point, a vertical or a longitudinal section over a time
+# window reads only the chunks it crosses. While the model is still writing snapshots, the store is extended by
+# rewriting its last row from the snapshot file.
+CHUNK_TIMES = 128
+CHUNK_LAYERS = 16
+CHUNK_SEGMENTS = 16
+INDEX = "index.json"
+_NAN = float("nan")
+_SWAP = sys.byteorder != "little"
+_build_locks: Dict[Path, threading.Lock] = {}
+_build_locks_guard = threading.Lock()
+
+
+def _blocks(n: int, size: int) -> int:
+    return -(-n // size)
+
+
+def parse_span(spec: Optional[str], n: int, what: str) -> Tuple[int, int]:
+    """A 1-based number or inclusive range "a-b" of 1..n (all of it for None) as a 0-based half-open span."""
+    if spec is None or not spec.strip():
+        return 0, n
+    a, sep, b = spec.strip().partition("-")
+    try:
+        lo, hi = int(a), int(b) if sep else int(a)
+    except ValueError:
+        raise ValueError(f"{what} must be a number or a range a-b, not {spec!r}")
+    if not 1 <= lo <= hi <= n:
+        raise ValueError(f"{what} {spec} is outside 1-{n}")
+    return lo - 1, hi
+
+
+class ChunkedFields:
+    """Reader of a store built by `update_fields`."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        idx = json.loads((root / INDEX).read_text(encoding="utf-8"))
+        self.kmx: int = idx["kmx"]
+        self.imx: int = idx["imx"]
+        self.chunk: Tuple[int, int, int] = tuple(idx["chunk"])
+        self.fields: List[str] = idx["fields"]
+        self.times: List[float] = idx["times"]  # JDAY of every snapshot
+        self.rows: List[int] = idx["rows"]  # offset in fields.w2f of the first snapshot of every row
+        self.source_size: int = idx["source_size"]
+        self.source_mtime_ns: int = idx["source_mtime_ns"]
+        self.nk = _blocks(self.kmx, self.chunk[1])
+        self.ni = _blocks(self.imx, self.chunk[2])
+
+    def time_span(self, start: Optional[float], end: Optional[float]) -> Tuple[int, int]:
+        """Snapshots with start <= JDAY <= end, as a half-open span of indices."""
+        t0 = 0 if start is None else bisect_left(self.times, start)
+        t1 = len(self.times) if end is None else bisect_right(self.times, end)
+        return t0, max(t0, t1)
+
+    def read(self, name: str, times: Tuple[int, int], layers: Tuple[int, int],
+             segments: Tuple[int, int]) -> Tuple[array, int]:
+        """
+        Values of field `name` over half-open spans of snapshots, layers and segments (0-based), in time, layer,
+        segment order, and the number of chunks read.
+        """
+        j = self.fields.index(name)
+        (t0, t1), (k0, k1), (i0, i1) = times, layers, segments
+        T, K, I = self.chunk
+        nk, ni = k1 - k0, i1 - i0
+        out = array("f", [_NAN]) * ((t1 - t0) * nk * ni)
+        if not out:
+            return out, 0
+        size = 4 * T * K * I
+        reads = 0
+        with open(self.root / f"f{j}.f32", "rb") as f:
+            for tc in range(t0 // T, (t1 - 1) // T + 1):
+                ta, tb = max(t0, tc * T), min(t1, (tc + 1) * T)
+                for kc in range(k0 // K, (k1 - 1) // K + 1):
+                    ka, kb = max(k0, kc * K), min(k1, (kc + 1) * K)
+                    for ic in range(i0 // I, (i1 - 1) // I + 1):
+                        ia, ib = max(i0, ic * I), min(i1, (ic + 1) * I)
+                        f.seek(((tc * self.nk + kc) * self.ni + ic) * size)
+                        chunk = array("f")
+                        chunk.frombytes(f.read(size))
+                        if _SWAP:
+                            chunk.byteswap()
+                        reads += 1
+                        w = ib - ia
+                        for t in range(ta, tb):
+                            for k in range(ka, kb):
+                                src = ((t - tc * T) * K + (k - kc * K)) * I + (ia - ic * I)
+                                dst = ((t - t0) * nk + (k - k0)) * ni + (ia - i0)
+                                out[dst:dst + w] = chunk[src:src + w]
+        return out, reads
+
+
+class _Builder:
+    """Fills one row of snapshots on the padded grid, per field, and writes it out as chunks."""
+
+    def __init__(self, store: FieldStore, root: Path) -> None:
+        self.store = store
+        self.root = root
+        self.kp = _blocks(store.kmx, CHUNK_LAYERS) * CHUNK_LAYERS
+        self.ip = _blocks(store.imx, CHUNK_SEGMENTS) * CHUNK_SEGMENTS
+        self.plane = self.kp * self.ip
+        self.bufs = {name: array("f", [_NAN]) * (CHUNK_TIMES * self.plane) for name in store.fields}
+        self.filled = 0
+
+    def add(self, snap: Snapshot) -> None:
+        s, base = self.store, self.filled * self.plane
+        for jw in range(1, s.nwb + 1):
+            ktop = snap.ktwb[jw - 1]
+            for jb in range(s.bs[jw - 1], s.be[jw - 1] + 1):
+                for i in range(snap.cus[jb - 1], s.ds[jb - 1] + 1):
+                    n0, n1 = snap.segments[i]
+                    if n1 <= n0:
+                        continue
+                    at = base + (ktop - 1) * self.ip + i - 1
+                    for name, values in snap.fields.items():
+                        self.bufs[name][at:at + (n1 - n0) * self.ip:self.ip] = values[n0:n1]
+        self.filled += 1
+
+    def flush(self, row: int) -> None:
+        T, K, I = CHUNK_TIMES, CHUNK_LAYERS, CHUNK_SEGMENTS
+        row_bytes = 4 * T * self.plane
+        for j, name in enumerate(self.store.fields):
+            buf = self.bufs[name]
+            out = array("f")
+            for k0 in range(0, self.kp, K):
+                for i0 in range(0, self.ip, I):
+                    for t in range(T):
+                        for k in range(k0, k0 + K):
+                            at = t * self.plane + k * self.ip + i0
+                            out.extend(buf[at:at + I])
+            if _SWAP:
+                out.byteswap()
+            path = self.root / f"f{j}.f32"
+            with open(path, "r+b" if path.exists() else "wb") as f:
+                f.seek(row * row_bytes)
+                out.tofile(f)
+                f.truncate()
+            buf[:] = array("f", [_NAN]) * len(buf)
+        self.filled = 0
+
+
+def update_fields(workdir: Path) -> Optional[ChunkedFields]:
+    """
+    The chunked store of a run, built from its fields.w2f or extended from the last row when the file has grown.
+    None when the run has no snapshots. Raises ValueError for an unreadable snapshot file.
+    """
+    source = workdir / W2F_NAME
+    if not source.is_file():
+        return None
+    root = workdir / FIELDS_DIR
+    with _build_locks_guard:
+        lock = _build_locks.setdefault(root, threading.Lock())
+    with lock:
+        st = source.stat()
+        try:
+            current: Optional[ChunkedFields] = ChunkedFields(root)
+        except (OSError, KeyError, ValueError):
+            current = None
+        if current and (current.source_size, current.source_mtime_ns) == (st.st_size, st.st_mtime_ns):
+            return current
+        store = FieldStore(source)
+        if (current is None or st.st_size < current.source_size or current.fields != store.fields
+                or (current.kmx, current.imx) != (store.kmx, store.imx)
+                or current.chunk != (CHUNK_TIMES, CHUNK_LAYERS, CHUNK_SEGMENTS)):
+            shutil.rmtree(root, ignore_errors=True)
+            root.mkdir(parents=True)
+            row, times, rows, offset = 0, [], [], None
+        else:
+            row = max(len(current.rows) - 1, 0)  # the last row may be partial: rebuilt from its first snapshot
+            times, rows = current.times[:row * CHUNK_TIMES], current.rows[:row]
+            offset = current.rows[row] if current.rows else None
+        builder = _Builder(store, root)
+        for snap in store.read(offset):
+            if builder.filled == CHUNK_TIMES:
+                builder.flush(row)
+                row += 1
+            if builder.filled == 0:
+                rows.append(snap.offset)
+            builder.add(snap)
+            times.append(snap.jday)
+        if builder.filled:
+            builder.flush(row)
+        index = {
+            "kmx": store.kmx, "imx": store.imx, "chunk": [CHUNK_TIMES, CHUNK_LAYERS, CHUNK_SEGMENTS],
+            "fields": store.fields, "times": times, "rows": rows,
+            "source_size": st.st_size, "source_mtime_ns": st.st_mtime_ns,
+        }
+        tmp = root / (INDEX + ".tmp")
+        tmp.write_text(json.dumps(index), encoding="utf-8")
+        os.replace(tmp, root / INDEX)
+        return ChunkedFields(root)
@@ -0,0 +1,605 @@
+from __future__ import annotations
+
+import argparse
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .binout import _parse_header
+
+
+# Field snapshots written by field_snapshot_cli.f90 (W2_FIELD_SNAPSHOT=on):
+#   b"W2FLD001" | int32 header length | header text | int32 bs(nwb), be(nwb), ds(nbr), kb(imx)
+#   records: float64 jday | float64 dlt | int32 ncells | int32 ktwb(nwb) | int32 cus(nbr) | float32 depth(imx)
+#            | nfields x ncells float32
+# Cells run over waterbodies, branches, segments (cus..ds) and layers (ktwb..kb), as FISHHABITAT and ENVIRP loop.
+W2F_MAGIC = b"W2FLD001"
+W2F_NAME = "fields.w2f"
+HABITAT_NPT = "w2_habitat.npt"
+ENVIRPRF_NPT = "w2_envirprf.npt"
+
+_F32 = struct.Struct("<f")
+_LIST_TOKEN = re.compile(r"'[^']*'|\"[^\"]*\"|[^,\s]+")
+
+
+def _f32(x: float) -> float:
+    """Round to single precision, as the model stores the criteria read from the input files."""
+    return _F32.unpack(_F32.pack(x))[0]
+
+
+def _ints(f, n: int) -> List[int]:
+    values = array("i")
+    values.frombytes(f.read(4 * n))
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values.tolist()
+
+
+@dataclass
+class Snapshot:
+    jday: float
+    dlt: float
+    ktwb: List[int]
+    cus: List[int]
+    depth: List[float]  # bottom depth of each segment (index i-1)
+    fields: Dict[str, array]  # per-cell values
+    branches: Dict[int, Tuple[int, int]]  # branch -> cell slice
+    segments: Dict[int, Tuple[int, int]]  # segment -> cell slice
+    offset: int = 0  # of the record in the file
+
+
+class FieldStore:
+    """Reader for `fields.w2f`; iterating yields one Snapshot per model output time."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            if f.read(8) != W2F_MAGIC:
+                raise ValueError(f"not a W2 field snapshot file: {self.path}")
+            (hlen,) = struct.unpack("<i", f.read(4))
+            meta = _parse_header(f.read(hlen).decode("latin-1"))
+            self.kmx = int(meta["kmx"])
+            self.imx = int(meta["imx"])
+            self.nwb = int(meta["nwb"])
+            self.nbr = int(meta["nbr"])
+            self.bs = _ints(f, self.nwb)
+            self.be = _ints(f, self.nwb)
+            self.ds = _ints(f, self.nbr)
+            self.kb = _ints(f, self.imx)
+            self._data_offset = f.tell()
+        self.fields = [s.strip() for s in meta.get("fields", "").split(",") if s.strip()]
+        self.constituents = [s.strip() for s in meta.get("constituents", "").split(",")]
+        self.derived = [s.strip() for s in meta.get("derived", "").split(",")]
+        do_name = meta.get("do", "").strip()
+        self.dissolved_oxygen = do_name if do_name in self.fields else None
+
+    def waterbody_of(self, jb: int) -> int:
+        for jw in range(1, self.nwb + 1):
+            if self.bs[jw - 1] <= jb <= self.be[jw - 1]:
+                return jw
+        raise ValueError(f"branch {jb} is not in any waterbody")
+
+    def _slices(self, ktwb: List[int], cus: List[int]):
+        branches: Dict[int, Tuple[int, int]] = {}
+        segments: Dict[int, Tuple[int, int]] = {}
+        n = 0
+        for jw in range(1, self.nwb + 1):
+            for jb in range(self.bs[jw - 1], self.be[jw - 1] + 1):
+                start = n
+                for i in range(cus[jb - 1], self.ds[jb - 1] + 1):
+                    m = max(self.kb[i - 1] - ktwb[jw - 1] + 1, 0)
+                    segments[i] = (n, n + m)
+                    n += m
+                branches[jb] = (start, n)
+        return branches, segments, n
+
+    def __iter__(self) -> Iterator[Snapshot]:
+        return self.read()
+
+    def read(self, offset: Optional[int] = None) -> Iterator[Snapshot]:
+        """Snapshots from the record at byte `offset` (a Snapshot.offset) on, or from the first."""
+        fixed = struct.Struct("<ddi")
+        with open(self.path, "rb") as f:
+            f.seek(self._data_offset if offset is None else offset)
+            while True:
+                at = f.tell()
+                raw = f.read(fixed.size)
+                if len(raw) < fixed.size:
+                    return
+                jday, dlt, ncells = fixed.unpack(raw)
+                size = 4 * (self.nwb + self.nbr + self.imx + ncells * len(self.fields))
+                record = f.read(size)
+                if len(record) < size:
+                    return  # record cut short by a run that is still writing
+                grid = array("i")
+                grid.frombytes(record[:4 * (self.nwb + self.nbr)])
+                if sys.byteorder != "little":
+                    grid.byteswap()
+                ktwb, cus = grid[:self.nwb].tolist(), grid[self.nwb:].tolist()
+                depth = array("f")
+                depth.frombytes(record[4 * (self.nwb + self.nbr):4 * (self.nwb + self.nbr + self.imx)])
+                values = array("f")
+                values.frombytes(record[4 * (self.nwb + self.nbr + self.imx):])
+                if sys.byteorder != "little":
+                    depth.byteswap()
+                    values.byteswap()
+                branches, segments, n = self._slices(ktwb, cus)
+                if n != ncells:
+                    raise ValueError(f"{self.path}: record at JDAY {jday} holds {ncells} cells, grid gives {n}")
+                fields = {name: values[j * ncells:(j + 1) * ncells] for j, name in enumerate(self.fields)}
+                yield Snapshot(jday, dlt, ktwb, cus, depth.tolist(), fields, branches, segments, at)
+
+
+# ---------------------------------------------------------------------------------------------------------------
+# Fish habitat (FISHHABITAT)
+
+
+@dataclass
+class Species:
+    name: str
+    temp_low: float
+    temp_high: float
+    do_min: float
+
+
+@dataclass
+class HabitatResult:
+    species: List[Species]
+    jday: List[float] = field(default_factory=list)
+    # scope ("all", "wb<N>", "br<N>") -> rows of (total volume, habitat volume per species)
+    volume: Dict[str, List[float]] = field(default_factory=dict)
+    habitat: Dict[str, List[List[float]]] = field(default_factory=dict)
+
+    def percent(self, scope: str) -> List[List[float]]:
+        return [[100.0 * h / v if v > 0.0 else 0.0 for h in row]
+                for v, row in zip(self.volume[scope], self.habitat[scope])]
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "species": [sp.__dict__ for sp in self.species],
+            "jday": self.jday,
+            "scopes": {scope: {"volume": self.volume[scope], "habitat": self.habitat[scope],
+                               "percent": self.percent(scope)} for scope in self.volume},
+        }
+
+
+def _list_tokens(line: str) -> List[str]:
+    """Values of a list-directed record: separated by commas or blanks, strings optionally quoted."""
+    return [t.strip("'\"") for t in _LIST_TOKEN.findall(line)]
+
+
+def read_habitat_npt(path: Path) -> Tuple[List[Species], str]:
+    """Species criteria and the habitat output file name from `w2_habitat.npt`."""
+    lines = Path(path).read_text(encoding="latin-1").splitlines()
+    head = _list_tokens(lines[2])
+    count, output = int(head[0]), head[1] if len(head) > 1 else "habitat.csv"
+    species = []
+    for line in lines[4:4 + count]:
+        t = _list_tokens(line)
+        species.append(Species(t[0], float(t[1]), float(t[2]), float(t[3])))
+    return species, output
+
+
+def _branch_habitat(t: Sequence[float], vol: Sequence[float], dox: Optional[Sequence[float]],
+                    groups: List[Tuple[Optional[float], List[Tuple[int, float, float]]]], out: List[float]) -> float:
+    """Habitat volume of each species into `out`; returns the total volume of the cells."""
+    # Habitat is TEMP-low < T <= TEMP-high (and DO >= DO-min): with the cells sorted by temperature, every species
+    # is a difference of two prefix sums; species sharing a DO limit share the prefix sums.
+    order = sorted(range(len(t)), key=t.__getitem__)
+    ts = [t[j] for j in order]
+    for do_min, members in groups:
+        if do_min is None:
+            vs = [vol[j] for j in order]
+        else:
+            vs = [vol[j] if dox[j] >= do_min else 0.0 for j in order]
+        cum = [0.0]
+        cum.extend(accumulate(vs))
+        for s, lo, hi in members:
+            out[s] = cum[bisect_right(ts, hi)] - cum[bisect_right(ts, lo)]
+    return sum(vol)
+
+
+def compute_habitat(store: FieldStore, species: List[Species], use_do: Optional[bool] = None) -> HabitatResult:
+    """
+    Habitat volume of every species per time, for the whole model, each waterbody and each branch.
+    DO limits apply when the store holds dissolved oxygen (as FISHHABITAT applies them when oxygen demand is
+    computed); `use_do=False` ignores them.
+    """
+    do_name = store.dissolved_oxygen if use_do is not False else None
+    if use_do and do_name is None:
+        raise ValueError("the field store holds no dissolved oxygen")
+    if do_name is None:
+        groups = [(None, [(s, _f32(sp.temp_low), _f32(sp.temp_high)) for s, sp in enumerate(species)])]
+    else:
+        by_limit: Dict[float, List[Tuple[int, float, float]]] = {}
+        for s, sp in enumerate(species):
+            by_limit.setdefault(_f32(sp.do_min), []).append((s, _f32(sp.temp_low), _f32(sp.temp_high)))
+        groups = list(by_limit.items())
+
+    result = HabitatResult(species=species)
+    scopes = ["all"] + [f"wb{jw}" for jw in range(1, store.nwb + 1)] + [f"br{jb}" for jb in range(1, store.nbr + 1)]
+    for scope in scopes:
+        result.volume[scope] = []
+        result.habitat[scope] = []
+    wb_of = {jb: store.waterbody_of(jb) for jb in range(1, store.nbr + 1)}
+    nsp = len(species)
+    for snap in store:
+        t, vol = snap.fields["T"], snap.fields["VOL"]
+        dox = snap.fields[do_name] if do_name else None
+        rows = {scope: [0.0] * nsp for scope in scopes}
+        totals = dict.fromkeys(scopes, 0.0)
+        for jb, (a, b) in snap.branches.items():
+            hab = [0.0] * nsp
+            total = _branch_habitat(t[a:b], vol[a:b], dox[a:b] if dox is not None else None, groups, hab)
+            for scope in ("all", f"wb{wb_of[jb]}", f"br{jb}"):
+                totals[scope] += total
+                row = rows[scope]
+                for s in range(nsp):
+                    row[s] += hab[s]
+        result.jday.append(snap.jday)
+        for scope in scopes:
+            result.volume[scope].append(totals[scope])
+            result.habitat[scope].append(rows[scope])
+    return result
+
+
+# ---------------------------------------------------------------------------------------------------------------
+# Environmental performance (ENVIRP)
+
+
+@dataclass
+class ClassSpec:
+    top: float
+    interval: float
+
+
+@dataclass
+class EnvirPerfSpec:
+    numclass: int
+    intervals: List[Optional[Tuple[int, int]]]  # segment ranges; None covers every segment
+    window: Optional[Tuple[float, float]] = None  # JDAY1..JDAY2 when selective
+    temperature: Optional[ClassSpec] = None
+    velocity: Optional[ClassSpec] = None
+    depth: Optional[ClassSpec] = None
+    constituents: Dict[str, ClassSpec] = field(default_factory=dict)
+    derived: Dict[str, ClassSpec] = field(default_factory=dict)
+
+
+def _fixed(line: str, start: int, width: int) -> str:
+    return line[start:start + width]
+
+
+def _fixed_float(line: str, start: int, width: int = 8) -> float:
+    text = _fixed(line, start, width).strip()
+    return float(text) if text else 0.0
+
+
+def _fixed_int(line: str, start: int, width: int = 8) -> int:
+    text = _fixed(line, start, width).strip()
+    return int(text) if text else 0
+
+
+def _is_on(line: str, start: int) -> bool:
+    return _fixed(line, start, 3).strip().upper() == "ON"
+
+
+def read_envirprf_npt(path: Path, constituents: Sequence[str], derived: Sequence[str]) -> EnvirPerfSpec:
+    """
+    Criteria from `w2_envirprf.npt`, read with the fixed columns ENVIRP uses. Active constituent lines are matched
+    to `constituents`/`derived` (the model's names, in input order) by position.
+    """
+    lines = Path(path).read_text(encoding="latin-1").splitlines() + [""] * 8
+    line = lines[2]
+    nint = max(_fixed_int(line, 0, 1), 1)
+    numclass = _fixed_int(line, 8)
+    selective = _is_on(line, 21)
+    window = (_fixed_float(line, 24), _fixed_float(line, 32)) if selective else None
+    if selective:
+        intervals: List[Optional[Tuple[int, int]]] = [
+            (_fixed_int(line, 40 + 16 * n), _fixed_int(line, 48 + 16 * n)) for n in range(nint)]
+    else:
+        intervals = [None] * nint
+
+    line = lines[5]
+    spec = EnvirPerfSpec(numclass=numclass, intervals=intervals, window=window)
+    if _is_on(line, 13):
+        spec.velocity = ClassSpec(top=_fixed_float(line, 24), interval=_fixed_float(line, 16))
+    if _is_on(line, 37):
+        spec.temperature = ClassSpec(top=_fixed_float(line, 48), interval=_fixed_float(line, 40))
+    if _is_on(line, 61):
+        spec.depth = ClassSpec(top=_fixed_float(line, 72), interval=_fixed_float(line, 64))
+
+    n = 8
+    for names, target in ((constituents, spec.constituents), (derived, spec.derived)):
+        for j, name in enumerate(names):
+            line = lines[n + j] if n + j < len(lines) else ""
+            if _is_on(line, 13):
+                target[name] = ClassSpec(top=_fixed_float(line, 24), interval=_fixed_float(line, 16))
+        n += len(names) + 2
+    return spec
+
+
+def envirperf_spec_from_dict(data: Dict[str, object], base: Optional[EnvirPerfSpec] = None) -> EnvirPerfSpec:
+    """
+    Criteria given as {"numclass", "intervals", "window", "temperature", "velocity", "depth", "constituents",
+    "derived"}, classes as {"top", "interval"}; keys left out are taken from `base` (e.g. the run's w2_envirprf.npt).
+    """
+    def classes(value) -> Optional[ClassSpec]:
+        return ClassSpec(top=float(value["top"]), interval=float(value["interval"])) if value else None
+
+    spec = EnvirPerfSpec(numclass=base.numclass if base else 20, intervals=list(base.intervals) if base else [None],
+                         window=base.window if base else None)
+    if base:
+        spec.temperature, spec.velocity, spec.depth = base.temperature, base.velocity, base.depth
+        spec.constituents, spec.derived = dict(base.constituents), dict(base.derived)
+    if "numclass" in data:
+        spec.numclass = int(data["numclass"])
+    if "intervals" in data:
+        spec.intervals = [tuple(int(i) for i in r) if r else None for r in data["intervals"]] or [None]
+    if "window" in data:
+        spec.window = tuple(float(d) for d in data["window"]) if data["window"] else None
+    for key in ("temperature", "velocity", "depth"):
+        if key in data:
+            setattr(spec, key, classes(data[key]))
+    for key in ("constituents", "derived"):
+        if key in data:
+            setattr(spec, key, {name: classes(v) for name, v in (data[key] or {}).items() if v})
+    if spec.numclass < 1:
+        raise ValueError("numclass must be at least 1")
+    return spec
+
+
+def class_edges(spec: ClassSpec, numclass: int) -> List[float]:
+    """Class tops TOP, TOP-INT, ... as ENVIRP steps them down in single precision (also the table labels)."""
+    edges = [_f32(spec.top)]
+    step = _f32(spec.interval)
+    for _ in range(1, numclass):
+        edges.append(_f32(edges[-1] - step))
+    return edges
+
+
+def _class_sums(values: Sequence[float], weights: Sequence[float], edges: List[float], out: List[float]) -> None:
+    # Class 1 is value >= TOP, class j covers [edge(j-1), edge(j-2)) and the last class takes everything below.
+    order = sorted(range(len(values)), key=values.__getitem__)
+    vs = [values[j] for j in order]
+    cum = [0.0]
+    cum.extend(accumulate(weights[j] for j in order))
+    below = [cum[bisect_left(vs, e)] for e in edges]
+    n = len(out)
+    out[0] += cum[-1] - below[0]
+    for jj in range(1, n - 1):
+        out[jj] += below[jj - 1] - below[jj]
+    if n > 1:
+        out[n - 1] += below[n - 2]
+
+
+@dataclass
+class ClassTable:
+    labels: List[float]
+    fractions: List[float]
+    average: float
+
+
+@dataclass
+class EnvirPerfResult:
+    spec: EnvirPerfSpec
+    # one dict per segment interval: variable ("T", "U", "depth" or a constituent name) -> table
+    tables: List[Dict[str, ClassTable]] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "numclass": self.spec.numclass,
+            "intervals": [list(r) if r else None for r in self.spec.intervals],
+            "window": list(self.spec.window) if self.spec.window else None,
+            "tables": [{name: t.__dict__ for name, t in tables.items()} for tables in self.tables],
+        }
+
+
+def compute_envirperf(store: FieldStore, spec: EnvirPerfSpec) -> EnvirPerfResult:
+    """Volume-time (depth: time) fraction of each class per segment interval, as ENVIRP accumulates them."""
+    volume_vars: List[Tuple[str, ClassSpec]] = []
+    if spec.temperature:
+        volume_vars.append(("T", spec.temperature))
+    if spec.velocity:
+        volume_vars.append(("U", spec.velocity))
+    for name, cs in list(spec.constituents.items()) + list(spec.derived.items()):
+        if name not in store.fields:
+            raise ValueError(f"{name} is not in {store.path.name}; rerun with W2_FIELD_SNAPSHOT_CONSTITUENTS "
+                             f"(or W2_FIELD_SNAPSHOT_DERIVED) including it")
+        volume_vars.append((name, cs))
+    edges = {name: class_edges(cs, spec.numclass) for name, cs in volume_vars}
+    depth_edges = class_edges(spec.depth, spec.numclass) if spec.depth else []
+
+    nint = len(spec.intervals)
+    classes = [{name: [0.0] * spec.numclass for name, _ in volume_vars} for _ in range(nint)]
+    tot = [dict.fromkeys(edges, 0.0) for _ in range(nint)]
+    cnt = [dict.fromkeys(edges, 0.0) for _ in range(nint)]
+    d_class = [[0.0] * spec.numclass for _ in range(nint)]
+    d_tot = [0.0] * nint
+    d_cnt = [0.0] * nint
+    sumvolt = [0.0] * nint
+
+    last: Optional[float] = None
+    for snap in store:
+        # the first evaluation is weighted by the time step, later ones by the time since the previous one
+        dltt = snap.dlt if last is None else (snap.jday - last) * 86400.0
+        last = snap.jday
+        if spec.window and not (spec.window[0] <= snap.jday <= spec.window[1]):
+            continue
+        vol = snap.fields["VOL"]
+        for n, seg_range in enumerate(spec.intervals):
+            cells: List[int] = []
+            segs: List[int] = []
+            for jb in snap.branches:
+                lo, hi = snap.cus[jb - 1], store.ds[jb - 1]
+                if seg_range is not None:
+                    lo, hi = max(lo, seg_range[0]), min(hi, seg_range[1])
+                for i in range(lo, hi + 1):
+                    s0, s1 = snap.segments[i]
+                    cells.extend(range(s0, s1))
+                    segs.append(i)
+            weights = [vol[c] * dltt for c in cells]
+            wsum = sum(weights)
+            sumvolt[n] += wsum
+            for name, _ in volume_vars:
+                values = snap.fields[name]
+                x = [values[c] for c in cells]
+                _class_sums(x, weights, edges[name], classes[n][name])
+                tot[n][name] += sum(v * w for v, w in zip(x, weights))
+                cnt[n][name] += wsum
+            if spec.depth:
+                depths = [snap.depth[i - 1] for i in segs]
+                _class_sums(depths, [dltt] * len(depths), depth_edges, d_class[n])
+                d_tot[n] += sum(depths) * dltt
+                d_cnt[n] += dltt * len(depths)
+
+    result = EnvirPerfResult(spec=spec)
+    for n in range(nint):
+        tables: Dict[str, ClassTable] = {}
+        for name, _ in volume_vars:
+            frac = [c / sumvolt[n] if sumvolt[n] > 0.0 else 0.0 for c in classes[n][name]]
+            avg = tot[n][name] / cnt[n][name] if cnt[n][name] > 0.0 else 0.0
+            tables[name] = ClassTable(edges[name], frac, avg)
+        if spec.depth:
+            frac = [c / d_cnt[n] if d_cnt[n] > 0.0 else 0.0 for c in d_class[n]]
+            tables["depth"] = ClassTable(depth_edges, frac, d_tot[n] / d_cnt[n] if d_cnt[n] > 0.0 else 0.0)
+        result.tables.append(tables)
+    return result
+
+
+# ---------------------------------------------------------------------------------------------------------------
+# Tables in the layout of the model's output files
+
+
+def fortran_e(x: float, width: int = 12, digits: int = 4) -> str:
+    """Fortran Ew.d: 0.dddd mantissa, e.g. 0.2003E+09."""
+    if x != x:
+        return "NaN".rjust(width)
+    if x == 0.0:
+        return f"0.{'0' * digits}E+00".rjust(width)
+    mant, exp = f"{abs(x):.{digits - 1}e}".split("e")
+    text = f"{'-' if x < 0 else ''}0.{mant.replace('.', '')}E{int(exp) + 1:+03d}"
+    return text.rjust(width)
+
+
+def _habitat_lines(result: HabitatResult, scope: str, label: str) -> List[str]:
+    lines = [" Fish habitat analysis: CE-QUAL-W2 model results", label,
+             " Species, Temperature minimum, Temperature maximum, Dissolved oxygen minimum"]
+    for sp in result.species:
+        lines.append(f"{sp.name + ',':<24}{sp.temp_low:8.2f},{sp.temp_high:8.2f},{sp.do_min:8.2f}")
+    lines.append(" ")
+    lines.append("JDAY," + "".join(f"%VOL-{sp.name},HAB-VOL(m3)-{sp.name}," for sp in result.species))
+    for jday, pct, hab in zip(result.jday, result.percent(scope), result.habitat[scope]):
+        lines.append(f"{jday:10.3f}," + "".join(f"{p:8.2f},{fortran_e(h)}," for p, h in zip(pct, hab)))
+    return lines
+
+
+def write_habitat(result: HabitatResult, out_dir: Path, output: str = "habitat.csv") -> List[Path]:
+    """Write `<output>`, `fish_habitat_wb<N>.opt` and `fish_habitat_br<N>.opt` as FISHHABITAT does."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    files = [(out_dir / output, "all", " ")]
+    for scope in result.volume:
+        if scope.startswith("wb"):
+            files.append((out_dir / f"fish_habitat_{scope}.opt", scope, f" FOR WATERBODY:{int(scope[2:]):12d}"))
+        elif scope.startswith("br"):
+            files.append((out_dir / f"fish_habitat_{scope}.opt", scope, f" FOR BRANCH:{int(scope[2:]):12d}"))
+    for path, scope, label in files:
+        path.write_text("\n".join(_habitat_lines(result, scope, label)) + "\n", encoding="latin-1")
+    return [p for p, _, _ in files]
+
+
+def write_envirperf(result: EnvirPerfResult, out_dir: Path) -> List[Path]:
+    """Write the `envrprf_*` tables ENVIRP writes at the end of a run."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written: List[Path] = []
+    spec = result.spec
+    single = (("T", "envrprf_t_{}.csv", "Temperature interval,", "Fraction of volume"),
+              ("U", "envrprf_v{}.csv", "Velocity interval,", "Fraction of volume"),
+              ("depth", "envrprf_depth{}.csv", "Depth interval,", "Fraction of time"))
+    for n, tables in enumerate(result.tables, start=1):
+        for key, pattern, head, unit in single:
+            if key not in tables:
+                continue
+            t = tables[key]
+            lines = [f' "{head}","{unit}"']
+            lines += [f"{label:6.2f},{fortran_e(frac)}," for label, frac in zip(t.labels, t.fractions)]
+            lines += ["", f" Sum of fractions, {fortran_e(sum(t.fractions))}", "", f" Average, {fortran_e(t.average)}"]
+            path = out_dir / pattern.format(n)
+            path.write_text("\n".join(lines) + "\n", encoding="latin-1")
+            written.append(path)
+        for names, pattern, sep in ((list(spec.constituents), "envrprf_c{}.csv", ", "),
+                                    (list(spec.derived), "envrprf_cd{}.csv", ",")):
+            if not names:
+                continue
+            cols = [tables[name] for name in names]
+            lines = ["".join(f"{name:>8}_interval, Fraction_of_volume{sep}" for name in names)]
+            for i in range(spec.numclass):
+                lines.append("".join(f"{t.labels[i]:10.4f},{fortran_e(t.fractions[i])}," for t in cols))
+            lines += ["", "".join(f" 0, {fortran_e(sum(t.fractions))}," for t in cols),
+                      "", "".join(f" 0, {fortran_e(t.average)}," for t in cols)]
+            path = out_dir / pattern.format(n)
+            path.write_text("\n".join(lines) + "\n", encoding="latin-1")
+            written.append(path)
+    return written
+
+
+def parse_species(text: str) -> Species:
+    """`NAME,TEMP-low,TEMP-high,DO-min` (the w2_habitat.npt species line)."""
+    t = _list_tokens(text)
+    if len(t) != 4:
+        raise ValueError(f"expected NAME,TEMP-low,TEMP-high,DO-min: {text!r}")
+    return Species(t[0], float(t[1]), float(t[2]), float(t[3]))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Recompute fish habitat and environmental performance tables from a run's field snapshots "
+                    "(written with W2_FIELD_SNAPSHOT=on)."
+    )
+    parser.add_argument("run_dir", type=Path)
+    parser.add_argument("--store", type=Path, help=f"field snapshot file (default <run_dir>/{W2F_NAME})")
+    parser.add_argument("--habitat", type=Path, help=f"species criteria (default <run_dir>/{HABITAT_NPT})")
+    parser.add_argument("--species", action="append", default=[], metavar="NAME,TL,TH,DO",
+                        help="species criteria replacing the habitat file (repeatable)")
+    parser.add_argument("--envirprf", type=Path, help=f"class criteria (default <run_dir>/{ENVIRPRF_NPT})")
+    parser.add_argument("--no-do", action="store_true", help="ignore the DO limits of the species")
+    parser.add_argument("--out", type=Path, help="output directory (default <run_dir>/posthoc)")
+    args = parser.parse_args(argv)
+
+    store_path = args.store or args.run_dir / W2F_NAME
+    if not store_path.is_file():
+        parser.error(f"no field snapshots: {store_path} (run the model with W2_FIELD_SNAPSHOT=on)")
+    store = FieldStore(store_path)
+    out_dir = args.out or args.run_dir / "posthoc"
+
+    habitat_path = args.habitat or args.run_dir / HABITAT_NPT
+    output = "habitat.csv"
+    species = [parse_species(s) for s in args.species]
+    if not species and habitat_path.is_file():
+        species, output = read_habitat_npt(habitat_path)
+    if species:
+        result = compute_habitat(store, species, use_do=False if args.no_do else None)
+        for path in write_habitat(result, out_dir, output):
+            print(f"wrote {path}")
+
+    envirprf_path = args.envirprf or args.run_dir / ENVIRPRF_NPT
+    if envirprf_path.is_file():
+        spec = read_envirprf_npt(envirprf_path, store.constituents, store.derived)
+        try:
+            perf = compute_envirperf(store, spec)
+        except ValueError as e:
+            print(f"environmental performance skipped: {e}", file=sys.stderr)
+        else:
+            for path in write_envirperf(perf, out_dir):
+                print(f"wrote {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
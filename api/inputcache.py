@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import math
+import re
+import struct
+import sys
+import zlib
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+
+# Sidecar layout read by input_cache_cli.f90 (W2_INPUT_CACHE=on):
+#   b"W2INC001" | int64 source size | uint32 crc32 | int32 format | int32 nrows | int32 ncols
+#   | 32-byte sha256 of the source | nrows x ncols float64, row by row
+# Rows are the data records of the source from line 4 on, decoded the way TIME_VARYING_DATA reads them.
+W2C_MAGIC = b"W2INC001"
+W2C_SUFFIX = ".w2c"
+FMT_FIXED = 0  # '(2F8.0)'-style 8-column fields
+FMT_CSV = 1  # first line starts with '$'; list-directed reads
+HEADER_LINES = 3
+FIELD_WIDTH = 8
+
+_HEADER = struct.Struct("<8sqIiii32s")
+_CSV_SPLIT = re.compile(r"\s*,\s*|\s+")
+_SKIP_NAMES = {"w2_con.npt", "graph.npt"}
+_SKIP_PREFIXES = ("bth",)
+
+NaN = float("nan")
+
+
+@dataclass
+class CacheInfo:
+    source: Path
+    sidecar: Path
+    fmt: int
+    nrows: int
+    ncols: int
+    rebuilt: bool
+
+
+def _number(token: str) -> float:
+    return float(token.replace("D", "E").replace("d", "e"))
+
+
+def parse_fixed_line(line: str) -> List[float]:
+    """Decode a line as F8.0 fields: blanks are ignored and an empty field reads as zero."""
+    values: List[float] = []
+    for start in range(0, len(line), FIELD_WIDTH):
+        field = line[start:start + FIELD_WIDTH].replace(" ", "").replace("\t", "")
+        if not field:
+            values.append(0.0)
+            continue
+        try:
+            values.append(_number(field))
+        except ValueError:
+            values.append(NaN)
+            break
+    return values
+
+
+def parse_csv_line(line: str) -> Optional[List[float]]:
+    """
+    Decode a line as a list-directed record. Returns None for a blank line (skipped by the reader).
+    Values that a list-directed READ would leave unchanged (null values, '/', text) end the record.
+    """
+    text = line.strip()
+    if not text:
+        return None
+    if text.endswith(","):
+        text = text[:-1]
+    values: List[float] = []
+    for token in _CSV_SPLIT.split(text):
+        if not token or token.startswith("/"):
+            break
+        repeat = 1
+        if "*" in token:
+            count, _, token = token.partition("*")
+            if not count.isdigit() or not token:
+                break
+            repeat = int(count)
+        try:
+            value = _number(token)
+        except ValueError:
+            break
+        values.extend([value] * repeat)
+    return values
+
+
+def decode_records(text: str) -> Tuple[int, List[List[float]]]:
+    lines = text.splitlines()
+    fmt = FMT_CSV if lines and lines[0][:1] == "$" else FMT_FIXED
+    rows: List[List[float]] = []
+    for line in lines[HEADER_LINES:]:
+        if fmt == FMT_CSV:
+            values = parse_csv_line(line)
+            if values is None:
+                continue
+        else:
+            values = parse_fixed_line(line)
+        rows.append(values)
+    return fmt, rows
+
+
+def looks_like_time_series(rows: List[List[float]]) -> bool:
+    return bool(rows) and len(rows[0]) >= 2 and all(math.isfinite(v) for v in rows[0][:2])
+
+
+def sidecar_path(source: Path) -> Path:
+    return source.with_name(source.name + W2C_SUFFIX)
+
+
+def read_sidecar_header(sidecar: Path) -> Optional[Tuple[int, int, int, int, int, bytes]]:
+    try:
+        with open(sidecar, "rb") as f:
+            raw = f.read(_HEADER.size)
+    except OSError:
+        return None
+    if len(raw) != _HEADER.size:
+        return None
+    magic, size, crc, fmt, nrows, ncols, sha = _HEADER.unpack(raw)
+    if magic != W2C_MAGIC:
+        return None
+    return size, crc, fmt, nrows, ncols, sha
+
+
+def sidecar_is_current(source: Path) -> bool:
+    """True if the sidecar of `source` exists and was built from its current contents."""
+    header = read_sidecar_header(sidecar_path(source))
+    if header is None:
+        return False
+    data = source.read_bytes()
+    size, crc, _, _, _, sha = header
+    return size == len(data) and crc == zlib.crc32(data) and sha == hashlib.sha256(data).digest()
+
+
+def build_sidecar(source: Path, force: bool = False) -> Optional[CacheInfo]:
+    """Write `<source>.w2c`; returns None if the file does not hold a time series."""
+    sidecar = sidecar_path(source)
+    if not force and sidecar_is_current(source):
+        _, _, fmt, nrows, ncols, _ = read_sidecar_header(sidecar)
+        return CacheInfo(source, sidecar, fmt, nrows, ncols, rebuilt=False)
+
+    data = source.read_bytes()
+    fmt, rows = decode_records(data.decode("latin-1"))
+    if not looks_like_time_series(rows):
+        return None
+    ncols = max(len(r) for r in rows)
+    fill = 0.0 if fmt == FMT_FIXED else NaN
+    values = array("d")
+    for r in rows:
+        values.extend(r)
+        values.extend([fill] * (ncols - len(r)))
+    if sys.byteorder != "little":
+        values.byteswap()
+
+    header = _HEADER.pack(W2C_MAGIC, len(data), zlib.crc32(data), fmt, len(rows), ncols,
+                          hashlib.sha256(data).digest())
+    tmp = sidecar.with_name(sidecar.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(header)
+        values.tofile(f)
+    tmp.replace(sidecar)
+    return CacheInfo(source, sidecar, fmt, len(rows), ncols, rebuilt=True)
+
+
+def candidate_inputs(input_dir: Path) -> Iterable[Path]:
+    for p in sorted(input_dir.rglob("*")):
+        if not p.is_file() or p.suffix.lower() not in (".npt", ".csv"):
+            continue
+        name = p.name.lower()
+        if name in _SKIP_NAMES or name.startswith(_SKIP_PREFIXES):
+            continue
+        yield p
+
+
+def convert_inputs(input_dir: Path, force: bool = False) -> List[CacheInfo]:
+    """Build (or refresh) the sidecars of every time-series input under `input_dir`."""
+    built: List[CacheInfo] = []
+    for p in candidate_inputs(input_dir):
+        info = build_sidecar(p, force=force)
+        if info is not None:
+            built.append(info)
+    return built
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Pre-convert W2 time-varying inputs to binary sidecars (read with W2_INPUT_CACHE=on)."
+    )
+    parser.add_argument("input_dir", type=Path)
+    parser.add_argument("--force", action="store_true", help="rebuild sidecars even if they are current")
+    args = parser.parse_args(argv)
+    if not args.input_dir.is_dir():
+        parser.error(f"not a directory: {args.input_dir}")
+    for info in convert_inputs(args.input_dir, force=args.force):
+        state = "built" if info.rebuilt else "current"
+        print(f"{state:8s} {info.sidecar}  rows={info.nrows} cols={info.ncols}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
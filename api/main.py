@@ -1,33 +1,55 @@
 from __future__ import annotations
 
 import os
+import re
+from array import array
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 import tempfile
 import shutil
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Query
-from fastapi.responses import FileResponse, PlainTextResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query, Body, Request
+from fastapi.responses import FileResponse, PlainTextResponse, JSONResponse, Response, StreamingResponse
 
+from .artifacts import read_stored
+from .binout import W2B_SUFFIX, read_series
+from . import columnar, export, fieldchunks, habitat
 from .manager import RunManager
+from .models import progress_timestamp
+from .resources import metrics_text
 
 
 repo_root = Path(__file__).resolve().parents[1]
 manager = RunManager(repo_root)
 
 app = FastAPI(title="W2 Runner API", version="0.1.0")
+ENCODING_PATTERN = "^(" + "|".join(columnar.ENCODINGS) + ")$"
 
 
 @app.post("/runs")
-def create_run(input_dir: str, name: Optional[str] = None) -> Dict[str, Any]:
+def create_run(input_dir: str, name: Optional[str] = None,
+               abort: Optional[List[str]] = Query(None), priority: int = 0,
+               outputs: Optional[str] = None, dlt: Optional[str] = None, cpu: Optional[float] = None,
+               memory: Optional[str] = None, io_weight: Optional[int] = None,
+               max_file: Optional[str] = None, binary: Optional[str] = None) -> Dict[str, Any]:
     """
     Create a new run from an existing input directory on the server.
+    `abort` (repeatable) sets early-abort rules, e.g. `dt < 1 for 10000 steps`; the server defaults
+    (W2_ABORT_RULES) apply otherwise. A run of higher `priority` starts before queued runs of lower
+    priority and, when all slots are busy, preempts the lowest-priority running run. `outputs` trims what the
+    model writes: a profile (`full`, `calibration`, `minimal`) or the output groups to keep, e.g. `tsr,wdo`.
+    `dlt` applies the time-step setting tuned by /autotune: `auto` (the family of the case's grid) or a family.
+    `cpu` (cores), `memory`, `io_weight` and `max_file` (sizes as e.g. `4G`) replace the server's resource limits.
+    `binary` names a registered model executable (GET /binaries), or `auto` for the fastest one recorded on
+    grids of this size; the default is w2_exe_linux.
     """
     p = Path(input_dir).expanduser().resolve()
+    limits = {"cpu": cpu, "memory": memory, "io_weight": io_weight, "max_file": max_file}
     try:
-        run = manager.create_run(p, name=name)
-    except FileNotFoundError as e:
+        run = manager.create_run(p, name=name, abort_rules=abort, priority=priority, outputs=outputs, dlt=dlt,
+                                 limits=limits, binary=binary)
+    except (FileNotFoundError, ValueError) as e:
         raise HTTPException(status_code=400, detail=str(e))
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -119,6 +141,20 @@ def get_run(run_id: str) -> Dict[str, Any]:
         "stdout_log": str(run.stdout_log),
         "error_log": str(run.error_log),
         "progress_log": str(run.progress_log),
+        "batch_id": run.batch_id,
+        "priority": run.priority,
+        "abort_rules": run.abort_rules,
+        "abort_reason": run.abort_reason,
+        "output_profile": run.meta.get("output_profile"),
+        "dlt_family": run.meta.get("dlt_family"),
+        "worker": run.meta.get("worker"),
+        "requeued": run.meta.get("requeued", 0),
+        "error": run.meta.get("error"),
+        "resources": manager.resources(run),
+        "binary": {k: v for k, v in (run.meta.get("binary") or {}).items() if k != "path"},
+        "result_key": run.meta.get("result_key"),
+        "evicted_at": run.meta.get("evicted_at"),
+        "eta": manager.estimate(run).as_dict(),
         "last_progress": {
             "day": lp.day,
             "hour": lp.hour,
@@ -149,33 +185,60 @@ def list_runs() -> Dict[str, Any]:
             "started_at": r.started_at,
             "finished_at": r.finished_at,
             "returncode": r.returncode,
+            "batch_id": r.batch_id,
+            "abort_reason": r.abort_reason,
         })
     items.sort(key=lambda x: (x["created_at"] or datetime.min), reverse=True)
     return {"count": len(items), "items": items}
 
 
+def _encoding(encoding: Optional[str], request: Request) -> str:
+    try:
+        return columnar.negotiate(encoding, request.headers.get("accept"))
+    except ValueError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+
+def _encoded(fmt: str, meta: Dict[str, Any], columns: Dict[str, Any]) -> Response:
+    return Response(content=columnar.encode(fmt, meta, columns), media_type=columnar.ENCODINGS[fmt],
+                    headers={"Vary": "Accept"})
+
+
 @app.get("/runs/{run_id}/progress")
-def get_progress(run_id: str, limit: int = Query(200, ge=1, le=5000)) -> Dict[str, Any]:
+def get_progress(run_id: str, request: Request, limit: int = Query(200, ge=1, le=100000),
+                 format: str = Query("items", pattern="^(items|columns)$"),
+                 encoding: Optional[str] = Query(None, pattern=ENCODING_PATTERN)):
+    """
+    The last `limit` progress points. `format=columns` returns one list per field (timestamps as seconds
+    since the epoch), which is much cheaper for long histories than one object per point.
+    Older points may be thinned on long runs (see `thinned`).
+    `encoding` (or the Accept header) selects json, msgpack, arrow or raw (see api/columnar.py); the binary
+    encodings are always columns.
+    """
     run = manager.get(run_id)
     if not run:
         raise HTTPException(status_code=404, detail="run not found")
-    pts = run._progress_points[-limit:]
-    return {
-        "count": len(pts),
-        "items": [
-            {
-                "day": p.day,
-                "hour": p.hour,
-                "percent": p.percent,
-                "step": p.step,
-                "dt": p.dt,
-                "viol_percent": p.viol_percent,
-                "elapsed_days": p.elapsed_days,
-                "timestamp": p.timestamp,
-            }
-            for p in pts
-        ],
-    }
+    fmt = _encoding(encoding, request)
+    if format == "columns" or fmt != "json":
+        cols = run.progress.tail(limit)
+        count = sum(len(seg) for seg in cols["step"])
+        return _encoded(fmt, {"count": count, "thinned": run.progress.thinned}, cols)
+    items = [
+        {
+            "day": day,
+            "hour": hour,
+            "percent": percent,
+            "step": step,
+            "dt": dt,
+            "viol_percent": viol,
+            "elapsed_days": elapsed,
+            "timestamp": progress_timestamp(ts),
+        }
+        for day, hour, percent, step, dt, viol, elapsed, ts in run.progress.rows(limit)
+    ]
+    return Response(content=columnar.encode_json({"count": len(items), "thinned": run.progress.thinned,
+                                                  "items": items}),
+                    media_type="application/json", headers={"Vary": "Accept"})
 
 
 @app.get("/runs/{run_id}/logs/stdout", response_class=PlainTextResponse)
@@ -203,30 +266,34 @@ def get_error(run_id: str):
 
 
 @app.get("/runs/{run_id}/artifacts")
-def list_artifacts(run_id: str, prefix: Optional[str] = None) -> Dict[str, Any]:
+def list_artifacts(request: Request, run_id: str, prefix: Optional[str] = None, glob: Optional[str] = None,
+                   kind: Optional[str] = Query(None, pattern="^(inputs|outputs|logs)$"),
+                   cursor: Optional[str] = None, limit: int = Query(1000, ge=1, le=100000)):
+    """
+    Page through the run's files in path order. `glob` is an fnmatch pattern over the relative path,
+    `kind` one of inputs, outputs or logs; pass the returned `next_cursor` as `cursor` for the next page.
+    Responses carry an ETag that changes with the files, so pollers can send If-None-Match.
+    """
     run = manager.get(run_id)
     if not run:
         raise HTTPException(status_code=404, detail="run not found")
-    base = run.artifacts_root
-    items = []
-    for p in base.rglob("*"):
-        if not p.is_file():
-            continue
-        rel = p.relative_to(base).as_posix()
-        if prefix and not rel.startswith(prefix):
-            continue
-        st = p.stat()
-        items.append({
-            "path": rel,
-            "size": st.st_size,
-            "mtime": datetime.fromtimestamp(st.st_mtime).isoformat(),
-        })
-    items.sort(key=lambda x: x["path"]) 
-    return {"count": len(items), "items": items}
+    manifest = manager.manifest(run)
+    etag = manifest.etag(prefix, glob, kind, cursor, limit)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    items, next_cursor = manifest.select(prefix=prefix, glob=glob, kind=kind, cursor=cursor, limit=limit)
+    return JSONResponse(
+        {"count": len(items), "items": [e.as_dict() for e in items], "next_cursor": next_cursor},
+        headers={"ETag": etag},
+    )
 
 
 @app.get("/runs/{run_id}/artifacts/{path:path}")
-def get_artifact(run_id: str, path: str):
+def get_artifact(request: Request, run_id: str, path: str):
+    """
+    Download one artifact; the ETag and X-Checksum-SHA256 headers carry its sha256. Artifacts compressed by
+    retention are decompressed on the fly, including for single byte ranges.
+    """
     run = manager.get(run_id)
     if not run:
         raise HTTPException(status_code=404, detail="run not found")
@@ -235,9 +302,273 @@ def get_artifact(run_id: str, path: str):
     # Prevent path traversal
     if not str(candidate).startswith(str(base.resolve())):
         raise HTTPException(status_code=400, detail="invalid path")
-    if not candidate.exists() or not candidate.is_file():
+    manifest = manager.manifest(run)
+    rel = candidate.relative_to(base.resolve()).as_posix()
+    entry = manifest.entries.get(rel)
+    stored = entry is not None and entry.stored is not None
+    if not stored and (not candidate.exists() or not candidate.is_file()):
+        raise HTTPException(status_code=404, detail="file not found")
+    sha = manifest.checksum(rel)
+    headers = {"ETag": f'"{sha}"', "X-Checksum-SHA256": sha} if sha else {}
+    if sha and request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    if not stored:
+        return FileResponse(path=str(candidate), headers=headers)
+
+    size = entry.size
+    start, stop, status = 0, size, 200
+    rng = request.headers.get("range")
+    if rng:
+        m = re.fullmatch(r"bytes=(\d*)-(\d*)", rng.strip())
+        if not m or (not m.group(1) and not m.group(2)):
+            raise HTTPException(status_code=416, detail="only single byte ranges are supported")
+        if m.group(1):
+            start = int(m.group(1))
+            stop = min(int(m.group(2)) + 1, size) if m.group(2) else size
+        else:
+            start = max(size - int(m.group(2)), 0)
+        if start >= stop:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+        status = 206
+        headers["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+    headers.update({"Accept-Ranges": "bytes", "Content-Length": str(stop - start),
+                    "Content-Disposition": f'attachment; filename="{candidate.name}"'})
+    return StreamingResponse(read_stored(base / entry.stored, entry.blocks, start, stop), status_code=status,
+                             media_type="application/octet-stream", headers=headers)
+
+
+@app.get("/runs/{run_id}/export")
+def export_run(run_id: str, include: Optional[List[str]] = Query(None),
+               kind: Optional[str] = Query(None, pattern="^(inputs|outputs|logs)$"), format: str = "zip",
+               have_inputs: Optional[str] = None):
+    """
+    Stream the run's artifacts as one archive (zip, tar, tar.gz or tar.zst), built on the fly.
+    `include` (repeatable) keeps files matching any of the globs. Inputs are left out when `have_inputs`
+    equals the run's input digest (sent in the X-Input-Digest header). Exports of finished runs are cached,
+    so repeat downloads support HTTP ranges.
+    """
+    run = manager.get(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="run not found")
+    try:
+        export.check_format(format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    manifest = manager.manifest(run)
+    skip_inputs = bool(have_inputs) and have_inputs == run.input_digest
+    filename = f"{run.name or run.run_id}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if run.input_digest:
+        headers["X-Input-Digest"] = run.input_digest
+    cache = None
+    if manifest.final:
+        key = export.cache_key(manifest.generation, sorted(include or []), kind, skip_inputs)
+        cache = run.artifacts_root / export.EXPORTS_DIR / f"{key}.{format}"
+        headers["ETag"] = f'"{key}"'
+        if cache.is_file():
+            return FileResponse(path=str(cache), media_type=export.EXPORT_FORMATS[format], headers=headers)
+    items = export.select_items(manifest, include or (), kind=kind, skip_inputs=skip_inputs)
+    return StreamingResponse(export.stream_archive(items, format, cache=cache),
+                             media_type=export.EXPORT_FORMATS[format], headers=headers)
+
+
+@app.get("/batches/{batch_id}/export")
+def export_batch(batch_id: str, include: Optional[List[str]] = Query(None),
+                 kind: Optional[str] = Query(None, pattern="^(inputs|outputs|logs)$"), format: str = "zip",
+                 have_inputs: Optional[List[str]] = Query(None)):
+    """
+    Stream the artifacts of every member as one archive, each under `<run_id>/`. Inputs are carried once per
+    input digest (by the first member that has it) and not at all for digests listed in `have_inputs`.
+    """
+    batch = manager.get_batch(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="batch not found")
+    try:
+        export.check_format(format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    seen = set(have_inputs or [])
+    items = []
+    for rid in batch.run_ids:
+        run = manager.get(rid)
+        if not run:
+            continue
+        skip_inputs = bool(run.input_digest) and run.input_digest in seen
+        if run.input_digest:
+            seen.add(run.input_digest)
+        items += export.select_items(manager.manifest(run), include or (), kind=kind, skip_inputs=skip_inputs,
+                                     prefix=f"{rid}/")
+    filename = f"{batch.name or batch.batch_id}.{format}"
+    return StreamingResponse(export.stream_archive(items, format), media_type=export.EXPORT_FORMATS[format],
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+@app.get("/runs/{run_id}/series/{path:path}")
+def get_series(run_id: str, path: str, request: Request, columns: Optional[str] = None,
+               encoding: Optional[str] = Query(None, pattern=ENCODING_PATTERN)):
+    """
+    Decode a binary time-series output (`*.w2b`, written with W2_OUTPUT_FORMAT=binary).
+    `columns` is an optional comma-separated subset of column names. `encoding` (or the Accept header) selects
+    json, msgpack, arrow or raw; the binary encodings carry the data as "columns" {name: values}.
+    """
+    run = manager.get(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="run not found")
+    base = run.artifacts_root
+    candidate = (base / path).resolve()
+    if not str(candidate).startswith(str(base.resolve())):
+        raise HTTPException(status_code=400, detail="invalid path")
+    fmt = _encoding(encoding, request)
+    if candidate.suffix != W2B_SUFFIX:
+        candidate = candidate.with_name(candidate.name + W2B_SUFFIX)
+    if not candidate.is_file():
         raise HTTPException(status_code=404, detail="file not found")
-    return FileResponse(path=str(candidate))
+    try:
+        series = read_series(candidate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    wanted = [c.strip() for c in columns.split(",")] if columns else None
+    if wanted:
+        missing = [c for c in wanted if c not in series.columns]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"unknown columns: {', '.join(missing)}")
+    names = wanted or series.columns
+    meta = {
+        "path": candidate.relative_to(base.resolve()).as_posix(),
+        "title": series.title,
+        "units": [series.units[series.columns.index(c)] for c in names],
+        "rows": series.nrows,
+    }
+    if fmt != "json":
+        return _encoded(fmt, meta, {c: [series.values[series.columns.index(c)::series.ncols]] for c in names})
+    return Response(content=columnar.encode_json(dict(meta, columns=names, data=series.as_dict(wanted))),
+                    media_type="application/json", headers={"Vary": "Accept"})
+
+
+@app.post("/runs/{run_id}/habitat")
+def recompute_habitat(run_id: str, criteria: Optional[Dict[str, Any]] = Body(None)) -> Dict[str, Any]:
+    """
+    Recompute fish habitat and environmental performance from the run's field snapshots (`fields.w2f`,
+    written with W2_FIELD_SNAPSHOT=on) for new criteria, without rerunning the model.
+    Body (all optional): `species` [{name, temp_low, temp_high, do_min}], `use_do`, and `envirprf`
+    {numclass, intervals, window, temperature, velocity, depth, constituents, derived}.
+    Criteria left out come from the run's w2_habitat.npt / w2_envirprf.npt.
+    """
+    run = manager.get(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="run not found")
+    criteria = criteria or {}
+    store_path = run.workdir / habitat.W2F_NAME
+    if not store_path.is_file():
+        raise HTTPException(status_code=404, detail=f"{habitat.W2F_NAME} not found (run with W2_FIELD_SNAPSHOT=on)")
+    try:
+        store = habitat.FieldStore(store_path)
+        if criteria.get("species"):
+            species = [habitat.Species(str(s["name"]), float(s["temp_low"]), float(s["temp_high"]),
+                                       float(s.get("do_min", 0.0))) for s in criteria["species"]]
+        elif (run.workdir / habitat.HABITAT_NPT).is_file():
+            species, _ = habitat.read_habitat_npt(run.workdir / habitat.HABITAT_NPT)
+        else:
+            species = []
+        result: Dict[str, Any] = {"run_id": run_id, "habitat": None, "envirperf": None}
+        if species:
+            result["habitat"] = habitat.compute_habitat(store, species, use_do=criteria.get("use_do")).as_dict()
+
+        base = None
+        if (run.workdir / habitat.ENVIRPRF_NPT).is_file():
+            base = habitat.read_envirprf_npt(run.workdir / habitat.ENVIRPRF_NPT, store.constituents, store.derived)
+        if base or criteria.get("envirprf"):
+            spec = habitat.envirperf_spec_from_dict(criteria.get("envirprf") or {}, base)
+            result["envirperf"] = habitat.compute_envirperf(store, spec).as_dict()
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return result
+
+
+@app.get("/runs/{run_id}/field")
+def get_field(run_id: str, request: Request, name: str = "T", segment: Optional[str] = None,
+              layer: Optional[str] = None, start: Optional[float] = None, end: Optional[float] = None,
+              encoding: Optional[str] = Query(None, pattern=ENCODING_PATTERN)):
+    """
+    A field of the run's snapshots (`fields.w2f`, written with W2_FIELD_SNAPSHOT=on) over a JDAY window
+    `start`..`end`, read from the run's chunked field store (built at the end of the run, or brought up to date
+    here while it runs). `segment` and `layer` take a number or a range `a-b` in model numbering and default to
+    all: both give a time series at a point, `segment` alone vertical sections, `layer` alone longitudinal ones.
+    `values` run time, layer, segment (sizes in `shape`); dry and inactive cells are NaN (null in JSON).
+    `encoding` (or the Accept header) selects json, msgpack, arrow or raw.
+    """
+    run = manager.get(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="run not found")
+    fmt = _encoding(encoding, request)
+    try:
+        store = fieldchunks.update_fields(run.workdir)
+        if store is None:
+            raise HTTPException(status_code=404,
+                                detail=f"{habitat.W2F_NAME} not found (run with W2_FIELD_SNAPSHOT=on)")
+        if name not in store.fields:
+            raise ValueError(f"unknown field {name!r}; the run has: {', '.join(store.fields)}")
+        layers = fieldchunks.parse_span(layer, store.kmx, "layer")
+        segments = fieldchunks.parse_span(segment, store.imx, "segment")
+        times = store.time_span(start, end)
+        values, chunks = store.read(name, times, layers, segments)
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    meta = {
+        "field": name,
+        "shape": [times[1] - times[0], layers[1] - layers[0], segments[1] - segments[0]],
+        "layers": [layers[0] + 1, layers[1]],
+        "segments": [segments[0] + 1, segments[1]],
+        "chunks_read": chunks,
+    }
+    return _encoded(fmt, meta, {"jday": [array("d", store.times[times[0]:times[1]])], "values": [values]})
+
+
+@app.get("/runs/{run_id}/skill")
+def get_run_skill(run_id: str, obs: str) -> Dict[str, Any]:
+    """
+    RMSE, MAE, bias, NSE and KGE of the run against observation set `obs`, per series and pooled, at the
+    observed times (and depths). A live run is scored on the output written so far; `coverage` is the
+    fraction of observations matched.
+    """
+    run = manager.get(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="run not found")
+    try:
+        skill = manager.skill(run, obs)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="observation set not found")
+    return {"run_id": run_id, "status": run.status, **skill}
+
+
+@app.post("/runs/{run_id}/pause")
+def pause_run(run_id: str, mode: str = Query("checkpoint", pattern="^(checkpoint|suspend)$")) -> Dict[str, Any]:
+    """
+    `checkpoint` stops the model at the end of its time step with its full state in rso.opt (status
+    "pausing", then "paused") and frees the slot; `suspend` stops the process in place (SIGSTOP), for short
+    pauses. A queued run is held back.
+    """
+    try:
+        ok = manager.pause(run_id, mode)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not ok:
+        raise HTTPException(status_code=404, detail="run not found")
+    run = manager.get(run_id)
+    return {"run_id": run_id, "status": run.status}
+
+
+@app.post("/runs/{run_id}/resume")
+def resume_run(run_id: str) -> Dict[str, Any]:
+    """Continue a paused run when a slot is free (from rso.opt after a checkpoint)."""
+    try:
+        ok = manager.resume(run_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not ok:
+        raise HTTPException(status_code=404, detail="run not found")
+    run = manager.get(run_id)
+    return {"run_id": run_id, "status": run.status}
 
 
 @app.post("/runs/{run_id}/cancel")
@@ -249,6 +580,254 @@ def cancel_run(run_id: str) -> Dict[str, Any]:
     return {"run_id": run_id, "status": run.status}
 
 
+@app.post("/batches")
+def create_batch(spec: Dict[str, Any] = Body(...)) -> Dict[str, Any]:
+    """
+    Create one run per member. Body: `name`, `abort` and `outputs` (rules and output profile applied to
+    members without their own), `priority`, `dlt`, `binary` and `limits` {cpu, memory, io_weight, max_file} (of
+    every member; see POST /runs) and `members`
+    [{input_dir, name, abort, outputs}]. Members beyond W2_MAX_PARALLEL_RUNS wait as "queued".
+    """
+    try:
+        members = [(Path(str(m["input_dir"])).expanduser().resolve(), m.get("name"), m.get("abort"),
+                    m.get("outputs")) for m in spec["members"]]
+        batch = manager.create_batch(members, name=spec.get("name"), abort_rules=spec.get("abort"),
+                                     priority=int(spec.get("priority", 0)), outputs=spec.get("outputs"),
+                                     dlt=spec.get("dlt"), limits=spec.get("limits"), binary=spec.get("binary"))
+    except (KeyError, TypeError, FileNotFoundError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return get_batch(batch.batch_id)
+
+
+@app.get("/batches/{batch_id}")
+def get_batch(batch_id: str) -> Dict[str, Any]:
+    batch = manager.get_batch(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="batch not found")
+    runs = [r for r in (manager.get(rid) for rid in batch.run_ids) if r]
+    counts: Dict[str, int] = {}
+    for r in runs:
+        counts[r.status] = counts.get(r.status, 0) + 1
+    return {
+        "batch_id": batch.batch_id,
+        "name": batch.name,
+        "created_at": batch.created_at,
+        "abort_rules": batch.abort_rules,
+        "outputs": batch.outputs,
+        "counts": counts,
+        "eta": manager.estimate_batch(batch),
+        "runs": [
+            {"run_id": r.run_id, "name": r.name, "status": r.status, "abort_reason": r.abort_reason}
+            for r in runs
+        ],
+    }
+
+
+@app.get("/batches/{batch_id}/skill")
+def get_batch_skill(batch_id: str, obs: str,
+                    rank: str = Query("rmse", pattern="^(rmse|mae|bias|nse|kge)$")) -> Dict[str, Any]:
+    """
+    Pooled skill of every member against observation set `obs`, best first by `rank` (lowest RMSE, MAE and
+    absolute bias, highest NSE and KGE; members without a value last). Per-series detail is at
+    /runs/{id}/skill.
+    """
+    batch = manager.get_batch(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="batch not found")
+    try:
+        scores = manager.skill_batch(batch, obs)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="observation set not found")
+    items = []
+    for rid, sk in scores.items():
+        run = manager.get(rid)
+        items.append({"run_id": rid, "name": run.name, "status": run.status, "matched": sk["matched"],
+                      "coverage": sk["coverage"], **sk["overall"]})
+
+    def order(item: Dict[str, Any]) -> tuple:
+        v = item[rank]
+        if v is None:
+            return (1, 0.0)
+        return (0, -v if rank in ("nse", "kge") else abs(v))
+
+    items.sort(key=order)
+    return {"batch_id": batch_id, "obs_id": obs, "rank": rank, "items": items}
+
+
+@app.get("/batches")
+def list_batches() -> Dict[str, Any]:
+    items = [get_batch(bid) for bid in manager.list_batch_ids()]
+    items.sort(key=lambda x: x["created_at"], reverse=True)
+    return {"count": len(items), "items": items}
+
+
+@app.post("/calibrations")
+def create_calibration(spec: Dict[str, Any] = Body(...)) -> Dict[str, Any]:
+    """
+    Calibrate w2_con.npt parameters against an observation set. Body:
+    `input_dir`, `obs` (obs_id) and `parameters` [{name, low, high, card, line, log}], where `name` heads a
+    field of a control card (e.g. CBHE, or EXH2O); optional `name`, `metric` (rmse, mae, bias, nse, kge),
+    `budget` (runs, default 50), `parallel` (default W2_MAX_PARALLEL_RUNS), `population`, `rungs` (fractions
+    of the simulated window, default [0.25, 0.5]), `eta` (default 3), `outputs`, `priority` and `seed`.
+    Trials run as a batch named after the study.
+    """
+    try:
+        study = manager.create_study(spec)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"missing or unknown {e.args[0]}")
+    except (TypeError, FileNotFoundError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return study.describe()
+
+
+@app.get("/calibrations/{study_id}")
+def get_calibration(study_id: str, trials: bool = True) -> Dict[str, Any]:
+    study = manager.get_study(study_id)
+    if not study:
+        raise HTTPException(status_code=404, detail="calibration not found")
+    return study.describe(trials=trials)
+
+
+@app.get("/calibrations")
+def list_calibrations() -> Dict[str, Any]:
+    items = [s.describe(trials=False) for s in (manager.get_study(i) for i in manager.list_study_ids()) if s]
+    items.sort(key=lambda x: x["created_at"], reverse=True)
+    return {"count": len(items), "items": items}
+
+
+@app.post("/calibrations/{study_id}/stop")
+def stop_calibration(study_id: str) -> Dict[str, Any]:
+    if not manager.stop_study(study_id):
+        raise HTTPException(status_code=404, detail="calibration not found")
+    return get_calibration(study_id, trials=False)
+
+
+@app.post("/autotune")
+def create_autotune(spec: Dict[str, Any] = Body(...)) -> Dict[str, Any]:
+    """
+    Tune DLTMAX and DLTF for a scenario family with short probe runs of `input_dir`. Body: `input_dir`;
+    optional `family` (default the grid, grid-NWBxNBRxIMXxKMX), `window_days` (probe length, default 10),
+    `dltmax` and `dltf` (candidate lists), `max_viol` (largest mean stability-violation % of a usable
+    probe, default 5). The fastest usable probe is kept for the family and applied by `dlt` on new runs.
+    """
+    try:
+        job = manager.create_autotune(spec)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"missing {e.args[0]}")
+    except (TypeError, FileNotFoundError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return job.describe()
+
+
+@app.get("/autotune/{job_id}")
+def get_autotune(job_id: str) -> Dict[str, Any]:
+    job = manager.get_autotune(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="autotune job not found")
+    return job.describe()
+
+
+@app.get("/autotune")
+def list_autotune() -> Dict[str, Any]:
+    items = [j.describe() for j in (manager.get_autotune(i) for i in manager.list_autotune_ids()) if j]
+    items.sort(key=lambda x: x["created_at"], reverse=True)
+    return {"count": len(items), "items": items, "families": manager.dlt_tuning.load()}
+
+
+@app.post("/observations")
+async def create_observations(file: UploadFile = File(...), name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Upload observations as CSV with columns file, variable, jday, value and, for spr profiles, depth and
+    segment. They are stored once and referenced by `obs_id` in /runs/{id}/skill and /batches/{id}/skill.
+    """
+    content = await file.read()
+    try:
+        obs = manager.observations.create(content.decode("utf-8-sig"), name=name or file.filename)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return obs.describe()
+
+
+@app.get("/observations")
+def list_observations() -> Dict[str, Any]:
+    items = [o.describe() for o in (manager.observations.get(i) for i in manager.observations.list_ids()) if o]
+    return {"count": len(items), "items": items}
+
+
+@app.get("/observations/{obs_id}")
+def get_observations(obs_id: str) -> Dict[str, Any]:
+    obs = manager.observations.get(obs_id)
+    if not obs:
+        raise HTTPException(status_code=404, detail="observation set not found")
+    return obs.describe()
+
+
+@app.delete("/observations/{obs_id}")
+def delete_observations(obs_id: str) -> Dict[str, Any]:
+    if not manager.observations.delete(obs_id):
+        raise HTTPException(status_code=404, detail="observation set not found")
+    return {"obs_id": obs_id, "deleted": True}
+
+
+@app.get("/workers")
+def list_workers() -> Dict[str, Any]:
+    """Worker agents registered in the job store (W2_EXECUTOR=workers), with their slots and liveness."""
+    items = manager.jobs.workers() if manager.jobs is not None else []
+    return {"executor": manager.executor, "count": len(items), "items": items}
+
+
+@app.get("/binaries")
+def list_binaries() -> Dict[str, Any]:
+    """Registered model executables, with the number of finished runs timed for each (used by binary=auto)."""
+    items = []
+    for v in manager.binaries.list():
+        d = v.describe()
+        d["timed_runs"] = sum(1 for r in manager.history.records if v.sha256 and r.binary == v.sha256)
+        items.append(d)
+    return {"count": len(items), "items": items}
+
+
+@app.post("/binaries")
+def register_binary(spec: Dict[str, Any] = Body(...)) -> Dict[str, Any]:
+    """
+    Register (or replace) a model executable. Body: `name`, `path` (on the API host), optional `flags` (the
+    build flags, e.g. "-O3 -qopenmp") and `capabilities` (e.g. ["openmp", "avx512"]; "debug" keeps a variant
+    out of binary=auto).
+    """
+    try:
+        v = manager.binaries.register(str(spec["name"]), str(spec["path"]), str(spec.get("flags") or ""),
+                                      spec.get("capabilities"))
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"missing {e.args[0]}")
+    except (TypeError, FileNotFoundError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return v.describe()
+
+
+@app.delete("/binaries/{name}")
+def delete_binary(name: str) -> Dict[str, Any]:
+    try:
+        removed = manager.binaries.remove(name)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not removed:
+        raise HTTPException(status_code=404, detail="binary not found")
+    return {"name": name, "deleted": True}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> str:
+    """Resource usage of every run known to the API, in the Prometheus text format."""
+    rows = []
+    for run in (manager.get(rid) for rid in manager.list_ids()):
+        if run:
+            labels = {"run_id": run.run_id, "name": run.name or "", "batch_id": run.batch_id or ""}
+            rows.append((labels, run.status, manager.resources(run).get("usage") or {}))
+    return metrics_text(rows)
+
+
 @app.get("/health")
 def health() -> Dict[str, Any]:
     w2_path = manager.w2_bin
@@ -258,6 +837,8 @@ def health() -> Dict[str, Any]:
         "w2_bin_exists": w2_path.exists(),
         "w2_bin_executable": os.access(w2_path, os.X_OK) if w2_path.exists() else False,
         "runs_root": str(manager.runs_root),
+        "executor": manager.executor,
+        "disk": manager.retention.usage(),
     }
 
 if __name__ == "__main__":
@@ -4,6 +4,8 @@ import io
 import os
 import re
 import shutil
+import signal
+import sqlite3
 import threading
 import time
 import uuid
@@ -11,9 +13,25 @@ from dataclasses import asdict
 from datetime import datetime
 from pathlib import Path
 from subprocess import Popen, PIPE, STDOUT
-from typing import Dict, Optional, Iterable, Tuple
+from typing import Dict, List, Optional, Iterable, Tuple
 
-from .models import Run, ProgressPoint
+from .abort import ABORT_RULES_ENV, AbortMonitor, parse_rules
+from .artifacts import Manifest
+from .autotune import DLT_TUNING, TuningJob, TuningRunner, TuningStore, dlt_overrides, family_of, parse_job
+from .binaries import AUTO_BINARY, BINARIES, DEFAULT_BINARY, BinaryRegistry, result_key
+from .calibrate import Study, StudyRunner, parse_study
+from .control import CONTROL_NPT, FieldRef, read_lines, read_summary, write_fields
+from .eta import (ETA_HISTORY, QUEUE_ORDER_ENV, QUEUE_ORDERS, Estimate, HistoryModel, RateEstimator, input_digest,
+                  simulate_queue)
+from .fieldchunks import update_fields
+from .observations import OBSERVATIONS_DIR, ObservationStore
+from .outputs import FLOWBAL_GROUP, parse_profile, stage_profile
+from .resources import ResourceLimits, RunResources, cgroup_root_from_env, combine, limit_failure, parse_limits
+from .retention import STORE_DIR, RetentionService
+from .skill import SkillEngine
+from .workers import (EXECUTOR_ENV, EXECUTORS, JOB_FINAL, JOB_STORE, JobState, JobStore, model_env, publish_file,
+                      publish_inputs)
+from .models import FINAL_STATUSES, Batch, Run, ProgressHistory, ProgressPoint
 
 
 PROGRESS_RE = re.compile(
@@ -22,6 +40,11 @@ PROGRESS_RE = re.compile(
     r"(?P<dt>[-\dEe+.]+)\s+s\s+\|\s+viol\s+(?P<viol>\d+\.\d)\%\s+\|\s+elapsed\s+"
     r"(?P<elapsed>\d+\.\d)\s+d$"
 )
+SLOT_STATUSES = ("running", "pausing")  # runs holding one of the max_parallel slots
+PAUSE_MODES = ("checkpoint", "suspend")
+DISPATCH_SECONDS = 1.0  # W2_EXECUTOR=workers: how often the job store is read
+STOP_FILE = "w2.stop"  # run_control_cli.f90: stop at the end of the time step, writing rso.opt
+RSO_FILE = "rso.opt"
 
 
 class RunManager:
@@ -33,18 +56,82 @@ class RunManager:
         self._lock = threading.Lock()
         self._runs: Dict[str, Run] = {}
         self._procs: Dict[str, Popen] = {}
+        self._batches: Dict[str, Batch] = {}
+        self._studies: Dict[str, Study] = {}
+        self._tunings: Dict[str, TuningJob] = {}
+        self._queue: List[str] = []
+        # Runs beyond this many wait in status "queued" and start as slots free up
+        self.max_parallel = max(1, int(os.environ.get("W2_MAX_PARALLEL_RUNS") or os.cpu_count() or 1))
+        self.default_abort_rules = [r.text for r in parse_rules(os.environ.get(ABORT_RULES_ENV))]
+        self.history = HistoryModel(self.runs_root / ETA_HISTORY)
+        self.binaries = BinaryRegistry(self.runs_root / BINARIES, self.w2_bin)
+        self.retention = RetentionService(self.runs_root)
+        self.observations = ObservationStore(self.runs_root / OBSERVATIONS_DIR)
+        self.skill_engine = SkillEngine()
+        self.dlt_tuning = TuningStore(self.runs_root / DLT_TUNING)
+        # Limits of every model process (api/resources.py), overridable per run, and the live processes' meters
+        self.limits = ResourceLimits.from_env()
+        self.cgroup_root = cgroup_root_from_env()
+        self._resources: Dict[str, RunResources] = {}
+        self.preempt_mode = os.environ.get("W2_PREEMPT_MODE", "checkpoint").strip().lower()
+        if self.preempt_mode not in PAUSE_MODES:
+            raise ValueError(f"W2_PREEMPT_MODE must be one of {', '.join(PAUSE_MODES)}: {self.preempt_mode!r}")
+        self.queue_order = os.environ.get(QUEUE_ORDER_ENV, "sjf").strip().lower()
+        if self.queue_order not in QUEUE_ORDERS:
+            raise ValueError(f"{QUEUE_ORDER_ENV} must be one of {', '.join(QUEUE_ORDERS)}: {self.queue_order!r}")
+        # Where runs execute: here ("local"), or on worker agents claiming them from a job store (api/workers.py)
+        self.executor = os.environ.get(EXECUTOR_ENV, "local").strip().lower()
+        if self.executor not in EXECUTORS:
+            raise ValueError(f"{EXECUTOR_ENV} must be one of {', '.join(EXECUTORS)}: {self.executor!r}")
+        self.jobs: Optional[JobStore] = None
+        self._remote: Dict[str, Dict[str, object]] = {}  # run_id -> attempt, seq, monitor, t0 of dispatched runs
+        if self.executor == "workers":
+            self.jobs = JobStore(self.runs_root / JOB_STORE)
+            threading.Thread(target=self._dispatch, name="w2-dispatch", daemon=True).start()
 
     def _new_run_id(self) -> str:
         return uuid.uuid4().hex[:12]
 
-    def create_run(self, input_dir: Path, name: Optional[str] = None, copy_inputs: bool = True) -> Run:
-        # Ensure binary exists and is executable
-        if not self.w2_bin.exists():
-            raise RuntimeError(f"w2_exe_linux not found at {self.w2_bin}. Build it with: make w2_exe_linux")
-        if not os.access(self.w2_bin, os.X_OK):
-            raise RuntimeError(f"w2_exe_linux is not executable: {self.w2_bin}")
+    def create_run(self, input_dir: Path, name: Optional[str] = None, copy_inputs: bool = True,
+                   abort_rules: Optional[List[str]] = None, batch_id: Optional[str] = None,
+                   priority: int = 0, outputs: Optional[object] = None,
+                   overrides: Optional[List[Tuple[FieldRef, float]]] = None, dlt: Optional[str] = None,
+                   limits: Optional[Dict[str, object]] = None, binary: Optional[str] = None) -> Run:
         if not input_dir.exists() or not input_dir.is_dir():
             raise FileNotFoundError(f"input_dir does not exist or is not a directory: {input_dir}")
+        summary = read_summary(input_dir)
+        # The executable (api/binaries.py): a registered variant, "auto" or the default w2_exe_linux. Ensure it
+        # exists and is executable (the workers fetch it by its hash)
+        try:
+            variant = self.binaries.resolve(binary, summary, self.history)
+        except KeyError:
+            names = ", ".join(v.name for v in self.binaries.list())
+            raise ValueError(f"unknown binary {binary!r}; registered: {names} (or {AUTO_BINARY})")
+        except FileNotFoundError as e:
+            hint = " Build it with: make w2_exe_linux" if (binary or DEFAULT_BINARY) == DEFAULT_BINARY else ""
+            raise RuntimeError(f"{e}.{hint}")
+        if self.jobs is None and not os.access(variant.path, os.X_OK):
+            raise RuntimeError(f"binary {variant.name!r} is not executable: {variant.path}")
+        # Rules given for the run replace the batch defaults, which replace the server defaults (W2_ABORT_RULES)
+        if abort_rules is None:
+            batch = self._batches.get(batch_id) if batch_id else None
+            abort_rules = batch.abort_rules if batch and batch.abort_rules else self.default_abort_rules
+        rules = [r.text for r in parse_rules(abort_rules)]
+        # Likewise the output profile (api/outputs.py): the run's, else the batch's, else the control file as is
+        if outputs is None and batch_id and batch_id in self._batches:
+            outputs = self._batches[batch_id].outputs
+        profile = parse_profile(outputs)
+        run_limits = parse_limits(limits, self.limits)
+        # A tuned time step (api/autotune.py): "auto" for the family of the case's grid, else a family name
+        dlt_family = None
+        if dlt:
+            dlt_family = family_of(summary) if dlt == "auto" and summary else dlt
+            setting = self.dlt_tuning.get(dlt_family)
+            if setting is None:
+                raise ValueError(f"no time-step tuning for family {dlt_family!r} (POST /autotune)")
+            overrides = dlt_overrides(read_lines(input_dir / CONTROL_NPT), setting) + list(overrides or [])
+        if (profile is not None or overrides) and not copy_inputs:
+            raise ValueError("output profiles and overrides rewrite the staged inputs and need copy_inputs")
 
         run_id = self._new_run_id()
         workdir = self.runs_root / run_id
@@ -58,6 +145,14 @@ class RunManager:
                     shutil.copytree(p, dst)
                 else:
                     shutil.copy2(p, dst)
+        try:
+            flowbal = [FLOWBAL_GROUP] if any(r.metric == "volume_error" for r in parse_rules(rules)) else []
+            output_profile = stage_profile(workdir, profile, flowbal)
+            if overrides:
+                write_fields(workdir / CONTROL_NPT, overrides)
+        except (OSError, ValueError):
+            shutil.rmtree(workdir, ignore_errors=True)
+            raise
 
         stdout_log = workdir / "stdout.log"
         error_log = workdir / "w2_error.log"  # produced by model if NaN
@@ -67,55 +162,313 @@ class RunManager:
             run_id=run_id,
             name=name,
             workdir=workdir,
-            status="created",
+            status="queued",
             stdout_log=stdout_log,
             error_log=error_log,
             progress_log=progress_log,
             artifacts_root=workdir,
+            batch_id=batch_id,
+            priority=priority,
+            abort_rules=rules,
+            input_digest=input_digest(workdir if copy_inputs else input_dir),  # as staged, so profiles differ
+            control=summary,
+            manifest=Manifest(workdir, (p.relative_to(workdir).as_posix() for p in workdir.rglob("*") if p.is_file())),
         )
+        if output_profile is not None:
+            run.meta["output_profile"] = output_profile
+        if overrides:
+            run.meta["overrides"] = {ref.describe(): x for ref, x in overrides}
+        if dlt_family:
+            run.meta["dlt_family"] = dlt_family
+        run.meta["limits"] = run_limits.as_dict()
+        run.meta["binary"] = {"name": variant.name, "sha256": variant.sha256, "path": variant.path,
+                              "auto": binary == AUTO_BINARY}
+        run.meta["result_key"] = result_key(run.input_digest, variant.sha256)
         with self._lock:
             self._runs[run_id] = run
+            self._queue.append(run_id)
 
-        self._start_run(run)
+        self._start_queued()
         return run
 
-    def _start_run(self, run: Run) -> None:
+    def create_batch(self, members: List[Tuple[Path, Optional[str], Optional[List[str]], Optional[object]]],
+                     name: Optional[str] = None, abort_rules: Optional[List[str]] = None,
+                     priority: int = 0, outputs: Optional[object] = None, dlt: Optional[str] = None,
+                     limits: Optional[Dict[str, object]] = None, binary: Optional[str] = None) -> Batch:
+        """
+        Create one run per (input_dir, name, abort_rules, outputs) member, all at `priority`; the batch's
+        `abort_rules` and output profile apply to members that set none; `dlt` (a tuned time step), resource
+        `limits` and `binary` apply to all. Everything is validated before the first run is queued.
+        """
+        parse_profile(outputs)
+        parse_limits(limits, self.limits)
+        if binary and binary != AUTO_BINARY and self.binaries.get(binary) is None:
+            raise ValueError(f"unknown binary {binary!r}")
+        for input_dir, _, member_rules, member_outputs in members:
+            if not input_dir.is_dir():
+                raise FileNotFoundError(f"input_dir does not exist or is not a directory: {input_dir}")
+            parse_rules(member_rules)
+            parse_profile(member_outputs)
+        batch = Batch(batch_id=self._new_run_id(), name=name,
+                      abort_rules=[r.text for r in parse_rules(abort_rules)], outputs=outputs)
+        with self._lock:
+            self._batches[batch.batch_id] = batch
+        for input_dir, member_name, member_rules, member_outputs in members:
+            run = self.create_run(input_dir, name=member_name, abort_rules=member_rules, batch_id=batch.batch_id,
+                                  priority=priority, outputs=member_outputs, dlt=dlt, limits=limits,
+                                  binary=binary)
+            batch.run_ids.append(run.run_id)
+        return batch
+
+    def _start_queued(self) -> None:
+        if self.jobs is not None:
+            self._submit_queued()
+            return
+        while True:
+            victim = None
+            with self._lock:
+                if not self._queue:
+                    return
+                n = self._next_queued(self._queue)
+                run = self._runs[self._queue[n]]
+                busy = [r for r in self._runs.values() if r.status in SLOT_STATUSES]
+                if len(busy) >= self.max_parallel:
+                    # Preempt the lowest-priority, most recently started run, one at a time
+                    lower = [r for r in busy if r.status == "running" and r.priority < run.priority]
+                    if not lower or any(r.status == "pausing" for r in busy):
+                        return
+                    victim = min(lower, key=lambda r: (r.priority, -(r.started_at or datetime.min).timestamp()))
+                else:
+                    self._queue.pop(n)
+                    run.status = "running"
+                    mode = run.meta.pop("pause_mode", None)
+            if victim is not None:
+                victim.meta["preempted"] = True
+                self.pause(victim.run_id, self.preempt_mode)
+                if self.preempt_mode == "checkpoint":
+                    return  # the slot frees once the victim has written rso.opt
+                continue
+            try:
+                if mode == "suspend":
+                    os.kill(self._procs[run.run_id].pid, signal.SIGCONT)
+                else:
+                    self._start_run(run, resume=mode == "checkpoint")
+            except OSError as e:
+                run.status = "failed"
+                run.finished_at = datetime.utcnow()
+                run.meta["error"] = str(e)
+
+    def _next_queued(self, queue: List[str]) -> int:
+        # Index in `queue` of the run to start next: highest priority first; then runs without a prediction,
+        # in FIFO order, then by predicted duration
+        top = max(self._runs[rid].priority for rid in queue)
+        candidates = [n for n, rid in enumerate(queue) if self._runs[rid].priority == top]
+        if self.queue_order == "fifo":
+            return candidates[0]
+        best, best_key = candidates[0], None
+        for n in candidates:
+            run = self._runs[queue[n]]
+            est = self._predict(run)
+            if est is None:
+                return n
+            key = est.eta_seconds if self.queue_order == "sjf" else -est.eta_seconds
+            if best_key is None or key < best_key:
+                best, best_key = n, key
+        return best
+
+    def _submit_queued(self) -> None:
+        # W2_EXECUTOR=workers: hand queued runs to the job store in start order; the workers' slots and the
+        # store's priority order take over from there (no preemption)
+        with self._lock:
+            order = []
+            while self._queue:
+                order.append(self._runs[self._queue.pop(self._next_queued(self._queue))])
+            for run in order:
+                self._remote[run.run_id] = {"attempt": 0}
+        for run in order:
+            try:
+                store = self.runs_root / STORE_DIR
+                inputs = publish_inputs(self.manifest(run), store)
+                binary = run.meta["binary"]
+                publish_file(Path(binary["path"]), store, binary["sha256"])
+                self.jobs.enqueue(run.run_id, run.priority,
+                                  {"inputs": inputs, "name": run.name, "limits": run.meta.get("limits"),
+                                   "binary": {"name": binary["name"], "sha256": binary["sha256"]}})
+            except (OSError, sqlite3.Error) as e:
+                run.status = "failed"
+                run.finished_at = datetime.utcnow()
+                run.meta["error"] = f"cannot queue for workers: {e}"
+                with self._lock:
+                    self._remote.pop(run.run_id, None)
+                continue
+            if run.status != "queued":  # canceled meanwhile
+                self.jobs.cancel(run.run_id)
+
+    def _dispatch(self) -> None:
+        # W2_EXECUTOR=workers: mirror claims, progress lines and results from the job store into the runs
+        while True:
+            time.sleep(DISPATCH_SECONDS)
+            try:
+                self.jobs.requeue_expired()
+                with self._lock:
+                    ids = list(self._remote)
+                states = self.jobs.states(ids) if ids else {}
+            except sqlite3.Error:
+                continue
+            for run_id, job in states.items():
+                run = self.get(run_id)
+                try:
+                    if run is not None:
+                        self._sync_remote(run, job, self._remote[run_id])
+                except (KeyError, sqlite3.Error):
+                    continue
+                except (ValueError, TypeError) as e:  # a malformed job or progress line: fail that run only
+                    self._fail_remote(run, f"malformed job: {e}")
+
+    def _fail_remote(self, run: Run, error: str) -> None:
+        with self._lock:
+            self._remote.pop(run.run_id, None)
+            run.meta["error"] = error
+            if run.status in ("queued", "running"):
+                run.status = "failed"
+        try:
+            self.jobs.cancel(run.run_id)  # a worker still running it stops at its next renewal
+        except sqlite3.Error:
+            pass
+        self._finalize(run)
+
+    def _sync_remote(self, run: Run, job: JobState, state: Dict[str, object]) -> None:
+        if job.status == "queued" and state["attempt"]:
+            # the worker's lease lapsed: started again by the next worker to claim it, from the beginning
+            state["attempt"] = 0
+            with self._lock:
+                if run.status == "running":
+                    run.status = "queued"
+                    run.meta["requeued"] = run.meta.get("requeued", 0) + 1
+            run.progress = ProgressHistory()
+            run.rate = RateEstimator()
+            return
+        if job.attempt and job.attempt != state["attempt"]:  # claimed (again) by a worker
+            state.update(attempt=job.attempt, seq=0, t0=job.claimed_at,
+                         monitor=AbortMonitor(parse_rules(run.abort_rules)))
+            run.progress = ProgressHistory()  # the points of an earlier attempt, if requeued since the last poll
+            run.rate = RateEstimator()
+            run.meta["worker"] = job.worker_id
+            with self._lock:
+                if run.status == "queued":
+                    run.status = "running"
+                    run.started_at = run.started_at or datetime.utcnow()
+        if state["attempt"]:
+            monitor, reason = state["monitor"], None
+            for seq, line, at in self.jobs.progress(run.run_id, state["attempt"], state["seq"]):
+                state["seq"] = seq
+                p = self._parse_progress_line(line)
+                if p:
+                    run.add_progress(p)
+                    run.rate.add(at, p.day + p.hour / 24.0)
+                    if monitor.rules and not reason:
+                        reason = monitor.on_progress(p, at - state["t0"])
+            if monitor.rules and not reason and job.status == "running":
+                reason = monitor.on_wall(time.time() - state["t0"])  # file rules need the run directory
+            if reason:
+                self._abort(run, reason)
+        if job.status not in JOB_FINAL:
+            return
+        with self._lock:
+            self._remote.pop(run.run_id, None)
+            run.returncode = job.returncode
+            if job.error:
+                run.meta["error"] = job.error
+            if job.resources:
+                run.meta["resources"] = job.resources
+            if run.status in ("queued", "running"):
+                run.status = job.status
+        self._finalize(run)
+
+    def pause(self, run_id: str, mode: str = "checkpoint") -> bool:
+        """
+        Pause a run. `checkpoint` asks the model to stop at the end of its time step, writing rso.opt, and
+        frees the slot once it has exited; `suspend` stops the process (SIGSTOP) where it is, keeping it in
+        memory. A queued run is held back from starting. Raises ValueError if the run cannot be paused.
+        """
+        if mode not in PAUSE_MODES:
+            raise ValueError(f"mode must be one of {', '.join(PAUSE_MODES)}")
+        if self.jobs is not None:
+            raise ValueError(f"runs cannot be paused with {EXECUTOR_ENV}=workers")
+        run = self.get(run_id)
+        if not run:
+            return False
+        with self._lock:
+            if run.status == "queued":
+                self._queue.remove(run_id)
+                run.status = "paused"
+                return True
+            proc = self._procs.get(run_id)
+            if run.status != "running" or proc is None or proc.poll() is not None:
+                raise ValueError(f"run is {run.status}, not running")
+            run.meta["pause_mode"] = mode
+            if mode == "suspend":
+                os.kill(proc.pid, signal.SIGSTOP)
+                run.status = "paused"
+                if run.meta.pop("preempted", False):
+                    run.status = "queued"  # continued when a slot frees
+                    self._queue.append(run_id)
+            else:
+                run.meta["pause_requested"] = time.time()
+                (run.workdir / STOP_FILE).touch()
+                run.status = "pausing"
+        if mode == "suspend":
+            self._start_queued()
+        return True
+
+    def resume(self, run_id: str) -> bool:
+        """Queue a paused run to continue (from rso.opt after a checkpoint) as soon as a slot is free."""
+        run = self.get(run_id)
+        if not run:
+            return False
+        with self._lock:
+            if run.status != "paused":
+                raise ValueError(f"run is {run.status}, not paused")
+            run.status = "queued"
+            self._queue.append(run_id)
+        self._start_queued()
+        return True
+
+    def _start_run(self, run: Run, resume: bool = False) -> None:
         # Launch process with workdir arg; set cwd to workdir as well
-        cmd = [str(self.w2_bin), str(run.workdir)]
-        env = os.environ.copy()
-        # Ensure Intel runtime libs are discoverable even if RUNPATH is ignored
-        extra_ld: list[str] = []
-        for key in ("W2_LD_LIBRARY_PATH", "W2_INTEL_LIBDIR"):
-            val = os.environ.get(key)
-            if val:
-                for part in val.split(":"):
-                    p = Path(part)
-                    if p.exists():
-                        extra_ld.append(str(p))
-        # Common default locations
-        for p in (
-            Path("/opt/intel/oneapi/compiler/2025.2/lib"),
-            Path("/opt/intel/oneapi/compiler/latest/lib"),
-        ):
-            if p.exists():
-                extra_ld.append(str(p))
-        if extra_ld:
-            current = env.get("LD_LIBRARY_PATH", "")
-            parts = [x for x in current.split(":") if x]
-            for x in extra_ld:
-                if x not in parts:
-                    parts.append(x)
-            env["LD_LIBRARY_PATH"] = ":".join(parts)
-        run.status = "running"
-        run.started_at = datetime.utcnow()
-
-        proc = Popen(cmd, cwd=run.workdir, stdout=PIPE, stderr=STDOUT, text=True, bufsize=1, env=env)
-        run.meta["pid"] = proc.pid
+        cmd = [run.meta["binary"]["path"], str(run.workdir)]
+        env = model_env(run.workdir)
+        (run.workdir / STOP_FILE).unlink(missing_ok=True)
+        if resume:
+            # continue from the checkpoint; the rate estimate restarts without the paused interval
+            env["W2_RESUME"] = "on"
+            run.progress_log.unlink(missing_ok=True)  # rewritten by the model; points so far stay in run.progress
+            run.meta["resumed"] = run.meta.get("resumed", 0) + 1
+            run.rate = RateEstimator()
+        else:
+            run.started_at = datetime.utcnow()
+
+        res = RunResources(run.run_id, parse_limits(run.meta.get("limits")), self.cgroup_root)
+        res.prepare()
+        # Spawn under the lock, so a cancel() since _start_queued marked the run "running" either stops the
+        # launch here or finds the process to terminate
         with self._lock:
+            if run.status != "running":
+                res.close()
+                return
+            try:
+                proc = Popen(cmd, cwd=run.workdir, stdout=PIPE, stderr=STDOUT, text=True, bufsize=1, env=env,
+                             preexec_fn=res.preexec)
+            except OSError:
+                res.close()
+                raise
             self._procs[run.run_id] = proc
+            self._resources[run.run_id] = res
+        run.meta["pid"] = proc.pid
+        res.attach(proc.pid)
 
         t_stdout = threading.Thread(target=self._pump_stdout, args=(run, proc), daemon=True)
-        t_progress = threading.Thread(target=self._tail_progress, args=(run,), daemon=True)
+        t_progress = threading.Thread(target=self._tail_progress, args=(run, proc), daemon=True)
         t_wait = threading.Thread(target=self._wait_and_finalize, args=(run, proc), daemon=True)
         t_stdout.start()
         t_progress.start()
@@ -137,13 +490,15 @@ class RunManager:
                 f.write(line)
                 f.flush()
 
-    def _tail_progress(self, run: Run) -> None:
-        # Poll progress log; append parsed points
+    def _tail_progress(self, run: Run, proc: Popen) -> None:
+        # Poll progress log; append parsed points and evaluate the run's abort rules on them
         pos = 0
+        monitor = AbortMonitor(parse_rules(run.abort_rules))
+        t0 = time.monotonic()
         while True:
-            # Stop when run is finalized and no new progress available
-            if run.status in {"succeeded", "failed", "canceled"} and not run.progress_log.exists():
-                break
+            # One last read after the process has exited, then stop
+            finished = proc.poll() is not None
+            reason = None
             try:
                 with open(run.progress_log, "r", encoding="utf-8", errors="ignore") as f:
                     f.seek(pos)
@@ -152,21 +507,101 @@ class RunManager:
                         p = self._parse_progress_line(raw)
                         if p:
                             run.add_progress(p)
+                            run.rate.add(time.monotonic(), p.day + p.hour / 24.0)
+                            if monitor.rules and not reason:
+                                reason = monitor.on_progress(p, time.monotonic() - t0)
                     pos = f.tell()
             except FileNotFoundError:
                 # Not yet created; wait and retry
                 pass
+            if finished:
+                break
+            res = self._resources.get(run.run_id)
+            if res is not None:
+                res.sample()
+            if monitor.rules and not reason:
+                reason = (monitor.on_wall(time.monotonic() - t0) or monitor.check_files(run.workdir)
+                          or monitor.check_flowbal(run.workdir))
+            if reason:
+                self._abort(run, reason)
 
             time.sleep(0.5)
 
+    def abort(self, run_id: str, reason: str) -> bool:
+        """Stop a running run as "aborted" with `reason` (as an early-abort rule would)."""
+        run = self.get(run_id)
+        if not run or run.status != "running":
+            return False
+        self._abort(run, reason)
+        return True
+
+    def _abort(self, run: Run, reason: str) -> None:
+        with self._lock:
+            if run.status != "running":
+                return
+            run.status = "aborted"
+            run.abort_reason = reason
+            proc = self._procs.get(run.run_id)
+        if self.jobs is not None:
+            self.jobs.cancel(run.run_id)
+        if proc and proc.poll() is None:
+            try:
+                proc.terminate()
+            except Exception:
+                pass
+
     def _wait_and_finalize(self, run: Run, proc: Popen) -> None:
         rc = proc.wait()
         run.returncode = rc
-        run.finished_at = datetime.utcnow()
-        if run.status != "canceled":
-            run.status = "succeeded" if rc == 0 else "failed"
         with self._lock:
             self._procs.pop(run.run_id, None)
+            res = self._resources.pop(run.run_id, None)
+            if run.status == "pausing":
+                rso = run.workdir / RSO_FILE
+                if rc == 0 and rso.is_file() and rso.stat().st_mtime >= run.meta.get("pause_requested", 0.0) - 1.0:
+                    run.status = "paused"
+                    if run.meta.pop("preempted", False):
+                        run.status = "queued"  # resumes when a slot frees
+                        self._queue.append(run.run_id)
+                else:
+                    run.status = "failed"
+                    run.meta.pop("pause_mode", None)
+            elif run.status not in ("canceled", "aborted"):
+                run.status = "succeeded" if rc == 0 else "failed"
+        if res is not None:
+            run.meta["resources"] = res.describe(combine((run.meta.get("resources") or {}).get("usage"), res.close()))
+        if run.status in ("paused", "queued"):
+            self._start_queued()
+            return
+        self._finalize(run)
+
+    def _finalize(self, run: Run) -> None:
+        run.finished_at = datetime.utcnow()
+        if run.status == "failed" and "error" not in run.meta:
+            why = limit_failure(run.returncode, (run.meta.get("resources") or {}).get("usage") or {})
+            if why:
+                run.meta["error"] = why
+        if (run.status == "succeeded" and run.input_digest and run.control and run.started_at
+                and not run.meta.get("resumed")):
+            self.history.record(run.input_digest, run.control, (run.finished_at - run.started_at).total_seconds(),
+                                (run.meta.get("binary") or {}).get("sha256"))
+        self._start_queued()
+        try:
+            update_fields(run.workdir)  # before retention, which may move fields.w2f into its store
+        except (OSError, ValueError):
+            pass
+        try:
+            manifest = self.manifest(run)
+            manifest.finalize()
+            self.retention.process(manifest)
+            with self._lock:
+                active = [rid for rid, r in self._runs.items() if r.status not in FINAL_STATUSES]
+            for rid in self.retention.evict(active):
+                self.skill_engine.forget(self.runs_root / rid)
+                if rid in self._runs:
+                    self._runs[rid].meta["evicted_at"] = datetime.utcnow()
+        except OSError:
+            pass
 
     def _parse_progress_line(self, line: str) -> Optional[ProgressPoint]:
         m = PROGRESS_RE.match(line.strip())
@@ -186,7 +621,140 @@ class RunManager:
         except Exception:
             return None
 
+    def _predict(self, run: Run) -> Optional[Estimate]:
+        return self.history.predict(run.input_digest, run.control, (run.meta.get("binary") or {}).get("sha256"))
+
     # Public query methods
+    def estimate(self, run: Run) -> Estimate:
+        """Wall seconds until `run` finishes, from its live rate once available, else from past runs."""
+        if run.status == "queued":
+            return self._predict(run) or Estimate("none")
+        if run.status != "running":
+            return Estimate("none")
+        lp = run.last_progress()
+        if lp is not None:
+            jday = lp.day + lp.hour / 24.0
+            if run.control:
+                remaining = run.control.tmend - jday
+            elif lp.percent > 0.0:
+                remaining = lp.elapsed_days * (100.0 - lp.percent) / lp.percent
+            else:
+                remaining = None
+            if remaining is not None:
+                est = run.rate.estimate(remaining)
+                if est is not None:
+                    return est
+        est = self._predict(run)
+        if est is None or not run.started_at:
+            return Estimate("none")
+        elapsed = (datetime.utcnow() - run.started_at).total_seconds()
+        return Estimate("history", eta_seconds=max(est.eta_seconds - elapsed, 0.0),
+                        eta_low=max(est.eta_low - elapsed, 0.0), eta_high=max(est.eta_high - elapsed, 0.0),
+                        spans=est.spans)
+
+    def resources(self, run: Run) -> Dict[str, object]:
+        """Limits and resource usage of a run: live while its process runs, else as recorded when it exited."""
+        with self._lock:
+            res = self._resources.get(run.run_id)
+        if res is not None:
+            return res.describe(combine((run.meta.get("resources") or {}).get("usage"), res.usage()))
+        return run.meta.get("resources") or {"limits": run.meta.get("limits"), "usage": {}}
+
+    def estimate_batch(self, batch: Batch) -> Dict[str, Optional[float]]:
+        """
+        Wall seconds until the last member finishes: queued runs (of any batch) are placed on slots in the
+        order the scheduler starts them, after the running runs' ETAs. None while any run involved has no
+        estimate.
+        """
+        with self._lock:
+            running = [r for r in self._runs.values() if r.status == "running"]
+            pending = list(self._queue)
+        order = []
+        while pending:
+            order.append(pending.pop(self._next_queued(pending)))
+        ests = {r.run_id: self.estimate(r) for r in running}
+        ests.update((rid, self.estimate(self._runs[rid])) for rid in order)
+        members = [rid for rid in batch.run_ids if rid in ests]
+        out: Dict[str, Optional[float]] = {}
+        for key in ("eta_seconds", "eta_low", "eta_high"):
+            if not members:
+                out[key] = 0.0
+            elif any(getattr(e, key) is None for e in ests.values()):
+                out[key] = None
+            else:
+                finish = {r.run_id: getattr(ests[r.run_id], key) for r in running}
+                finish.update(zip(order, simulate_queue(list(finish.values()),
+                                                        [getattr(ests[rid], key) for rid in order],
+                                                        self.max_parallel)))
+                out[key] = max(finish[rid] for rid in members)
+        return out
+
+    def skill(self, run: Run, obs_id: str, until: Optional[float] = None) -> Dict[str, object]:
+        """
+        Skill of a run against an observation set, over the output written so far and the observations up to
+        day `until`; KeyError if no such set.
+        """
+        obs = self.observations.get(obs_id)
+        if obs is None:
+            raise KeyError(obs_id)
+        return self.skill_engine.score(run.run_id, run.artifacts_root, obs, until)
+
+    def skill_batch(self, batch: Batch, obs_id: str) -> Dict[str, Dict[str, object]]:
+        obs = self.observations.get(obs_id)
+        if obs is None:
+            raise KeyError(obs_id)
+        runs = [r for r in (self.get(rid) for rid in batch.run_ids) if r]
+        return self.skill_engine.score_many([(r.run_id, r.artifacts_root) for r in runs], obs)
+
+    def create_study(self, spec: Dict[str, object]) -> Study:
+        """Start a calibration study (api/calibrate.py); its trials are the runs of a batch of the same name."""
+        study = parse_study(spec, self._new_run_id(), self.max_parallel)
+        obs = self.observations.get(study.obs_id)
+        if obs is None:
+            raise KeyError(study.obs_id)
+        runner = StudyRunner(self, study, obs)
+        study.batch_id = self.create_batch([], name=study.name or f"study-{study.study_id}",
+                                           priority=study.priority).batch_id
+        with self._lock:
+            self._studies[study.study_id] = study
+        runner.start()
+        return study
+
+    def create_autotune(self, spec: Dict[str, object]) -> TuningJob:
+        """Probe candidate time-step settings for a case (api/autotune.py) as a batch of short runs."""
+        job, lines = parse_job(spec, self._new_run_id())
+        job.batch_id = self.create_batch([], name=f"autotune-{job.family}").batch_id
+        with self._lock:
+            self._tunings[job.job_id] = job
+        TuningRunner(self, job, lines, self.dlt_tuning).launch()
+        return job
+
+    def get_autotune(self, job_id: str) -> Optional[TuningJob]:
+        with self._lock:
+            return self._tunings.get(job_id)
+
+    def list_autotune_ids(self) -> Iterable[str]:
+        with self._lock:
+            return list(self._tunings.keys())
+
+    def get_study(self, study_id: str) -> Optional[Study]:
+        with self._lock:
+            return self._studies.get(study_id)
+
+    def list_study_ids(self) -> Iterable[str]:
+        with self._lock:
+            return list(self._studies.keys())
+
+    def stop_study(self, study_id: str) -> bool:
+        """Launch no more trials and cancel the running ones."""
+        study = self.get_study(study_id)
+        if not study:
+            return False
+        if study.status == "running":
+            study.status = "stopping"
+            study.stop_event.set()
+        return True
+
     def get(self, run_id: str) -> Optional[Run]:
         with self._lock:
             return self._runs.get(run_id)
@@ -195,16 +763,37 @@ class RunManager:
         with self._lock:
             return list(self._runs.keys())
 
+    def manifest(self, run: Run) -> Manifest:
+        if run.manifest is None:
+            run.manifest = Manifest.load(run.artifacts_root) or Manifest(run.artifacts_root)
+        run.manifest.refresh()
+        return run.manifest
+
+    def get_batch(self, batch_id: str) -> Optional[Batch]:
+        with self._lock:
+            return self._batches.get(batch_id)
+
+    def list_batch_ids(self) -> Iterable[str]:
+        with self._lock:
+            return list(self._batches.keys())
+
     def cancel(self, run_id: str) -> bool:
         run = self.get(run_id)
         if not run:
             return False
-        proc = self._procs.get(run_id)
+        with self._lock:
+            if run_id in self._queue:
+                self._queue.remove(run_id)
+            run.status = "canceled"
+            run.finished_at = datetime.utcnow()
+            proc = self._procs.get(run_id)
+        if self.jobs is not None:
+            self.jobs.cancel(run_id)
         if proc and proc.poll() is None:
             try:
                 proc.terminate()
+                if run.meta.get("pause_mode") == "suspend":
+                    os.kill(proc.pid, signal.SIGCONT)  # a stopped process only acts on SIGTERM once continued
             except Exception:
                 pass
-        run.status = "canceled"
-        run.finished_at = datetime.utcnow()
         return True
@@ -1,12 +1,19 @@
 from __future__ import annotations
 
+import os
+from array import array
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 
+from .artifacts import Manifest
+from .control import ControlSummary
+from .eta import RateEstimator
 
-RunStatus = str  # created | running | succeeded | failed | canceled
+
+RunStatus = str  # created | queued | running | pausing | paused | succeeded | failed | canceled | aborted
+FINAL_STATUSES = {"succeeded", "failed", "canceled", "aborted"}
 
 
 @dataclass
@@ -22,6 +29,123 @@ class ProgressPoint:
     timestamp: datetime = field(default_factory=datetime.utcnow)
 
 
+PROGRESS_MAX_POINTS_ENV = "W2_PROGRESS_MAX_POINTS"  # per run, default 100000
+PROGRESS_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("day", "i"),
+    ("hour", "d"),
+    ("percent", "d"),
+    ("step", "q"),
+    ("dt", "d"),
+    ("viol_percent", "d"),
+    ("elapsed_days", "d"),
+    ("timestamp", "d"),  # seconds since the epoch, UTC
+)
+_CHUNK_ROWS = 4096
+_EPOCH = datetime(1970, 1, 1)
+
+
+def progress_timestamp(ts: float) -> datetime:
+    return _EPOCH + timedelta(seconds=ts)
+
+
+class _Chunk:
+    __slots__ = ("cols", "n")
+
+    def __init__(self, cols: Optional[List[array]] = None, n: int = 0) -> None:
+        if cols is None:
+            cols = [array(code, bytes(array(code).itemsize * _CHUNK_ROWS)) for _, code in PROGRESS_COLUMNS]
+        self.cols = cols
+        self.n = n
+
+
+class ProgressHistory:
+    """
+    Progress points of a run as typed columns (no line text), in fixed-size chunks that are filled in place and
+    never resized, so the memoryviews handed out by `tail` stay valid while the run keeps appending. Past
+    `max_points`, the older half of the history is thinned to every other point; the newest `max_points // 2`
+    points always keep full resolution.
+    """
+
+    __slots__ = ("max_points", "thinned", "last_line", "_chunks")
+
+    def __init__(self, max_points: Optional[int] = None) -> None:
+        if max_points is None:
+            max_points = int(os.environ.get(PROGRESS_MAX_POINTS_ENV) or 100000)
+        self.max_points = max(max_points, 2 * _CHUNK_ROWS)
+        self.thinned = 0  # number of thinning passes so far
+        self.last_line = ""
+        self._chunks: List[_Chunk] = []
+
+    def __len__(self) -> int:
+        return sum(c.n for c in self._chunks)
+
+    def append(self, p: ProgressPoint) -> None:
+        chunks = self._chunks
+        if not chunks or chunks[-1].n == _CHUNK_ROWS:
+            chunks.append(_Chunk())
+        c = chunks[-1]
+        i = c.n
+        row = (p.day, p.hour, p.percent, p.step, p.dt, p.viol_percent, p.elapsed_days,
+               (p.timestamp - _EPOCH).total_seconds())
+        for col, v in zip(c.cols, row):
+            col[i] = v
+        c.n = i + 1  # readers see the row once it is complete
+        self.last_line = p.line
+        if i == _CHUNK_ROWS - 1 and len(self) > self.max_points:
+            self._thin()
+
+    def _thin(self) -> None:
+        chunks = self._chunks
+        total = len(self)
+        split = total - self.max_points // 2
+        merged = []
+        for k, (_, code) in enumerate(PROGRESS_COLUMNS):
+            col = array(code)
+            for c in chunks:
+                col.extend(c.cols[k][:c.n])
+            merged.append(col[:split:2] + col[split:])
+        rows = len(merged[0])
+        new = []
+        for start in range(0, rows, _CHUNK_ROWS):
+            n = min(_CHUNK_ROWS, rows - start)
+            cols = []
+            for col, (_, code) in zip(merged, PROGRESS_COLUMNS):
+                part = col[start:start + n]
+                part.frombytes(bytes(part.itemsize * (_CHUNK_ROWS - n)))
+                cols.append(part)
+            new.append(_Chunk(cols, n))
+        self._chunks = new  # readers holding the old chunks keep a consistent view
+        self.thinned += 1
+
+    def tail(self, limit: int) -> Dict[str, List[memoryview]]:
+        """The last `limit` points, per column, as memoryview segments over the chunks (no copy)."""
+        chunks = self._chunks
+        counts = [c.n for c in chunks]
+        segs: List[Tuple[_Chunk, int, int]] = []
+        for c, n in zip(reversed(chunks), reversed(counts)):
+            if limit <= 0:
+                break
+            take = min(n, limit)
+            segs.append((c, n - take, n))
+            limit -= take
+        segs.reverse()
+        return {name: [memoryview(c.cols[k])[a:b] for c, a, b in segs]
+                for k, (name, _) in enumerate(PROGRESS_COLUMNS)}
+
+    def rows(self, limit: int) -> Iterator[Tuple[Any, ...]]:
+        cols = self.tail(limit)
+        segs = zip(*(cols[name] for name, _ in PROGRESS_COLUMNS))
+        for parts in segs:
+            yield from zip(*parts)
+
+    def last(self) -> Optional[ProgressPoint]:
+        for row in self.rows(1):
+            day, hour, percent, step, dt, viol, elapsed, ts = row
+            return ProgressPoint(day, hour, percent, step, dt, viol, elapsed, self.last_line,
+                                 progress_timestamp(ts))
+        return None
+
+
 @dataclass
 class Run:
     run_id: str
@@ -37,11 +161,29 @@ class Run:
     progress_log: Path = field(default=Path())
     artifacts_root: Path = field(default=Path())
     meta: Dict[str, Any] = field(default_factory=dict)
-    _progress_points: List[ProgressPoint] = field(default_factory=list)
+    batch_id: Optional[str] = None
+    priority: int = 0  # queued runs of higher priority start first and may preempt running ones
+    abort_rules: List[str] = field(default_factory=list)
+    abort_reason: Optional[str] = None
+    input_digest: Optional[str] = None
+    control: Optional[ControlSummary] = None  # grid and simulated window from w2_con.npt
+    rate: RateEstimator = field(default_factory=RateEstimator)
+    manifest: Optional[Manifest] = None  # index of the files under artifacts_root
+    progress: ProgressHistory = field(default_factory=ProgressHistory)
 
     def add_progress(self, p: ProgressPoint) -> None:
-        self._progress_points.append(p)
+        self.progress.append(p)
 
     def last_progress(self) -> Optional[ProgressPoint]:
-        return self._progress_points[-1] if self._progress_points else None
+        return self.progress.last()
+
 
+@dataclass
+class Batch:
+    batch_id: str
+    name: Optional[str]
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    run_ids: List[str] = field(default_factory=list)
+    # defaults applied to member runs that do not set their own
+    abort_rules: List[str] = field(default_factory=list)
+    outputs: Optional[Any] = None  # output profile spec (api/outputs.py)
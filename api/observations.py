@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+import shutil
+import sys
+import threading
+import uuid
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+# Observation sets are uploaded as CSV with the columns
+#   file      model output the values compare to: tsr_<n>_seg<i>.csv, two_<i>.csv (and the other
+#             withdrawal outputs) or spr<jw>.opt
+#   variable  column of that file, with or without its units (T2, T2(C), ...); for spr files the constituent
+#             (Temperature, ...)
+#   jday      time of the observation (model Julian day)
+#   value
+#   depth     metres below the water surface, spr files only
+#   segment   model segment, spr files only
+# and stored under runs/.observations/<obs_id>: meta.json plus one float64 column file per series.
+OBSERVATIONS_DIR = ".observations"
+COLUMNS = ("jday", "depth", "value")
+REQUIRED = ("file", "variable", "jday", "value")
+
+
+@dataclass
+class Series:
+    file: str
+    variable: str
+    segment: Optional[int] = None
+    n: int = 0
+    jday: array = field(default_factory=lambda: array("d"), repr=False)
+    depth: array = field(default_factory=lambda: array("d"), repr=False)  # NaN for time series
+    value: array = field(default_factory=lambda: array("d"), repr=False)
+
+    @property
+    def key(self) -> str:
+        return f"{self.file}:{self.variable}" + (f":{self.segment}" if self.segment is not None else "")
+
+    @property
+    def is_profile(self) -> bool:
+        return self.file.lower().startswith("spr")
+
+    def describe(self) -> Dict[str, object]:
+        return {
+            "key": self.key, "file": self.file, "variable": self.variable, "segment": self.segment, "n": self.n,
+            "jday_min": min(self.jday) if self.n else None, "jday_max": max(self.jday) if self.n else None,
+        }
+
+
+@dataclass
+class ObservationSet:
+    obs_id: str
+    name: Optional[str]
+    created_at: str
+    series: List[Series] = field(default_factory=list)
+
+    def describe(self) -> Dict[str, object]:
+        return {
+            "obs_id": self.obs_id, "name": self.name, "created_at": self.created_at,
+            "rows": sum(s.n for s in self.series), "series": [s.describe() for s in self.series],
+        }
+
+
+def parse_csv(text: str) -> List[Series]:
+    """Group the rows of an observation CSV into series sorted by time (and depth)."""
+    reader = csv.DictReader(io.StringIO(text))
+    header = [h.strip().lower() for h in reader.fieldnames or []]
+    missing = [c for c in REQUIRED if c not in header]
+    if missing:
+        raise ValueError(f"observation CSV lacks the column(s) {', '.join(missing)}")
+    reader.fieldnames = header
+    groups: Dict[Tuple[str, str, Optional[int]], List[Tuple[float, float, float]]] = {}
+    for lineno, row in enumerate(reader, start=2):
+        try:
+            fname = row["file"].strip()
+            variable = row["variable"].strip()
+            if not fname or not variable:
+                raise ValueError("empty file or variable")
+            jday, value = float(row["jday"]), float(row["value"])
+            profile = fname.lower().startswith("spr")
+            depth = float(row["depth"]) if profile else float("nan")
+            segment = int(float(row["segment"])) if profile else None
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"observation CSV line {lineno}: {e} (spr rows need depth and segment)")
+        groups.setdefault((fname, variable, segment), []).append((jday, depth, value))
+    if not groups:
+        raise ValueError("observation CSV has no rows")
+    out = []
+    for (fname, variable, segment), rows in groups.items():
+        rows.sort(key=lambda r: (r[0], r[1]))
+        s = Series(fname, variable, segment, len(rows))
+        for jday, depth, value in rows:
+            s.jday.append(jday)
+            s.depth.append(depth)
+            s.value.append(value)
+        out.append(s)
+    out.sort(key=lambda s: s.key)
+    return out
+
+
+class ObservationStore:
+    """Observation sets on disk, loaded on first use and kept in memory (they are small next to model output)."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._sets: Dict[str, ObservationSet] = {}
+        self._lock = threading.Lock()
+
+    def create(self, text: str, name: Optional[str] = None) -> ObservationSet:
+        obs = ObservationSet(uuid.uuid4().hex[:12], name, datetime.utcnow().isoformat(), parse_csv(text))
+        d = self.root / obs.obs_id
+        d.mkdir(parents=True)
+        meta = {"obs_id": obs.obs_id, "name": name, "created_at": obs.created_at, "series": []}
+        for k, s in enumerate(obs.series):
+            with open(d / f"series_{k}.f64", "wb") as f:
+                for col in COLUMNS:
+                    values = getattr(s, col)
+                    if sys.byteorder != "little":
+                        values = array("d", values)
+                        values.byteswap()
+                    values.tofile(f)
+            meta["series"].append({"file": s.file, "variable": s.variable, "segment": s.segment, "n": s.n})
+        tmp = d / "meta.json.tmp"
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, d / "meta.json")
+        with self._lock:
+            self._sets[obs.obs_id] = obs
+        return obs
+
+    def get(self, obs_id: str) -> Optional[ObservationSet]:
+        with self._lock:
+            obs = self._sets.get(obs_id)
+        if obs is not None or not obs_id.isalnum():
+            return obs
+        obs = self._load(self.root / obs_id)
+        if obs is not None:
+            with self._lock:
+                self._sets[obs_id] = obs
+        return obs
+
+    def _load(self, d: Path) -> Optional[ObservationSet]:
+        try:
+            meta = json.loads((d / "meta.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        obs = ObservationSet(meta["obs_id"], meta.get("name"), meta.get("created_at", ""))
+        for k, m in enumerate(meta["series"]):
+            s = Series(m["file"], m["variable"], m.get("segment"), int(m["n"]))
+            with open(d / f"series_{k}.f64", "rb") as f:
+                for col in COLUMNS:
+                    values = getattr(s, col)
+                    values.fromfile(f, s.n)
+                    if sys.byteorder != "little":
+                        values.byteswap()
+            obs.series.append(s)
+        return obs
+
+    def list_ids(self) -> List[str]:
+        if not self.root.is_dir():
+            return []
+        return sorted(d.name for d in self.root.iterdir() if (d / "meta.json").is_file())
+
+    def delete(self, obs_id: str) -> bool:
+        if self.get(obs_id) is None:
+            return False
+        with self._lock:
+            self._sets.pop(obs_id, None)
+        shutil.rmtree(self.root / obs_id, ignore_errors=True)
+        return True
+
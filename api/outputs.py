@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple, Union
+
+from .control import CONTROL_NPT, find_card, fields, read_lines, set_field
+
+
+# Output groups of w2_con.npt: card title (its first 8 characters), whether the card has one line per water body,
+# and the index of the ON/OFF field on its data line(s). OUTPUTA writes a group only while its switch reads ON
+# (ONV for SPR PLOT).
+OUTPUT_GROUPS: Dict[str, Tuple[str, bool, int]] = {
+    "snp": ("SNP PRIN", True, 0),  # snapshot
+    "scr": ("SCR PRIN", True, 0),  # screen
+    "prf": ("PRF PLOT", True, 0),  # vertical profiles
+    "spr": ("SPR PLOT", True, 0),  # spreadsheet profiles
+    "vpl": ("VPL PLOT", True, 0),  # vector plots
+    "cpl": ("CPL PLOT", True, 0),  # contour plots
+    "flx": ("FLUXES", True, 0),  # kinetic fluxes
+    "tsr": ("TSR PLOT", False, 0),  # time series
+    "wdo": ("WITH OUT", False, 0),  # withdrawal outflow
+    "habitat": ("MISCELL", False, 2),  # HABTATC: fish habitat volumes
+    "envirp": ("MISCELL", False, 3),  # ENVIRPC: environmental performance criteria
+}
+# Groups kept by each named profile; the others are switched off in the staged control file
+OUTPUT_PROFILES: Dict[str, FrozenSet[str]] = {
+    "full": frozenset(OUTPUT_GROUPS),
+    "calibration": frozenset({"scr", "tsr", "wdo"}),
+    "minimal": frozenset({"scr"}),
+}
+# Kept by every profile: in CLI builds the screen output interval is what writes w2_progress.log (progress,
+# ETA and rate history, the progress abort rules, calibration rungs and time-step probes)
+ALWAYS_KEPT: FrozenSet[str] = frozenset({"scr"})
+# flowbal.csv, read by the volume_error abort rules, is written at the contour (CPL PLOT) interval
+FLOWBAL_GROUP = "cpl"
+_ON = ("ON", "ONV")
+_OFF = "OFF".rjust(8)
+
+
+@dataclass(frozen=True)
+class OutputProfile:
+    name: str  # a key of OUTPUT_PROFILES, or "custom" for an explicit list
+    keep: FrozenSet[str] = field(default_factory=frozenset)
+
+    def as_dict(self) -> Dict[str, object]:
+        return {"name": self.name, "keep": sorted(self.keep)}
+
+
+def parse_profile(spec: Union[None, str, Sequence[str]]) -> Optional[OutputProfile]:
+    """
+    `spec` is a profile name, or output groups to keep as a list or comma-separated string
+    (e.g. "tsr,wdo"). None and "full" leave the control file as it is.
+    """
+    if spec is None:
+        return None
+    if isinstance(spec, str):
+        name = spec.strip().lower()
+        if name in OUTPUT_PROFILES:
+            return None if name == "full" else OutputProfile(name, OUTPUT_PROFILES[name])
+        groups = [g.strip().lower() for g in name.split(",") if g.strip()]
+    else:
+        groups = [str(g).strip().lower() for g in spec]
+    unknown = [g for g in groups if g not in OUTPUT_GROUPS]
+    if unknown:
+        raise ValueError(f"unknown output profile or group {', '.join(unknown)!r}; profiles are "
+                         f"{', '.join(OUTPUT_PROFILES)} and groups {', '.join(OUTPUT_GROUPS)}")
+    return OutputProfile("custom", frozenset(groups))
+
+
+def apply_profile(control: Path, profile: OutputProfile, keep: Sequence[str] = ()) -> List[str]:
+    """
+    Switch off the output groups `profile` does not keep in `control` (a staged w2_con.npt), in place; the
+    ALWAYS_KEPT groups and `keep` stay as they are. Only the ON/OFF fields change, so the fixed-format reads of
+    input.f90 see the same cards. Returns the groups that were on and are now off.
+    """
+    lines = read_lines(control)
+    nwb = int(fields(lines[find_card(lines, "GRID")])[0])
+    kept = profile.keep | ALWAYS_KEPT | frozenset(keep)
+    disabled = []
+    for group, (card, per_wb, k) in OUTPUT_GROUPS.items():
+        if group in kept:
+            continue
+        first = find_card(lines, card)
+        changed = False
+        for i in range(first, first + (nwb if per_wb else 1)):
+            f = fields(lines[i])
+            if k < len(f) and f[k].strip().upper() in _ON:
+                lines[i] = set_field(lines[i], k, _OFF)
+                changed = True
+        if changed:
+            disabled.append(group)
+    if disabled:
+        control.write_bytes("".join(lines).encode("latin-1"))
+    return disabled
+
+
+def stage_profile(workdir: Path, profile: Optional[OutputProfile],
+                  keep: Sequence[str] = ()) -> Optional[Dict[str, object]]:
+    """
+    Apply `profile` to the control file staged in `workdir`, keeping the groups in `keep` as well (those the
+    run's abort rules read); returns what to record in the run metadata.
+    """
+    if profile is None:
+        return None
+    control = workdir / CONTROL_NPT
+    if not control.is_file():
+        raise FileNotFoundError(f"output profile {profile.name!r} needs {CONTROL_NPT} in the inputs")
+    try:
+        disabled = apply_profile(control, profile, keep)
+    except (ValueError, IndexError) as e:
+        raise ValueError(f"cannot apply output profile {profile.name!r} to {CONTROL_NPT}: {e}")
+    return dict(profile.as_dict(), disabled=disabled)
@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import os
+import resource
+import signal
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .retention import parse_size
+
+
+# Resource limits of model processes, configured from the environment and overridable per run:
+#   W2_RUN_CPU=<cores>          CPU quota (cgroup cpu.max), e.g. 1.5
+#   W2_RUN_MEMORY=<bytes>       memory limit (cgroup memory.max; without cgroups RLIMIT_DATA, the heap and
+#                               anonymous mappings, as thread stacks make the address space much larger)
+#   W2_RUN_IO_WEIGHT=<1-10000>  proportional I/O share (cgroup io.weight; needs an io scheduler that honours it)
+#   W2_RUN_MAX_FILE=<bytes>     largest file a run may write (RLIMIT_FSIZE), against runaway output
+#   W2_CGROUP_ROOT=<dir>        cgroup v2 directory delegated to the runner (e.g. systemd Delegate=yes); every
+#                               process gets a child cgroup w2-<run_id>. Without it, or when it cannot be used,
+#                               the limits that have an rlimit fall back to setrlimit and the others are not applied.
+# Sizes accept K, M, G and T suffixes.
+CGROUP_ROOT_ENV = "W2_CGROUP_ROOT"
+CPU_PERIOD_US = 100000
+_CONTROLLERS = {"cpu": "cpu", "memory": "memory", "io_weight": "io"}
+_RLIMIT_NAMES = {resource.RLIMIT_FSIZE: "RLIMIT_FSIZE", resource.RLIMIT_DATA: "RLIMIT_DATA"}
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+# Counters that add up over the processes of a run (a checkpointed run resumes as a new process)
+_ADDITIVE = ("cpu_seconds", "user_seconds", "system_seconds", "read_bytes", "write_bytes",
+             "voluntary_ctx_switches", "involuntary_ctx_switches", "throttled_seconds", "oom_kills")
+# Usage exported by GET /metrics: key, Prometheus type, help
+_METRICS = (
+    ("cpu_seconds", "counter", "CPU time of the model process(es), user and system."),
+    ("peak_rss_bytes", "gauge", "Peak resident memory."),
+    ("read_bytes", "counter", "Bytes read from storage."),
+    ("write_bytes", "counter", "Bytes written to storage."),
+    ("voluntary_ctx_switches", "counter", "Voluntary context switches."),
+    ("involuntary_ctx_switches", "counter", "Involuntary context switches."),
+    ("throttled_seconds", "counter", "Time held back by the CPU quota."),
+    ("oom_kills", "counter", "Processes killed at the memory limit."),
+)
+
+
+@dataclass(frozen=True)
+class ResourceLimits:
+    cpu: Optional[float] = None  # cores
+    memory: Optional[int] = None  # bytes
+    io_weight: Optional[int] = None
+    max_file: Optional[int] = None  # bytes
+
+    @classmethod
+    def from_env(cls) -> "ResourceLimits":
+        return parse_limits({"cpu": os.environ.get("W2_RUN_CPU"), "memory": os.environ.get("W2_RUN_MEMORY"),
+                             "io_weight": os.environ.get("W2_RUN_IO_WEIGHT"),
+                             "max_file": os.environ.get("W2_RUN_MAX_FILE")})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {k: v for k, v in asdict(self).items() if v is not None}
+
+
+def parse_limits(spec: Optional[Dict[str, Any]], default: Optional[ResourceLimits] = None) -> ResourceLimits:
+    """Limits from `spec` (cpu, memory, io_weight, max_file; sizes as numbers or text), else from `default`."""
+    base = asdict(default) if default else {}
+    spec = {k: v for k, v in (spec or {}).items() if v is not None and str(v).strip()}
+    unknown = sorted(set(spec) - set(asdict(ResourceLimits())))
+    if unknown:
+        raise ValueError(f"unknown resource limit(s) {', '.join(unknown)}")
+    try:
+        if "cpu" in spec:
+            base["cpu"] = float(spec["cpu"])
+        for key in ("memory", "max_file"):
+            if key in spec:
+                base[key] = parse_size(str(spec[key]))
+        if "io_weight" in spec:
+            base["io_weight"] = int(spec["io_weight"])
+    except ValueError:
+        raise ValueError(f"invalid resource limits {spec!r}")
+    limits = ResourceLimits(**base)
+    if limits.cpu is not None and limits.cpu <= 0.0:
+        raise ValueError("cpu must be a positive number of cores")
+    if limits.memory is not None and limits.memory <= 0 or limits.max_file is not None and limits.max_file <= 0:
+        raise ValueError("memory and max_file must be positive sizes")
+    if limits.io_weight is not None and not 1 <= limits.io_weight <= 10000:
+        raise ValueError("io_weight must be between 1 and 10000")
+    return limits
+
+
+def cgroup_root_from_env() -> Optional[Path]:
+    val = os.environ.get(CGROUP_ROOT_ENV)
+    return Path(val) if val and val.strip() else None
+
+
+def combine(prev: Optional[Dict[str, Any]], usage: Dict[str, Any]) -> Dict[str, Any]:
+    """Usage of a run over its processes so far: counters add up, peaks take the larger."""
+    if not prev:
+        return usage
+    out = dict(usage)
+    for k, v in prev.items():
+        if k in _ADDITIVE and isinstance(v, (int, float)):
+            out[k] = (out.get(k) or 0) + v
+        elif k == "peak_rss_bytes" and v is not None:
+            out[k] = max(v, out.get(k) or 0)
+    return out
+
+
+def limit_failure(returncode: Optional[int], usage: Dict[str, Any]) -> Optional[str]:
+    """Why a failed run failed, when a limit stopped it."""
+    if usage.get("oom_kills"):
+        return "killed at the memory limit"
+    if returncode == -signal.SIGXFSZ:
+        return "a file reached the max_file limit"
+    return None
+
+
+def metrics_text(runs: List[Tuple[Dict[str, str], str, Dict[str, Any]]]) -> str:
+    """Prometheus text exposition of (labels, status, usage) per run, and the number of runs per status."""
+    out = ["# HELP w2_runs Runs known to the API by status.", "# TYPE w2_runs gauge"]
+    counts: Dict[str, int] = {}
+    for _, status, _ in runs:
+        counts[status] = counts.get(status, 0) + 1
+    out += [f'w2_runs{{status="{st}"}} {n}' for st, n in sorted(counts.items())]
+    for key, kind, help_ in _METRICS:
+        rows = [(labels, usage[key]) for labels, _, usage in runs if usage.get(key) is not None]
+        if not rows:
+            continue
+        out += [f"# HELP w2_run_{key} {help_}", f"# TYPE w2_run_{key} {kind}"]
+        for labels, value in rows:
+            text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            out.append(f"w2_run_{key}{{{text}}} {value}")
+    return "\n".join(out) + "\n"
+
+
+def _escape(value: Optional[str]) -> str:
+    return (value or "").replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _read_kv(path: Path) -> Dict[str, str]:
+    out = {}
+    with open(path, "r", encoding="ascii", errors="ignore") as f:
+        for line in f:
+            key, _, val = line.partition(":" if ":" in line else " ")
+            out[key.strip()] = val.strip()
+    return out
+
+
+class RunResources:
+    """
+    Confines one model process (its own cgroup, else rlimits) and measures what it used: CPU seconds, peak
+    RSS, bytes read and written and context switches. /proc is sampled while the process lives (by whoever
+    polls it); counters the cgroup keeps are read once more after it has exited.
+    """
+
+    def __init__(self, run_id: str, limits: ResourceLimits, cgroup_root: Optional[Path] = None) -> None:
+        self.run_id = run_id
+        self.limits = limits
+        self.cgroup_root = cgroup_root
+        self.cgroup: Optional[Path] = None  # while it exists
+        self.cgroup_name: Optional[str] = None
+        self.mode = "none"  # cgroup | rlimit | none: how the limits were applied
+        self.errors: List[str] = []
+        self.pid: Optional[int] = None
+        self._proc: Dict[str, Any] = {}
+
+    def prepare(self) -> None:
+        """Set the limits up before the process starts: its cgroup, with the controllers' values written."""
+        if self.cgroup_root is not None:
+            try:
+                self._make_cgroup()
+                self.mode = "cgroup"
+            except OSError as e:
+                self.errors.append(f"cgroup: {e}")
+                self._remove_cgroup()
+        if self.mode == "none" and self._rlimits(False):
+            self.mode = "rlimit"
+        if self.mode != "cgroup" and (self.limits.cpu is not None or self.limits.io_weight is not None):
+            self.errors.append("cpu and io_weight limits need a cgroup (W2_CGROUP_ROOT)")
+
+    def _rlimits(self, in_cgroup: bool) -> List[Tuple[int, int]]:
+        out = []
+        if self.limits.max_file is not None:
+            out.append((resource.RLIMIT_FSIZE, self.limits.max_file))
+        if self.limits.memory is not None and not in_cgroup:
+            out.append((resource.RLIMIT_DATA, self.limits.memory))
+        return out
+
+    def preexec(self) -> None:
+        """
+        Popen's preexec_fn: runs in the child between fork and exec, so that the model and whatever it starts
+        are confined from their first instruction. Joins the cgroup (memory falls back to RLIMIT_DATA when that
+        fails) and sets the rlimits; `attach` checks the outcome from the parent.
+        """
+        in_cgroup = False
+        if self.cgroup is not None:
+            try:
+                fd = os.open(self.cgroup / "cgroup.procs", os.O_WRONLY)
+                try:
+                    os.write(fd, b"0")  # 0: the writing process
+                finally:
+                    os.close(fd)
+                in_cgroup = True
+            except OSError:
+                pass
+        for which, value in self._rlimits(in_cgroup):
+            try:
+                resource.setrlimit(which, (value, value))
+            except (OSError, ValueError):
+                pass
+
+    def attach(self, pid: int) -> None:
+        """Record a process started with `preexec` and report the limits that did not take hold."""
+        self.pid = pid
+        try:
+            in_cgroup = self.cgroup is not None and any(
+                line.endswith("/" + self.cgroup_name)
+                for line in (Path("/proc") / str(pid) / "cgroup").read_text().splitlines())
+            if self.cgroup is not None and not in_cgroup:
+                self.errors.append(f"cgroup: could not move the process into {self.cgroup}")
+                self.mode = "rlimit" if self._rlimits(False) else "none"
+            for which, value in self._rlimits(in_cgroup):
+                if resource.prlimit(pid, which)[0] != value:
+                    self.errors.append(f"rlimit: {_RLIMIT_NAMES[which]} not applied")
+        except OSError:
+            pass  # already exited (and reaped); nothing left to check
+
+    def _make_cgroup(self) -> None:
+        root = self.cgroup_root
+        if not (root / "cgroup.controllers").is_file():
+            raise OSError(f"{root} is not a cgroup v2 directory")
+        wanted = {_CONTROLLERS[k] for k, v in asdict(self.limits).items() if v is not None and k in _CONTROLLERS}
+        enabled = set((root / "cgroup.subtree_control").read_text().split())
+        missing = sorted(wanted - enabled)
+        if missing:
+            (root / "cgroup.subtree_control").write_text(" ".join("+" + c for c in missing))
+        self.cgroup_name = f"w2-{self.run_id}"
+        self.cgroup = root / self.cgroup_name
+        self.cgroup.mkdir(exist_ok=True)
+        if self.limits.cpu is not None:
+            (self.cgroup / "cpu.max").write_text(f"{int(self.limits.cpu * CPU_PERIOD_US)} {CPU_PERIOD_US}")
+        if self.limits.memory is not None:
+            (self.cgroup / "memory.max").write_text(str(self.limits.memory))
+            swap = self.cgroup / "memory.swap.max"
+            if swap.exists():
+                swap.write_text("0")  # otherwise memory.max only moves the overflow to swap
+        if self.limits.io_weight is not None:
+            try:
+                (self.cgroup / "io.weight").write_text(f"default {self.limits.io_weight}")
+            except OSError as e:
+                self.errors.append(f"io.weight: {e}")  # the device's scheduler has no weights
+        if not os.access(self.cgroup / "cgroup.procs", os.W_OK):
+            raise OSError(f"{self.cgroup / 'cgroup.procs'} is not writable")
+
+    def sample(self) -> None:
+        """Read the process's counters from /proc (a no-op once it has exited)."""
+        if self.pid is None:
+            return
+        proc = Path("/proc") / str(self.pid)
+        sample: Dict[str, Any] = {}
+        try:
+            stat = (proc / "stat").read_text().rsplit(")", 1)[1].split()
+            if stat[0] == "Z":
+                return  # exited; the counters are no longer the process's own
+            user, system = int(stat[11]) / _CLK_TCK, int(stat[12]) / _CLK_TCK
+            sample.update(user_seconds=user, system_seconds=system, cpu_seconds=user + system)
+            status = _read_kv(proc / "status")
+            if "VmHWM" in status:
+                sample["peak_rss_bytes"] = int(status["VmHWM"].split()[0]) * 1024
+            sample["voluntary_ctx_switches"] = int(status.get("voluntary_ctxt_switches", 0))
+            sample["involuntary_ctx_switches"] = int(status.get("nonvoluntary_ctxt_switches", 0))
+            io = _read_kv(proc / "io")
+            sample.update(read_bytes=int(io.get("read_bytes", 0)), write_bytes=int(io.get("write_bytes", 0)))
+        except (OSError, IndexError, ValueError):
+            pass
+        if sample:
+            self._proc.update(sample)
+
+    def _cgroup_usage(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        cg = self.cgroup
+        if cg is None:
+            return out
+        try:
+            cpu = _read_kv(cg / "cpu.stat")
+            out.update(cpu_seconds=int(cpu["usage_usec"]) / 1e6, user_seconds=int(cpu["user_usec"]) / 1e6,
+                       system_seconds=int(cpu["system_usec"]) / 1e6)
+            if "throttled_usec" in cpu:
+                out["throttled_seconds"] = int(cpu["throttled_usec"]) / 1e6
+        except (OSError, KeyError, ValueError):
+            pass
+        try:
+            out["peak_rss_bytes"] = int((cg / "memory.peak").read_text())  # Linux 5.19+
+        except (OSError, ValueError):
+            pass
+        try:
+            out["oom_kills"] = int(_read_kv(cg / "memory.events").get("oom_kill", 0))
+        except (OSError, ValueError):
+            pass
+        try:
+            rbytes = wbytes = 0
+            for line in (cg / "io.stat").read_text().splitlines():
+                for item in line.split()[1:]:
+                    key, _, val = item.partition("=")
+                    if key == "rbytes":
+                        rbytes += int(val)
+                    elif key == "wbytes":
+                        wbytes += int(val)
+            out.update(read_bytes=rbytes, write_bytes=wbytes)
+        except (OSError, ValueError):
+            pass
+        return out
+
+    def usage(self) -> Dict[str, Any]:
+        out = dict(self._proc)
+        out.update(self._cgroup_usage())
+        return out
+
+    def describe(self, usage: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return {"mode": self.mode, "cgroup": self.cgroup_name,
+                "limits": self.limits.as_dict(), "errors": self.errors,
+                "usage": self.usage() if usage is None else usage}
+
+    def close(self) -> Dict[str, Any]:
+        """Final usage, once the process has exited; removes its cgroup."""
+        usage = self.usage()
+        self._remove_cgroup()
+        return usage
+
+    def _remove_cgroup(self) -> None:
+        if self.cgroup is None:
+            return
+        try:
+            self.cgroup.rmdir()  # cgroupfs removes the interface files with the directory
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.errors.append(f"cgroup: cannot remove {self.cgroup}: {e}")
+        self.cgroup = None
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from .artifacts import COMPRESS_BLOCK, COMPRESS_SUFFIX, MANIFEST_NAME, Manifest
+
+
+# Retention of finished runs, configured from the environment:
+#   W2_RETENTION_COMPRESS=on|off     gzip text outputs and logs once a run finishes (default on)
+#   W2_RETENTION_MIN_SIZE=<bytes>    smallest file worth compressing (default 64K)
+#   W2_RETENTION_DEDUPE=on|off       hard-link identical input files to one copy in runs/.store (default on)
+#   W2_RETENTION_MAX_AGE_DAYS=<d>    delete finished run directories older than this
+#   W2_RETENTION_MAX_BYTES=<bytes>   delete the oldest finished run directories while runs/ is larger than this
+# Sizes accept K, M, G and T suffixes.
+STORE_DIR = ".store"
+COMPRESS_SUFFIXES = (".opt", ".csv", ".dat", ".txt", ".log", ".out")  # text; binary stores stay as written
+
+
+def _on(name: str, default: bool) -> bool:
+    val = os.environ.get(name)
+    if val is None or not val.strip():
+        return default
+    return val.strip().lower() in ("on", "1", "yes", "true")
+
+
+def parse_size(text: str) -> int:
+    t = text.strip().upper().rstrip("B")
+    mult = 1
+    if t and t[-1] in "KMGT":
+        mult = 1024 ** ("KMGT".index(t[-1]) + 1)
+        t = t[:-1]
+    return int(float(t) * mult)
+
+
+@dataclass
+class RetentionPolicy:
+    compress: bool = True
+    min_size: int = 64 * 1024
+    dedupe: bool = True
+    max_age_days: Optional[float] = None
+    max_bytes: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        age = os.environ.get("W2_RETENTION_MAX_AGE_DAYS")
+        size = os.environ.get("W2_RETENTION_MAX_BYTES")
+        min_size = os.environ.get("W2_RETENTION_MIN_SIZE")
+        return cls(
+            compress=_on("W2_RETENTION_COMPRESS", True),
+            min_size=parse_size(min_size) if min_size else 64 * 1024,
+            dedupe=_on("W2_RETENTION_DEDUPE", True),
+            max_age_days=float(age) if age else None,
+            max_bytes=parse_size(size) if size else None,
+        )
+
+
+def compress_file(src: Path, dest: Path) -> tuple:
+    """gzip `src` into `dest` as one member per COMPRESS_BLOCK bytes; returns (member offsets, sha256 of src)."""
+    blocks = []
+    h = hashlib.sha256()
+    with open(src, "rb") as f, open(dest, "wb") as out:
+        for block in iter(lambda: f.read(COMPRESS_BLOCK), b""):
+            h.update(block)
+            blocks.append(out.tell())
+            out.write(gzip.compress(block, compresslevel=6, mtime=0))
+    return blocks, h.hexdigest()
+
+
+class RetentionService:
+    """Compresses and dedupes finished runs, evicts old ones and measures disk usage of runs/."""
+
+    def __init__(self, runs_root: Path, policy: Optional[RetentionPolicy] = None) -> None:
+        self.runs_root = runs_root
+        self.store = runs_root / STORE_DIR
+        self.policy = policy or RetentionPolicy.from_env()
+        self._lock = threading.Lock()
+        self._usage: Optional[Dict[str, Any]] = None
+
+    def process(self, manifest: Manifest) -> None:
+        """Compress outputs and dedupe inputs of a finalized run."""
+        changed = False
+        for rel in list(manifest.paths):
+            e = manifest.entries[rel]
+            try:
+                if e.kind == "inputs" and self.policy.dedupe:
+                    changed |= self._dedupe(manifest, rel)
+                elif (e.kind != "inputs" and self.policy.compress and e.stored is None
+                      and e.size >= self.policy.min_size and rel.lower().endswith(COMPRESS_SUFFIXES)):
+                    changed |= self._compress(manifest, rel)
+            except OSError:
+                continue
+        if changed:
+            manifest.generation += 1
+            manifest.save()
+
+    def _compress(self, manifest: Manifest, rel: str) -> bool:
+        src = manifest.root / rel
+        dest = src.with_name(src.name + COMPRESS_SUFFIX)
+        if dest.exists():
+            return False
+        st = src.stat()
+        tmp = dest.with_name(dest.name + ".tmp")
+        blocks, sha = compress_file(src, tmp)
+        if tmp.stat().st_size > 0.9 * st.st_size:
+            tmp.unlink()
+            return False
+        os.replace(tmp, dest)
+        os.utime(dest, ns=(st.st_atime_ns, st.st_mtime_ns))
+        src.unlink()
+        e = manifest.entries[rel]
+        e.stored = dest.relative_to(manifest.root).as_posix()
+        e.blocks = blocks
+        e.sha256 = sha
+        return True
+
+    def _dedupe(self, manifest: Manifest, rel: str) -> bool:
+        src = manifest.root / rel
+        st = src.stat()
+        if st.st_nlink > 1:
+            return False  # already shared
+        sha = manifest.checksum(rel)
+        if not sha:
+            return False
+        shared = self.store / sha[:2] / sha
+        if not shared.exists():
+            shared.parent.mkdir(parents=True, exist_ok=True)
+            os.link(src, shared)
+            os.chmod(shared, 0o444)
+        else:
+            tmp = src.with_name(src.name + ".link")
+            os.link(shared, tmp)
+            os.replace(tmp, src)
+        e = manifest.entries[rel]
+        e.mtime_ns = src.stat().st_mtime_ns
+        e.sha256 = sha
+        return True
+
+    def evict(self, active: Iterable[str]) -> List[str]:
+        """Delete finished run directories past the age or size limits, oldest first; returns their ids."""
+        keep: Set[str] = set(active)
+        now = time.time()
+        finished = []
+        for d in self.runs_root.iterdir():
+            if not d.is_dir() or d.name.startswith(".") or d.name in keep:
+                continue
+            marker = d / MANIFEST_NAME
+            try:
+                finished.append((marker.stat().st_mtime if marker.exists() else d.stat().st_mtime, d))
+            except OSError:
+                continue
+        finished.sort()
+        evicted = []
+        if self.policy.max_age_days is not None:
+            cutoff = now - self.policy.max_age_days * 86400.0
+            while finished and finished[0][0] < cutoff:
+                evicted.append(finished.pop(0)[1])
+        if self.policy.max_bytes is not None:
+            total = self.usage(refresh=True)["runs_bytes"] - sum(self._tree_bytes(d, set()) for d in evicted)
+            while finished and total > self.policy.max_bytes:
+                d = finished.pop(0)[1]
+                total -= self._tree_bytes(d, set())
+                evicted.append(d)
+        for d in evicted:
+            shutil.rmtree(d, ignore_errors=True)
+        if evicted:
+            self._collect_store()
+        self.usage(refresh=True)
+        return [d.name for d in evicted]
+
+    def _collect_store(self) -> None:
+        # store files no run links to any more
+        if not self.store.is_dir():
+            return
+        for p in self.store.glob("*/*"):
+            try:
+                if p.stat().st_nlink == 1:
+                    p.unlink()
+            except OSError:
+                continue
+
+    @staticmethod
+    def _tree_bytes(root: Path, seen: Set[int]) -> int:
+        total = 0
+        stack = [root]
+        while stack:
+            try:
+                it = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with it:
+                for de in it:
+                    if de.is_dir(follow_symlinks=False):
+                        stack.append(Path(de.path))
+                    elif de.is_file(follow_symlinks=False):
+                        st = de.stat(follow_symlinks=False)
+                        if st.st_nlink > 1:
+                            if st.st_ino in seen:
+                                continue
+                            seen.add(st.st_ino)
+                        total += st.st_blocks * 512
+        return total
+
+    def usage(self, refresh: bool = False) -> Dict[str, Any]:
+        """Bytes on disk under runs/ (hard-linked inputs counted once), measured after each retention pass."""
+        with self._lock:
+            if self._usage is None or refresh:
+                self._usage = {
+                    "runs_bytes": self._tree_bytes(self.runs_root, set()),
+                    "store_bytes": self._tree_bytes(self.store, set()),
+                    "measured_at": datetime.utcnow(),
+                }
+            usage = dict(self._usage)
+        fs = shutil.disk_usage(self.runs_root)
+        usage.update(fs_total_bytes=fs.total, fs_free_bytes=fs.free)
+        return usage
@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import math
+import os
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .artifacts import COMPRESS_SUFFIX
+from .observations import ObservationSet, Series
+
+
+PROFILE_TOLERANCE = 0.5  # days between an observed profile and the nearest model profile
+TABLE_CACHE = 256  # parsed model outputs kept in memory, least recently used dropped first
+PLAN_CACHE = 1024
+
+
+def _norm(name: str) -> str:
+    return name.strip().lower()
+
+
+def _base(name: str) -> str:
+    return _norm(name.split("(", 1)[0])
+
+
+class _Incremental:
+    """A model output parsed as it grows: only the lines appended since the last read are parsed."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.offset = 0
+        self.mtime_ns = -1
+        self._partial = b""
+
+    def read_new(self) -> Iterable[str]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            gz = self.path.with_name(self.path.name + COMPRESS_SUFFIX)
+            if self.offset == 0 and gz.is_file():  # compressed by retention once the run finished
+                self.offset = -1
+                with gzip.open(gz, "rb") as f:
+                    return f.read().decode("latin-1").splitlines()
+            return []
+        if st.st_size < self.offset or self.offset < 0:  # rewritten
+            self.reset()
+        if st.st_size == self.offset:
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = self._partial + f.read(st.st_size - self.offset)
+        self.offset = st.st_size
+        self.mtime_ns = st.st_mtime_ns
+        cut = data.rfind(b"\n") + 1
+        self._partial = data[cut:]  # a line the model is still writing
+        return data[:cut].decode("latin-1").splitlines()
+
+    def reset(self) -> None:
+        self.offset = 0
+        self._partial = b""
+
+
+class SeriesTable(_Incremental):
+    """tsr_*.csv and withdrawal outputs (two_*.csv, ...): a JDAY header line, then comma-separated rows."""
+
+    def __init__(self, path: Path) -> None:
+        super().__init__(path)
+        self.reset()
+
+    def reset(self) -> None:
+        super().reset()
+        self.columns: List[str] = []
+        self.data: List[array] = []
+
+    def refresh(self) -> None:
+        for line in self.read_new():
+            parts = [p.strip() for p in line.split(",")]
+            if parts and parts[-1] == "":
+                parts.pop()
+            if not self.columns:
+                if parts and parts[0].upper() == "JDAY":
+                    self.columns = parts
+                    self.data = [array("d") for _ in parts]
+                continue
+            try:
+                row = [float(p) for p in parts[:len(self.columns)]]
+            except ValueError:
+                continue
+            if len(row) < len(self.columns):
+                continue
+            for col, v in zip(self.data, row):
+                col.append(v)
+
+    def column(self, variable: str) -> Optional[array]:
+        want = _norm(variable)
+        for k, name in enumerate(self.columns):
+            if k and (_norm(name) == want or _base(name) == want):
+                return self.data[k]
+        return None
+
+    @property
+    def jday(self) -> array:
+        return self.data[0] if self.data else array("d")
+
+
+class ProfileTable(_Incremental):
+    """spr<jw>.opt: per constituent and output time, one row per layer of Depth and (Elevation, value) per segment."""
+
+    def __init__(self, path: Path) -> None:
+        super().__init__(path)
+        self.reset()
+
+    def reset(self) -> None:
+        super().reset()
+        self.segments: List[int] = []
+        # (constituent, segment) -> times and, per time, the (depth, value) pairs in depth order
+        self.profiles: Dict[Tuple[str, int], Tuple[array, List[Tuple[array, array]]]] = {}
+
+    def refresh(self) -> None:
+        for line in self.read_new():
+            parts = [p.strip() for p in line.split(",")]
+            if not self.segments:
+                if parts and parts[0].lower() == "constituent":
+                    self.segments = [int("".join(c for c in p if c.isdigit())) for p in parts[4::2]
+                                     if any(c.isdigit() for c in p)]
+                continue
+            try:
+                jday, depth = float(parts[1]), float(parts[2])
+            except (IndexError, ValueError):
+                continue
+            name = _norm(parts[0])
+            for j, seg in enumerate(self.segments):
+                try:
+                    value = float(parts[4 + 2 * j])
+                except (IndexError, ValueError):
+                    continue  # below the bottom of this segment
+                times, profiles = self.profiles.setdefault((name, seg), (array("d"), []))
+                if not times or times[-1] != jday:
+                    times.append(jday)
+                    profiles.append((array("d"), array("d")))
+                profiles[-1][0].append(depth)
+                profiles[-1][1].append(value)
+
+
+def metrics(obs: Sequence[float], mod: Sequence[float]) -> Dict[str, Optional[float]]:
+    """RMSE, MAE, bias (model - observed), Nash-Sutcliffe and Kling-Gupta efficiencies of matched pairs."""
+    n = len(obs)
+    out: Dict[str, Optional[float]] = {"n": n, "rmse": None, "mae": None, "bias": None, "nse": None, "kge": None}
+    if n == 0:
+        return out
+    diff = [m - o for o, m in zip(obs, mod)]
+    sse = math.fsum(d * d for d in diff)
+    mo, mm = math.fsum(obs) / n, math.fsum(mod) / n
+    out.update(rmse=math.sqrt(sse / n), mae=math.fsum(abs(d) for d in diff) / n, bias=mm - mo)
+    if n < 2:
+        return out
+    so = math.fsum((o - mo) ** 2 for o in obs)
+    sm = math.fsum((m - mm) ** 2 for m in mod)
+    if so > 0.0:
+        out["nse"] = 1.0 - sse / so
+    if so > 0.0 and sm > 0.0 and mo != 0.0:
+        r = math.fsum((o - mo) * (m - mm) for o, m in zip(obs, mod)) / math.sqrt(so * sm)
+        out["kge"] = 1.0 - math.sqrt((r - 1.0) ** 2 + (math.sqrt(sm / so) - 1.0) ** 2 + (mm / mo - 1.0) ** 2)
+    return out
+
+
+class SkillEngine:
+    """
+    Scores runs against observation sets. Model outputs are parsed incrementally (a live run only parses what
+    it appended), and the interpolation of a series onto the observation times is planned once per distinct
+    model time axis, so the members of a batch that write at the same times share one plan and scoring them is
+    a gather and a weighted sum per series. Results are cached per (run, observation set) until one of the
+    outputs they read changes.
+    """
+
+    def __init__(self, tolerance: float = PROFILE_TOLERANCE) -> None:
+        self.tolerance = tolerance
+        self._tables: "OrderedDict[Path, _Incremental]" = OrderedDict()
+        self._plans: "OrderedDict[Tuple[str, str, bytes], Tuple[array, array, array]]" = OrderedDict()
+        self._results: Dict[Tuple[str, str, Optional[float]], Tuple[tuple, Dict[str, object]]] = {}
+        self._lock = threading.Lock()
+
+    def _table(self, path: Path, profile: bool) -> Optional[_Incremental]:
+        t = self._tables.get(path)
+        if t is None:
+            if not path.is_file() and not path.with_name(path.name + COMPRESS_SUFFIX).is_file():
+                return None
+            t = ProfileTable(path) if profile else SeriesTable(path)
+            self._tables[path] = t
+        self._tables.move_to_end(path)
+        while len(self._tables) > TABLE_CACHE:
+            self._tables.popitem(last=False)
+        t.refresh()
+        return t
+
+    def _plan(self, obs_id: str, s: Series, t: array, until: Optional[float]) -> Tuple[array, array, array]:
+        """
+        For the observations within the model times `t` (and up to `until`): their index, the index of the model
+        time at or after each, and the weight of that later time in a linear interpolation.
+        """
+        key = (obs_id, s.key, until, hashlib.blake2b(t.tobytes(), digest_size=16).digest())
+        plan = self._plans.get(key)
+        if plan is not None:
+            self._plans.move_to_end(key)
+            return plan
+        which, idx, w = array("l"), array("l"), array("d")
+        if len(t):
+            t0, t1 = t[0], (t[-1] if until is None else min(t[-1], until))
+            for k, x in enumerate(s.jday):
+                if x < t0 or x > t1:
+                    continue
+                i = max(bisect_left(t, x), 1) if len(t) > 1 else 0
+                span = t[i] - t[i - 1] if i else 0.0
+                which.append(k)
+                idx.append(i)
+                w.append((x - t[i - 1]) / span if span > 0.0 else 1.0)
+        plan = (which, idx, w)
+        self._plans[key] = plan
+        while len(self._plans) > PLAN_CACHE:
+            self._plans.popitem(last=False)
+        return plan
+
+    def _match_series(self, obs_id: str, s: Series, table: SeriesTable,
+                      until: Optional[float]) -> Tuple[List[float], List[float]]:
+        col = table.column(s.variable)
+        if col is None:
+            raise KeyError(f"{s.file} has no column {s.variable!r}")
+        t = table.jday
+        n = min(len(t), len(col))
+        if n < len(t):
+            t = t[:n]
+        which, idx, w = self._plan(obs_id, s, t, until)
+        value = s.value
+        obs = [value[k] for k in which]
+        mod = [col[i - 1] + wi * (col[i] - col[i - 1]) if i else col[0] for i, wi in zip(idx, w)]
+        return obs, mod
+
+    def _match_profile(self, s: Series, table: ProfileTable,
+                       until: Optional[float]) -> Tuple[List[float], List[float]]:
+        entry = table.profiles.get((_norm(s.variable), s.segment))
+        if entry is None:
+            raise KeyError(f"{s.file} has no {s.variable!r} profiles for segment {s.segment}")
+        times, profiles = entry
+        obs, mod = [], []
+        for x, depth, value in zip(s.jday, s.depth, s.value):
+            if until is not None and x > until:
+                break
+            i = bisect_left(times, x)
+            near = [j for j in (i - 1, i) if 0 <= j < len(times)]
+            if not near:
+                continue
+            j = min(near, key=lambda j: abs(times[j] - x))
+            if abs(times[j] - x) > self.tolerance:
+                continue
+            depths, values = profiles[j]
+            if depth > depths[-1]:
+                continue  # below the modelled bottom
+            k = bisect_left(depths, depth)
+            if k == 0:
+                m = values[0]
+            else:
+                span = depths[k] - depths[k - 1]
+                m = values[k - 1] + (depth - depths[k - 1]) / span * (values[k] - values[k - 1]) if span else values[k]
+            obs.append(value)
+            mod.append(m)
+        return obs, mod
+
+    def score(self, run_id: str, root: Path, obs: ObservationSet, until: Optional[float] = None) -> Dict[str, object]:
+        """
+        Skill of the run whose outputs are under `root`, over whatever output it has written so far and the
+        observations up to day `until`.
+        """
+        with self._lock:
+            return self._score(run_id, root, obs, until)
+
+    def score_many(self, runs: Sequence[Tuple[str, Path]], obs: ObservationSet) -> Dict[str, Dict[str, object]]:
+        """Skill of several (run_id, root) runs, scored in one pass so they share interpolation plans."""
+        with self._lock:
+            return {run_id: self._score(run_id, root, obs, None) for run_id, root in runs}
+
+    def _score(self, run_id: str, root: Path, obs: ObservationSet, until: Optional[float]) -> Dict[str, object]:
+        files = sorted({s.file for s in obs.series})
+        token = []
+        for f in files:
+            try:
+                st = os.stat(root / f)
+            except OSError:
+                try:
+                    st = os.stat(root / (f + COMPRESS_SUFFIX))
+                except OSError:
+                    token.append((f, None, None))
+                    continue
+            token.append((f, st.st_size, st.st_mtime_ns))
+        token = tuple(token)
+        cached = self._results.get((run_id, obs.obs_id, until))
+        if cached is not None and cached[0] == token:
+            return cached[1]
+        series_out = []
+        all_obs: List[float] = []
+        all_mod: List[float] = []
+        matched = total = 0
+        for s in obs.series:
+            observed = s.n if until is None else bisect_right(s.jday, until)
+            total += observed
+            entry: Dict[str, object] = {"key": s.key}
+            table = self._table(root / s.file, s.is_profile)
+            if table is None:
+                entry.update(metrics([], []), matched=0, observed=observed, error="output not written")
+                series_out.append(entry)
+                continue
+            try:
+                if s.is_profile:
+                    o, m = self._match_profile(s, table, until)
+                else:
+                    o, m = self._match_series(obs.obs_id, s, table, until)
+            except KeyError as e:
+                entry.update(metrics([], []), matched=0, observed=observed, error=str(e.args[0]))
+                series_out.append(entry)
+                continue
+            entry.update(metrics(o, m), matched=len(o), observed=observed)
+            series_out.append(entry)
+            matched += len(o)
+            all_obs += o
+            all_mod += m
+        result = {
+            "obs_id": obs.obs_id,
+            "until": until,
+            "matched": matched,
+            "observed": total,
+            "coverage": matched / total if total else 0.0,
+            "overall": metrics(all_obs, all_mod),  # pooled over every series
+            "series": series_out,
+        }
+        self._results[(run_id, obs.obs_id, until)] = (token, result)
+        return result
+
+    def forget(self, root: Path) -> None:
+        """Drop the parsed outputs of a run (evicted or removed)."""
+        with self._lock:
+            for p in [p for p in self._tables if p.parent == root]:
+                del self._tables[p]
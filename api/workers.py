@@ -0,0 +1,487 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import signal
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from subprocess import Popen, STDOUT
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from .artifacts import Manifest
+from .inputcache import W2C_SUFFIX
+from .resources import ResourceLimits, RunResources, cgroup_root_from_env, parse_limits
+from .retention import STORE_DIR
+
+
+# Remote execution. With W2_EXECUTOR=workers the API does not start runs itself: it publishes their staged
+# inputs to the content store (runs/.store, the store retention dedupes into) and queues them in a SQLite job
+# store, runs/.jobs.db. Worker agents (python -m api.workers) on any host that mounts runs/ register their
+# slots, claim queued jobs under a lease, run w2_exe_linux in local scratch, renew the lease and push the
+# progress lines every heartbeat, and copy the results back into the run directory. A job whose lease lapses
+# (its worker died or lost the store) is queued again, up to MAX_ATTEMPTS times.
+EXECUTOR_ENV = "W2_EXECUTOR"
+EXECUTORS = ("local", "workers")
+JOB_STORE = ".jobs.db"
+LEASE_SECONDS = 30.0
+HEARTBEAT_SECONDS = 2.0
+MAX_ATTEMPTS = 3
+JOB_FINAL = ("succeeded", "failed", "canceled")
+
+# Rollback journal rather than WAL, which needs shared memory and so does not work on network filesystems
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY, host TEXT, slots INTEGER, running INTEGER DEFAULT 0, lease REAL,
+    started_at REAL, heartbeat_at REAL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    run_id TEXT PRIMARY KEY, seq INTEGER, priority INTEGER, spec TEXT,
+    status TEXT,  -- queued | running | succeeded | failed | canceled
+    worker_id TEXT, attempt INTEGER DEFAULT 0, claimed_at REAL, lease_until REAL,
+    returncode INTEGER, error TEXT, resources TEXT, updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority, seq);
+CREATE TABLE IF NOT EXISTS progress (
+    run_id TEXT, attempt INTEGER, seq INTEGER, line TEXT, at REAL,
+    PRIMARY KEY (run_id, attempt, seq)
+);
+"""
+
+
+@dataclass
+class JobState:
+    run_id: str
+    status: str
+    worker_id: Optional[str]
+    attempt: int
+    claimed_at: Optional[float]
+    returncode: Optional[int]
+    error: Optional[str]
+    resources: Optional[Dict[str, Any]]  # limits and usage, as the worker measured them
+
+
+@dataclass
+class Job:
+    run_id: str
+    attempt: int
+    spec: Dict[str, Any]
+
+
+class JobStore:
+    """Jobs, worker registrations and progress lines in one SQLite file, shared by the API and the workers."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with self._connect() as db:
+            db.executescript(_SCHEMA)
+            columns = {r[1] for r in db.execute("PRAGMA table_info(jobs)")}
+            if "resources" not in columns:  # stores created before resource accounting
+                db.execute("ALTER TABLE jobs ADD COLUMN resources TEXT")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One connection per operation: callers are threads of the API and processes on other hosts
+        db = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    # API side
+    def enqueue(self, run_id: str, priority: int, spec: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._write() as db:
+            seq = db.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM jobs").fetchone()[0]
+            db.execute("INSERT OR REPLACE INTO jobs (run_id, seq, priority, spec, status, updated_at) "
+                       "VALUES (?, ?, ?, ?, 'queued', ?)", (run_id, seq, priority, json.dumps(spec), now))
+
+    def cancel(self, run_id: str) -> None:
+        with self._write() as db:
+            db.execute("UPDATE jobs SET status = 'canceled', updated_at = ? WHERE run_id = ? AND status IN "
+                       "('queued', 'running')", (time.time(), run_id))
+
+    def states(self, run_ids: List[str]) -> Dict[str, JobState]:
+        out: Dict[str, JobState] = {}
+        with self._connect() as db:
+            for k in range(0, len(run_ids), 500):
+                part = run_ids[k:k + 500]
+                rows = db.execute("SELECT run_id, status, worker_id, attempt, claimed_at, returncode, error, "
+                                  f"resources FROM jobs WHERE run_id IN ({','.join('?' * len(part))})", part)
+                out.update((r[0], JobState(*r[:7], json.loads(r[7]) if r[7] else None)) for r in rows)
+        return out
+
+    def progress(self, run_id: str, attempt: int, after: int) -> List[Tuple[int, str, float]]:
+        """Progress lines (seq, line, worker wall time) of an attempt after line `after`."""
+        with self._connect() as db:
+            return db.execute("SELECT seq, line, at FROM progress WHERE run_id = ? AND attempt = ? AND seq > ? "
+                              "ORDER BY seq", (run_id, attempt, after)).fetchall()
+
+    def requeue_expired(self) -> List[str]:
+        """Queue again the running jobs whose lease has lapsed; fail those out of attempts. Returns their ids."""
+        now = time.time()
+        with self._write() as db:
+            rows = db.execute("SELECT run_id, attempt FROM jobs WHERE status = 'running' AND lease_until < ?",
+                              (now,)).fetchall()
+            for run_id, attempt in rows:
+                if attempt >= MAX_ATTEMPTS:
+                    db.execute("UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE run_id = ?",
+                               (f"worker lease lapsed {attempt} times", now, run_id))
+                else:
+                    db.execute("UPDATE jobs SET status = 'queued', worker_id = NULL, lease_until = NULL, "
+                               "updated_at = ? WHERE run_id = ?", (now, run_id))
+                db.execute("DELETE FROM progress WHERE run_id = ? AND attempt = ?", (run_id, attempt))
+        return [r[0] for r in rows]
+
+    def workers(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        with self._connect() as db:
+            rows = db.execute("SELECT worker_id, host, slots, running, lease, started_at, heartbeat_at "
+                              "FROM workers ORDER BY worker_id").fetchall()
+            jobs = dict(db.execute("SELECT worker_id, COUNT(*) FROM jobs WHERE status = 'running' "
+                                   "GROUP BY worker_id").fetchall())
+        return [{"worker_id": w, "host": host, "slots": slots, "running": running, "leased": jobs.get(w, 0),
+                 "started_at": started, "heartbeat_age": now - beat, "alive": now - beat < lease}
+                for w, host, slots, running, lease, started, beat in rows]
+
+    # Worker side
+    def register(self, worker_id: str, host: str, slots: int, lease: float = LEASE_SECONDS) -> None:
+        now = time.time()
+        with self._write() as db:
+            db.execute("INSERT OR REPLACE INTO workers (worker_id, host, slots, running, lease, started_at, "
+                       "heartbeat_at) VALUES (?, ?, ?, 0, ?, ?, ?)", (worker_id, host, slots, lease, now, now))
+
+    def deregister(self, worker_id: str) -> None:
+        with self._write() as db:
+            db.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+
+    def heartbeat(self, worker_id: str, running: int) -> None:
+        with self._write() as db:
+            db.execute("UPDATE workers SET running = ?, heartbeat_at = ? WHERE worker_id = ?",
+                       (running, time.time(), worker_id))
+
+    def claim(self, worker_id: str, n: int, lease: float = LEASE_SECONDS) -> List[Job]:
+        """Lease up to `n` queued jobs, highest priority first, then in queue order."""
+        self.requeue_expired()
+        now = time.time()
+        with self._write() as db:
+            rows = db.execute("SELECT run_id, attempt, spec FROM jobs WHERE status = 'queued' "
+                              "ORDER BY priority DESC, seq LIMIT ?", (n,)).fetchall()
+            for run_id, attempt, _ in rows:
+                db.execute("UPDATE jobs SET status = 'running', worker_id = ?, attempt = ?, claimed_at = ?, "
+                           "lease_until = ?, updated_at = ? WHERE run_id = ?",
+                           (worker_id, attempt + 1, now, now + lease, now, run_id))
+        return [Job(run_id, attempt + 1, json.loads(spec)) for run_id, attempt, spec in rows]
+
+    def renew(self, run_id: str, worker_id: str, attempt: int, lease: float = LEASE_SECONDS,
+              lines: Optional[List[Tuple[int, str, float]]] = None) -> bool:
+        """Extend a lease and append progress lines; False if the job is no longer this worker's to run."""
+        now = time.time()
+        with self._write() as db:
+            cur = db.execute("UPDATE jobs SET lease_until = ?, updated_at = ? WHERE run_id = ? AND worker_id = ? "
+                             "AND attempt = ? AND status = 'running'", (now + lease, now, run_id, worker_id, attempt))
+            if cur.rowcount == 0:
+                return False
+            if lines:
+                db.executemany("INSERT OR IGNORE INTO progress (run_id, attempt, seq, line, at) "
+                               "VALUES (?, ?, ?, ?, ?)", [(run_id, attempt, s, line, at) for s, line, at in lines])
+        return True
+
+    def complete(self, run_id: str, worker_id: str, attempt: int, status: str, returncode: Optional[int],
+                 error: Optional[str] = None, resources: Optional[Dict[str, Any]] = None) -> bool:
+        with self._write() as db:
+            cur = db.execute("UPDATE jobs SET status = ?, returncode = ?, error = ?, resources = ?, "
+                             "lease_until = NULL, updated_at = ? WHERE run_id = ? AND worker_id = ? AND "
+                             "attempt = ? AND status = 'running'",
+                             (status, returncode, error, json.dumps(resources) if resources else None,
+                              time.time(), run_id, worker_id, attempt))
+            return cur.rowcount > 0
+
+    def release(self, run_id: str, worker_id: str, attempt: int) -> None:
+        """Hand a leased job back to the queue (a worker shutting down), without using up an attempt."""
+        with self._write() as db:
+            cur = db.execute("UPDATE jobs SET status = 'queued', worker_id = NULL, lease_until = NULL, "
+                             "attempt = attempt - 1, updated_at = ? WHERE run_id = ? AND worker_id = ? AND "
+                             "attempt = ? AND status = 'running'", (time.time(), run_id, worker_id, attempt))
+            if cur.rowcount:
+                db.execute("DELETE FROM progress WHERE run_id = ? AND attempt = ?", (run_id, attempt))
+
+
+def model_env(workdir: Path) -> Dict[str, str]:
+    """Environment of a w2_exe_linux process running in `workdir`, locally or on a worker."""
+    env = os.environ.copy()
+    # Ensure Intel runtime libs are discoverable even if RUNPATH is ignored
+    extra_ld: list[str] = []
+    for key in ("W2_LD_LIBRARY_PATH", "W2_INTEL_LIBDIR"):
+        val = os.environ.get(key)
+        if val:
+            for part in val.split(":"):
+                p = Path(part)
+                if p.exists():
+                    extra_ld.append(str(p))
+    # Common default locations
+    for p in (
+        Path("/opt/intel/oneapi/compiler/2025.2/lib"),
+        Path("/opt/intel/oneapi/compiler/latest/lib"),
+    ):
+        if p.exists():
+            extra_ld.append(str(p))
+    if extra_ld:
+        current = env.get("LD_LIBRARY_PATH", "")
+        parts = [x for x in current.split(":") if x]
+        for x in extra_ld:
+            if x not in parts:
+                parts.append(x)
+        env["LD_LIBRARY_PATH"] = ":".join(parts)
+    # Read pre-converted input sidecars (python -m api.inputcache) when the inputs carry them
+    if "W2_INPUT_CACHE" not in env and next(workdir.rglob("*" + W2C_SUFFIX), None) is not None:
+        env["W2_INPUT_CACHE"] = "on"
+    return env
+
+
+def publish_file(src: Path, store: Path, sha: str) -> None:
+    """Put a file into the content store under its sha256 (a hard link where possible)."""
+    shared = store / sha[:2] / sha
+    if shared.exists():
+        return
+    shared.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(src, shared)
+    except FileExistsError:
+        pass
+    except OSError:  # another filesystem
+        tmp = shared.with_name(f"{sha}.{os.getpid()}.tmp")
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, shared)
+
+
+def publish_inputs(manifest: Manifest, store: Path) -> Dict[str, str]:
+    """Put the staged inputs of a run into the content store; returns {relative path: sha256}."""
+    out: Dict[str, str] = {}
+    manifest.refresh(max_age=0.0)
+    for rel in sorted(manifest.inputs):
+        sha = manifest.checksum(rel)
+        if sha is None:
+            continue
+        publish_file(manifest.root / rel, store, sha)
+        out[rel] = sha
+    return out
+
+
+@dataclass
+class _Task:
+    job: Job
+    workdir: Path
+    proc: Popen
+    stdout: IO[str]
+    resources: RunResources
+    staged: Dict[str, Tuple[int, int]] = field(default_factory=dict)  # input: (size, mtime_ns) as staged
+    pos: int = 0  # of w2_progress.log
+    seq: int = 0
+
+
+class WorkerAgent:
+    """Claims jobs from the store while it has free slots and runs them in `scratch`."""
+
+    def __init__(self, repo_root: Path, slots: int, scratch: Path, w2_bin: Optional[Path] = None,
+                 worker_id: Optional[str] = None, lease: float = LEASE_SECONDS) -> None:
+        self.runs_root = repo_root / "runs"
+        self.jobs = JobStore(self.runs_root / JOB_STORE)
+        self.content = self.runs_root / STORE_DIR
+        self.slots = max(1, slots)
+        self.scratch = scratch
+        self.cache = scratch / ".cache"  # store files fetched by this host, by sha256
+        self.w2_bin = (w2_bin or repo_root / "w2_exe_linux").resolve()
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease = lease
+        self.limits = ResourceLimits.from_env()  # for what the API leaves open
+        self.cgroup_root = cgroup_root_from_env()
+        self.active: Dict[str, _Task] = {}
+
+    def serve(self, stop: threading.Event) -> None:
+        self.cache.mkdir(parents=True, exist_ok=True)
+        self.jobs.register(self.worker_id, socket.gethostname(), self.slots, self.lease)
+        try:
+            while not stop.is_set():
+                self.step()
+                stop.wait(HEARTBEAT_SECONDS)
+        finally:
+            for task in list(self.active.values()):
+                self._drop(task)
+                self.jobs.release(task.job.run_id, self.worker_id, task.job.attempt)
+            self.jobs.deregister(self.worker_id)
+
+    def step(self) -> None:
+        for task in list(self.active.values()):
+            task.resources.sample()
+            rc = task.proc.poll()
+            lines = self._new_lines(task)
+            if not self.jobs.renew(task.job.run_id, self.worker_id, task.job.attempt, self.lease, lines):
+                self._drop(task)  # canceled, or the lease lapsed and the job went back to the queue
+            elif rc is not None:
+                self._finish(task, rc)
+        free = self.slots - len(self.active)
+        if free > 0:
+            for job in self.jobs.claim(self.worker_id, free, self.lease):
+                self._start(job)
+        self.jobs.heartbeat(self.worker_id, len(self.active))
+
+    def _fetch(self, sha: str) -> Path:
+        cached = self.cache / sha
+        if cached.exists():
+            return cached
+        tmp = self.cache / f"{sha}.{os.getpid()}.tmp"
+        h = hashlib.sha256()
+        with open(self.content / sha[:2] / sha, "rb") as src, open(tmp, "wb") as dst:
+            for chunk in iter(lambda: src.read(1 << 20), b""):
+                h.update(chunk)
+                dst.write(chunk)
+        if h.hexdigest() != sha:
+            tmp.unlink()
+            raise OSError(f"content store file {sha} does not match its digest")
+        os.replace(tmp, cached)
+        return cached
+
+    def _start(self, job: Job) -> None:
+        workdir = self.scratch / job.run_id
+        shutil.rmtree(workdir, ignore_errors=True)
+        staged = {}
+        try:
+            limits = parse_limits(job.spec.get("limits"), self.limits)
+            w2_bin = self.w2_bin
+            if job.spec.get("binary"):  # the variant the API chose, by its hash
+                w2_bin = self._fetch(job.spec["binary"]["sha256"])
+                if not os.access(w2_bin, os.X_OK):
+                    os.chmod(w2_bin, 0o755)
+            if not w2_bin.is_file():
+                raise OSError(f"w2_exe_linux not found at {w2_bin}")
+            for rel, sha in job.spec["inputs"].items():
+                dst = workdir / rel
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(self._fetch(sha), dst)
+                st = dst.stat()
+                staged[rel] = (st.st_size, st.st_mtime_ns)
+            stdout = open(workdir / "stdout.log", "w", encoding="utf-8", newline="\n")
+            res = RunResources(job.run_id, limits, self.cgroup_root)
+            res.prepare()
+            try:
+                proc = Popen([str(w2_bin), str(workdir)], cwd=workdir, stdout=stdout, stderr=STDOUT,
+                             env=model_env(workdir), preexec_fn=res.preexec)
+            except OSError:
+                stdout.close()
+                res.close()
+                raise
+        except (OSError, KeyError, ValueError) as e:
+            shutil.rmtree(workdir, ignore_errors=True)
+            self.jobs.complete(job.run_id, self.worker_id, job.attempt, "failed", None, f"staging failed: {e}")
+            return
+        res.attach(proc.pid)
+        self.active[job.run_id] = _Task(job, workdir, proc, stdout, res, staged)
+
+    def _new_lines(self, task: _Task) -> List[Tuple[int, str, float]]:
+        out = []
+        try:
+            with open(task.workdir / "w2_progress.log", "r", encoding="utf-8", errors="ignore") as f:
+                f.seek(task.pos)
+                now = time.time()
+                while True:
+                    raw = f.readline()
+                    if not raw.endswith("\n"):
+                        break  # complete lines only
+                    task.seq += 1
+                    out.append((task.seq, raw.rstrip("\n"), now))
+                    task.pos = f.tell()
+        except FileNotFoundError:
+            pass
+        return out
+
+    def _finish(self, task: _Task, rc: int) -> None:
+        task.stdout.close()
+        run_id, attempt = task.job.run_id, task.job.attempt
+        status, error = ("succeeded" if rc == 0 else "failed"), None
+        try:
+            self._upload(task)
+        except OSError as e:
+            status, error = "failed", f"upload failed: {e}"
+        resources = task.resources.describe(task.resources.close())
+        self.jobs.complete(run_id, self.worker_id, attempt, status, rc, error, resources)
+        del self.active[run_id]
+        shutil.rmtree(task.workdir, ignore_errors=True)
+
+    def _upload(self, task: _Task) -> None:
+        # Copy what the run wrote (or changed) into its directory under runs/, each file replaced atomically
+        dest_root = self.runs_root / task.job.run_id
+        for p in sorted(task.workdir.rglob("*")):
+            if not p.is_file():
+                continue
+            rel = p.relative_to(task.workdir).as_posix()
+            st = p.stat()
+            if task.staged.get(rel) == (st.st_size, st.st_mtime_ns):
+                continue
+            dest = dest_root / rel
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dest.with_name(dest.name + ".upload")
+            shutil.copyfile(p, tmp)
+            os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+            os.replace(tmp, dest)
+
+    def _drop(self, task: _Task) -> None:
+        if task.proc.poll() is None:
+            task.proc.terminate()
+            try:
+                task.proc.wait(timeout=10)
+            except Exception:
+                task.proc.kill()
+        task.stdout.close()
+        task.resources.close()
+        self.active.pop(task.job.run_id, None)
+        shutil.rmtree(task.workdir, ignore_errors=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Run queued W2 runs for an API started with W2_EXECUTOR=workers (see README)."
+    )
+    parser.add_argument("--root", type=Path, default=Path("."), help="repository root whose runs/ the API uses")
+    parser.add_argument("--slots", type=int, default=os.cpu_count() or 1, help="runs to execute at once")
+    parser.add_argument("--scratch", type=Path, help="local working directory (default a temporary directory)")
+    parser.add_argument("--w2-bin", type=Path,
+                        help="model executable for jobs that name none (default <root>/w2_exe_linux)")
+    parser.add_argument("--id", dest="worker_id", help="worker name (default <host>-<pid>)")
+    parser.add_argument("--lease", type=float, default=LEASE_SECONDS,
+                        help="seconds a claimed run stays this worker's without a heartbeat")
+    args = parser.parse_args(argv)
+    root = args.root.resolve()
+    if not (root / "runs" / JOB_STORE).is_file():
+        parser.error(f"no job store at {root / 'runs' / JOB_STORE}; start the API with {EXECUTOR_ENV}=workers")
+    scratch = args.scratch or Path(os.environ.get("TMPDIR", "/tmp")) / f"w2-worker-{os.getpid()}"
+    agent = WorkerAgent(root, args.slots, scratch.resolve(), args.w2_bin, args.worker_id, args.lease)
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    print(f"worker {agent.worker_id}: {agent.slots} slot(s), scratch {scratch}", flush=True)
+    agent.serve(stop)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
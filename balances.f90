@@ -5,6 +5,7 @@ USE GLOBAL;     USE NAMESC; USE GEOMC;  USE LOGICC; USE PREC;  USE SURFHE;  USE
   USE STRUCTURES; USE TRANS;  USE TVDC;   USE SELWC;  USE GDAYC; USE SCREENC; USE TDGAS;   USE RSTART
   USE MACROPHYTEC; USE POROSITYC; USE ZOOPLANKTONC
   Use CEMAVars
+  USE BINARYOUTCLI, ONLY: SERIES_WRITE, SERIES_IS_BINARY
   IMPLICIT NONE
   EXTERNAL RESTART_OUTPUT
   REAL VOLINJW,VOLPRJW,VOLOUTJW,VOLWDJW,VOLEVJW,VOLDTJW,VOLTRBJW,VOLICEJW,TPWB,TPSED,TNWB,TNSED,TPPLANT,TNPLANT
@@ -76,7 +77,9 @@ USE GLOBAL;     USE NAMESC; USE GEOMC;  USE LOGICC; USE PREC;  USE SURFHE;  USE
 
         IF (CONTOUR(JW)) THEN
         IF (JDAY+(DLT/DAY) >= NXTMCP(JW) .OR. JDAY+(DLT/DAY) >= CPLD(CPLDP(JW)+1,JW))THEN
-            IF(VOLUME_BALANCE(JW))THEN
+            IF(SERIES_IS_BINARY(FLOWBFN))THEN
+            CALL SERIES_WRITE(FLOWBFN,'',[REAL(R8)::JDAY,JW,VOLINJW,VOLPRJW,VOLOUTJW,VOLWDJW,VOLEVJW,VOLDTJW,VOLTRBJW,VOLICEJW,DLVR(JW)])
+            ELSE IF(VOLUME_BALANCE(JW))THEN
             WRITE(FLOWBFN,'(F10.3,",",1X,I3,",",11(E16.8,",",1X))')JDAY,JW,VOLINJW,VOLPRJW,VOLOUTJW,VOLWDJW,VOLEVJW,VOLDTJW,VOLTRBJW,VOLICEJW,DLVR(JW)
             ELSE
             WRITE(FLOWBFN,'(F10.3,",",1X,I3,",",10(E16.8,",",1X))')JDAY,JW,VOLINJW,VOLPRJW,VOLOUTJW,VOLWDJW,VOLEVJW,VOLDTJW,VOLTRBJW,VOLICEJW
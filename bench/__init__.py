@@ -0,0 +1 @@
+"""Benchmark harness for the W2 model and the runner API (see `python -m bench --help`)."""
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .common import load_result, repo_root, write_result
+
+
+def _env_pairs(pairs: List[str]) -> Dict[str, str]:
+    env = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep or not key:
+            raise argparse.ArgumentTypeError(f"expected KEY=VALUE, got {pair!r}")
+        env[key] = value
+    return env
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .model import CASES, DETROIT
+
+    parser = argparse.ArgumentParser(prog="python -m bench", description="W2 model and API benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_model = sub.add_parser("model", help="time model runs of the benchmark cases")
+    p_model.add_argument("--case", action="append", choices=sorted(CASES),
+                         help="case to run (repeatable; default: all)")
+    p_model.add_argument("--w2-bin", type=Path, default=repo_root / "w2_exe_linux")
+    p_model.add_argument("--source", type=Path, default=DETROIT, help="input directory the cases derive from")
+    p_model.add_argument("--repeat", type=int, default=1)
+    p_model.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                         help="extra environment for the model, e.g. W2_OUTPUT_FORMAT=binary")
+    p_model.add_argument("--timeout", type=float, default=None, help="seconds before a run is killed")
+    p_model.add_argument("--keep", action="store_true", help="keep the case directories")
+    p_model.add_argument("-o", "--output", type=Path, help="result file (default: bench/results/...)")
+
+    p_api = sub.add_parser("api", help="load-test the runner API under concurrent clients")
+    p_api.add_argument("--base-url", help="test a running server instead of starting one")
+    p_api.add_argument("--input-dir", type=Path, help="create a run from this directory to query")
+    p_api.add_argument("--run-id", help="query an existing run")
+    p_api.add_argument("--clients", type=int, default=16)
+    p_api.add_argument("--requests", type=int, default=50, help="requests per client and endpoint")
+    p_api.add_argument("-o", "--output", type=Path, help="result file (default: bench/results/...)")
+
+    p_cmp = sub.add_parser("compare", help="compare two result files and flag regressions")
+    p_cmp.add_argument("base", type=Path)
+    p_cmp.add_argument("new", type=Path)
+    p_cmp.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "model":
+        from .model import bench_model
+
+        try:
+            result = bench_model(args.case or list(CASES), args.w2_bin.resolve(), source=args.source.resolve(),
+                                 repeat=args.repeat, env_overrides=_env_pairs(args.env), timeout=args.timeout,
+                                 keep=args.keep)
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            return 2
+        print(f"results written to {write_result(result, args.output)}")
+        return 0 if all(c["ok"] for c in result["cases"].values()) else 1
+
+    if args.command == "api":
+        from .api_load import bench_api
+
+        result = bench_api(base_url=args.base_url, input_dir=args.input_dir, clients=args.clients,
+                           requests_per_client=args.requests, run_id=args.run_id)
+        print(f"results written to {write_result(result, args.output)}")
+        return 0
+
+    from .compare import compare_results, format_report
+
+    report = compare_results(load_result(args.base), load_result(args.new), threshold=args.threshold)
+    print(format_report(report))
+    return 1 if report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
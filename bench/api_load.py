@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from subprocess import Popen, DEVNULL
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote, urlencode
+from urllib.request import Request, urlopen
+
+from .common import new_result, percentile, repo_root
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _request(url: str, method: str = "GET", timeout: float = 30.0) -> Tuple[int, bytes]:
+    req = Request(url, method=method)
+    try:
+        with urlopen(req, timeout=timeout) as resp:
+            return resp.status, resp.read()
+    except HTTPError as e:
+        return e.code, e.read()
+
+
+def start_server(port: int) -> Popen:
+    cmd = [sys.executable, "-m", "uvicorn", "api.main:app", "--host", "127.0.0.1", "--port", str(port),
+           "--log-level", "warning"]
+    return Popen(cmd, cwd=repo_root, stdout=DEVNULL, stderr=DEVNULL, env=os.environ.copy())
+
+
+def wait_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            status, _ = _request(base_url + "/health", timeout=2.0)
+            if status == 200:
+                return
+        except (URLError, OSError):
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"API did not become ready at {base_url}")
+
+
+def pick_run(base_url: str, input_dir: Optional[Path]) -> Optional[str]:
+    """Create a run from `input_dir`, or fall back to the most recent run known to the server."""
+    if input_dir is not None:
+        status, body = _request(f"{base_url}/runs?{urlencode({'input_dir': str(input_dir), 'name': 'bench'})}",
+                                method="POST")
+        if status == 200:
+            return json.loads(body)["run_id"]
+        print(f"could not create a run ({status}): {body[:200]!r}")
+    status, body = _request(base_url + "/runs")
+    if status == 200:
+        items = json.loads(body).get("items") or []
+        if items:
+            return items[0]["run_id"]
+    return None
+
+
+def load_endpoint(url: str, clients: int, requests_per_client: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    nbytes = 0
+
+    def worker(_: int) -> Tuple[List[float], int, int]:
+        lat: List[float] = []
+        err = 0
+        size = 0
+        for _ in range(requests_per_client):
+            t0 = time.perf_counter()
+            try:
+                status, body = _request(url)
+                size += len(body)
+                if status >= 400:
+                    err += 1
+            except (URLError, OSError):
+                err += 1
+            lat.append((time.perf_counter() - t0) * 1000.0)
+        return lat, err, size
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for lat, err, size in pool.map(worker, range(clients)):
+            latencies.extend(lat)
+            errors += err
+            nbytes += size
+    elapsed = time.perf_counter() - t0
+    total = len(latencies)
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": errors / total if total else 0.0,
+        "elapsed_s": elapsed,
+        "throughput_rps": total / elapsed if elapsed > 0 else None,
+        "bytes": nbytes,
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies) if latencies else None,
+        },
+    }
+
+
+def bench_api(base_url: Optional[str] = None, input_dir: Optional[Path] = None, clients: int = 16,
+              requests_per_client: int = 50, run_id: Optional[str] = None) -> Dict[str, Any]:
+    server = None
+    if base_url is None:
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(port)
+    base_url = base_url.rstrip("/")
+    try:
+        wait_ready(base_url)
+        run_id = run_id or pick_run(base_url, input_dir)
+        endpoints = {"runs": "/runs", "health": "/health"}
+        if run_id:
+            rid = quote(run_id)
+            endpoints.update({
+                "run": f"/runs/{rid}",
+                "progress": f"/runs/{rid}/progress?limit=200",
+                "logs_stdout": f"/runs/{rid}/logs/stdout?tail=200",
+                "artifacts": f"/runs/{rid}/artifacts",
+            })
+        else:
+            print("no run available: only /runs and /health are load-tested")
+
+        result = new_result("api")
+        result["base_url"] = base_url
+        result["run_id"] = run_id
+        result["clients"] = clients
+        result["requests_per_client"] = requests_per_client
+        result["endpoints"] = {}
+        for name, path in endpoints.items():
+            stats = load_endpoint(base_url + path, clients, requests_per_client)
+            stats["path"] = path
+            result["endpoints"][name] = stats
+            print(f"{name:12s} p50 {stats['latency_ms']['p50']:.1f} ms  p95 {stats['latency_ms']['p95']:.1f} ms  "
+                  f"{stats['throughput_rps']:.0f} req/s  errors {stats['errors']}")
+        return result
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except Exception:
+                server.kill()
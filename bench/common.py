@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+repo_root = Path(__file__).resolve().parents[1]
+results_root = repo_root / "bench" / "results"
+SCHEMA_VERSION = 1
+
+
+def git_info() -> Dict[str, Any]:
+    def _git(*args: str) -> Optional[str]:
+        try:
+            out = subprocess.run(["git", *args], cwd=repo_root, capture_output=True, text=True, timeout=30)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        return out.stdout.strip() if out.returncode == 0 else None
+
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": _git("rev-parse", "HEAD"), "dirty": bool(status) if status is not None else None}
+
+
+def host_info() -> Dict[str, Any]:
+    return {
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "python": sys.version.split()[0],
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def file_digest(path: Path) -> Optional[str]:
+    if not path.is_file():
+        return None
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0..100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), int(round(q / 100.0 * len(ordered) + 0.5))))
+    return ordered[rank - 1]
+
+
+def new_result(kind: str) -> Dict[str, Any]:
+    return {
+        "schema": SCHEMA_VERSION,
+        "kind": kind,
+        "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "git": git_info(),
+        "host": host_info(),
+    }
+
+
+def write_result(result: Dict[str, Any], out: Optional[Path]) -> Path:
+    if out is None:
+        commit = (result.get("git") or {}).get("commit") or "nogit"
+        stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+        out = results_root / f"{result['kind']}-{stamp}-{commit[:7]}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return out
+
+
+def load_result(path: Path) -> Dict[str, Any]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if data.get("schema") != SCHEMA_VERSION:
+        raise ValueError(f"{path}: unsupported benchmark schema {data.get('schema')!r}")
+    return data
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# (label, path into a case/endpoint entry, True if higher is better)
+MODEL_METRICS = [
+    ("wall_s", ("summary", "wall_s"), False),
+    ("startup_s", ("summary", "phases", "startup_s"), False),
+    ("stepping_s", ("summary", "phases", "stepping_s"), False),
+    ("peak_rss_kb", ("summary", "peak_rss_kb"), False),
+    ("output_bytes", ("summary", "output_bytes"), False),
+]
+API_METRICS = [
+    ("p50_ms", ("latency_ms", "p50"), False),
+    ("p95_ms", ("latency_ms", "p95"), False),
+    ("throughput_rps", ("throughput_rps",), True),
+    ("error_rate", ("error_rate",), False),
+]
+
+
+def _get(entry: Dict[str, Any], path: Tuple[str, ...]) -> Optional[float]:
+    cur: Any = entry
+    for key in path:
+        if not isinstance(cur, dict) or key not in cur:
+            return None
+        cur = cur[key]
+    return cur if isinstance(cur, (int, float)) else None
+
+
+def compare_results(base: Dict[str, Any], new: Dict[str, Any], threshold: float = 0.10) -> Dict[str, Any]:
+    """
+    Compare two result files of the same kind. A metric regresses when it moves in the bad direction
+    by more than `threshold` (relative); error rates regress on any increase.
+    """
+    if base.get("kind") != new.get("kind"):
+        raise ValueError(f"cannot compare {base.get('kind')!r} results with {new.get('kind')!r} results")
+    if new["kind"] == "model":
+        groups, metrics = "cases", MODEL_METRICS
+    else:
+        groups, metrics = "endpoints", API_METRICS
+
+    rows: List[Dict[str, Any]] = []
+    for name in sorted(set(base.get(groups, {})) & set(new.get(groups, {}))):
+        for label, path, higher_is_better in metrics:
+            old_v = _get(base[groups][name], path)
+            new_v = _get(new[groups][name], path)
+            if old_v is None or new_v is None:
+                continue
+            change = (new_v - old_v) / old_v if old_v else (0.0 if new_v == old_v else float("inf"))
+            worse = -change if higher_is_better else change
+            if label == "error_rate":
+                regressed = new_v > old_v
+            else:
+                regressed = worse > threshold
+            rows.append({"name": name, "metric": label, "base": old_v, "new": new_v, "change": change,
+                         "regressed": regressed})
+    return {"kind": new["kind"], "threshold": threshold, "rows": rows,
+            "regressions": sum(1 for r in rows if r["regressed"])}
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"{'name':18s} {'metric':15s} {'base':>14s} {'new':>14s} {'change':>8s}"]
+    for r in report["rows"]:
+        flag = "  REGRESSED" if r["regressed"] else ""
+        lines.append(f"{r['name']:18s} {r['metric']:15s} {r['base']:14.4g} {r['new']:14.4g} "
+                     f"{r['change'] * 100:7.1f}%{flag}")
+    lines.append(f"{report['regressions']} regression(s) beyond {report['threshold'] * 100:.0f}%")
+    return "\n".join(lines)
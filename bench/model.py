@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from subprocess import Popen, PIPE, STDOUT
+from typing import Any, Dict, List, Optional, Tuple
+
+from .common import file_digest, new_result, repo_root
+
+
+DETROIT = repo_root / "DetroitReservoirV422"
+DAY_RE = re.compile(r"^Day\s+(?P<day>\d+)\s+\+\s+(?P<hour>[\d.]+)\s+h.*\|\s+step\s+(?P<step>\d+)\s+\|")
+
+
+@dataclass(frozen=True)
+class CaseSpec:
+    description: str
+    days: Optional[float] = None  # simulate only the first `days` of the control file window
+    dt_scale: float = 1.0  # divide DLTMAX by this factor (more, shorter steps on the same grid)
+
+
+CASES: Dict[str, CaseSpec] = {
+    "detroit": CaseSpec("bundled DetroitReservoirV422 case, full year"),
+    "detroit-30d": CaseSpec("DetroitReservoirV422, first 30 days", days=30.0),
+    "detroit-30d-dt4": CaseSpec("DetroitReservoirV422, first 30 days with DLTMAX/4 (4x step workload)",
+                                days=30.0, dt_scale=4.0),
+}
+
+
+def _find_card(lines: List[str], card: str) -> int:
+    """Index of the first data line of a fixed-format w2_con.npt card."""
+    for i, line in enumerate(lines):
+        if line[:8].strip() == card:
+            for j in range(i + 1, len(lines)):
+                if lines[j].strip():
+                    return j
+    raise ValueError(f"card {card!r} not found in w2_con.npt")
+
+
+def _fields(line: str) -> List[str]:
+    body = line.rstrip("\r\n")
+    return [body[k:k + 8] for k in range(8, len(body), 8)]
+
+
+def _set_fields(line: str, fields: List[str]) -> str:
+    eol = line[len(line.rstrip("\r\n")):]
+    return (line[:8] + "".join(f"{v:>8s}"[:8] for v in fields)).rstrip() + eol
+
+
+def _fmt(value: float) -> str:
+    text = f"{value:8.3f}"
+    return text if len(text) <= 8 else f"{value:8.1f}"
+
+
+def apply_case(control: Path, spec: CaseSpec) -> None:
+    """Rewrite TMEND and DLTMAX in a fixed-format w2_con.npt for `spec`."""
+    if spec.days is None and spec.dt_scale == 1.0:
+        return
+    raw = control.read_bytes().decode("latin-1")
+    lines = raw.splitlines(keepends=True)
+    if spec.days is not None:
+        i = _find_card(lines, "TIME CON")
+        fields = _fields(lines[i])
+        tmstrt, tmend = float(fields[0]), float(fields[1])
+        fields[1] = _fmt(min(tmend, tmstrt + spec.days))
+        lines[i] = _set_fields(lines[i], fields)
+    if spec.dt_scale != 1.0:
+        i = _find_card(lines, "DLT MAX")
+        fields = _fields(lines[i])
+        fields = [_fmt(float(f) / spec.dt_scale) if f.strip() else f for f in fields]
+        lines[i] = _set_fields(lines[i], fields)
+    control.write_bytes("".join(lines).encode("latin-1"))
+
+
+def prepare_case(name: str, source: Path, dest: Path) -> Path:
+    spec = CASES[name]
+    workdir = dest / name
+    shutil.copytree(source, workdir)
+    apply_case(workdir / "w2_con.npt", spec)
+    return workdir
+
+
+def _snapshot(root: Path) -> Dict[str, Tuple[int, int]]:
+    snap = {}
+    for p in root.rglob("*"):
+        if p.is_file():
+            st = p.stat()
+            snap[p.relative_to(root).as_posix()] = (st.st_size, st.st_mtime_ns)
+    return snap
+
+
+def _output_volume(before: Dict[str, Tuple[int, int]], after: Dict[str, Tuple[int, int]]) -> Dict[str, Any]:
+    written = {k: v[0] for k, v in after.items() if before.get(k) != v}
+    by_ext: Dict[str, int] = {}
+    for rel, size in written.items():
+        ext = Path(rel).suffix.lower() or "(none)"
+        by_ext[ext] = by_ext.get(ext, 0) + size
+    return {"output_bytes": sum(written.values()), "output_files": len(written), "output_bytes_by_ext": by_ext}
+
+
+def run_model(w2_bin: Path, workdir: Path, env: Dict[str, str], timeout: Optional[float]) -> Dict[str, Any]:
+    """Run one simulation and measure wall time, phases, peak RSS and output volume."""
+    before = _snapshot(workdir)
+    t0 = time.perf_counter()
+    first_step = last_step = None
+    steps = 0
+    last_day = None
+    proc = Popen([str(w2_bin), str(workdir)], cwd=workdir, stdout=PIPE, stderr=STDOUT, text=True,
+                 errors="replace", env=env)
+    timer = threading.Timer(timeout, proc.kill) if timeout else None
+    if timer:
+        timer.start()
+    try:
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            m = DAY_RE.match(line.strip())
+            if m:
+                now = time.perf_counter()
+                first_step = first_step if first_step is not None else now
+                last_step = now
+                steps = int(m.group("step"))
+                last_day = int(m.group("day")) + float(m.group("hour")) / 24.0
+        # os.wait4 reaps the child itself and reports its own resource usage
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+    finally:
+        if timer:
+            timer.cancel()
+    t_end = time.perf_counter()
+
+    wall = t_end - t0
+    phases = {
+        "startup_s": (first_step - t0) if first_step is not None else wall,
+        "stepping_s": (last_step - first_step) if first_step is not None else 0.0,
+        "finalize_s": (t_end - last_step) if last_step is not None else 0.0,
+    }
+    result: Dict[str, Any] = {
+        "returncode": proc.returncode,
+        "wall_s": wall,
+        "user_s": usage.ru_utime,
+        "sys_s": usage.ru_stime,
+        "peak_rss_kb": usage.ru_maxrss,
+        "phases": phases,
+        "steps": steps,
+        "last_jday": last_day,
+    }
+    result.update(_output_volume(before, _snapshot(workdir)))
+    return result
+
+
+def _summary(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    walls = [s["wall_s"] for s in samples]
+    summary = {
+        "wall_s": statistics.median(walls),
+        "wall_min_s": min(walls),
+        "wall_max_s": max(walls),
+        "peak_rss_kb": max(s["peak_rss_kb"] for s in samples),
+        "output_bytes": samples[-1]["output_bytes"],
+        "steps": samples[-1]["steps"],
+        "phases": {k: statistics.median(s["phases"][k] for s in samples) for k in samples[0]["phases"]},
+    }
+    stepping = summary["phases"]["stepping_s"]
+    summary["steps_per_s"] = summary["steps"] / stepping if stepping > 0 else None
+    return summary
+
+
+def bench_model(cases: List[str], w2_bin: Path, source: Path = DETROIT, repeat: int = 1,
+                env_overrides: Optional[Dict[str, str]] = None, timeout: Optional[float] = None,
+                keep: bool = False) -> Dict[str, Any]:
+    if not w2_bin.exists() or not os.access(w2_bin, os.X_OK):
+        raise RuntimeError(f"model binary not found or not executable: {w2_bin} (build it with: make w2_exe_linux)")
+    env = os.environ.copy()
+    env.update(env_overrides or {})
+
+    result = new_result("model")
+    result["w2_bin"] = {"path": str(w2_bin), "sha256": file_digest(w2_bin), "size": w2_bin.stat().st_size}
+    result["env"] = dict(env_overrides or {})
+    result["repeat"] = repeat
+    result["cases"] = {}
+    scratch = Path(tempfile.mkdtemp(prefix="w2bench-"))
+    try:
+        for name in cases:
+            samples = []
+            for k in range(repeat):
+                workdir = prepare_case(name, source, scratch / f"r{k}")
+                sample = run_model(w2_bin, workdir, env, timeout)
+                samples.append(sample)
+                print(f"{name:18s} run {k + 1}/{repeat}: {sample['wall_s']:.2f} s, rc={sample['returncode']}")
+                if not keep:
+                    shutil.rmtree(workdir, ignore_errors=True)
+            result["cases"][name] = {
+                "description": CASES[name].description,
+                "ok": all(s["returncode"] == 0 for s in samples),
+                "summary": _summary(samples),
+                "samples": samples,
+            }
+    finally:
+        if keep:
+            print(f"case directories kept under {scratch}")
+        else:
+            shutil.rmtree(scratch, ignore_errors=True)
+    return result
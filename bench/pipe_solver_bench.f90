@@ -0,0 +1,132 @@
+! Pipe solver benchmark: the band LU of OPEN_CHANNEL (W2_PIPE_SOLVER=band) against the dense LUDCMP / LUBKSB
+! path (W2_PIPE_SOLVER=dense) on synthetic pipe networks. Every pipe gets a pentadiagonal system shaped like
+! OPEN_CHANNEL's (continuity rows at even nodes, momentum rows at odd nodes, coefficients varying from pipe to
+! pipe and step to step); each is assembled in band storage and solved both ways.
+!   make pipe_solver_bench && ./pipe_solver_bench [pipes] [steps]
+! prints, per number of nodes NC, microseconds per solve of each path, the speedup and the largest relative
+! difference between the two solutions. NC above 500 did not fit the fixed scratch array of the former LUDCMP.
+program pipe_solver_bench
+  use prec,          only: r8
+  use pipesolvercli, only: pipe_kl, pipe_bw, pipe_band_factor, pipe_band_solve, pipe_band_to_dense, ludcmp, lubksb
+  implicit none
+
+  integer, parameter :: ncs(5) = [7, 19, 51, 201, 601]
+  integer, parameter :: dense_budget = 400000000  ! n**3 operations per size for the dense path, at most
+  real(r8), parameter :: theta = 0.55_r8, g = 9.81_r8
+  integer  :: pipes, steps, nsolve, ndense, nc, s, p, j, c
+  integer(8) :: t0, t1, rate
+  real(r8) :: tband, tdense, d, diff, scale
+  real(r8), allocatable :: abd(:,:), work(:,:), al(:,:), full(:,:), b(:), xband(:), xdense(:)
+  integer,  allocatable :: indx(:)
+  character(len=32) :: arg
+
+  pipes = 500
+  steps = 20
+  if (command_argument_count() >= 1) then
+    call get_command_argument(1, arg)
+    read(arg, *) pipes
+  end if
+  if (command_argument_count() >= 2) then
+    call get_command_argument(2, arg)
+    read(arg, *) steps
+  end if
+  call system_clock(count_rate=rate)
+
+  write(*,'(a,i0,a,i0,a)') 'pipe solver benchmark: ', pipes, ' pipes x ', steps, ' steps'
+  write(*,'(a6,a10,a14,a14,a10,a14)') 'NC', 'solves', 'dense us', 'band us', 'speedup', 'max rel diff'
+  do c = 1, size(ncs)
+    nc = ncs(c)
+    nsolve = pipes*steps
+    ndense = max(1, min(nsolve, int(dense_budget/(real(nc, r8)**3))))
+    allocate (abd(nc,pipe_bw), work(nc,pipe_bw), al(nc,pipe_kl), full(nc,nc), b(nc), xband(nc), xdense(nc))
+    allocate (indx(nc))
+
+    ! band path over all solves
+    call system_clock(t0)
+    do s = 1, steps
+      do p = 1, pipes
+        call assemble(p, s, nc, abd, b)
+        call pipe_band_factor(abd, nc, nc, al, indx, d)
+        call pipe_band_solve(abd, nc, nc, al, indx, b)
+      end do
+    end do
+    call system_clock(t1)
+    tband = real(t1-t0, r8)/real(rate, r8)*1.0e6_r8/real(nsolve, r8)
+
+    ! dense path over the first ndense solves
+    call system_clock(t0)
+    j = 0
+    outer: do s = 1, steps
+      do p = 1, pipes
+        j = j+1
+        if (j > ndense) exit outer
+        call assemble(p, s, nc, abd, b)
+        call pipe_band_to_dense(abd, nc, nc, full)
+        call ludcmp(full, nc, nc, indx, d)
+        call lubksb(full, nc, nc, indx, b)
+      end do
+    end do outer
+    call system_clock(t1)
+    tdense = real(t1-t0, r8)/real(rate, r8)*1.0e6_r8/real(ndense, r8)
+
+    ! agreement on a sample of the systems (at most as many as the dense path timed)
+    diff = 0.0_r8
+    j = 0
+    sample: do s = 1, min(steps, 3)
+      do p = 1, min(pipes, 20)
+        j = j+1
+        if (j > ndense) exit sample
+        call assemble(p, s, nc, abd, b)
+        work = abd
+        call pipe_band_to_dense(abd, nc, nc, full)
+        xband  = b
+        xdense = b
+        call pipe_band_factor(work, nc, nc, al, indx, d)
+        call pipe_band_solve(work, nc, nc, al, indx, xband)
+        call ludcmp(full, nc, nc, indx, d)
+        call lubksb(full, nc, nc, indx, xdense)
+        scale = max(maxval(abs(xdense)), tiny(1.0_r8))
+        diff  = max(diff, maxval(abs(xband-xdense))/scale)
+      end do
+    end do sample
+    write(*,'(i6,i10,f14.3,f14.3,f10.1,es14.3)') nc, nsolve, tdense, tband, tdense/tband, diff
+    deallocate (abd, work, al, full, b, xband, xdense, indx)
+  end do
+
+contains
+
+  ! System of pipe p at step s: rows and right-hand side as OPEN_CHANNEL assembles them, for a pipe of NC nodes
+  ! with velocities, areas and water levels varying smoothly along it
+  subroutine assemble(p, s, nc, a, rhs)
+    integer,  intent(in)  :: p, s, nc
+    real(r8), intent(out) :: a(nc,pipe_bw), rhs(nc)
+    real(r8) :: dtdx, vel, area, top, rough, phase
+    integer  :: n
+
+    a     = 0.0_r8
+    dtdx  = 0.5_r8+0.01_r8*real(mod(p, 17), r8)
+    rough = 0.01_r8+0.001_r8*real(mod(p, 7), r8)
+    do n = 1, nc
+      phase = real(n, r8)/real(nc, r8)+0.1_r8*real(p, r8)+0.05_r8*real(s, r8)
+      vel   = 0.5_r8+0.4_r8*sin(6.0_r8*phase)
+      area  = 1.0_r8+0.3_r8*cos(4.0_r8*phase)
+      top   = 1.5_r8+0.2_r8*sin(3.0_r8*phase)
+      if (mod(n, 2) == 0) then
+        if (n /= 2) a(n,1) = -theta*dtdx*vel*0.5_r8
+        a(n,2) = -theta*dtdx*area/top
+        a(n,3) =  1.0_r8
+        a(n,4) =  theta*dtdx*area/top
+        if (n /= nc-1) a(n,5) = theta*dtdx*vel*0.5_r8
+        rhs(n) = area/top
+      else
+        if (n /= 1) then
+          a(n,1) = -theta*dtdx*vel
+          a(n,2) = -theta*dtdx*g
+        end if
+        a(n,3) = 1.0_r8+theta*g*rough*abs(vel)+theta*dtdx*vel
+        if (n /= nc) a(n,4) = theta*dtdx*g
+        rhs(n) = vel
+      end if
+    end do
+  end subroutine assemble
+end program pipe_solver_bench
@@ -0,0 +1,341 @@
+module binaryoutcli
+  use prec,    only: r8
+  use screenc, only: jday
+  implicit none
+
+  ! Optional binary stream mode for the OUTPUTA time-series writers (TSR, wl.opt, flowbal.csv and the
+  ! qwo_/two_/cwo_/dwo_ structure files). Enabled with W2_OUTPUT_FORMAT=binary. Each attached text file
+  ! is replaced by <file>.w2b, laid out as
+  !   'W2BIN001' | int32 header length | header text | int32 ncols | ncols x float64 per row ...
+  ! The header holds 'title=', 'columns=' and 'units=' lines taken from the text header of the file.
+  ! Rows are buffered in memory (W2_OUTPUT_BUFFER_ROWS, default 512) and written in one stream write.
+  character(len=8), parameter :: w2b_magic = 'W2BIN001'
+  integer, parameter :: max_line = 8000
+
+  type series_t
+    integer :: unit_bin = 0      ! NEWUNIT numbers are negative; 0 means not open
+    integer :: ncols    = 0
+    integer :: nrows    = 0
+    logical :: header_written = .false.
+    character(len=:), allocatable :: title, columns, units
+    real(r8), allocatable :: buf(:,:)
+  end type series_t
+
+  logical, save :: binary_initialized = .false.
+  logical, save :: binary_enabled     = .false.
+  integer, save :: buffer_rows        = 512
+  integer, save :: nseries            = 0
+  type(series_t), allocatable, save :: series(:)
+  integer,        allocatable, save :: slot_of_unit(:)
+contains
+
+  subroutine binary_output_init()
+    character(len=32) :: val
+    integer :: n, ios, status
+
+    if (binary_initialized) return
+    binary_initialized = .true.
+
+    call get_environment_variable('W2_OUTPUT_FORMAT', val, status=status)
+    if (status == 0) then
+      select case (trim(adjustl(val)))
+      case ('binary', 'BINARY', 'w2b', 'W2B')
+        binary_enabled = .true.
+      end select
+    end if
+
+    call get_environment_variable('W2_OUTPUT_BUFFER_ROWS', val, status=status)
+    if (status == 0) then
+      read(val, *, iostat=ios) n
+      if (ios == 0 .and. n > 0) buffer_rows = n
+    end if
+  end subroutine binary_output_init
+
+  logical function binary_output_active()
+    if (.not. binary_initialized) call binary_output_init()
+    binary_output_active = binary_enabled
+  end function binary_output_active
+
+  integer function series_slot(unit)
+    integer, intent(in) :: unit
+    series_slot = 0
+    if (.not. allocated(slot_of_unit)) return
+    if (unit < lbound(slot_of_unit,1) .or. unit > ubound(slot_of_unit,1)) return
+    series_slot = slot_of_unit(unit)
+  end function series_slot
+
+  logical function series_is_binary(unit)
+    integer, intent(in) :: unit
+    series_is_binary = (series_slot(unit) > 0)
+  end function series_is_binary
+
+  ! Split a CSV header line such as 'JDAY,QWD(m3s-1),' into 'JDAY,QWD' and ',m3s-1'.
+  subroutine split_header_line(line, columns, units)
+    character(*), intent(in) :: line
+    character(len=:), allocatable, intent(out) :: columns, units
+    character(len=len(line)) :: tok
+    integer :: p, q, lp
+
+    columns = ''
+    units   = ''
+    p = 1
+    do while (p <= len_trim(line))
+      q = index(line(p:), ',')
+      if (q == 0) then
+        tok = line(p:)
+        p   = len_trim(line) + 1
+      else
+        tok = line(p:p+q-2)
+        p   = p + q
+      end if
+      tok = adjustl(tok)
+      if (len_trim(tok) == 0) cycle
+      lp = index(tok, '(')
+      if (len_trim(columns) > 0 .or. len_trim(units) > 0) then
+        columns = columns//','
+        units   = units//','
+      end if
+      if (lp > 1 .and. tok(len_trim(tok):len_trim(tok)) == ')') then
+        columns = columns//trim(tok(1:lp-1))
+        units   = units//tok(lp+1:len_trim(tok)-1)
+      else
+        columns = columns//trim(tok)
+      end if
+    end do
+  end subroutine split_header_line
+
+  logical function is_data_line(line)
+    character(*), intent(in) :: line
+    character(len=1) :: c
+    c = adjustl(line)
+    is_data_line = (index('0123456789-+.', c) > 0 .and. c /= ' ')
+  end function is_data_line
+
+  ! Replace the text file connected to UNIT (already holding its header) with a binary series file.
+  ! On restart (APPEND) an existing .w2b is cut back to the rows before JDAY and continued, as the text
+  ! writers rewind to JDAY; files that already contain text data rows (restart from a text-mode run) are
+  ! left in text mode.
+  subroutine series_attach(unit, append)
+    integer, intent(in) :: unit
+    logical, intent(in) :: append
+    character(len=512) :: fname
+    character(len=max_line) :: line, colline
+    character(len=:), allocatable :: title
+    logical :: opened, exists, has_data
+    integer :: u, ios, s
+
+    if (.not. binary_output_active()) return
+    inquire(unit=unit, opened=opened, name=fname)
+    if (.not. opened) return
+    if (series_slot(unit) > 0) return
+
+    close(unit)
+    title    = ''
+    colline  = ''
+    has_data = .false.
+    open(newunit=u, file=trim(fname), status='old', action='read', iostat=ios)
+    if (ios == 0) then
+      do
+        read(u, '(A)', iostat=ios) line
+        if (ios /= 0) exit
+        if (len_trim(line) == 0) cycle
+        if (is_data_line(line)) then
+          has_data = .true.
+          exit
+        end if
+        if (len_trim(colline) > 0) then
+          if (len(title) > 0) title = title//' '
+          title = title//trim(adjustl(colline))
+        end if
+        colline = line
+      end do
+      if (has_data) then
+        close(u)
+        open(unit, file=trim(fname), position='append')
+        return
+      end if
+      close(u, status='delete')
+    end if
+
+    if (.not. allocated(series)) allocate(series(64))
+    if (nseries == size(series)) call grow_series()
+    call ensure_slot(unit)
+
+    nseries = nseries + 1
+    s = nseries
+    series(s)%title = title
+    call split_header_line(trim(colline), series(s)%columns, series(s)%units)
+
+    inquire(file=trim(fname)//'.w2b', exist=exists)
+    if (append .and. exists) exists = series_cut(trim(fname)//'.w2b')
+    if (append .and. exists) then
+      open(newunit=series(s)%unit_bin, file=trim(fname)//'.w2b', access='stream', form='unformatted', &
+           status='old', position='append', action='write')
+      series(s)%header_written = .true.
+    else
+      open(newunit=series(s)%unit_bin, file=trim(fname)//'.w2b', access='stream', form='unformatted', &
+           status='replace', action='write')
+    end if
+    slot_of_unit(unit) = s
+  end subroutine series_attach
+
+  ! Truncate a .w2b at its first row with JDAY at or after the restart day (and any partly written last
+  ! row). False when the file holds no header, to be written anew.
+  logical function series_cut(fname)
+    character(*), intent(in) :: fname
+    character(len=8) :: magic
+    integer(4) :: hlen, ncols
+    integer(8) :: fsize, start, rowbytes, nrows, k, cut
+    real(r8)   :: jd
+    integer    :: u, ios
+
+    series_cut = .false.
+    open(newunit=u, file=fname, access='stream', form='unformatted', status='old', action='readwrite', iostat=ios)
+    if (ios /= 0) return
+    inquire(unit=u, size=fsize)
+    read(u, pos=1, iostat=ios) magic, hlen
+    if (ios == 0 .and. magic == w2b_magic) read(u, pos=13_8+hlen, iostat=ios) ncols
+    if (ios /= 0 .or. magic /= w2b_magic .or. ncols <= 0) then
+      close(u)
+      return
+    end if
+    series_cut = .true.
+    start    = 17_8+hlen
+    rowbytes = 8_8*ncols
+    nrows    = max(fsize-start+1, 0_8)/rowbytes
+    cut      = nrows
+    do k = 0, nrows-1
+      read(u, pos=start+k*rowbytes, iostat=ios) jd
+      if (ios /= 0 .or. jd >= real(jday, r8)) then
+        cut = k
+        exit
+      end if
+    end do
+    if (start+cut*rowbytes <= fsize) then
+      read(u, pos=start+cut*rowbytes)
+      endfile(u)
+    end if
+    close(u)
+  end function series_cut
+
+  subroutine grow_series()
+    type(series_t), allocatable :: tmp(:)
+    allocate(tmp(2*size(series)))
+    tmp(1:size(series)) = series
+    call move_alloc(tmp, series)
+  end subroutine grow_series
+
+  ! Unit numbers index slot_of_unit directly; NEWUNIT numbers are negative, so both bounds may grow.
+  subroutine ensure_slot(unit)
+    integer, intent(in) :: unit
+    integer, allocatable :: tmp(:)
+    integer :: lo, hi
+    if (.not. allocated(slot_of_unit)) then
+      allocate(slot_of_unit(min(unit,0):max(unit,1023)))
+      slot_of_unit = 0
+      return
+    end if
+    lo = min(unit, lbound(slot_of_unit,1))
+    hi = max(unit, ubound(slot_of_unit,1))
+    if (lo == lbound(slot_of_unit,1) .and. hi == ubound(slot_of_unit,1)) return
+    allocate(tmp(lo:hi))
+    tmp = 0
+    tmp(lbound(slot_of_unit,1):ubound(slot_of_unit,1)) = slot_of_unit
+    call move_alloc(tmp, slot_of_unit)
+  end subroutine ensure_slot
+
+  subroutine write_series_header(s)
+    integer, intent(in) :: s
+    character(len=:), allocatable :: hdr, cols, units
+    integer :: n, jc
+
+    ! Pad the names when rows are wider than the text header (e.g. per-outlet columns in qwo_*.opt)
+    cols  = series(s)%columns
+    units = series(s)%units
+    n = 0
+    if (len(cols) > 0) n = count_fields(cols)
+    do jc = n+1, series(s)%ncols
+      if (len(cols) > 0) then
+        cols  = cols//','
+        units = units//','
+      end if
+      cols = cols//'C'//itoa(jc)
+    end do
+    hdr = 'title='//series(s)%title//new_line('a')//'columns='//cols//new_line('a')//'units='//units//new_line('a')
+    write(series(s)%unit_bin) w2b_magic, int(len(hdr), 4), hdr, int(series(s)%ncols, 4)
+    series(s)%header_written = .true.
+  end subroutine write_series_header
+
+  integer function count_fields(str)
+    character(*), intent(in) :: str
+    integer :: i
+    count_fields = 1
+    do i = 1, len(str)
+      if (str(i:i) == ',') count_fields = count_fields + 1
+    end do
+  end function count_fields
+
+  function itoa(i) result(str)
+    integer, intent(in) :: i
+    character(len=:), allocatable :: str
+    character(len=16) :: tmp
+    write(tmp, '(I0)') i
+    str = trim(tmp)
+  end function itoa
+
+  subroutine series_flush(s)
+    integer, intent(in) :: s
+    if (series(s)%nrows == 0) return
+    if (.not. series(s)%header_written) call write_series_header(s)
+    write(series(s)%unit_bin) series(s)%buf(:, 1:series(s)%nrows)
+    series(s)%nrows = 0
+  end subroutine series_flush
+
+  ! Append one row (first value is JDAY). Without an attached binary file this is a formatted write.
+  subroutine series_write(unit, fmt, values)
+    integer,      intent(in) :: unit
+    character(*), intent(in) :: fmt
+    real(r8),     intent(in) :: values(:)
+    integer :: s, n
+
+    s = series_slot(unit)
+    if (s == 0) then
+      write(unit, fmt) values
+      return
+    end if
+
+    if (.not. allocated(series(s)%buf)) then
+      series(s)%ncols = size(values)
+      allocate(series(s)%buf(series(s)%ncols, buffer_rows))
+    end if
+    if (series(s)%nrows == size(series(s)%buf, 2)) call series_flush(s)
+    n = min(size(values), series(s)%ncols)
+    series(s)%nrows = series(s)%nrows + 1
+    series(s)%buf(:, series(s)%nrows) = -99.0_r8
+    series(s)%buf(1:n, series(s)%nrows) = values(1:n)
+  end subroutine series_write
+
+  subroutine series_flush_all()
+    integer :: s
+    do s = 1, nseries
+      if (series(s)%unit_bin /= 0) then
+        call series_flush(s)
+        flush(series(s)%unit_bin)
+      end if
+    end do
+  end subroutine series_flush_all
+
+  subroutine series_close_all()
+    integer :: s
+    do s = 1, nseries
+      if (series(s)%unit_bin /= 0) then
+        call series_flush(s)
+        close(series(s)%unit_bin)
+        series(s)%unit_bin = 0
+      end if
+    end do
+    nseries = 0
+    if (allocated(slot_of_unit)) slot_of_unit = 0
+  end subroutine series_close_all
+
+end module binaryoutcli
@@ -1,28 +1,141 @@
 module diagnosticscli
   use, intrinsic :: ieee_arithmetic
+  use prec,    only: r8
   use screenc, only: jday, eltmjd, nit
   use global
-  use geomc,  only: elws
-  use trans,  only: dz
+  use geomc,   only: elws
+  use trans,   only: dz
+  use tvdc,    only: nac, cn
   implicit none
+
+  ! Scan modes selected with W2_NAN_CHECK_MODE:
+  !   scan     - fused per-cell NaN test over the active region (default)
+  !   checksum - running sum over the active region; a non-finite sum triggers a confirming scan
+  !   off      - no sentinel checks
+  integer, parameter :: nan_mode_off = 0, nan_mode_scan = 1, nan_mode_checksum = 2
+
+  integer,  save :: nan_mode        = nan_mode_scan
+  integer,  save :: nan_every       = 1       ! W2_NAN_CHECK_STEPS: check every N steps
+  real,     save :: nan_interval    = 0.0     ! W2_NAN_CHECK_DAYS: check every interval (days); overrides steps when > 0
+  real,     save :: nan_next_jday   = -huge(1.0)
+  integer,  save :: nan_due_nit     = -1      ! step of the last decision: every check point of a step shares it
+  logical,  save :: nan_due         = .false.
+  logical,  save :: nan_initialized = .false.
 contains
+
+  subroutine nan_check_init()
+    character(len=32) :: val
+    integer :: n, ios, status
+    real :: r
+
+    if (nan_initialized) return
+    nan_initialized = .true.
+
+    call get_environment_variable('W2_NAN_CHECK_MODE', val, status=status)
+    if (status == 0) then
+      select case (trim(adjustl(val)))
+      case ('off', 'OFF', 'none', 'NONE')
+        nan_mode = nan_mode_off
+      case ('checksum', 'CHECKSUM')
+        nan_mode = nan_mode_checksum
+      case default
+        nan_mode = nan_mode_scan
+      end select
+    end if
+
+    call get_environment_variable('W2_NAN_CHECK_STEPS', val, status=status)
+    if (status == 0) then
+      read(val, *, iostat=ios) n
+      if (ios == 0 .and. n > 0) nan_every = n
+    end if
+
+    call get_environment_variable('W2_NAN_CHECK_DAYS', val, status=status)
+    if (status == 0) then
+      read(val, *, iostat=ios) r
+      if (ios == 0 .and. r > 0.0) nan_interval = r
+    end if
+  end subroutine nan_check_init
+
+  ! Decided once per time step, so that every check point of a due step runs in both cadence modes
+  logical function nan_check_due()
+    if (nit /= nan_due_nit) then
+      nan_due_nit = nit
+      nan_due     = .false.
+      if (nan_mode /= nan_mode_off) then
+        if (nan_interval > 0.0) then
+          if (jday >= nan_next_jday) then
+            nan_next_jday = jday + nan_interval
+            nan_due       = .true.
+          end if
+        else
+          nan_due = (mod(nit, nan_every) == 0)
+        end if
+      end if
+    end if
+    nan_check_due = nan_due
+  end function nan_check_due
+
+  ! Single fused pass over the active cells (KT..KB, US..DS) of every branch.
+  logical function active_region_has_nan()
+    integer :: jw, jb, i, k, jac, kt
+    active_region_has_nan = .true.
+    do jw = 1, nwb
+      kt = ktwb(jw)
+      do jb = bs(jw), be(jw)
+        do i = us(jb), ds(jb)
+          if (ieee_is_nan(elws(i))) return
+          do k = kt, kb(i)
+            if (ieee_is_nan(u(k,i))   .or. ieee_is_nan(w(k,i))   .or. ieee_is_nan(t1(k,i)) .or. &
+                ieee_is_nan(t2(k,i))  .or. ieee_is_nan(rho(k,i)) .or. ieee_is_nan(az(k,i)) .or. &
+                ieee_is_nan(dz(k,i))) return
+            do jac = 1, nac
+              if (ieee_is_nan(c2(k,i,cn(jac)))) return
+            end do
+          end do
+        end do
+      end do
+    end do
+    active_region_has_nan = .false.
+  end function active_region_has_nan
+
+  ! Cheap alternative: accumulate the active region into one sum. NaN (and Inf) propagate, so a
+  ! finite checksum proves the region is clean; a non-finite one is confirmed with the exact scan.
+  real(r8) function active_region_checksum()
+    integer :: jw, jb, i, k, jac, kt
+    real(r8) :: s
+    s = 0.0_r8
+    do jw = 1, nwb
+      kt = ktwb(jw)
+      do jb = bs(jw), be(jw)
+        do i = us(jb), ds(jb)
+          s = s + elws(i)
+          do k = kt, kb(i)
+            s = s + u(k,i) + w(k,i) + t1(k,i) + t2(k,i) + rho(k,i) + az(k,i) + dz(k,i)
+          end do
+          do jac = 1, nac
+            s = s + sum(c2(kt:kb(i),i,cn(jac)))
+          end do
+        end do
+      end do
+    end do
+    active_region_checksum = s
+  end function active_region_checksum
+
   subroutine check_nan_and_dump(stage)
     character(*), intent(in) :: stage
     logical :: has_nan
     character(len=10) :: cdate, cctime
 
-    has_nan = .false.
+    if (.not. nan_initialized) call nan_check_init()
+    if (.not. nan_check_due()) return
 
     ! Sentinel checks on key state fields; if any NaN is present, dump full restart state.
-    has_nan = has_nan .or. any(ieee_is_nan(U))
-    has_nan = has_nan .or. any(ieee_is_nan(W))
-    has_nan = has_nan .or. any(ieee_is_nan(T1))
-    has_nan = has_nan .or. any(ieee_is_nan(T2))
-    has_nan = has_nan .or. any(ieee_is_nan(C2))
-    has_nan = has_nan .or. any(ieee_is_nan(ELWS))
-    has_nan = has_nan .or. any(ieee_is_nan(RHO))
-    has_nan = has_nan .or. any(ieee_is_nan(AZ))
-    has_nan = has_nan .or. any(ieee_is_nan(DZ))
+    if (nan_mode == nan_mode_checksum) then
+      has_nan = .not. ieee_is_finite(active_region_checksum())
+      if (has_nan) has_nan = active_region_has_nan()
+    else
+      has_nan = active_region_has_nan()
+    end if
 
     if (has_nan) then
       call date_and_time(cdate, cctime)
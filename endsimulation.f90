@@ -7,6 +7,10 @@ USE GLOBAL;     USE NAMESC; USE GEOMC;  USE LOGICC; USE PREC;  USE SURFHE;  USE
   ! CEMA testing start
   use CEMAVars
   ! CEMA testing end
+  USE BINARYOUTCLI, ONLY: SERIES_CLOSE_ALL
+  USE SHADETABLECLI, ONLY: SHADE_TABLE_REPORT
+  USE HEATSOLVERCLI, ONLY: HEAT_SOLVER_REPORT
+  USE FIELDSNAPCLI, ONLY: FIELD_SNAPSHOT_CLOSE
   IMPLICIT NONE
   EXTERNAL RESTART_OUTPUT
   INTEGER IFILE 
@@ -22,6 +26,10 @@ USE GLOBAL;     USE NAMESC; USE GEOMC;  USE LOGICC; USE PREC;  USE SURFHE;  USE
    ! write(1081,'(5g12.5)')xjnh4,SD_Jctest,Jcs,MFTSedFlxVars(2,26)
  ! CEMA testing end
 
+  CALL SERIES_CLOSE_ALL              ! flush and close binary time-series outputs (W2_OUTPUT_FORMAT=binary)
+  CALL SHADE_TABLE_REPORT            ! exact vs. table shade differences (W2_SHADE_MODE=compare)
+  CALL HEAT_SOLVER_REPORT            ! equilibrium temperature iteration counts (W2_HEAT_SOLVER=vector)
+  CALL FIELD_SNAPSHOT_CLOSE          ! close fields.w2f (W2_FIELD_SNAPSHOT=on)
   CALL DATE_AND_TIME (CDATE,CCTIME)
   IF (.NOT. ERROR_OPEN) TEXT = 'Normal termination at '//CCTIME(1:2)//':'//CCTIME(3:4)//':'//CCTIME(5:6)//' on '//CDATE(5:6)//'/'     &
                                                        //CDATE(7:8)//'/'//CDATE(3:4)
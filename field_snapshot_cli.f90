@@ -0,0 +1,296 @@
+module fieldsnapcli
+  use prec,    only: r8
+  use screenc, only: jday
+  use global
+  use geomc,   only: depthb
+  use namesc,  only: cname2, cdname2
+  use tvdc,    only: nac, cn, constituents
+  use main,    only: ndo, restart_in
+  use logicc,  only: oxygen_demand
+  implicit none
+
+  ! Field snapshots for post-processing (api/habitat.py recomputes FISHHABITAT and ENVIRP from them).
+  !   W2_FIELD_SNAPSHOT=on                  write fields.w2f at the output times of the TSR files, where FISHHABITAT
+  !                                         and ENVIRP are evaluated
+  !   W2_FIELD_SNAPSHOT_DAYS=<days>         minimum interval between snapshots (default 0: every TSR output time)
+  !   W2_FIELD_SNAPSHOT_CONSTITUENTS=<list> constituents (CNAME2 names, comma-separated, or 'all' for the active ones)
+  !                                         stored next to T, U and VOL; default DO when oxygen demand is computed
+  !   W2_FIELD_SNAPSHOT_DERIVED=<list>      derived constituents (CDNAME2 names or 'all'); default none
+  ! Layout:
+  !   'W2FLD001' | int32 header length | header text | int32 bs(nwb), be(nwb), ds(nbr), kb(imx)
+  !   records: float64 jday | float64 dlt | int32 ncells | int32 ktwb(nwb) | int32 cus(nbr) | float32 depthb(kb(i),i)
+  !            | nfields x ncells float32, field by field
+  ! Cells run over waterbodies, branches (bs..be), segments (cus..ds) and layers (ktwb..kb), so every branch and
+  ! segment is a contiguous slice of a record.
+  character(len=8), parameter :: w2f_magic = 'W2FLD001'
+  character(len=*), parameter :: w2f_name  = 'fields.w2f'
+
+  logical, save :: snap_cfg_loaded = .false.
+  logical, save :: snap_enabled    = .false.
+  real,    save :: snap_days       = 0.0
+  real,    save :: snap_next       = -huge(1.0)
+  integer, save :: snap_unit       = 0
+  integer, save :: ncfield         = 0
+  integer, save :: ncdfield        = 0
+  integer, allocatable, save :: cfield(:), cdfield(:)
+  real,    allocatable, save :: buf(:)
+contains
+
+  subroutine field_snapshot_init()
+    character(len=1024) :: val
+    integer :: status, ios
+    real :: r
+
+    if (snap_cfg_loaded) return
+    snap_cfg_loaded = .true.
+
+    call get_environment_variable('W2_FIELD_SNAPSHOT', val, status=status)
+    if (status == 0) then
+      select case (trim(adjustl(val)))
+      case ('on', 'ON', '1', 'yes', 'YES', 'true', 'TRUE')
+        snap_enabled = .true.
+      case ('off', 'OFF', '0', 'no', 'NO', 'false', 'FALSE', '')
+        snap_enabled = .false.
+      case default
+        write(*,'(a)') 'W2_FIELD_SNAPSHOT='//trim(val)//' not recognized, field snapshots are off'
+      end select
+    end if
+    if (.not. snap_enabled) return
+
+    call get_environment_variable('W2_FIELD_SNAPSHOT_DAYS', val, status=status)
+    if (status == 0 .and. len_trim(val) > 0) then
+      read(val, *, iostat=ios) r
+      if (ios == 0 .and. r >= 0.0) snap_days = r
+    end if
+
+    allocate(cfield(nct), cdfield(ndc))
+    call get_environment_variable('W2_FIELD_SNAPSHOT_CONSTITUENTS', val, status=status)
+    if (status == 0) then
+      call select_names(val, cname2, cfield, ncfield, .true.)
+    else if (constituents .and. oxygen_demand) then
+      ncfield   = 1
+      cfield(1) = ndo
+    end if
+    call get_environment_variable('W2_FIELD_SNAPSHOT_DERIVED', val, status=status)
+    if (status == 0) call select_names(val, cdname2, cdfield, ncdfield, .false.)
+    if (.not. constituents) then
+      ncfield  = 0
+      ncdfield = 0
+    end if
+  end subroutine field_snapshot_init
+
+  ! Resolve a comma-separated name list (or 'all') against names; unknown names are reported and skipped
+  subroutine select_names(list, names, idx, n, active_only)
+    character(*), intent(in)  :: list
+    character(*), intent(in)  :: names(:)
+    integer,      intent(out) :: idx(:), n
+    logical,      intent(in)  :: active_only
+    character(len=len(list)) :: tok
+    integer :: p, q, j
+
+    n = 0
+    if (upper(trim(adjustl(list))) == 'ALL') then
+      if (active_only) then
+        n = nac
+        idx(1:nac) = cn(1:nac)
+      else
+        n = size(names)
+        idx(1:n) = [(j, j=1,n)]
+      end if
+      return
+    end if
+
+    p = 1
+    do while (p <= len_trim(list))
+      q = index(list(p:), ',')
+      if (q == 0) then
+        tok = list(p:)
+        p   = len_trim(list)+1
+      else
+        tok = list(p:p+q-2)
+        p   = p+q
+      end if
+      tok = adjustl(tok)
+      if (len_trim(tok) == 0) cycle
+      do j = 1, size(names)
+        if (upper(trim(adjustl(names(j)))) == upper(trim(tok))) exit
+      end do
+      if (j > size(names)) then
+        write(*,'(a)') 'Field snapshot: '//trim(tok)//' is not a constituent name, skipped'
+      else if (all(idx(1:n) /= j)) then
+        n = n+1
+        idx(n) = j
+      end if
+    end do
+  end subroutine select_names
+
+  function upper(str) result(up)
+    character(*), intent(in) :: str
+    character(len=len(str)) :: up
+    integer :: i
+
+    up = str
+    do i = 1, len(str)
+      if (str(i:i) >= 'a' .and. str(i:i) <= 'z') up(i:i) = achar(iachar(str(i:i))-32)
+    end do
+  end function upper
+
+  subroutine open_store()
+    character(len=:), allocatable :: hdr, fields, cnames, cdnames
+    logical :: exists
+    integer :: j
+
+    inquire(file=w2f_name, exist=exists)
+    if (restart_in .and. exists) exists = store_cut()
+    if (restart_in .and. exists) then
+      open(newunit=snap_unit, file=w2f_name, access='stream', form='unformatted', status='old', position='append',      &
+           action='write')
+      return
+    end if
+
+    fields = 'T,U,VOL'
+    do j = 1, ncfield
+      fields = fields//','//trim(adjustl(cname2(cfield(j))))
+    end do
+    do j = 1, ncdfield
+      fields = fields//','//trim(adjustl(cdname2(cdfield(j))))
+    end do
+    cnames = ''
+    do j = 1, nct
+      if (j > 1) cnames = cnames//','
+      cnames = cnames//trim(adjustl(cname2(j)))
+    end do
+    cdnames = ''
+    do j = 1, ndc
+      if (j > 1) cdnames = cdnames//','
+      cdnames = cdnames//trim(adjustl(cdname2(j)))
+    end do
+    hdr = 'kmx='//itoa(kmx)//new_line('a')//'imx='//itoa(imx)//new_line('a')//'nwb='//itoa(nwb)//new_line('a')         &
+          //'nbr='//itoa(nbr)//new_line('a')//'fields='//fields//new_line('a')//'constituents='//cnames//new_line('a') &
+          //'derived='//cdnames//new_line('a')
+    if (oxygen_demand .and. any(cfield(1:ncfield) == ndo)) hdr = hdr//'do='//trim(adjustl(cname2(ndo)))//new_line('a')
+
+    open(newunit=snap_unit, file=w2f_name, access='stream', form='unformatted', status='replace', action='write')
+    write(snap_unit) w2f_magic, int(len(hdr), 4), hdr
+    write(snap_unit) int(bs, 4), int(be, 4), int(ds, 4), int(kb, 4)
+  end subroutine open_store
+
+  ! Truncate fields.w2f at its first record with JDAY at or after the restart day (and any partly written last
+  ! record), so a restarted run continues the store without repeating snapshots. False when the file holds no
+  ! header, to be written anew.
+  logical function store_cut()
+    character(len=8) :: magic
+    character(len=:), allocatable :: hdr
+    integer(4) :: hlen, ncells
+    integer(8) :: fsize, p, reclen
+    real(r8)   :: jd
+    integer    :: u, ios, nf, q, e, j
+
+    store_cut = .false.
+    open(newunit=u, file=w2f_name, access='stream', form='unformatted', status='old', action='readwrite', iostat=ios)
+    if (ios /= 0) return
+    inquire(unit=u, size=fsize)
+    read(u, pos=1, iostat=ios) magic, hlen
+    if (ios /= 0 .or. magic /= w2f_magic .or. hlen <= 0) then
+      close(u)
+      return
+    end if
+    allocate(character(len=hlen) :: hdr)
+    read(u, iostat=ios) hdr
+    q = index(hdr, 'fields=')
+    if (ios /= 0 .or. q == 0) then
+      close(u)
+      return
+    end if
+    store_cut = .true.
+
+    ! Field count of the stored records, which need not match this run's selection
+    e = index(hdr(q:), new_line('a'))
+    e = merge(q+e-2, len(hdr), e > 0)
+    nf = 1
+    do j = q, e
+      if (hdr(j:j) == ',') nf = nf+1
+    end do
+
+    p = 13_8+hlen+4_8*(2*nwb+nbr+imx)
+    do
+      if (p+19 > fsize) exit
+      read(u, pos=p, iostat=ios) jd
+      if (ios == 0) read(u, pos=p+16, iostat=ios) ncells
+      if (ios /= 0 .or. jd >= real(jday, r8)) exit
+      reclen = 20_8+4_8*(nwb+nbr+imx)+4_8*nf*ncells
+      if (p+reclen-1 > fsize) exit
+      p = p+reclen
+    end do
+    if (p <= fsize) then
+      read(u, pos=p)
+      endfile(u)
+    end if
+    close(u)
+  end function store_cut
+
+  function itoa(i) result(str)
+    integer, intent(in) :: i
+    character(len=:), allocatable :: str
+    character(len=16) :: tmp
+    write(tmp, '(I0)') i
+    str = trim(tmp)
+  end function itoa
+
+  ! Called where FISHHABITAT and ENVIRP are evaluated
+  subroutine field_snapshot_write()
+    integer :: jw, jb, i, k, j, n, nf, ncells
+    real    :: depth(imx)
+
+    if (.not. snap_cfg_loaded) call field_snapshot_init()
+    if (.not. snap_enabled) return
+    if (jday < snap_next) return
+    snap_next = jday+snap_days
+    if (snap_unit == 0) call open_store()
+
+    ncells = 0
+    do jw = 1, nwb
+      do jb = bs(jw), be(jw)
+        do i = cus(jb), ds(jb)
+          ncells = ncells+max(kb(i)-ktwb(jw)+1, 0)
+        end do
+      end do
+    end do
+    nf = 3+ncfield+ncdfield
+    if (allocated(buf)) then
+      if (size(buf) < nf*ncells) deallocate(buf)
+    end if
+    if (.not. allocated(buf)) allocate(buf(nf*ncells))
+
+    depth = 0.0
+    n = 0
+    do jw = 1, nwb
+      do jb = bs(jw), be(jw)
+        do i = cus(jb), ds(jb)
+          depth(i) = real(depthb(kb(i),i))
+          do k = ktwb(jw), kb(i)
+            n = n+1
+            buf(n)          = real(t2(k,i))
+            buf(ncells+n)   = real(u(k,i))
+            buf(2*ncells+n) = real(vol(k,i))
+            do j = 1, ncfield
+              buf((2+j)*ncells+n) = real(c2(k,i,cfield(j))*cmult(cfield(j)))
+            end do
+            do j = 1, ncdfield
+              buf((2+ncfield+j)*ncells+n) = real(cd(k,i,cdfield(j))*cdmult(cdfield(j)))
+            end do
+          end do
+        end do
+      end do
+    end do
+
+    write(snap_unit) real(jday, r8), real(dlt, r8), int(ncells, 4), int(ktwb, 4), int(cus, 4), depth, buf(1:nf*ncells)
+  end subroutine field_snapshot_write
+
+  subroutine field_snapshot_close()
+    if (snap_unit == 0) return
+    close(snap_unit)
+    snap_unit = 0
+  end subroutine field_snapshot_close
+
+end module fieldsnapcli
@@ -285,7 +285,7 @@ END SUBROUTINE PIPE_FLOW_INITIALIZE
 !***********************************************************************************************************************************
 
 SUBROUTINE OPEN_CHANNEL_INITIALIZE
-  USE GLOBAL; USE STRUCTURES
+  USE GLOBAL; USE STRUCTURES; USE PIPESOLVERCLI
   REAL(R8), PARAMETER :: THETA=0.55
   REAL(R8)    :: DLTX,PHI,VTOT,SLOPE,DIST,BEPR1,BEPR2,BC1,EL1,BC2,EL2,WLSLOPE,DLTX2,BAR1,BAREA,RAD1,RAD2
   REAL(R8)    :: TWIDTH,VAVG,QSUM,QAVG,QOUT,WETPER,BAR2
@@ -297,7 +297,7 @@ SUBROUTINE OPEN_CHANNEL_INITIALIZE
   REAL(R8)                                 :: DT,D
   REAL(R8),    ALLOCATABLE, DIMENSION(:)   :: Y,   B,   V,   CAREA, TOPW,  BELEV, Q, VOLD, YOLD     ! CB 10/4/07
   REAL(R8),    ALLOCATABLE, DIMENSION(:)   :: YT,  VT, VPR, YPR, TAREA, TOPWT, RT
-  REAL(R8),    ALLOCATABLE, DIMENSION(:,:) :: DAA, AL
+  REAL(R8),    ALLOCATABLE, DIMENSION(:,:) :: DAA, AL, ABD
   INTEGER, ALLOCATABLE, DIMENSION(:)   :: INDX
   LOGICAL                              :: SMOOTH_WATER_LEVELS      !, OPENWRN
   SAVE
@@ -306,14 +306,16 @@ SUBROUTINE OPEN_CHANNEL_INITIALIZE
 
   ALLOCATE (Y(NN),    V(NN),     CAREA(NN),  TOPW(NN),   BELEV(NN),  Q(NN),     VOLD(NN), YOLD(NN), B(NN))         ! CB 10/4/07
   ALLOCATE (YT(NN),   VT(NN),    VPR(NN),    YPR(NN),    TAREA(NN),  TOPWT(NN), RT(NN),   INDX(NN))
-  ALLOCATE (AL(NN,2), DAA(NN,NN))
+  CALL PIPE_SOLVER_INIT
+  ALLOCATE (AL(NN,PIPE_KL), ABD(NN,PIPE_BW))                            ! band storage: ABD(N,3+J-N) multiplies unknown J in row N
+  IF (.NOT. PIPE_BAND) ALLOCATE (DAA(NN,NN))
 RETURN
 
 ENTRY OPEN_CHANNEL (EL1,EL2,QOUT,IC,DT)
 
 ! Variable initializtion
 
-  B     = 0.0; Y     = 0.0; V = 0.0; VT = 0.0; YT = 0.0; RT = 0.0; DAA = 0.0; YPR = 0.0; VPR = 0.0; TOPW = 0.0; TOPWT = 0.0
+  B     = 0.0; Y     = 0.0; V = 0.0; VT = 0.0; YT = 0.0; RT = 0.0; ABD = 0.0; YPR = 0.0; VPR = 0.0; TOPW = 0.0; TOPWT = 0.0
   CAREA = 0.0; TAREA = 0.0
   BELEV(1)  = UPIE
   BELEV(NC) = DNIE
@@ -412,11 +414,11 @@ ENTRY OPEN_CHANNEL (EL1,EL2,QOUT,IC,DT)
   DO N=2,NC-1,2
     VPR(N) = (VPR(N-1)+VPR(N+1))*0.5D0
     V(N)   = (V(N-1)+V(N+1))*0.5D0
-    IF (N /= 2) DAA(N,N-2) = -THETA*(DT/DLTX)*(VPR(N)*0.5)
-    DAA(N,N-1) = -THETA*(DT/DLTX)*(TAREA(N)/TOPWT(N))
-    DAA(N,N)   =  1.0D0
-    DAA(N,N+1) =  THETA*(DT/DLTX)*(TAREA(N)/TOPWT(N))
-    IF (N /= NC-1) DAA(N,N+2) = THETA*(DT/DLTX)*(VPR(N)*0.5D0)
+    IF (N /= 2) ABD(N,1) = -THETA*(DT/DLTX)*(VPR(N)*0.5)
+    ABD(N,2) = -THETA*(DT/DLTX)*(TAREA(N)/TOPWT(N))
+    ABD(N,3) =  1.0D0
+    ABD(N,4) =  THETA*(DT/DLTX)*(TAREA(N)/TOPWT(N))
+    IF (N /= NC-1) ABD(N,5) = THETA*(DT/DLTX)*(VPR(N)*0.5D0)
     IF (N == 2) THEN
       B(N) = Y(N)-(1.0D0-THETA)*(DT/DLTX)*(TAREA(N)/TOPWT(N))*(V(N+1)-V(N-1))-(1.0D0-THETA)*(DT/DLTX)*(V(N)*0.5D0)*(Y(N+2)-BC1)          &
              +THETA*(DT/DLTX)*(VPR(N)*0.5D0)*BC1
@@ -433,12 +435,12 @@ ENTRY OPEN_CHANNEL (EL1,EL2,QOUT,IC,DT)
 
     DO N=1,NC,2
       IF (N /= 1) THEN
-        DAA(N,N-2) = -THETA*(DT/DLTX)*VPR(N)
-        DAA(N,N-1) = -THETA*(DT/DLTX)*G*DCOS(PHI)
+        ABD(N,1) = -THETA*(DT/DLTX)*VPR(N)
+        ABD(N,2) = -THETA*(DT/DLTX)*G*DCOS(PHI)
       END IF
-      DAA(N,N) = 1.0+THETA*DT*G*(FMAN**2)*DABS(VPR(N))/(RT(N)**(4.0/3.0))+THETA*(DT/DLTX)*VPR(N)+THETA*(CLOSS*0.5D0)*(DT/CLEN)        &
+      ABD(N,3) = 1.0+THETA*DT*G*(FMAN**2)*DABS(VPR(N))/(RT(N)**(4.0/3.0))+THETA*(DT/DLTX)*VPR(N)+THETA*(CLOSS*0.5D0)*(DT/CLEN)        &
                  *DABS(VPR(N))
-      IF (N /= NC) DAA(N,N+1) = THETA*(DT/DLTX)*G*DCOS(PHI)
+      IF (N /= NC) ABD(N,4) = THETA*(DT/DLTX)*G*DCOS(PHI)
       IF (N == 1) THEN
         B(N) = V(N)-(1.0D0-THETA)*(DT/DLTX)*G*(Y(N+1)-BC1)*DCOS(PHI)-(1.0D0-THETA)*V(N)*(DT/DLTX)*V(N)-(1.0D0-THETA)*DT*G*(FMAN**2)       &
                /(RT(N)**(4.0/3.0))*V(N)*DABS(V(N))+DT*G*DSIN(PHI)-(1.0D0-THETA)*(DT/CLEN)*(CLOSS*0.5D0)*V(N)*DABS(V(N))+THETA*(DT/DLTX)   &
@@ -455,12 +457,12 @@ ENTRY OPEN_CHANNEL (EL1,EL2,QOUT,IC,DT)
   ELSE
     DO N=1,NC,2
       IF (N /= NC) THEN
-        DAA(N,N+2) = THETA*(DT/DLTX)*VPR(N)
-        DAA(N,N+1) = THETA*(DT/DLTX)*G*DCOS(PHI)
+        ABD(N,5) = THETA*(DT/DLTX)*VPR(N)
+        ABD(N,4) = THETA*(DT/DLTX)*G*DCOS(PHI)
       END IF
-      DAA(N,N) = 1.0+THETA*DT*G*(FMAN**2)*DABS(VPR(N))/(RT(N)**(4.0/3.0))-THETA*(DT/DLTX)*VPR(N)+THETA*(CLOSS*0.5D0)*(DT/CLEN)        &
+      ABD(N,3) = 1.0+THETA*DT*G*(FMAN**2)*DABS(VPR(N))/(RT(N)**(4.0/3.0))-THETA*(DT/DLTX)*VPR(N)+THETA*(CLOSS*0.5D0)*(DT/CLEN)        &
                  *DABS(VPR(N))
-      IF (N /= 1) DAA(N,N-1) = -THETA*(DT/DLTX)*G*DCOS(PHI)
+      IF (N /= 1) ABD(N,2) = -THETA*(DT/DLTX)*G*DCOS(PHI)
       IF (N == NC) THEN
         B(N) = V(N)-(1.0D0-THETA)*(DT/DLTX)*G*(BC2-Y(N-1))*DCOS(PHI)-(1.0-THETA)*V(N)*(DT/DLTX)*(-V(N))-(1.0D0-THETA)*DT*G*(FMAN**2)    &
                /(RT(N)**(4.0/3.0))*V(N)*DABS(V(N))+DT*G*DSIN(PHI)-(1.0-THETA)*(DT/CLEN)*(CLOSS*0.5)*V(N)*DABS(V(N))-THETA*(DT/DLTX)   &
@@ -476,8 +478,14 @@ ENTRY OPEN_CHANNEL (EL1,EL2,QOUT,IC,DT)
     END DO
   END IF
   NP = NN
-  CALL LUDCMP (DAA,NC,NP,INDX,D)
-  CALL LUBKSB (DAA,NC,NP,INDX,B)
+  IF (PIPE_BAND) THEN
+    CALL PIPE_BAND_FACTOR (ABD,NC,NP,AL,INDX,D)
+    CALL PIPE_BAND_SOLVE  (ABD,NC,NP,AL,INDX,B)
+  ELSE
+    CALL PIPE_BAND_TO_DENSE (ABD,NC,NP,DAA)
+    CALL LUDCMP (DAA,NC,NP,INDX,D)
+    CALL LUBKSB (DAA,NC,NP,INDX,B)
+  END IF
   DO I=2,NC-1,2
     YOLD(I)   = Y(I)
     YST(I,IC) = Y(I)
@@ -546,7 +554,8 @@ ENTRY OPEN_CHANNEL (EL1,EL2,QOUT,IC,DT)
 10010 FORMAT ('water levels for culvert ',I3,' on Julian Day ',F10.3,' are <= 0 - predictions have been smoothed')
 RETURN
 ENTRY DEALLOCATE_OPEN_CHANNEL
-  DEALLOCATE (Y, V, CAREA, TOPW, BELEV, Q, VOLD, YOLD, B, YT, VT, VPR, YPR, TAREA, TOPWT, RT, INDX, AL, DAA)      ! CB 10/4/07
+  DEALLOCATE (Y, V, CAREA, TOPW, BELEV, Q, VOLD, YOLD, B, YT, VT, VPR, YPR, TAREA, TOPWT, RT, INDX, AL, ABD)      ! CB 10/4/07
+  IF (ALLOCATED(DAA)) DEALLOCATE (DAA)
 RETURN
 END SUBROUTINE OPEN_CHANNEL_INITIALIZE
 
@@ -638,102 +647,6 @@ SUBROUTINE GRID_AREA2
   RETURN
 END SUBROUTINE
 
-!***********************************************************************************************************************************
-!**                                              S U B R O U T I N E   L U D C M P                                                **
-!***********************************************************************************************************************************
-
-SUBROUTINE LUDCMP (A,N,NP,INDX,D)
-USE PREC
-  INTEGER         :: I,J,K,IMAX,NP,N
-  INTEGER         :: INDX(NP)
-  REAL(R8)        :: A(NP,NP),D
-  REAL(R8)        :: VV(500),AAMAX,SUM,DUM
-  REAL, PARAMETER :: TINY=1.0E-20
-
-
-  D = 1.0
-  DO I=1,N
-    AAMAX = 0.0
-    DO J=1,N
-      IF (ABS(A(I,J)) > AAMAX) AAMAX = ABS(A(I,J))
-    END DO
-    VV(I) = 1.0/AAMAX
-  END DO
-  DO J=1,N
-    DO I=1,J-1
-      SUM = A(I,J)
-      DO K=1,I-1
-        SUM = SUM-A(I,K)*A(K,J)
-      END DO
-      A(I,J) = SUM
-    END DO
-    AAMAX = 0.0
-    DO I=J,N
-      SUM = A(I,J)
-      DO K=1,J-1
-        SUM = SUM-A(I,K)*A(K,J)
-      END DO
-      A(I,J) = SUM
-      DUM = VV(I)*ABS(SUM)
-      IF (DUM >= AAMAX) THEN
-        IMAX  = I
-        AAMAX = DUM
-      END IF
-    END DO
-    IF (J /= IMAX) THEN
-      DO K=1,N
-        DUM       = A(IMAX,K)
-        A(IMAX,K) = A(J,K)
-        A(J,K)    = DUM
-      END DO
-      D        = -D
-      VV(IMAX) =  VV(J)
-    END IF
-    INDX(J) = IMAX
-    IF (A(J,J) == 0.0) A(J,J) = TINY
-    IF (J /= N) THEN
-      DUM = 1.0/A(J,J)
-      DO I=J+1,N
-        A(I,J) = A(I,J)*DUM
-      END DO
-    END IF
-  END DO
-END SUBROUTINE LUDCMP
-
-!***********************************************************************************************************************************
-!**                                              S U B R O U T I N E   L U B K S B                                                **
-!***********************************************************************************************************************************
-
-SUBROUTINE LUBKSB (A,N,NP,INDX,B)
-USE PREC
-  INTEGER :: N, NP
-  REAL(R8):: A(NP,NP), B(N),SUM
-  INTEGER :: INDX(NP)
-  INTEGER :: I, II, J, LL
-
-  II = 0
-  DO I=1,N
-    LL    = INDX(I)
-    SUM   = B(LL)
-    B(LL) = B(I)
-    IF (II /= 0) THEN
-      DO J=II,I-1
-        SUM = SUM-A(I,J)*B(J)
-      END DO
-    ELSE IF (SUM /= 0.0) THEN
-      II = I
-    END IF
-    B(I) = SUM
-  END DO
-  DO I=N,1,-1
-    SUM = B(I)
-    DO J=I+1,N
-      SUM = SUM-A(I,J)*B(J)
-    END DO
-    B(I) = SUM/A(I,I)
-  END DO
-END SUBROUTINE LUBKSB
-
 !***********************************************************************************************************************************
 !**                                                  F U N C T I O N   B A R E A                                                  **
 !***********************************************************************************************************************************
@@ -138,6 +138,89 @@ ENTRY SURFACE_TERMS (TSUR)
   RETURN  
 END SUBROUTINE HEAT_EXCHANGE
 
+!***********************************************************************************************************************************
+!**                          E Q U I L I B R I U M  T E M P E R A T U R E  ( S E G M E N T S  I U - I D )                         **
+!***********************************************************************************************************************************
+
+! Same fixed-point iteration as EQUILIBRIUM_TEMPERATURE for all ice-free surface cells of segments IU-ID of waterbody JW at once
+! (W2_HEAT_SOLVER=vector). Cells iterate in lockstep, a converged cell keeping its values, and each cell starts from its result
+! of the previous time step unless W2_HEAT_WARM_START=off.
+
+SUBROUTINE EQUILIBRIUM_TEMPERATURE_SEGMENTS (IU,ID)
+  USE GLOBAL, ONLY: JW, NONZERO, ICE, Z0; USE SURFHE; USE TVDC; USE PREC
+  USE HEATSOLVERCLI, ONLY: HEAT_WARM_START, ET_WARM, HAS_WARM, HEAT_SOLVER_RECORD
+  IMPLICIT NONE
+  INTEGER, INTENT(IN) :: IU,ID
+  INTEGER,  PARAMETER :: MAXIT = 10
+  REAL(R8) :: DEG_F,DEG_C
+  REAL(R8) :: MPS_TO_MPH,W_M2_TO_BTU_FT2_DAY,FLUX_BR_TO_FLUX_SI
+  REAL(R8) :: TDEW_F,TAIR_F,ACONV,BCONV,RA,TSTAR,SRC
+  REAL(R8), DIMENSION(IU:ID) :: SRO_BR,FW,ETF,ETP,BETA,CSHEF
+  LOGICAL,  DIMENSION(IU:ID) :: ACTIVE
+  INTEGER,  DIMENSION(IU:ID) :: ITERS
+  INTEGER  :: I,J
+  LOGICAL  :: UPD
+
+  DATA MPS_TO_MPH /2.23714D0/, W_M2_TO_BTU_FT2_DAY /7.60796D0/, FLUX_BR_TO_FLUX_SI /0.23659D0/
+
+  IF (ID < IU) RETURN
+
+! British units
+
+  TDEW_F = DEG_F(TDEW(JW))
+  TAIR_F = DEG_F(TAIR(JW))
+  ACONV  = W_M2_TO_BTU_FT2_DAY
+  BCONV  = 0.0
+  IF (CFW(JW) == 1.0) BCONV = 3.401062
+  IF (CFW(JW) == 2.0) BCONV = 1.520411
+  RA     = 3.1872E-08*(TAIR_F+459.67)**4
+  SRC    = 0.26*TAIR_F
+  DO I=IU,ID
+    SRO_BR(I) = SRON(JW)*W_M2_TO_BTU_FT2_DAY*SHADE(I)
+    FW(I)     = ACONV*AFW(JW)+BCONV*BFW(JW)*(WIND(JW)*WSC(I)*MPS_TO_MPH*DLOG(2.0D0/Z0(JW))/DLOG(WINDH(JW)/Z0(JW))+NONZERO)**CFW(JW)
+    ACTIVE(I) = .NOT. ICE(I)
+    ITERS(I)  = 0
+    ETF(I)    = TDEW_F
+    IF (HEAT_WARM_START .AND. HAS_WARM(I)) ETF(I) = ET_WARM(I)
+  END DO
+
+! Equilibrium temperature and heat exchange coefficient
+
+  DO I=IU,ID
+    TSTAR    = (ETF(I)+TDEW_F)*0.5
+    BETA(I)  =  0.255-(8.5E-3*TSTAR)+(2.04E-4*TSTAR*TSTAR)
+    CSHEF(I) =  15.7+(0.26+BETA(I))*FW(I)
+    ETP(I)   = (SRO_BR(I)+RA-1801.0)/CSHEF(I)+(CSHEF(I)-15.7)*(SRC+BETA(I)*TDEW_F)/(CSHEF(I)*(0.26+BETA(I)))
+  END DO
+  DO J=1,MAXIT
+    DO I=IU,ID
+      UPD       =  ACTIVE(I) .AND. ABS(ETP(I)-ETF(I)) > 0.05
+      ACTIVE(I) =  UPD
+      ETF(I)    =  MERGE(ETP(I),ETF(I),UPD)
+      TSTAR     = (ETF(I)+TDEW_F)*0.5
+      BETA(I)   =  MERGE(0.255-(8.5E-3*TSTAR)+(2.04E-4*TSTAR*TSTAR),BETA(I),UPD)
+      CSHEF(I)  =  MERGE(15.7+(0.26+BETA(I))*FW(I),CSHEF(I),UPD)
+      ETP(I)    =  MERGE((SRO_BR(I)+RA-1801.0)/CSHEF(I)+(CSHEF(I)-15.7)*(SRC+BETA(I)*TDEW_F)/(CSHEF(I)*(0.26+BETA(I))),ETP(I),UPD)
+      ITERS(I)  =  ITERS(I)+MERGE(1,0,UPD)
+    END DO
+    IF (.NOT. ANY(ACTIVE)) EXIT
+  END DO
+
+! SI units
+
+  DO I=IU,ID
+    IF (ICE(I)) THEN
+      HAS_WARM(I) = .FALSE.
+      CYCLE
+    END IF
+    ET_WARM(I)  = ETF(I)
+    HAS_WARM(I) = .TRUE.
+    ET(I)       = DEG_C(ETF(I))
+    CSHE(I)     = CSHEF(I)*FLUX_BR_TO_FLUX_SI/RHOWCP
+  END DO
+  CALL HEAT_SOLVER_RECORD (PACK(ITERS,.NOT. ICE(IU:ID)),MAXIT)
+END SUBROUTINE EQUILIBRIUM_TEMPERATURE_SEGMENTS
+
 ! Function declaration
 
    REAL(R8) FUNCTION DEG_F(X)
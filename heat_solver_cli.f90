@@ -0,0 +1,101 @@
+module heatsolvercli
+  use prec, only: r8
+  implicit none
+
+  ! Equilibrium-temperature solver selection for TEMPERATURE (waterbodies without term-by-term heat exchange):
+  !   W2_HEAT_SOLVER=scalar  (default) EQUILIBRIUM_TEMPERATURE, one segment at a time, iterations started from
+  !                          the dew point temperature
+  !   W2_HEAT_SOLVER=vector  EQUILIBRIUM_TEMPERATURE_SEGMENTS, all surface cells of a branch iterated together,
+  !                          each started from the segment's equilibrium temperature of the previous time step
+  !   W2_HEAT_WARM_START=off starts the vector solver from the dew point as well (same iterates as scalar)
+  ! The warm-start temperatures go into the restart file (last record, vector solver only), so that a run resumed
+  ! from it iterates as the uninterrupted run does; restart files without them resume cold.
+  ! The vector solver keeps iteration statistics and prints them at the end of the run.
+  logical, save :: heat_cfg_loaded  = .false.
+  logical, save :: heat_vector      = .false.
+  logical, save :: heat_warm_start  = .true.
+
+  ! previous equilibrium temperature (deg F) per segment, valid where has_warm is set
+  real(r8), allocatable, save :: et_warm(:)
+  logical,  allocatable, save :: has_warm(:)
+  character(len=8), parameter  :: heat_tag = 'W2HEAT01'
+
+  integer(8), save :: nsolves    = 0
+  integer(8), save :: niters     = 0
+  integer(8), save :: ncapped    = 0
+  integer,    save :: max_iters  = 0
+contains
+
+  subroutine heat_solver_init(imx)
+    integer, intent(in) :: imx
+    character(len=32) :: val
+    integer :: status
+
+    if (heat_cfg_loaded) return
+    heat_cfg_loaded = .true.
+
+    call get_environment_variable('W2_HEAT_SOLVER', val, status=status)
+    if (status == 0) then
+      select case (trim(adjustl(val)))
+      case ('vector', 'VECTOR')
+        heat_vector = .true.
+      case ('scalar', 'SCALAR', '')
+        heat_vector = .false.
+      case default
+        write(*,'(a)') 'W2_HEAT_SOLVER='//trim(val)//' not recognized, using the scalar solver'
+      end select
+    end if
+    call get_environment_variable('W2_HEAT_WARM_START', val, status=status)
+    if (status == 0) then
+      select case (trim(adjustl(val)))
+      case ('off', 'OFF', '0', 'no', 'NO', 'false', 'FALSE')
+        heat_warm_start = .false.
+      end select
+    end if
+    if (.not. heat_vector) return
+
+    allocate(et_warm(imx), has_warm(imx))
+    et_warm  = 0.0_r8
+    has_warm = .false.
+  end subroutine heat_solver_init
+
+  ! Restart record of the warm-start state, written by RESTART_OUTPUT after the model's own records
+  subroutine heat_solver_save(unit, imx)
+    integer, intent(in) :: unit, imx
+
+    call heat_solver_init(imx)
+    if (.not. heat_vector) return
+    write(unit) heat_tag, imx, has_warm, et_warm
+  end subroutine heat_solver_save
+
+  ! Reads the record of heat_solver_save, if any, after the model's own restart records
+  subroutine heat_solver_restore(unit, imx)
+    integer, intent(in) :: unit, imx
+    character(len=8) :: tag
+    integer :: n, ios
+
+    call heat_solver_init(imx)
+    if (.not. heat_vector) return
+    read(unit, iostat=ios) tag, n, has_warm, et_warm
+    if (ios /= 0 .or. tag /= heat_tag .or. n /= imx) then
+      et_warm  = 0.0_r8
+      has_warm = .false.
+    end if
+  end subroutine heat_solver_restore
+
+  subroutine heat_solver_record(iters, cap)
+    integer, intent(in) :: iters(:), cap
+
+    nsolves   = nsolves+size(iters)
+    niters    = niters+sum(int(iters, 8))
+    ncapped   = ncapped+count(iters >= cap)
+    max_iters = max(max_iters, maxval(iters))
+  end subroutine heat_solver_record
+
+  subroutine heat_solver_report()
+    if (.not. heat_vector .or. nsolves == 0) return
+    write(*,'(a,i0,a,f0.2,a,i0,a,i0,a)') 'Heat solver: ', nsolves, ' segment solves, mean ',                           &
+          real(niters, r8)/real(nsolves, r8), ' iterations, max ', max_iters, ', ', ncapped, ' at the iteration cap'
+  end subroutine heat_solver_report
+
+end module heatsolvercli
@@ -0,0 +1,228 @@
+module inputcachecli
+  use prec, only: r8
+  implicit none
+
+  ! Optional binary cache for the time-varying input files read by TIME_VARYING_DATA. Enabled with
+  ! W2_INPUT_CACHE=on. For an input file <file>, the sidecar <file>.w2c written by api/inputcache.py
+  ! holds the decoded data records (from line 4 on) as float64, laid out as
+  !   'W2INC001' | int64 source size | int32 source crc32 | int32 format (0 fixed F8.0, 1 csv)
+  !   | int32 nrows | int32 ncols | 32-byte sha256 of the source | nrows x ncols float64 (row by row)
+  ! Values that could not be decoded are stored as NaN. A sidecar is only used when the source size and
+  ! CRC-32 match and every record holds the values the model reads from it; otherwise the text file is
+  ! read as usual.
+  character(len=8), parameter :: w2c_magic = 'W2INC001'
+  integer, parameter :: fmt_fixed = 0, fmt_csv = 1
+
+  type cache_t
+    integer :: ncols = 0
+    integer :: nrows = 0
+    integer :: next  = 1
+    character(len=:), allocatable :: fname
+    real(r8), allocatable :: rows(:,:)
+  end type cache_t
+
+  logical, save :: cache_initialized = .false.
+  logical, save :: cache_enabled     = .false.
+  integer, save :: ncaches           = 0
+  type(cache_t), allocatable, save :: caches(:)
+  integer,       allocatable, save :: cache_of_unit(:)
+  integer(8),                 save :: crc_table(0:255)
+contains
+
+  subroutine input_cache_init()
+    character(len=32) :: val
+    integer :: status, n, k
+    integer(8) :: c
+
+    if (cache_initialized) return
+    cache_initialized = .true.
+
+    call get_environment_variable('W2_INPUT_CACHE', val, status=status)
+    if (status == 0) then
+      select case (trim(adjustl(val)))
+      case ('on', 'ON', '1', 'yes', 'YES', 'true', 'TRUE')
+        cache_enabled = .true.
+      end select
+    end if
+    if (.not. cache_enabled) return
+
+    ! CRC-32 (zlib polynomial), same digest as zlib.crc32 on the Python side
+    do n = 0, 255
+      c = int(n, 8)
+      do k = 1, 8
+        if (iand(c, 1_8) /= 0) then
+          c = ieor(int(z'EDB88320', 8), shiftr(c, 1))
+        else
+          c = shiftr(c, 1)
+        end if
+      end do
+      crc_table(n) = c
+    end do
+  end subroutine input_cache_init
+
+  ! CRC-32 and size of a file; returns .false. if it cannot be read.
+  logical function file_crc32(fname, fsize, crc)
+    character(*), intent(in)  :: fname
+    integer(8),   intent(out) :: fsize, crc
+    integer, parameter :: chunk = 1048576
+    character(len=:), allocatable :: buf
+    integer(8) :: pos, n, i
+    integer :: u, ios
+
+    file_crc32 = .false.
+    crc = 0
+    inquire(file=fname, size=fsize)
+    if (fsize < 0) return
+    open(newunit=u, file=fname, access='stream', form='unformatted', status='old', action='read', iostat=ios)
+    if (ios /= 0) return
+    allocate(character(len=chunk) :: buf)
+    crc = int(z'FFFFFFFF', 8)
+    pos = 1
+    do while (pos <= fsize)
+      n = min(int(chunk, 8), fsize - pos + 1)
+      read(u, pos=pos, iostat=ios) buf(1:n)
+      if (ios /= 0) then
+        close(u)
+        return
+      end if
+      do i = 1, n
+        crc = ieor(crc_table(iand(ieor(crc, int(ichar(buf(i:i)), 8)), 255_8)), shiftr(crc, 8))
+      end do
+      pos = pos + n
+    end do
+    close(u)
+    crc = ieor(crc, int(z'FFFFFFFF', 8))
+    file_crc32 = .true.
+  end function file_crc32
+
+  ! Switch UNIT (an open input file whose first NSKIP data records were already read as text) to its
+  ! sidecar cache. NVALUES is the number of values each later READ takes from a record; callers only
+  ! attach files whose records occupy a single line.
+  logical function input_cache_attach(unit, nvalues, nskip)
+    integer, intent(in) :: unit, nvalues, nskip
+    character(len=512) :: fname
+    character(len=8)   :: magic
+    character(len=32)  :: sha
+    logical  :: opened, exists
+    integer  :: u, ios, fmt, nrows, ncols, crc4, s
+    integer(8) :: srcsize, srcsize_now, crc_now
+    real(r8), allocatable :: rows(:,:), tmp(:,:)
+
+    input_cache_attach = .false.
+    if (.not. cache_initialized) call input_cache_init()
+    if (.not. cache_enabled) return
+    inquire(unit=unit, opened=opened, name=fname)
+    if (.not. opened) return
+    inquire(file=trim(fname)//'.w2c', exist=exists)
+    if (.not. exists) return
+
+    open(newunit=u, file=trim(fname)//'.w2c', access='stream', form='unformatted', status='old', &
+         action='read', iostat=ios)
+    if (ios /= 0) return
+    read(u, iostat=ios) magic, srcsize, crc4, fmt, nrows, ncols, sha
+    if (ios /= 0 .or. magic /= w2c_magic .or. nrows < 0 .or. ncols < 1) then
+      close(u)
+      call reject(fname, 'unreadable cache header')
+      return
+    end if
+    if (.not. file_crc32(trim(fname), srcsize_now, crc_now)) then
+      close(u)
+      return
+    end if
+    if (srcsize_now /= srcsize .or. crc_now /= iand(int(crc4, 8), int(z'FFFFFFFF', 8))) then
+      close(u)
+      call reject(fname, 'source changed since the cache was built')
+      return
+    end if
+    allocate(rows(ncols, nrows))
+    read(u, iostat=ios) rows
+    close(u)
+    if (ios /= 0) then
+      call reject(fname, 'truncated cache')
+      return
+    end if
+
+    ! Fixed-format records shorter than the read are blank-padded (zero); csv records would continue
+    ! on the next line, which the cache does not reproduce.
+    if (nvalues > ncols) then
+      if (fmt /= fmt_fixed) then
+        call reject(fname, 'records hold fewer values than the model reads')
+        return
+      end if
+      allocate(tmp(nvalues, nrows))
+      tmp = 0.0_r8
+      tmp(1:ncols, :) = rows
+      call move_alloc(tmp, rows)
+      ncols = nvalues
+    end if
+    if (any(rows(1:nvalues, :) /= rows(1:nvalues, :))) then
+      call reject(fname, 'records hold values the cache cannot represent')
+      return
+    end if
+    if (nrows < nskip) return
+
+    if (.not. allocated(caches)) allocate(caches(64))
+    if (ncaches == size(caches)) call grow_caches()
+    call ensure_unit(unit)
+    ncaches = ncaches + 1
+    s = ncaches
+    caches(s)%fname = trim(fname)
+    caches(s)%ncols = ncols
+    caches(s)%nrows = nrows
+    caches(s)%next  = nskip + 1
+    call move_alloc(rows, caches(s)%rows)
+    cache_of_unit(unit) = s
+    input_cache_attach = .true.
+  end function input_cache_attach
+
+  subroutine reject(fname, why)
+    character(*), intent(in) :: fname, why
+    write(*, '(A)') 'Input cache not used for '//trim(fname)//': '//why
+  end subroutine reject
+
+  subroutine grow_caches()
+    type(cache_t), allocatable :: tmp(:)
+    allocate(tmp(2*size(caches)))
+    tmp(1:size(caches)) = caches
+    call move_alloc(tmp, caches)
+  end subroutine grow_caches
+
+  subroutine ensure_unit(unit)
+    integer, intent(in) :: unit
+    integer, allocatable :: tmp(:)
+    if (.not. allocated(cache_of_unit)) then
+      allocate(cache_of_unit(0:max(unit, 255)))
+      cache_of_unit = 0
+      return
+    end if
+    if (unit <= ubound(cache_of_unit, 1)) return
+    allocate(tmp(0:2*unit))
+    tmp = 0
+    tmp(0:ubound(cache_of_unit, 1)) = cache_of_unit
+    call move_alloc(tmp, cache_of_unit)
+  end subroutine ensure_unit
+
+  logical function input_cache_active(unit)
+    integer, intent(in) :: unit
+    input_cache_active = .false.
+    if (.not. allocated(cache_of_unit)) return
+    if (unit < 0 .or. unit > ubound(cache_of_unit, 1)) return
+    input_cache_active = (cache_of_unit(unit) > 0)
+  end function input_cache_active
+
+  ! Next record of an attached unit; VALUES receives its first size(VALUES) fields.
+  subroutine input_cache_read(unit, values)
+    integer,  intent(in)  :: unit
+    real(r8), intent(out) :: values(:)
+    integer :: s
+
+    s = cache_of_unit(unit)
+    if (caches(s)%next > caches(s)%nrows) then
+      write(*, '(A)') 'End of file on input cache for '//caches(s)%fname
+      stop 'End of file reading time-varying input data'
+    end if
+    values = caches(s)%rows(1:size(values), caches(s)%next)
+    caches(s)%next = caches(s)%next + 1
+  end subroutine input_cache_read
+
+end module inputcachecli
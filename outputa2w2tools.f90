@@ -5,6 +5,7 @@ SUBROUTINE OUTPUTA
   USE STRUCTURES; USE TRANS;  USE TVDC;   USE SELWC;  USE GDAYC; USE SCREENC; USE TDGAS;   USE RSTART  
   USE MACROPHYTEC; USE POROSITYC; USE ZOOPLANKTONC;   USE BIOENERGETICS
   use CEMAVars
+  USE BINARYOUTCLI, ONLY: SERIES_WRITE, SERIES_IS_BINARY
   IMPLICIT NONE
   
   EXTERNAL RESTART_OUTPUT  
@@ -12,6 +13,7 @@ SUBROUTINE OUTPUTA
   INTEGER :: JAD,JAF,IFLAG,JWWD,NLINES,ITOT,JJ, NUMOUTLETS,JSSS(100),JJC, IC, KK
   REAL    :: TVOLAVG,QSUMM,CGASD,XDUM,QOUTLET(100),TOUTLET(100),VOLTOT  
   REAL(R8):: DLVBR,DLE,CGAS,TGATE,TSPILL  
+  REAL(R8),ALLOCATABLE :: TSRROW(:)
     
   ! *** DSI W2_TOOL LINKAGE  
   REAL*4,SAVE,ALLOCATABLE,DIMENSION(:)::WSEL  
@@ -106,7 +108,7 @@ SUBROUTINE OUTPUTA
       NXTMTS = NXTMTS+TSRF(TSRDP)  
         
       ! write out water level File  
-      write(WLFN,'(f10.3,",",1000(f8.3,","))')jday,((elws(i),i=us(jb),ds(jb)),jb=1,nbr)      
+      call series_write(WLFN,'(f10.3,",",1000(f8.3,","))',[real(r8)::jday,((elws(i),i=us(jb),ds(jb)),jb=1,nbr)])      
         
       DO J=1,NIKTSR  
         I = ITSR(J)  
@@ -138,6 +140,28 @@ SUBROUTINE OUTPUTA
           IF (K > KB(I)) CYCLE  
         END IF  
         
+    IF (SERIES_IS_BINARY(TSR(J))) THEN        ! binary output mode: numeric row in the column order of the TSR header
+      IF (K >= KTWB(JW)) THEN
+        TSRROW = [REAL(R8)::JDAY,DLT,ELWS(I),T1(K,I),U(K,I),QC(I),SRON(JW)*1.06,GAMMA(K,I),DEPTHB(KB(I),I),BI(KTWB(JW),I),SHADE(I)]
+      ELSE
+        TSRROW = [REAL(R8)::JDAY,DLT,ELWS(I),-99.,-99.,QC(I),SRON(JW)*1.06,-99.,DEPTHB(KB(I),I),BI(KTWB(JW),I),SHADE(I)]
+      END IF
+      IF (ICE_COMPUTATION) TSRROW = [TSRROW,REAL(ICETH(I),R8)]
+      TSRROW = [TSRROW,[REAL(R8)::TVOLAVG,RN(I),RS(I),RANLW(JW),RB(I),RE(I),RC(I)]]
+      IF (K >= KTWB(JW)) THEN
+        TSRROW = [TSRROW,[REAL(R8)::(C2(K,I,CN(JAC))*CMULT(CN(JAC)),JAC=1,NAC),(EPD(K,I,JE),JE=1,NEP),(MAC(K,I,JM),JM=1,NMC)]]
+        IF (SEDIMENT_CALC(JW)) TSRROW = [TSRROW,[REAL(R8)::SED(K,I),SEDP(K,I),SEDN(K,I),SEDC(K,I)]]
+        TSRROW = [TSRROW,[REAL(R8)::(CD(K,I,CDN(JAD,JW))*CDMULT(CDN(JAD,JW)),JAD=1,NACD(JW)),(KF(K,I,KFCN(JF,JW))*VOL(K,I)/1000./DAY,JF=1,NAF(JW)), &
+                          (APLIM(K,I,JA),JA=1,NAL),(ANLIM(K,I,JA),JA=1,NAL),(ALLIM(K,I,JA),JA=1,NAL)]]
+      ELSE
+        TSRROW = [TSRROW,[REAL(R8)::(-99.,JAC=1,NAC+NEP+NMC)]]
+        IF (SEDIMENT_CALC(JW)) TSRROW = [TSRROW,[REAL(R8)::(-99.,JAC=1,4)]]
+        TSRROW = [TSRROW,[REAL(R8)::(-99.,JAC=1,NACD(JW)+NAF(JW)+3*NAL)]]
+      END IF
+      CALL SERIES_WRITE(TSR(J),'',TSRROW)
+      CYCLE
+    END IF
+
     IF(K >= KTWB(JW))THEN      ! SW 4/4/2018 ADDED TO ELIMINATE THE LAST VALUE OF A VARIABLE BEING USED FOR CASE WHEN ESTR IS NEGATIVE
      
         DO JAC=1,NAC  
@@ -840,15 +864,15 @@ SUBROUTINE OUTPUTA
                 JFILE=JFILE+1  
                 qwdo(j)           = qwdo(j)            +qstr(js,jb)                 ! cb 1/16/13  
                 twdo(j)           = twdo(j)            +qstr(js,jb)*tavg(js,jb)
-                WRITE(WDO2(JFILE,1),'(F10.3,",",F10.4)')JDAY,QSTR(JS,JB)  
-                WRITE(WDO2(JFILE,2),'(F10.3,",",F8.2)')JDAY,TAVG(JS,JB)  
+                CALL SERIES_WRITE(WDO2(JFILE,1),'(F10.3,",",F10.4)',[REAL(R8)::JDAY,QSTR(JS,JB)])  
+                CALL SERIES_WRITE(WDO2(JFILE,2),'(F10.3,",",F8.2)',[REAL(R8)::JDAY,TAVG(JS,JB)])  
                 IF (CONSTITUENTS)then
                   cwdo(cn(1:nac),j)= cwdo(cn(1:nac),j)+qstr(js,jb)*cavg(js,jb,cn(1:nac))                 ! cb 1/16/13
-                  WRITE (WDO2(JFILE,3),'(F10.3,",",1000(F10.4,","))') JDAY,(CAVG(JS,JB,CN(JC)),     JC=1,NAC)  
+                  CALL SERIES_WRITE(WDO2(JFILE,3),'(F10.3,",",1000(F10.4,","))',[REAL(R8)::JDAY,(CAVG(JS,JB,CN(JC)),     JC=1,NAC)])  
                 end if
                 IF (DERIVED_CALC)then
                   cdwdo(cdn(1:nacd(jw),jw),j) = cdwdo(cdn(1:nacd(jw),jw),j)+qstr(js,jb)*cdavg(js,jb,cdn(1:nacd(jw),jw))                 ! cb 1/16/13 
-                  WRITE (WDO2(JFILE,4),'(F10.3,",",1000(F10.4,","))') JDAY,(CDAVG(JS,JB,CDN(JD,JW)),JD=1,NACD(JW))  
+                  CALL SERIES_WRITE(WDO2(JFILE,4),'(F10.3,",",1000(F10.4,","))',[REAL(R8)::JDAY,(CDAVG(JS,JB,CDN(JD,JW)),JD=1,NACD(JW))])  
                 end if
               ENDDO  
               JSSS(JB)=NSTR(JB)  
@@ -873,18 +897,18 @@ SUBROUTINE OUTPUTA
             JFILE=JFILE+1
             qwdo(j)           = qwdo(j)            +qwd(jwd)                 ! cb 1/16/13  
             twdo(j)           = twdo(j)            +qwd(jwd)*tavgw(jwd)                 ! cb 1/16/13  
-            WRITE(WDO2(JFILE,1),'(F10.3,",",F10.4)')JDAY,QWD(JWD)  
-            WRITE(WDO2(JFILE,2),'(F10.3,",",F8.2)')JDAY,TAVGW(JWD)  
+            CALL SERIES_WRITE(WDO2(JFILE,1),'(F10.3,",",F10.4)',[REAL(R8)::JDAY,QWD(JWD)])  
+            CALL SERIES_WRITE(WDO2(JFILE,2),'(F10.3,",",F8.2)',[REAL(R8)::JDAY,TAVGW(JWD)])  
             IF (CONSTITUENTS)then
               cwdo(cn(1:nac),j)= cwdo(cn(1:nac),j)+qwd(jwd)*cavgw(jwd,cn(1:nac))                 ! cb 1/16/13  
-              WRITE (WDO2(JFILE,3),'(F10.3,",",1000(F10.4,","))') JDAY,(CAVGW(JWD,CN(JC)),     JC=1,NAC)  
+              CALL SERIES_WRITE(WDO2(JFILE,3),'(F10.3,",",1000(F10.4,","))',[REAL(R8)::JDAY,(CAVGW(JWD,CN(JC)),     JC=1,NAC)])  
             end if
             IF (DERIVED_CALC)THEN  
               !DO JW=1,NWB  
               !  IF (IWDO(J) >= US(BS(JW)) .AND. IWDO(J) <= DS(BE(JW))) EXIT  
               !END DO
               cdwdo(cdn(1:nacd(jw),jw),j) = cdwdo(cdn(1:nacd(jw),jw),j)+qwd(jwd)*cdavgw(jwd,cdn(1:nacd(jw),jw))                 ! cb 1/16/13  
-              WRITE (WDO2(JFILE,4),'(F10.3,",",1000(F10.4,","))') JDAY,(CDAVGW(JWD,CDN(JD,JW)),JD=1,NACD(JW))  
+              CALL SERIES_WRITE(WDO2(JFILE,4),'(F10.3,",",1000(F10.4,","))',[REAL(R8)::JDAY,(CDAVGW(JWD,CDN(JD,JW)),JD=1,NACD(JW))])  
             ENDIF  
           ENDIF  
         ENDDO  
@@ -897,7 +921,7 @@ SUBROUTINE OUTPUTA
             
           IF(IWDO(J) == IUSP(JS))THEN  
             JFILE=JFILE+1  
-            WRITE(WDO2(JFILE,1),'(F10.3,",",F10.4)')JDAY,QSP(JS)  
+            CALL SERIES_WRITE(WDO2(JFILE,1),'(F10.3,",",F10.4)',[REAL(R8)::JDAY,QSP(JS)])  
             IF(LATERAL_SPILLWAY(JS))THEN  
             !  JWD=JWD+1
               qwdo(j)           = qwdo(j)            +qsp(js)                 ! cb 1/16/13  
@@ -907,14 +931,14 @@ SUBROUTINE OUTPUTA
                     CAVGW(JWD,:)=-99.0
                     CDAVGW(JWD,:)=-99.0
                 ENDIF
-              WRITE(WDO2(JFILE,2),'(F10.3,",",F8.2)')JDAY,TAVGW(JWD)  
+              CALL SERIES_WRITE(WDO2(JFILE,2),'(F10.3,",",F8.2)',[REAL(R8)::JDAY,TAVGW(JWD)])  
               IF (CONSTITUENTS)then
                 cwdo(cn(1:nac),j)= cwdo(cn(1:nac),j)+qsp(js)*cavgw(jwd,cn(1:nac))                 ! cb 1/16/13
-                WRITE (WDO2(JFILE,3),'(F10.3,",",1000(F10.4,","))') JDAY,(CAVGW(JWD,CN(JC)),     JC=1,NAC)  
+                CALL SERIES_WRITE(WDO2(JFILE,3),'(F10.3,",",1000(F10.4,","))',[REAL(R8)::JDAY,(CAVGW(JWD,CN(JC)),     JC=1,NAC)])  
               end if
               IF (DERIVED_CALC)then
                 cdwdo(cdn(1:nacd(jw),jw),j) = cdwdo(cdn(1:nacd(jw),jw),j)+qsp(js)*cdavgw(jwd,cdn(1:nacd(jwusp(js)),jwusp(js)))        ! cb 1/16/13
-                WRITE (WDO2(JFILE,4),'(F10.3,",",1000(F10.4,","))') JDAY,(CDAVGW(JWD,CDN(JD,JWUSP(JS))),JD=1,NACD(JWUSP(JS)))  
+                CALL SERIES_WRITE(WDO2(JFILE,4),'(F10.3,",",1000(F10.4,","))',[REAL(R8)::JDAY,(CDAVGW(JWD,CDN(JD,JWUSP(JS))),JD=1,NACD(JWUSP(JS)))])  
               end if
             ELSE  
             !  JSSS(JBUSP(JS))=JSSS(JBUSP(JS))+1
@@ -925,14 +949,14 @@ SUBROUTINE OUTPUTA
                     CAVG(JSSS(JBUSP(JS)),JBUSP(JS),:)=-99.0
                     CDAVG(JSSS(JBUSP(JS)),JBUSP(JS),:)=-99.0
                 ENDIF
-              WRITE(WDO2(JFILE,2),'(F10.3,",",F8.2)')JDAY,TAVG(JSSS(JBUSP(JS)),JBUSP(JS))  
+              CALL SERIES_WRITE(WDO2(JFILE,2),'(F10.3,",",F8.2)',[REAL(R8)::JDAY,TAVG(JSSS(JBUSP(JS)),JBUSP(JS))])  
               IF (CONSTITUENTS)then
                 cwdo(cn(1:nac),j)= cwdo(cn(1:nac),j)+qsp(js)*cavg(jsss(jbusp(js)),jbusp(js),cn(1:nac))            ! cb 1/16/13
-                WRITE (WDO2(JFILE,3),'(F10.3,",",1000(F10.4,","))') JDAY,(CAVG(JSSS(JBUSP(JS)),JBUSP(JS),CN(JC)),     JC=1,NAC)  
+                CALL SERIES_WRITE(WDO2(JFILE,3),'(F10.3,",",1000(F10.4,","))',[REAL(R8)::JDAY,(CAVG(JSSS(JBUSP(JS)),JBUSP(JS),CN(JC)),     JC=1,NAC)])  
               end if
               IF (DERIVED_CALC)then
                 cdwdo(cdn(1:nacd(jw),jw),j) = cdwdo(cdn(1:nacd(jw),jw),j)+qsp(js)*cdavg(jsss(jbusp(js)),jbusp(js),cdn(1:nacd(jwusp(js)),jwusp(js)))    ! cb 1/16/13
-                WRITE (WDO2(JFILE,4),'(F10.3,",",1000(F10.4,","))') JDAY,(CDAVG(JSSS(JBUSP(JS)),JBUSP(JS),CDN(JD,JWUSP(JS))),JD=1,NACD(JWUSP(JS)))  
+                CALL SERIES_WRITE(WDO2(JFILE,4),'(F10.3,",",1000(F10.4,","))',[REAL(R8)::JDAY,(CDAVG(JSSS(JBUSP(JS)),JBUSP(JS),CDN(JD,JWUSP(JS))),JD=1,NACD(JWUSP(JS)))])  
               end if
             ENDIF  
           ENDIF  
@@ -946,9 +970,9 @@ SUBROUTINE OUTPUTA
           IF(IWDO(J) == IUPU(JS))THEN  
             JFILE=JFILE+1  
             IF(PUMPON(JS))THEN  
-              WRITE(WDO2(JFILE,1),'(F10.3,",",F10.4)')JDAY,QPU(JS)  
+              CALL SERIES_WRITE(WDO2(JFILE,1),'(F10.3,",",F10.4)',[REAL(R8)::JDAY,QPU(JS)])  
             ELSE  
-              WRITE(WDO2(JFILE,1),'(F10.3,",",F8.3)')JDAY,0.0  
+              CALL SERIES_WRITE(WDO2(JFILE,1),'(F10.3,",",F8.3)',[REAL(R8)::JDAY,0.0])  
             ENDIF  
             IF(LATERAL_PUMP(JS))THEN  
             !  JWD=JWD+1              
@@ -961,20 +985,20 @@ SUBROUTINE OUTPUTA
                   qwdo(j)           = qwdo(j)            +qpu(js)  
                   twdo(j)           = twdo(j)            +qpu(js)*tavgw(jwd)
                 end if
-              WRITE(WDO2(JFILE,2),'(F10.3,",",F8.2)')JDAY,TAVGW(JWD)  
+              CALL SERIES_WRITE(WDO2(JFILE,2),'(F10.3,",",F8.2)',[REAL(R8)::JDAY,TAVGW(JWD)])  
               ! Debug
               !WRITE(WDO2(JFILE,2),'(F10.3,",",F8.2,",",f8.3,",",i5,",",i5)')JDAY,TAVGW(JWD),qpu(js),js,jwd      ! Debug
               IF (CONSTITUENTS)then
                 if(pumpon(js))then                 ! cb 1/16/13
                   cwdo(cn(1:nac),j)= cwdo(cn(1:nac),j)+qpu(js)*cavgw(jwd,cn(1:nac))
                 end if
-                WRITE (WDO2(JFILE,3),'(F10.3,",",1000(F10.4,","))') JDAY,(CAVGW(JWD,CN(JC)),     JC=1,NAC)  
+                CALL SERIES_WRITE(WDO2(JFILE,3),'(F10.3,",",1000(F10.4,","))',[REAL(R8)::JDAY,(CAVGW(JWD,CN(JC)),     JC=1,NAC)])  
               end if
               IF (DERIVED_CALC)then
                 if(pumpon(js))then   ! cb 1/16/13
                   cdwdo(cdn(1:nacd(jw),jw),j) = cdwdo(cdn(1:nacd(jw),jw),j)+qpu(js)*cdavgw(jwd,cdn(1:nacd(jwupu(js)),jwupu(js))) 
                 end if
-                WRITE (WDO2(JFILE,4),'(F10.3,",",1000(F10.4,","))') JDAY,(CDAVGW(JWD,CDN(JD,JWUPU(JS))),JD=1,NACD(JWUPU(JS)))  
+                CALL SERIES_WRITE(WDO2(JFILE,4),'(F10.3,",",1000(F10.4,","))',[REAL(R8)::JDAY,(CDAVGW(JWD,CDN(JD,JWUPU(JS))),JD=1,NACD(JWUPU(JS)))])  
               end if
             ELSE  
             !  JSSS(JBUPU(JS))=JSSS(JBUPU(JS))+1  
@@ -987,18 +1011,18 @@ SUBROUTINE OUTPUTA
                   qwdo(j)           = qwdo(j)            +qpu(js)  
                   twdo(j)           = twdo(j)            +qpu(js)*tavg(jsss(jbupu(js)),jbupu(js))
               end if
-              WRITE(WDO2(JFILE,2),'(F10.3,",",F8.2)')JDAY,TAVG(JSSS(JBUPU(JS)),JBUPU(JS))  
+              CALL SERIES_WRITE(WDO2(JFILE,2),'(F10.3,",",F8.2)',[REAL(R8)::JDAY,TAVG(JSSS(JBUPU(JS)),JBUPU(JS))])  
               IF (CONSTITUENTS)then
                 if(pumpon(js))then                ! cb 1/16/13
                   cwdo(cn(1:nac),j)= cwdo(cn(1:nac),j)+qpu(js)*cavg(jsss(jbupu(js)),jbupu(js),cn(1:nac)) 
                 end if
-                WRITE (WDO2(JFILE,3),'(F10.3,",",1000(F10.4,","))') JDAY,(CAVG(JSSS(JBUPU(JS)),JBUPU(JS),CN(JC)),     JC=1,NAC)  
+                CALL SERIES_WRITE(WDO2(JFILE,3),'(F10.3,",",1000(F10.4,","))',[REAL(R8)::JDAY,(CAVG(JSSS(JBUPU(JS)),JBUPU(JS),CN(JC)),     JC=1,NAC)])  
               end if
               IF (DERIVED_CALC)then
                 if(pumpon(js))then   ! cb 1/16/13
                   cdwdo(cdn(1:nacd(jw),jw),j) = cdwdo(cdn(1:nacd(jw),jw),j)+qpu(js)*cdavg(jsss(jbupu(js)),jbupu(js),cdn(1:nacd(jwupu(js)),jwupu(js))) 
                 end if
-                WRITE (WDO2(JFILE,4),'(F10.3,",",1000(F10.4,","))') JDAY,(CDAVG(JSSS(JBUPU(JS)),JBUPU(JS),CDN(JD,JWUPU(JS))),JD=1,NACD(JWUPU(JS)))  
+                CALL SERIES_WRITE(WDO2(JFILE,4),'(F10.3,",",1000(F10.4,","))',[REAL(R8)::JDAY,(CDAVG(JSSS(JBUPU(JS)),JBUPU(JS),CDN(JD,JWUPU(JS))),JD=1,NACD(JWUPU(JS)))])  
               end if
             ENDIF  
           ENDIF  
@@ -1011,7 +1035,7 @@ SUBROUTINE OUTPUTA
              ENDIF
           IF(IWDO(J) == IUPI(JS))THEN  
             JFILE=JFILE+1  
-            WRITE(WDO2(JFILE,1),'(F10.3,",",F10.4)')JDAY,QPI(JS)  
+            CALL SERIES_WRITE(WDO2(JFILE,1),'(F10.3,",",F10.4)',[REAL(R8)::JDAY,QPI(JS)])  
             IF(LATERAL_PIPE(JS))THEN  
            !   JWD=JWD+1  
                 qwdo(j)           = qwdo(j)            +qpi(js)     ! cb 1/16/13
@@ -1021,14 +1045,14 @@ SUBROUTINE OUTPUTA
                     CAVGW(JWD,:)=-99.0
                     CDAVGW(JWD,:)=-99.0
                 ENDIF
-              WRITE(WDO2(JFILE,2),'(F10.3,",",F8.2)')JDAY,TAVGW(JWD)  
+              CALL SERIES_WRITE(WDO2(JFILE,2),'(F10.3,",",F8.2)',[REAL(R8)::JDAY,TAVGW(JWD)])  
               IF (CONSTITUENTS)then
                 cwdo(cn(1:nac),j)= cwdo(cn(1:nac),j)+qpi(js)*cavgw(jwd,cn(1:nac))     ! cb 1/16/13
-                WRITE (WDO2(JFILE,3),'(F10.3,",",1000(F10.4,","))') JDAY,(CAVGW(JWD,CN(JC)),     JC=1,NAC)  
+                CALL SERIES_WRITE(WDO2(JFILE,3),'(F10.3,",",1000(F10.4,","))',[REAL(R8)::JDAY,(CAVGW(JWD,CN(JC)),     JC=1,NAC)])  
               end if
               IF (DERIVED_CALC)then
                 cdwdo(cdn(1:nacd(jw),jw),j) = cdwdo(cdn(1:nacd(jw),jw),j)+qpi(js)*cdavgw(jwd,cdn(1:nacd(jwupi(js)),jwupi(js)))     ! cb 1/16/13
-                WRITE (WDO2(JFILE,4),'(F10.3,1000(F10.4,","))') JDAY,(CDAVGW(JWD,CDN(JD,JWUPI(JS))),JD=1,NACD(JWUPI(JS)))  
+                CALL SERIES_WRITE(WDO2(JFILE,4),'(F10.3,1000(F10.4,","))',[REAL(R8)::JDAY,(CDAVGW(JWD,CDN(JD,JWUPI(JS))),JD=1,NACD(JWUPI(JS)))])  
               end if
             ELSE  
             !  JSSS(JBUPI(JS))=JSSS(JBUPI(JS))+1
@@ -1039,14 +1063,14 @@ SUBROUTINE OUTPUTA
                     CAVG(JSSS(JBUPI(JS)),JBUPI(JS),:)=-99.0
                     CDAVG(JSSS(JBUPI(JS)),JBUPI(JS),:)=-99.0
                 ENDIF
-              WRITE(WDO2(JFILE,2),'(F10.3,",",F8.2)')JDAY,TAVG(JSSS(JBUPI(JS)),JBUPI(JS))  
+              CALL SERIES_WRITE(WDO2(JFILE,2),'(F10.3,",",F8.2)',[REAL(R8)::JDAY,TAVG(JSSS(JBUPI(JS)),JBUPI(JS))])  
               IF (CONSTITUENTS)then
                 cwdo(cn(1:nac),j)= cwdo(cn(1:nac),j)+qpi(js)*cavg(jsss(jbupi(js)),jbupi(js),cn(1:nac))     ! cb 1/16/13
-                WRITE (WDO2(JFILE,3),'(F10.3,",",1000(F10.4,","))') JDAY,(CAVG(JSSS(JBUPI(JS)),JBUPI(JS),CN(JC)),     JC=1,NAC)  
+                CALL SERIES_WRITE(WDO2(JFILE,3),'(F10.3,",",1000(F10.4,","))',[REAL(R8)::JDAY,(CAVG(JSSS(JBUPI(JS)),JBUPI(JS),CN(JC)),     JC=1,NAC)])  
               end if
               IF (DERIVED_CALC)then
                 cdwdo(cdn(1:nacd(jw),jw),j) = cdwdo(cdn(1:nacd(jw),jw),j)+qpi(js)*cdavg(jsss(jbupi(js)),jbupi(js),cdn(1:nacd(jwupi(js)),jwupi(js)))     ! cb 1/16/13
-                WRITE (WDO2(JFILE,4),'(F10.3,",",1000(F10.4,","))') JDAY,(CDAVG(JSSS(JBUPI(JS)),JBUPI(JS),CDN(JD,JWUPI(JS))),JD=1,NACD(JWUPI(JS)))  
+                CALL SERIES_WRITE(WDO2(JFILE,4),'(F10.3,",",1000(F10.4,","))',[REAL(R8)::JDAY,(CDAVG(JSSS(JBUPI(JS)),JBUPI(JS),CDN(JD,JWUPI(JS))),JD=1,NACD(JWUPI(JS)))])  
               end if
             ENDIF  
           ENDIF  
@@ -1060,7 +1084,7 @@ SUBROUTINE OUTPUTA
              
           IF(IWDO(J) == IUGT(JS))THEN  
             JFILE=JFILE+1  
-            WRITE(WDO2(JFILE,1),'(F10.3,",",F10.4)')JDAY,QGT(JS)  
+            CALL SERIES_WRITE(WDO2(JFILE,1),'(F10.3,",",F10.4)',[REAL(R8)::JDAY,QGT(JS)])  
             IF(LATERAL_GATE(JS))THEN  
           !    JWD=JWD+1  
               qwdo(j)           = qwdo(j)            +qgt(js)     ! cb 1/16/13
@@ -1070,14 +1094,14 @@ SUBROUTINE OUTPUTA
                     CAVGW(JWD,:)=-99.0
                     CDAVGW(JWD,:)=-99.0
                 ENDIF
-              WRITE(WDO2(JFILE,2),'(F10.3,",",F8.2)')JDAY,TAVGW(JWD)  
+              CALL SERIES_WRITE(WDO2(JFILE,2),'(F10.3,",",F8.2)',[REAL(R8)::JDAY,TAVGW(JWD)])  
               IF (CONSTITUENTS)then
                 cwdo(cn(1:nac),j)= cwdo(cn(1:nac),j)+qgt(js)*cavgw(jwd,cn(1:nac))     ! cb 1/16/13
-                WRITE (WDO2(JFILE,3),'(F10.3,",",1000(F10.4,","))') JDAY,(CAVGW(JWD,CN(JC)),     JC=1,NAC)  
+                CALL SERIES_WRITE(WDO2(JFILE,3),'(F10.3,",",1000(F10.4,","))',[REAL(R8)::JDAY,(CAVGW(JWD,CN(JC)),     JC=1,NAC)])  
               end if
               IF (DERIVED_CALC)then
                 cdwdo(cdn(1:nacd(jw),jw),j) = cdwdo(cdn(1:nacd(jw),jw),j)+qgt(js)*cdavgw(jwd,cdn(1:nacd(jwugt(js)),jwugt(js)))     ! cb 1/16/13
-                WRITE (WDO2(JFILE,4),'(F10.3,",",1000(F10.4,","))') JDAY,(CDAVGW(JWD,CDN(JD,JWUGT(JS))),JD=1,NACD(JWUGT(JS)))  
+                CALL SERIES_WRITE(WDO2(JFILE,4),'(F10.3,",",1000(F10.4,","))',[REAL(R8)::JDAY,(CDAVGW(JWD,CDN(JD,JWUGT(JS))),JD=1,NACD(JWUGT(JS)))])  
               end if
             ELSE  
            !   JSSS(JBUGT(JS))=JSSS(JBUGT(JS))+1
@@ -1088,14 +1112,14 @@ SUBROUTINE OUTPUTA
                     CAVG(JSSS(JBUGT(JS)),JBUGT(JS),:)=-99.0
                     CDAVG(JSSS(JBUGT(JS)),JBUGT(JS),:)=-99.0
                 ENDIF
-              WRITE(WDO2(JFILE,2),'(F10.3,",",F8.2)')JDAY,TAVG(JSSS(JBUGT(JS)),JBUGT(JS))  
+              CALL SERIES_WRITE(WDO2(JFILE,2),'(F10.3,",",F8.2)',[REAL(R8)::JDAY,TAVG(JSSS(JBUGT(JS)),JBUGT(JS))])  
               IF (CONSTITUENTS)then
                 cwdo(cn(1:nac),j)= cwdo(cn(1:nac),j)+qgt(js)*cavg(jsss(jbugt(js)),jbugt(js),cn(1:nac))     ! cb 1/16/13
-                WRITE (WDO2(JFILE,3),'(F10.3,",",1000(F10.4,","))') JDAY,(CAVG(JSSS(JBUGT(JS)),JBUGT(JS),CN(JC)),     JC=1,NAC)  
+                CALL SERIES_WRITE(WDO2(JFILE,3),'(F10.3,",",1000(F10.4,","))',[REAL(R8)::JDAY,(CAVG(JSSS(JBUGT(JS)),JBUGT(JS),CN(JC)),     JC=1,NAC)])  
               end if
               IF (DERIVED_CALC)then
                 cdwdo(cdn(1:nacd(jw),jw),j) = cdwdo(cdn(1:nacd(jw),jw),j)+qgt(js)*cdavg(jsss(jbugt(js)),jbugt(js),cdn(1:nacd(jwugt(js)),jwugt(js)))     ! cb 1/16/13
-                WRITE (WDO2(JFILE,4),'(F10.3,",",1000(F10.4,","))') JDAY,(CDAVG(JSSS(JBUGT(JS)),JBUGT(JS),CDN(JD,JWUGT(JS))),JD=1,NACD(JWUGT(JS)))  
+                CALL SERIES_WRITE(WDO2(JFILE,4),'(F10.3,",",1000(F10.4,","))',[REAL(R8)::JDAY,(CDAVG(JSSS(JBUGT(JS)),JBUGT(JS),CDN(JD,JWUGT(JS))),JD=1,NACD(JWUGT(JS)))])  
               end if
             ENDIF  
           ENDIF  
@@ -1106,21 +1130,17 @@ SUBROUTINE OUTPUTA
         IF (QWDO(J) /= 0.0) TWDO(J) = TWDO(J)/QWDO(J)  
         DO JC=1,NAC  
           IF (QWDO(J) /= 0.0) CWDO(CN(JC),J) = CWDO(CN(JC),J)/QWDO(J)  
-          WRITE (CWDOC(CN(JC)),'(F10.4)') CWDO(CN(JC),J)                        ! SW 9/23/13 Changed format from G8.3 to F8.3 to avoid format overflow
-          CWDOC(CN(JC)) = ADJUSTR(CWDOC(CN(JC)))  
         END DO  
         DO JW=1,NWB  
           IF (IWDO(J) >= US(BS(JW)) .AND. IWDO(J) <= DS(BE(JW))) EXIT  
         END DO  
         DO JD=1,NACD(JW)  
           IF (QWDO(J) /= 0.0) CDWDO(CDN(JD,JW),J) = CDWDO(CDN(JD,JW),J)/QWDO(J)  
-          WRITE (CDWDOC(CDN(JD,JW)),'(F10.4)') CDWDO(CDN(JD,JW),J)              ! SW 9/23/13 Changed format from G8.3 to F8.3 to avoid format overflow
-          CDWDOC(CDN(JD,JW)) = ADJUSTR(CDWDOC(CDN(JD,JW)))  
         END DO  
-          WRITE (WDO(J,1),'(F10.3,",",F9.3,",",8X,100(F9.3,","))') JDAY, QWDO(J), (QOUTLET(I),I=1,NUMOUTLETS)  
-          WRITE (WDO(J,2),'(F10.3,",",F8.2,",",8X,100(F8.2,","))') JDAY, TWDO(J), (TOUTLET(I),I=1,NUMOUTLETS)  
-          IF (CONSTITUENTS) WRITE (WDO(J,3),'(F10.3,",",1000(A10,","))') JDAY,(CWDOC(CN(JC)),     JC=1,NAC)  
-          IF (DERIVED_CALC) WRITE (WDO(J,4),'(F10.3,",",1000(A10,","))') JDAY,(CDWDOC(CDN(JD,JW)),JD=1,NACD(JW))  
+          CALL SERIES_WRITE(WDO(J,1),'(F10.3,",",F9.3,",",8X,100(F9.3,","))',[REAL(R8)::JDAY, QWDO(J), (QOUTLET(I),I=1,NUMOUTLETS)])  
+          CALL SERIES_WRITE(WDO(J,2),'(F10.3,",",F8.2,",",8X,100(F8.2,","))',[REAL(R8)::JDAY, TWDO(J), (TOUTLET(I),I=1,NUMOUTLETS)])  
+          IF (CONSTITUENTS) CALL SERIES_WRITE(WDO(J,3),'(F10.3,",",1000(F10.4,","))',[REAL(R8)::JDAY,(CWDO(CN(JC),J),     JC=1,NAC)])
+          IF (DERIVED_CALC) CALL SERIES_WRITE(WDO(J,4),'(F10.3,",",1000(F10.4,","))',[REAL(R8)::JDAY,(CDWDO(CDN(JD,JW),J),JD=1,NACD(JW))])
       END DO  
     END IF  
   END IF  
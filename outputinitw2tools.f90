@@ -4,6 +4,7 @@ SUBROUTINE OUTPUTINIT
   USE GLOBAL;     USE NAMESC; USE GEOMC;  USE LOGICC; USE PREC;  USE SURFHE;  USE KINETIC; USE SHADEC; USE EDDY  
   USE STRUCTURES; USE TRANS;  USE TVDC;   USE SELWC;  USE GDAYC; USE SCREENC; USE TDGAS;   USE RSTART  
   USE MACROPHYTEC; USE POROSITYC; USE ZOOPLANKTONC;  USE BIOENERGETICS; USE CEMAVars, ONLY: SEDIMENT_DIAGENESIS
+  USE BINARYOUTCLI, ONLY: BINARY_OUTPUT_ACTIVE, SERIES_ATTACH
   IMPLICIT NONE
   EXTERNAL RESTART_OUTPUT  
     
@@ -1318,6 +1319,31 @@ SUBROUTINE OUTPUTINIT
     ENDIF  
       
   END IF  
+
+  ! *** Optional binary stream mode for the time-series outputs (W2_OUTPUT_FORMAT=binary)
+  IF (BINARY_OUTPUT_ACTIVE()) THEN
+    IF (TIME_SERIES) THEN
+      DO J=1,NIKTSR
+        CALL SERIES_ATTACH(TSR(J),RESTART_IN)
+      END DO
+      CALL SERIES_ATTACH(WLFN,RESTART_IN)
+    END IF
+    IF (ANY(VOLUME_BALANCE .AND. CONTOUR)) CALL SERIES_ATTACH(FLOWBFN,RESTART_IN)
+    IF (DOWNSTREAM_OUTFLOW) THEN
+      DO JWD=1,NIWDO
+        CALL SERIES_ATTACH(WDO(JWD,1),RESTART_IN)
+        CALL SERIES_ATTACH(WDO(JWD,2),RESTART_IN)
+        IF (CONSTITUENTS) CALL SERIES_ATTACH(WDO(JWD,3),RESTART_IN)
+        IF (DERIVED_CALC) CALL SERIES_ATTACH(WDO(JWD,4),RESTART_IN)
+      END DO
+      DO J=1,JFILE
+        CALL SERIES_ATTACH(WDO2(J,1),RESTART_IN)
+        CALL SERIES_ATTACH(WDO2(J,2),RESTART_IN)
+        IF (CONSTITUENTS) CALL SERIES_ATTACH(WDO2(J,3),RESTART_IN)
+        IF (DERIVED_CALC) CALL SERIES_ATTACH(WDO2(J,4),RESTART_IN)
+      END DO
+    END IF
+  END IF
     
   RETURN  
 END SUBROUTINE OUTPUTINIT  
@@ -111,6 +111,11 @@ Module Fishy
       
       INTEGER :: DIAGFN=8001, DATADEBUGFN=8002, BARCHRTXFN=8003,BARCHRTZFN=8004,FINALFN=8005,INITIALFN=8006
 
+! Per-particle working state of the NFISH loop in FISH: one copy per thread when the loop runs in parallel
+!$OMP THREADPRIVATE(FN,FIMP,FXLOC,FKMP,FZLOC,FYLOC,FNBP,FSIZE,FAGE,UFISH,VFISH,WFISH,ISWITCH,FSNAG,RRR,  &
+!$OMP               FXSENSPH,BXSENSPH,UZSENSPH,DZSENSPH,FJR,KTWBF,DIR,VARIABLE,LOCATE,ILOK,XLOK,KLOK,ZLOK, &
+!$OMP               VALUE,FXVEL,FZVEL,FISHTEMP,FISHDO,FYVEL,FROMKTBOT,SURFCALC,FKMPTEMP,JJ)
+
 End Module Fishy
 
 
@@ -121,7 +126,8 @@ End Module Fishy
 
       SUBROUTINE FISH
 
-     USE SURFHE; Use Fishy; Use GDAYC;  Use SCREENC; Use GEOMC; USE GLOBAL;   Use MAIN, only: IWD, FISH_PARTICLE_EXIST, KBI 
+     USE SURFHE; Use Fishy; Use GDAYC;  Use SCREENC; Use GEOMC; USE GLOBAL;   Use MAIN, only: IWD, FISH_PARTICLE_EXIST, KBI
+     USE PARTICLECLI, only: PARTICLE_CLI_INIT, PARTICLE_COUNTER_RNG, PARTICLE_SEED
      IMPLICIT NONE
      
      REAL :: DZ
@@ -159,7 +165,8 @@ End Module Fishy
   wbskip=.false.
   showsky=.false.
         CALL FIMPBR                  ! Establishes data set of what segments are in each Branch
-        SEED           = 92          ! Seed for the Random Number Generator
+        CALL PARTICLE_CLI_INIT
+        SEED           = INT(MODULO(PARTICLE_SEED,1048576_8))   ! Seed for the Random Number Generator (92 unless W2_PARTICLE_SEED is set)
 
 
 !------------------------------------------ PARTICLE DATA INITIALIZATION ------------------------------------------
@@ -338,7 +345,11 @@ End Module Fishy
       CALL INTERCONST                                         ! Subroutine to interpolate Constituent values
       CALL INTERFLOWF                                         ! Subroutine to interpolate Flow Field values
  
-      DO 131 FN=1,NFISH              ! This is the only loop where statements are not indented
+! With the counter-based generator every draw depends only on (seed, particle, step), so particles are
+! independent and the loop may run across OpenMP threads; the legacy RANDOM stream keeps it serial
+!$OMP PARALLEL DO IF(PARTICLE_COUNTER_RNG) PRIVATE(KK,IW) SCHEDULE(DYNAMIC,64)
+      DO 131 JF=1,NFISH              ! This is the only loop where statements are not indented
+      FN = JF
       IF (JDAY .LT. DELAYDATE(FN)) CYCLE
       FIMP =    INT(FISHES(FN,1))    ! Segment IMP where fish is located
       FXLOC =       FISHES(FN,2)     ! Location of fish within segment IMP from upstream side
@@ -359,7 +370,7 @@ End Module Fishy
 !Determine Horizontal & Vertical Velocity, Temperature, and DO Gradients in Fish Sensory Sphere:
 !  How far to seek out gradients (i.e. edges of the fish sensory sphere given timestep used)?
 
-        CALL RANDOM(SEED,RRR)                                           ! Subroutine which calculates a random number
+        CALL PARTICLE_RANDOM(1,RRR)                                     ! Subroutine which calculates a random number
 
         FXSENSPH = (FBDYSEARCH * FSIZE) * RRR                           ! FXSENSPH = Leading edge of the sensory sphere
         BXSENSPH = (BBDYSEARCH * FSIZE) * RRR                           ! BXSENSPH = Trailing edge of the sensory sphere
@@ -754,6 +765,7 @@ CALL PART_TRANSPORT
       IF(ISWITCH==0)CALL HISTOGRAM
       
   131 CONTINUE   !end of NFISH loop
+!$OMP END PARALLEL DO
 
    28 CONTINUE
 
@@ -833,6 +845,26 @@ CALL PART_TRANSPORT
       END
 
 
+!  Draw number STREAM of the current particle FN: the legacy RANDOM sequence, or with
+!  W2_PARTICLE_RNG=counter a value keyed on (seed, FN, NIT, STREAM) that is safe to call from any thread
+
+      SUBROUTINE PARTICLE_RANDOM(STREAM,RNDX)
+      USE FISHY, ONLY: FN, SEED
+      USE SCREENC, ONLY: NIT
+      USE PARTICLECLI, ONLY: PARTICLE_COUNTER_RNG, PARTICLE_UNIFORM
+      IMPLICIT NONE
+      INTEGER   STREAM
+      REAL      RNDX
+
+      IF (PARTICLE_COUNTER_RNG) THEN
+        RNDX = PARTICLE_UNIFORM(FN,NIT,STREAM)
+      ELSE
+        CALL RANDOM(SEED,RNDX)
+      END IF
+      RETURN
+      END
+
+
 !***********************************************************************
 !***********************************************************************
 !*                                                                    **
@@ -944,7 +976,7 @@ CALL PART_TRANSPORT
       USE GLOBAL
       IMPLICIT NONE
       
-      INTEGER  WBDY
+      INTEGER  WBDY,JBW                                     ! local branch index, GLOBAL JB is shared between threads
 
       WBDY = 0                                              ! WBDY = Water Body
    90 WBDY = WBDY + 1
@@ -953,8 +985,8 @@ CALL PART_TRANSPORT
         STOP
       ELSE
       END IF
-      DO 92 JB=BS(WBDY),BE(WBDY)                            ! Branches within a particular
-        IF ((FIMP.GE.US(JB)).AND.(FIMP.LE.DS(JB))) THEN     !   Water Body
+      DO 92 JBW=BS(WBDY),BE(WBDY)                           ! Branches within a particular
+        IF ((FIMP.GE.US(JBW)).AND.(FIMP.LE.DS(JBW))) THEN   !   Water Body
           FJR = WBDY
           GOTO 91
         ELSE
@@ -2164,8 +2196,8 @@ Subroutine Part_transport
 
 ! COMPUTE DZ and DX by interpolating
 
-        call random(seed,r1)
-        call random(seed,r2)
+        call particle_random(2,r1)
+        call particle_random(3,r2)
 
 !        r1=gasdev(seed)
 !        r2=gasdev(seed)
@@ -2309,28 +2341,29 @@ End Subroutine Part_transport
    SUBROUTINE HISTOGRAM
    USE Fishy; USE GLOBAL; USE GEOMC; USE MAIN, ONLY: KBI
    REAL :: DepthParticle
+   INTEGER :: IP          ! local segment index, GLOBAL I is shared between threads
     
     N=FN   ! N IS THE FISH NUMBER - THIS ROUTINE IS CALLED FOR EACH FISH FN  
    ! Velocity
     K=FKMP
-    I=FIMP
-    DepthParticle=ELWS(I)-EL(K,I)+FZLOC
+    IP=FIMP
+    DepthParticle=ELWS(IP)-EL(K,IP)+FZLOC
     
     IF(HIST_V.OR.HIST_T.OR.HIST_D)sumvolt(N)=sumvolt(N)+dlt   ! ONLY COMPUTED ONCE
      
         IF(HIST_V)THEN
-            v_tot(N)=v_tot(N)+u(k,i)*dlt
+            v_tot(N)=v_tot(N)+u(k,ip)*dlt
             v_cnt(N)=v_cnt(N)+dlt
             v_crit=vel_top
-            if(u(k,i).ge.vel_top)v_class(N,1)=v_class(N,1)+dlt
+            if(u(k,ip).ge.vel_top)v_class(N,1)=v_class(N,1)+dlt
             do jj=2,numclass
-              if(u(k,i).lt.v_crit.and.u(k,i).ge.v_crit-vel_int)then
+              if(u(k,ip).lt.v_crit.and.u(k,ip).ge.v_crit-vel_int)then
                 v_class(N,jj)=v_class(N,jj)+dlt
                 go to 210
               else
                 v_crit=v_crit-vel_int
               end if
-              if(jj.eq.numclass.and.u(k,i).lt.v_crit+vel_int)then
+              if(jj.eq.numclass.and.u(k,ip).lt.v_crit+vel_int)then
                 v_class(N,jj)=v_class(N,jj)+dlt
               end if
             end do
@@ -2340,18 +2373,18 @@ End Subroutine Part_transport
 
              if(HIST_T)then
 
-            t_tot(N)=t_tot(N)+t2(k,i)*dlt
+            t_tot(N)=t_tot(N)+t2(k,ip)*dlt
             t_cnt(N)=t_cnt(N)+dlt
             t_crit=temp_top
-            if(t2(k,i).ge.temp_top)t_class(N,1)=t_class(N,1)+dlt
+            if(t2(k,ip).ge.temp_top)t_class(N,1)=t_class(N,1)+dlt
             do jj=2,numclass
-              if(t2(k,i).lt.t_crit.and.t2(k,i).ge.t_crit-temp_int)then
+              if(t2(k,ip).lt.t_crit.and.t2(k,ip).ge.t_crit-temp_int)then
                 t_class(N,jj)=t_class(N,jj)+dlt
                 go to 200
               else
                 t_crit=t_crit-temp_int
               end if
-              if(jj.eq.numclass.and.t2(k,i).lt.t_crit+temp_int)then
+              if(jj.eq.numclass.and.t2(k,ip).lt.t_crit+temp_int)then
                 t_class(N,jj)=t_class(N,jj)+dlt
               end if
             end do
@@ -0,0 +1,79 @@
+module particlecli
+  use, intrinsic :: iso_fortran_env, only: int64
+  implicit none
+
+  ! Random numbers for the particle/fish tracking module (particle.f90).
+  !   W2_PARTICLE_RNG=legacy   (default) the original sequential RANDOM(SEED,RNDX) stream
+  !   W2_PARTICLE_RNG=counter  a counter-based generator: each draw is a pure function of
+  !                            (seed, particle, time step, stream), so results do not depend on the
+  !                            order particles are processed in or on the number of OpenMP threads
+  !   W2_PARTICLE_SEED=<int>   seed for either generator (default 92, the value FISH always used)
+  ! Only the counter generator lets the particle loop run in parallel (build particle.f90 with
+  ! PARTICLE_OMP_FLAGS=-qopenmp, thread count from OMP_NUM_THREADS).
+  logical,        save :: particle_cfg_loaded   = .false.
+  logical,        save :: particle_counter_rng  = .false.
+  integer(int64), save :: particle_seed         = 92_int64
+
+  ! splitmix64 constants (0x9E3779B97F4A7C15, 0xBF58476D1CE4E5B9, 0x94D049BB133111EB)
+  integer(int64), parameter :: golden = -7046029254386353131_int64
+  integer(int64), parameter :: mix1   = -4658895280553007687_int64
+  integer(int64), parameter :: mix2   = -7723592293110705685_int64
+contains
+
+  subroutine particle_cli_init()
+    character(len=32) :: val
+    integer :: status, ios
+    integer(int64) :: seed
+
+    if (particle_cfg_loaded) return
+    particle_cfg_loaded = .true.
+
+    call get_environment_variable('W2_PARTICLE_RNG', val, status=status)
+    if (status == 0) then
+      select case (trim(adjustl(val)))
+      case ('counter', 'COUNTER')
+        particle_counter_rng = .true.
+      case ('legacy', 'LEGACY', '')
+        particle_counter_rng = .false.
+      case default
+        write(*,'(a)') 'W2_PARTICLE_RNG='//trim(val)//' not recognized, using the legacy generator'
+      end select
+    end if
+
+    call get_environment_variable('W2_PARTICLE_SEED', val, status=status)
+    if (status == 0 .and. len_trim(val) > 0) then
+      read(val, *, iostat=ios) seed
+      if (ios == 0) then
+        particle_seed = seed
+      else
+        write(*,'(a)') 'W2_PARTICLE_SEED='//trim(val)//' is not an integer, using the default seed'
+      end if
+    end if
+  end subroutine particle_cli_init
+
+  ! splitmix64 finalizer; integer overflow wraps (two's complement) as the mixing requires
+  pure function mix64(x) result(z)
+    integer(int64), intent(in) :: x
+    integer(int64) :: z
+
+    z = x
+    z = ieor(z, shiftr(z, 30)) * mix1
+    z = ieor(z, shiftr(z, 27)) * mix2
+    z = ieor(z, shiftr(z, 31))
+  end function mix64
+
+  ! Uniform number in (0,1) for draw `stream` of particle `id` at time step `step`
+  pure function particle_uniform(id, step, stream) result(r)
+    integer, intent(in) :: id, step, stream
+    real :: r
+    integer(int64) :: x
+
+    x = mix64(particle_seed + golden)
+    x = mix64(x + int(id, int64) * golden)
+    x = mix64(x + int(step, int64) * golden)
+    x = mix64(x + int(stream, int64) * golden)
+    ! top 23 bits, centred in their interval; exact in single precision, so 0 and 1 are never returned
+    r = (real(shiftr(x, 41)) + 0.5) / 8388608.0
+  end function particle_uniform
+
+end module particlecli
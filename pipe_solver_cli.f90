@@ -0,0 +1,234 @@
+module pipesolvercli
+  use prec, only: r8
+  implicit none
+
+  ! Linear solver of OPEN_CHANNEL (partly full pipes and culverts, gate-spill-pipe.f90). The continuity and
+  ! momentum equations of a pipe couple each node to at most two nodes on either side, so the NC x NC system is
+  ! pentadiagonal. It is assembled in band storage, a(n, pipe_kl+1+j-n) holding the coefficient of unknown j in
+  ! row n, sized once per run; only the coefficients change from one solve to the next.
+  !   W2_PIPE_SOLVER=band   (default) LU with partial pivoting within the band (pipe_band_factor,
+  !                         pipe_band_solve): O(NC) per solve
+  !   W2_PIPE_SOLVER=dense  the band expanded to a full matrix and solved with LUDCMP / LUBKSB: O(NC**3) per solve
+  ! bench/pipe_solver_bench.f90 (make pipe_solver_bench) times both on synthetic pipe systems.
+  integer, parameter :: pipe_kl = 2
+  integer, parameter :: pipe_ku = 2
+  integer, parameter :: pipe_bw = pipe_kl+pipe_ku+1
+
+  logical, save :: pipe_cfg_loaded = .false.
+  logical, save :: pipe_band       = .true.
+contains
+
+  subroutine pipe_solver_init()
+    character(len=32) :: val
+    integer :: status
+
+    if (pipe_cfg_loaded) return
+    pipe_cfg_loaded = .true.
+
+    call get_environment_variable('W2_PIPE_SOLVER', val, status=status)
+    if (status == 0) then
+      select case (trim(adjustl(val)))
+      case ('band', 'BAND', '')
+        pipe_band = .true.
+      case ('dense', 'DENSE')
+        pipe_band = .false.
+      case default
+        write(*,'(a)') 'W2_PIPE_SOLVER='//trim(val)//' not recognized, using the band solver'
+      end select
+    end if
+  end subroutine pipe_solver_init
+
+  ! LU factorization of the band matrix a(np, pipe_bw) of order n in place, with row interchanges in indx and the
+  ! multipliers in al(np, pipe_kl); d is +1 or -1 for an even or odd number of interchanges. The upper factor
+  ! takes up to pipe_bw entries per row, rows shifted left so that a(k,1) is the pivot.
+  subroutine pipe_band_factor(a, n, np, al, indx, d)
+    integer,  intent(in)    :: n, np
+    real(r8), intent(inout) :: a(np,pipe_bw)
+    real(r8), intent(out)   :: al(np,pipe_kl), d
+    integer,  intent(out)   :: indx(n)
+    real(r8), parameter :: tiny = 1.0e-20_r8
+    real(r8) :: dum
+    integer  :: i, j, k, l
+
+    l = pipe_kl
+    do i = 1, min(pipe_kl, n)
+      do j = pipe_kl+2-i, pipe_bw
+        a(i,j-l) = a(i,j)
+      end do
+      l = l-1
+      do j = pipe_bw-l, pipe_bw
+        a(i,j) = 0.0_r8
+      end do
+    end do
+    d = 1.0_r8
+    l = pipe_kl
+    do k = 1, n
+      dum = a(k,1)
+      i   = k
+      if (l < n) l = l+1
+      do j = k+1, l
+        if (abs(a(j,1)) > abs(dum)) then
+          dum = a(j,1)
+          i   = j
+        end if
+      end do
+      indx(k) = i
+      if (dum == 0.0_r8) a(k,1) = tiny
+      if (i /= k) then
+        d = -d
+        do j = 1, pipe_bw
+          dum    = a(k,j)
+          a(k,j) = a(i,j)
+          a(i,j) = dum
+        end do
+      end if
+      do i = k+1, l
+        dum         = a(i,1)/a(k,1)
+        al(k,i-k)   = dum
+        do j = 2, pipe_bw
+          a(i,j-1) = a(i,j)-dum*a(k,j)
+        end do
+        a(i,pipe_bw) = 0.0_r8
+      end do
+    end do
+  end subroutine pipe_band_factor
+
+  ! Solves a x = b with the factors of pipe_band_factor; b is overwritten with x
+  subroutine pipe_band_solve(a, n, np, al, indx, b)
+    integer,  intent(in)    :: n, np
+    real(r8), intent(in)    :: a(np,pipe_bw), al(np,pipe_kl)
+    integer,  intent(in)    :: indx(n)
+    real(r8), intent(inout) :: b(n)
+    real(r8) :: dum
+    integer  :: i, k, l
+
+    l = pipe_kl
+    do k = 1, n
+      i = indx(k)
+      if (i /= k) then
+        dum  = b(k)
+        b(k) = b(i)
+        b(i) = dum
+      end if
+      if (l < n) l = l+1
+      do i = k+1, l
+        b(i) = b(i)-al(k,i-k)*b(k)
+      end do
+    end do
+    l = 1
+    do i = n, 1, -1
+      dum = b(i)
+      do k = 2, l
+        dum = dum-a(i,k)*b(k+i-1)
+      end do
+      b(i) = dum/a(i,1)
+      if (l < pipe_bw) l = l+1
+    end do
+  end subroutine pipe_band_solve
+
+  ! Band storage to the leading n x n block of the full matrix full(np,np)
+  subroutine pipe_band_to_dense(a, n, np, full)
+    integer,  intent(in)  :: n, np
+    real(r8), intent(in)  :: a(np,pipe_bw)
+    real(r8), intent(out) :: full(np,np)
+    integer :: i, j
+
+    full = 0.0_r8
+    do i = 1, n
+      do j = max(1, i-pipe_kl), min(n, i+pipe_ku)
+        full(i,j) = a(i,pipe_kl+1+j-i)
+      end do
+    end do
+  end subroutine pipe_band_to_dense
+
+  ! Dense LU decomposition with implicit (row-scaled) partial pivoting, as in Numerical Recipes
+  subroutine ludcmp(a, n, np, indx, d)
+    integer,  intent(in)    :: n, np
+    real(r8), intent(inout) :: a(np,np)
+    integer,  intent(out)   :: indx(np)
+    real(r8), intent(out)   :: d
+    real,     parameter :: tiny = 1.0e-20
+    real(r8) :: vv(n), aamax, sum, dum
+    integer  :: i, j, k, imax
+
+    d = 1.0
+    do i = 1, n
+      aamax = 0.0
+      do j = 1, n
+        if (abs(a(i,j)) > aamax) aamax = abs(a(i,j))
+      end do
+      vv(i) = 1.0/aamax
+    end do
+    do j = 1, n
+      do i = 1, j-1
+        sum = a(i,j)
+        do k = 1, i-1
+          sum = sum-a(i,k)*a(k,j)
+        end do
+        a(i,j) = sum
+      end do
+      aamax = 0.0
+      do i = j, n
+        sum = a(i,j)
+        do k = 1, j-1
+          sum = sum-a(i,k)*a(k,j)
+        end do
+        a(i,j) = sum
+        dum = vv(i)*abs(sum)
+        if (dum >= aamax) then
+          imax  = i
+          aamax = dum
+        end if
+      end do
+      if (j /= imax) then
+        do k = 1, n
+          dum       = a(imax,k)
+          a(imax,k) = a(j,k)
+          a(j,k)    = dum
+        end do
+        d        = -d
+        vv(imax) =  vv(j)
+      end if
+      indx(j) = imax
+      if (a(j,j) == 0.0) a(j,j) = tiny
+      if (j /= n) then
+        dum = 1.0/a(j,j)
+        do i = j+1, n
+          a(i,j) = a(i,j)*dum
+        end do
+      end if
+    end do
+  end subroutine ludcmp
+
+  ! Forward and back substitution with the factors of ludcmp; b is overwritten with the solution
+  subroutine lubksb(a, n, np, indx, b)
+    integer,  intent(in)    :: n, np
+    real(r8), intent(in)    :: a(np,np)
+    integer,  intent(in)    :: indx(np)
+    real(r8), intent(inout) :: b(n)
+    real(r8) :: sum
+    integer  :: i, ii, j, ll
+
+    ii = 0
+    do i = 1, n
+      ll    = indx(i)
+      sum   = b(ll)
+      b(ll) = b(i)
+      if (ii /= 0) then
+        do j = ii, i-1
+          sum = sum-a(i,j)*b(j)
+        end do
+      else if (sum /= 0.0) then
+        ii = i
+      end if
+      b(i) = sum
+    end do
+    do i = n, 1, -1
+      sum = b(i)
+      do j = i+1, n
+        sum = sum-a(i,j)*b(j)
+      end do
+      b(i) = sum/a(i,i)
+    end do
+  end subroutine lubksb
+end module pipesolvercli
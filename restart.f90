@@ -6,9 +6,12 @@ SUBROUTINE RESTART_OUTPUT (RSOFN)
   USE GLOBAL; USE SCREENC; USE RSTART; USE GDAYC; USE GEOMC; USE KINETIC, ONLY:EPM,EPD,SEDC,SEDN,SEDP,PH, SDKV; USE TVDC, ONLY:QSUM     
   USE KINETIC, ONLY:SED, PFLUXIN,NFLUXIN ; USE ZOOPLANKTONC, ONLY: ZOO; USE EDDY, ONLY: TKE; USE MAIN, ONLY:ENVIRPC;USE ENVIRPMOD; USE LOGICC;USE STRUCTURES
   USE MACROPHYTEC
+  USE BINARYOUTCLI, ONLY: SERIES_FLUSH_ALL
+  USE HEATSOLVERCLI, ONLY: HEAT_SOLVER_SAVE
   IMPLICIT NONE
   
   CHARACTER(*) :: RSOFN
+  CALL SERIES_FLUSH_ALL                  ! buffered binary time series must be on disk before the snapshot
   OPEN  (RSO,FILE=RSOFN,FORM='UNFORMATTED',STATUS='UNKNOWN')
   WRITE (RSO) NIT,    NV,     KMIN,   IMIN,   NSPRF,  CMBRT,  ZMIN,   IZMIN,  START,  CURRENT
   WRITE (RSO) DLTDP,  SNPDP,  TSRDP,  VPLDP,  PRFDP,  CPLDP,  SPRDP,  RSODP,  SCRDP,  FLXDP,  WDODP
@@ -32,5 +35,6 @@ SUBROUTINE RESTART_OUTPUT (RSOFN)
   IF(ENVIRPC == '      ON')WRITE(RSO)T_CLASS,V_CLASS,C_CLASS,CD_CLASS,T_TOT,T_CNT,SUMVOLT,V_CNT,V_TOT,C_TOT,C_CNT,CD_TOT,CD_CNT
   IF(PIPES)WRITE(RSO)YS,VS,VST,YST,DTP,QOLD
   WRITE(RSO)TPOUT,TPTRIB,TPDTRIB,TPWD,TPPR,TPIN,TP_SEDSOD_PO4,PFLUXIN,TNOUT,TNTRIB,TNDTRIB,TNWD,TNPR,TNIN,TN_SEDSOD_NH4,NFLUXIN    !TP_SEDBURIAL,TN_SEDBURIAL,
+  CALL HEAT_SOLVER_SAVE (RSO,IMX)         ! warm start of the vector equilibrium-temperature solver
   CLOSE (RSO)
 END SUBROUTINE RESTART_OUTPUT
\ No newline at end of file
@@ -0,0 +1,69 @@
+module runctlcli
+  use msclib, only: stop_pushed, restart_pushed
+  implicit none
+
+  ! Run control for the API runner (pause/resume in api/manager.py):
+  !   W2_STOP_FILE=<path>  when this file appears (default 'w2.stop' in the run directory) the run stops at the end of
+  !                        the time step through the STOP_PUSHED path: the full model state goes to rso.opt and the
+  !                        outputs are closed. The file is removed once seen.
+  !   W2_RESUME=on         continue a stopped run from its rso.opt (the RESTART_PUSHED path); the time series
+  !                        outputs are appended to
+  ! The stop file is looked for at most once per wall-clock second.
+  logical,            save :: ctl_cfg_loaded = .false.
+  character(len=512), save :: stop_file      = 'w2.stop'
+  integer(8),         save :: next_check     = 0
+  integer(8),         save :: clock_rate     = 1
+contains
+
+  subroutine run_control_init()
+    character(len=512) :: val
+    integer :: status
+    logical :: exists
+
+    if (ctl_cfg_loaded) return
+    ctl_cfg_loaded = .true.
+    stop_pushed    = .false.
+    restart_pushed = .false.
+    call system_clock(count_rate=clock_rate)
+
+    call get_environment_variable('W2_STOP_FILE', val, status=status)
+    if (status == 0 .and. len_trim(val) > 0) stop_file = adjustl(val)
+
+    call get_environment_variable('W2_RESUME', val, status=status)
+    if (status == 0) then
+      select case (trim(adjustl(val)))
+      case ('on', 'ON', '1', 'yes', 'YES', 'true', 'TRUE')
+        inquire(file='rso.opt', exist=exists)
+        if (exists) then
+          restart_pushed = .true.
+          write(*,'(a)') 'Resuming from rso.opt'
+        else
+          write(*,'(a)') 'W2_RESUME=on but rso.opt not found, starting from the beginning'
+        end if
+      case ('off', 'OFF', '0', 'no', 'NO', 'false', 'FALSE', '')
+      case default
+        write(*,'(a)') 'W2_RESUME='//trim(val)//' not recognized, starting from the beginning'
+      end select
+    end if
+  end subroutine run_control_init
+
+  ! Called once per time step
+  subroutine run_control_poll()
+    integer(8) :: now
+    integer    :: u, ios
+    logical    :: exists
+
+    if (.not. ctl_cfg_loaded) call run_control_init()
+    call system_clock(now)
+    if (now < next_check) return
+    next_check = now+clock_rate
+
+    inquire(file=trim(stop_file), exist=exists)
+    if (.not. exists) return
+    stop_pushed = .true.
+    open(newunit=u, file=trim(stop_file), status='old', iostat=ios)
+    if (ios == 0) close(u, status='delete')
+    write(*,'(a)') 'Stop requested ('//trim(stop_file)//'), writing rso.opt'
+  end subroutine run_control_poll
+
+end module runctlcli
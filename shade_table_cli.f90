@@ -0,0 +1,216 @@
+module shadetablecli
+  use prec, only: r8
+  use shadec, only: iang, ang, gama, topo
+  implicit none
+
+  ! Lookup tables for SHADING (dynamic topographic and vegetative shade), selected with W2_SHADE_MODE:
+  !   exact    (default) the original computation for every segment and call
+  !   table    the sun position is taken once per waterbody and time step from a table over the current day
+  !            (W2_SHADE_TABLE_MINUTES bins, default 5, linear interpolation), and the topographic shade angle
+  !            from a per-segment table over W2_SHADE_AZIMUTH_BINS sun-azimuth bins (default 360; a multiple of
+  !            the IANG=18 TOPO directions reproduces the exact piecewise-linear interpolation)
+  !   compare  evaluates both, keeps the exact SHADE and reports the largest difference at the end of the run
+  integer, parameter :: shade_exact = 0, shade_table = 1, shade_compare = 2
+  real(r8), parameter :: pi_sh = 3.14159265359_r8
+
+  logical, save :: shade_cfg_loaded = .false.
+  integer, save :: shade_mode       = shade_exact
+  integer, save :: ntime            = 288
+  integer, save :: naz              = 360
+
+  ! per waterbody: the day the time table was built for, the table itself, and the last time step looked up
+  integer,  allocatable, save :: day_built(:)
+  real,     allocatable, save :: decl_day(:), eqt_day(:)
+  real,     allocatable, save :: alt_tab(:,:), az_tab(:,:)
+  real,     allocatable, save :: step_jday(:), step_a00(:), step_hh(:), step_decl(:), step_az(:)
+
+  ! per segment: topographic shade angle over sun azimuth
+  logical,  allocatable, save :: topo_built(:)
+  real,     allocatable, save :: topo_tab(:,:)
+
+  ! compare mode statistics
+  integer(8), save :: ncompared = 0
+  real(r8),   save :: sum_diff  = 0.0_r8
+  real,       save :: max_diff  = 0.0
+  integer,    save :: max_seg   = 0
+contains
+
+  subroutine shade_cli_init(nwb, imx)
+    integer, intent(in) :: nwb, imx
+    character(len=32) :: val
+    integer :: status, ios, n
+
+    if (shade_cfg_loaded) return
+    shade_cfg_loaded = .true.
+
+    call get_environment_variable('W2_SHADE_MODE', val, status=status)
+    if (status == 0) then
+      select case (trim(adjustl(val)))
+      case ('table', 'TABLE')
+        shade_mode = shade_table
+      case ('compare', 'COMPARE')
+        shade_mode = shade_compare
+      case ('exact', 'EXACT', '')
+        shade_mode = shade_exact
+      case default
+        write(*,'(a)') 'W2_SHADE_MODE='//trim(val)//' not recognized, using the exact shade computation'
+      end select
+    end if
+    if (shade_mode == shade_exact) return
+
+    call get_environment_variable('W2_SHADE_TABLE_MINUTES', val, status=status)
+    if (status == 0 .and. len_trim(val) > 0) then
+      read(val, *, iostat=ios) n
+      if (ios == 0 .and. n >= 1 .and. n <= 1440) ntime = max(1, nint(1440.0/real(n)))
+    end if
+    call get_environment_variable('W2_SHADE_AZIMUTH_BINS', val, status=status)
+    if (status == 0 .and. len_trim(val) > 0) then
+      read(val, *, iostat=ios) n
+      if (ios == 0 .and. n >= iang) naz = n
+    end if
+
+    allocate(day_built(nwb), decl_day(nwb), eqt_day(nwb), alt_tab(0:ntime,nwb), az_tab(0:ntime,nwb))
+    allocate(step_jday(nwb), step_a00(nwb), step_hh(nwb), step_decl(nwb), step_az(nwb))
+    allocate(topo_built(imx), topo_tab(0:naz,imx))
+    day_built  = -huge(1)
+    step_jday  = -huge(1.0)
+    topo_built = .false.
+  end subroutine shade_cli_init
+
+  ! Solar azimuth (radians clockwise from north) as computed in SHADING
+  real function solar_azimuth(a00, hh, decl, lat)
+    real,     intent(in) :: a00, hh, decl
+    real(r8), intent(in) :: lat
+    real :: a02, ax, azt
+
+    a02 = a00/57.2957795
+    ax  = (sin(decl)*cos(lat*0.017453)-cos(decl)*cos(hh)*sin(lat*0.017453))/cos(a02)
+    if (ax >  1.0) ax =  1.0
+    if (ax < -1.0) ax = -1.0
+    azt = acos(ax)
+    if (hh < 0.0) then
+      solar_azimuth = azt
+    else
+      solar_azimuth = 2.0*pi_sh-azt
+    end if
+  end function solar_azimuth
+
+  ! Tabulate solar altitude and azimuth of waterbody jw over day iday
+  subroutine build_day(jw, iday, lat, longit)
+    integer,  intent(in) :: jw, iday
+    real(r8), intent(in) :: lat, longit
+    real :: taud, hour, hh, sinal, standard
+    integer :: b
+
+    standard     = 15.0*int(longit/15.0)
+    taud         = (2*pi_sh*(iday-1))/365
+    eqt_day(jw)  = 0.170*sin(4*pi_sh*(iday-80)/373)-0.129*sin(2*pi_sh*(iday-8)/355)
+    decl_day(jw) = 0.006918-0.399912*cos(taud)+0.070257*sin(taud)-0.006758*cos(2*taud)+0.000907*sin(2*taud)             &
+                   -0.002697*cos(3*taud)+0.001480*sin(3*taud)
+    do b = 0, ntime
+      hour  = 24.0*real(b)/real(ntime)
+      hh    = 0.261799*(hour-(longit-standard)*0.0666667+eqt_day(jw)-12.0)
+      sinal = sin(lat*.0174533)*sin(decl_day(jw))+cos(lat*.0174533)*cos(decl_day(jw))*cos(hh)
+      alt_tab(b,jw) = 57.2957795*asin(sinal)
+      az_tab(b,jw)  = solar_azimuth(alt_tab(b,jw), hh, decl_day(jw), lat)
+    end do
+    day_built(jw) = iday
+  end subroutine build_day
+
+  ! Sun position for waterbody jw at jday. With read_rad the altitude, hour angle and declination come from
+  ! the day table (as SHADING computes them when short-wave radiation is read from input); otherwise a00, hh
+  ! and decl are the values set by SHORT_WAVE_RADIATION and only the azimuth is derived. Either way the result
+  ! is evaluated once per waterbody and time step.
+  subroutine shade_sun(jw, jday, lat, longit, read_rad, a00, hh, decl, az)
+    integer,  intent(in)    :: jw
+    real,     intent(in)    :: jday
+    real(r8), intent(in)    :: lat, longit
+    logical,  intent(in)    :: read_rad
+    real,     intent(inout) :: a00, hh, decl
+    real,     intent(out)   :: az
+    real :: hour, x, f, d, standard
+    integer :: iday, b
+
+    if (step_jday(jw) == jday) then
+      a00 = step_a00(jw); hh = step_hh(jw); decl = step_decl(jw); az = step_az(jw)
+      return
+    end if
+
+    if (read_rad) then
+      hour = (jday-int(jday))*24.0
+      iday = jday-((int(jday/365))*365)
+      iday = iday+int(int(jday/365)/4)
+      if (day_built(jw) /= iday) call build_day(jw, iday, lat, longit)
+      standard = 15.0*int(longit/15.0)
+      hh   = 0.261799*(hour-(longit-standard)*0.0666667+eqt_day(jw)-12.0)
+      decl = decl_day(jw)
+      x = hour/24.0*real(ntime)
+      b = min(max(int(x), 0), ntime-1)
+      f = x-real(b)
+      a00 = alt_tab(b,jw)+(alt_tab(b+1,jw)-alt_tab(b,jw))*f
+      d   = az_tab(b+1,jw)-az_tab(b,jw)
+      if (d >  pi_sh) d = d-2.0*pi_sh                            ! azimuth wraps through north
+      if (d < -pi_sh) d = d+2.0*pi_sh
+      az  = modulo(az_tab(b,jw)+d*f, real(2.0*pi_sh))
+    else
+      az = solar_azimuth(a00, hh, decl, lat)
+    end if
+
+    step_jday(jw) = jday
+    step_a00(jw) = a00; step_hh(jw) = hh; step_decl(jw) = decl; step_az(jw) = az
+  end subroutine shade_sun
+
+  ! Topographic shade angle of segment i as interpolated in SHADING
+  real function topo_angle_exact(i, az)
+    integer, intent(in) :: i
+    real,    intent(in) :: az
+    integer :: j
+
+    topo_angle_exact = topo(i,1)
+    do j = 1, iang-1
+      if (az > ang(j) .and. az <= ang(j+1)) topo_angle_exact = topo(i,j)+(topo(i,j+1)-topo(i,j))/gama*(az-ang(j))
+    end do
+    if (az > ang(iang) .and. az <= 2*pi_sh) topo_angle_exact = topo(i,iang)+(topo(i,1)-topo(i,iang))/gama*(az-ang(iang))
+  end function topo_angle_exact
+
+  real function shade_topo_angle(i, az)
+    integer, intent(in) :: i
+    real,    intent(in) :: az
+    real :: x, f
+    integer :: b
+
+    if (.not. topo_built(i)) then
+      do b = 1, naz
+        topo_tab(b,i) = topo_angle_exact(i, real(2.0*pi_sh*real(b,r8)/real(naz,r8)))
+      end do
+      topo_tab(0,i) = topo_tab(naz,i)
+      topo_built(i) = .true.
+    end if
+    x = az/real(2.0*pi_sh)*real(naz)
+    b = min(max(int(x), 0), naz-1)
+    f = x-real(b)
+    shade_topo_angle = topo_tab(b,i)+(topo_tab(b+1,i)-topo_tab(b,i))*f
+  end function shade_topo_angle
+
+  subroutine shade_compare_record(i, exact, tabled)
+    integer,  intent(in) :: i
+    real(r8), intent(in) :: exact
+    real,     intent(in) :: tabled
+    real :: d
+
+    d = real(abs(exact-tabled))
+    ncompared = ncompared+1
+    sum_diff  = sum_diff+d
+    if (d > max_diff) then
+      max_diff = d
+      max_seg  = i
+    end if
+  end subroutine shade_compare_record
+
+  subroutine shade_table_report()
+    if (shade_mode /= shade_compare .or. ncompared == 0) return
+    write(*,'(a,i0,a,es10.3,a,i0,a,es10.3)') 'Shade table check: ', ncompared, ' evaluations, max |SHADE exact-table| ', &
+          max_diff, ' (segment ', max_seg, '), mean ', sum_diff/real(ncompared, r8)
+  end subroutine shade_table_report
+
+end module shadetablecli
@@ -5,11 +5,37 @@
 
 SUBROUTINE SHADING
   USE SHADEC; USE GLOBAL; USE GDAYC; USE SURFHE; USE GEOMC; USE SCREENC; USE LOGICC
+  USE SHADETABLECLI
   IMPLICIT NONE
-  CHARACTER(1) :: BANK
-  REAL         :: LOCAL,STANDARD,HOUR,TAUD,SINAL,A02,AZ00,A0,AX,ANG1,ANG2,TOPOANG,SFACT,HT,CLINE,SRED,STLEN,EDGE,EDAZ,SN,AZT
+  REAL         :: LOCAL,STANDARD,HOUR,TAUD,SINAL,A02,AZ00,A0,AX,ANG1,ANG2,TOPOANG,SFACT,AZT
+  REAL         :: A00T,HHT,DECLT,AZ0T,SHADET
   INTEGER      :: IDAY,J
 
+! Sun position and topographic angle from lookup tables (W2_SHADE_MODE=table or compare)
+
+  CALL SHADE_CLI_INIT(NWB,IMX)
+  IF (SHADE_MODE /= SHADE_EXACT) THEN
+    A00T  = A00(JW)
+    HHT   = HH(JW)
+    DECLT = DECL(JW)
+    CALL SHADE_SUN(JW,JDAY,LAT(JW),LONGIT(JW),READ_RADIATION(JW),A00T,HHT,DECLT,AZ0T)
+    IF (A00T < 0.0) THEN
+      SHADET = 0.0
+    ELSE
+      SHADET = MAX(0.0,1.0-SHADE_FACTOR(A00T/57.2957795,AZ0T,SHADE_TOPO_ANGLE(I,AZ0T)))
+      SHADET = MIN(ABS(REAL(SHADEI(I))),SHADET)
+    END IF
+    IF (SHADE_MODE == SHADE_TABLE) THEN
+      IF (READ_RADIATION(JW)) THEN
+        A00(JW)  = A00T
+        HH(JW)   = HHT
+        DECL(JW) = DECLT
+      END IF
+      SHADE(I) = SHADET
+      RETURN
+    END IF
+  END IF
+
 ! Calculate solar altitude, declination, and local hour angle when short-wave solar radiation is provided as input
 
   IF (READ_RADIATION(JW)) THEN
@@ -62,6 +88,23 @@ SUBROUTINE SHADING
       TOPOANG =  TOPO(I,IANG)+ANG2*ANG1
     END IF
 
+    SFACT = SHADE_FACTOR(A0,AZ00,TOPOANG)
+    SHADE(I) = MAX (0.0,1.0-SFACT)
+    SHADE(I) = MIN(ABS(SHADEI(I)),SHADE(I))              ! SW 10/2/2017 Allows for fixed canopy cover over top of channel - only used if shade is less than shadei only valid for -0.99 and 0.0
+  END IF
+  IF (SHADE_MODE == SHADE_COMPARE) CALL SHADE_COMPARE_RECORD(I,SHADE(I),SHADET)
+  RETURN
+
+CONTAINS
+
+! Fraction of short-wave radiation blocked by topography and vegetation for solar altitude A0 (radians),
+! azimuth AZ00 and topographic shade angle TOPOANG
+
+  REAL FUNCTION SHADE_FACTOR(A0,AZ00,TOPOANG) RESULT(SFACT)
+    REAL, INTENT(IN) :: A0,AZ00,TOPOANG
+    CHARACTER(1)     :: BANK
+    REAL             :: HT,CLINE,SRED,STLEN,EDGE,EDAZ,SN
+
 !** Complete topographic shading if solar altitude less than topo angle
 
     IF (A0 <= TOPOANG) THEN
@@ -127,8 +170,5 @@ SUBROUTINE SHADING
     SN    = MIN (HT*ABS (SIN (ABS (PHI0(I)-AZ00)))/TAN (A0)-EDGE,BI(KT,I))
     SFACT = SRED*SN/BI(KT,I)
 100 CONTINUE
-    SHADE(I) = MAX (0.0,1.0-SFACT)
-    SHADE(I) = MIN(ABS(SHADEI(I)),SHADE(I))              ! SW 10/2/2017 Allows for fixed canopy cover over top of channel - only used if shade is less than shadei only valid for -0.99 and 0.0
-  END IF
-  RETURN
+  END FUNCTION SHADE_FACTOR
 END SUBROUTINE SHADING
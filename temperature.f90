@@ -5,11 +5,15 @@ USE GLOBAL;     USE NAMESC; USE GEOMC;  USE LOGICC; USE PREC;  USE SURFHE;  USE
   USE STRUCTURES; USE TRANS;  USE TVDC;   USE SELWC;  USE GDAYC; USE SCREENC; USE TDGAS;   USE RSTART
   USE MACROPHYTEC; USE POROSITYC; USE ZOOPLANKTONC
   Use CEMAVars
+  USE HEATSOLVERCLI, ONLY: HEAT_SOLVER_INIT, HEAT_VECTOR
   IMPLICIT NONE
   EXTERNAL RESTART_OUTPUT
   
   REAL(R8) :: BTA1(1000),GMA1(1000)   ! places a limit of 1000 vertical layers
   REAL     :: RN1    
+  LOGICAL  :: SEGMENT_ET                ! equilibrium temperature solved for the whole branch (W2_HEAT_SOLVER=vector)
+
+CALL HEAT_SOLVER_INIT (IMX)
 
 DO JW=1,NWB
       IF (READ_EXTINCTION(JW))GAMMA(:,US(BS(JW)):DS(BE(JW))) = EXH2O(JW)      ! SW 1/28/13
@@ -34,8 +38,15 @@ DO JW=1,NWB
 !****** Heat exchange
 
         IF (.NOT. NO_HEAT(JW)) THEN
+          SEGMENT_ET = HEAT_VECTOR .AND. .NOT. TERM_BY_TERM(JW)
+          IF (SEGMENT_ET) THEN
+            DO I=IU,ID
+              IF (DYNAMIC_SHADE(I)) CALL SHADING
+            END DO
+            CALL EQUILIBRIUM_TEMPERATURE_SEGMENTS (IU,ID)
+          END IF
           DO I=IU,ID
-            IF (DYNAMIC_SHADE(I)) CALL SHADING
+            IF (DYNAMIC_SHADE(I) .AND. .NOT. SEGMENT_ET) CALL SHADING
 
 !********** Surface
 
@@ -46,7 +57,7 @@ DO JW=1,NWB
                 RN(I)     = RS(I)+RANLW(JW)-RB(I)-RE(I)-RC(I)
                 HEATEX    = RN(I)/RHOWCP*BI(KT,I)*DLX(I)
               ELSE
-                CALL EQUILIBRIUM_TEMPERATURE
+                IF (.NOT. SEGMENT_ET) CALL EQUILIBRIUM_TEMPERATURE
                 HEATEX = (ET(I)-T2(KT,I))*CSHE(I)*BI(KT,I)*DLX(I)
               END IF
               TSS(KT,I) =  TSS(KT,I)+HEATEX
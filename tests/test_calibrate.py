@@ -0,0 +1,77 @@
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from api.calibrate import Parameter, Study, StudyRunner, Trial
+from api.control import CONTROL_NPT, FieldRef, card_lines, fields, read_lines
+from api.models import Run, ProgressPoint
+from api.observations import ObservationSet, Series
+from api.outputs import parse_profile, stage_profile
+
+CASE = Path(__file__).resolve().parent.parent / "DetroitReservoirV422"
+
+
+class FakeManager:
+    """The parts of RunManager a StudyRunner uses, with skill scores set per run."""
+
+    def __init__(self) -> None:
+        self.runs: Dict[str, Run] = {}
+        self.rmse: Dict[str, float] = {}
+        self.aborted: Dict[str, str] = {}
+
+    def get(self, run_id: str) -> Optional[Run]:
+        return self.runs.get(run_id)
+
+    def skill(self, run: Run, obs_id: str, until: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        return {"overall": {"rmse": self.rmse[run.run_id]}}
+
+    def abort(self, run_id: str, reason: str) -> bool:
+        self.aborted[run_id] = reason
+        self.runs[run_id].status = "aborted"
+        return True
+
+
+def make_study(rungs: List[float], eta: int) -> Study:
+    param = Parameter("CBHE", FieldRef("HYD COEF", 0), 0.1, 1.0)
+    return Study(study_id="s1", name=None, input_dir=CASE, obs_id="o1", metric="rmse", params=[param], budget=10,
+                 parallel=2, rungs=rungs, eta=eta, outputs=None, priority=0, batch_id="b1", seed=1)
+
+
+def new_trial(manager: FakeManager, study: Study, run_id: str, rmse: float) -> Trial:
+    """A live trial whose run is past the first rung (25 %) and short of the second, scoring `rmse`."""
+    run = Run(run_id, None, CASE, status="running")
+    run.add_progress(ProgressPoint(100, 0.0, 30.0, 10, 60.0, 0.0, 1.0, "line"))
+    manager.runs[run_id] = run
+    manager.rmse[run_id] = rmse
+    trial = Trial(len(study.trials) + 1, [0.5], None, {"CBHE": 0.55}, run_id=run_id)
+    study.trials.append(trial)
+    return trial
+
+
+def test_study_outputs_keep_progress(tmp_path):
+    obs = ObservationSet("o1", None, "", [Series("tsr_1_seg30.csv", "T2")])
+    runner = StudyRunner(FakeManager(), make_study([0.25], 2), obs)
+    assert runner.study.outputs == ["scr", "tsr"]
+
+    shutil.copy(CASE / CONTROL_NPT, tmp_path / CONTROL_NPT)
+    staged = stage_profile(tmp_path, parse_profile(runner.study.outputs))
+    assert "scr" not in staged["disabled"]
+    lines = read_lines(tmp_path / CONTROL_NPT)
+    assert all(fields(lines[i])[0].strip() == "ON" for i in card_lines(lines, "SCR PRIN"))
+
+
+def test_poor_trial_is_pruned_at_rung():
+    manager = FakeManager()
+    runner = StudyRunner(manager, make_study([0.25, 0.5], 2), ObservationSet("o1", None, ""))
+    study = runner.study
+    study.rung_losses[0] += [1.0, 1.2]  # trials already scored at the first rung
+    good = new_trial(manager, study, "good", 0.5)
+    poor = new_trial(manager, study, "poor", 5.0)
+
+    runner._check(good)
+    assert good.status == "running" and good.rung == 1 and "good" not in manager.aborted
+
+    runner._check(poor)
+    assert poor.status == "pruned" and poor.score == 5.0
+    assert poor.pruned_at == runner.summary.tmstrt + 0.25 * runner.summary.days
+    assert manager.aborted["poor"].startswith("pruned: rmse 5 at day")
@@ -6,6 +6,7 @@
 SUBROUTINE TIME_VARYING_DATA
   USE GLOBAL;  USE SURFHE; USE SCREENC; USE TVDC; USE LOGICC; USE SELWC; USE STRUCTURES; USE NAMESC
   USE KINETIC, ONLY:EXH2O; USE SHADEC; USE MAIN, ONLY: PUMPS, SEGNUM
+  USE INPUTCACHECLI, ONLY: INPUT_CACHE_ATTACH, INPUT_CACHE_ACTIVE, INPUT_CACHE_READ
   IMPLICIT NONE
 
 ! Type declaration
@@ -16,6 +17,7 @@ SUBROUTINE TIME_VARYING_DATA
   REAL                                   :: NXQWD1, NXQWD2, NXQGT,  NXTVD, NXQPT
   REAL                                   :: NXWSC
   REAL(R8)                               :: RATIO,QRATIO,TRATIO,CRATIO,HRATIO
+  REAL(R8),ALLOCATABLE, DIMENSION(:)     :: CROW
   REAL(R8),ALLOCATABLE, DIMENSION(:)     :: QDTRO,  TDTRO,  ELUHO,  ELDHO,  QWDO,   QTRO,   TTRO,   QINO,   TINO
   REAL,    ALLOCATABLE, DIMENSION(:)     :: TAIRNX, TDEWNX, PHINX,  WINDNX, SRONX,  CLOUDNX,BGTNX,XX
   REAL,    ALLOCATABLE, DIMENSION(:)     :: NXEXT1, NXEXT2, EXTNX,  EXTO
@@ -36,6 +38,7 @@ SUBROUTINE TIME_VARYING_DATA
   INTEGER, ALLOCATABLE, DIMENSION(:)     :: PRT,    UHT,    DHT,    INC,    DTC,    PRC,    UHC,    DHC,    OTQ,    MET,    EXT, ODYNS,DYNPUMPF
   LOGICAL, ALLOCATABLE, DIMENSION(:)     :: INFLOW_CONST, TRIB_CONST, DTRIB_CONST, PRECIP_CONST,OTQF, TRCF, DTCF, INCF, PRCF, METF,DYNEF, TRQF, TRTF, DTTF, DTQF, INQF, INTF, PRQF, PRTF,EXTF
   LOGICAL                                :: WDQF,WSHF, GATEF   ! SW 9/26/2017
+  LOGICAL                                :: CACHED
   INTEGER, ALLOCATABLE, DIMENSION(:)     :: EUHF,TUHF,CUHF,EDHF,TDHF,CDHF    ! =0 Old format for head BCs, =1 Time series format no vertical variation, =2 csv format vertical variation             SW 2/28/17
   SAVE
 ! Allocation declarations
@@ -45,6 +48,7 @@ SUBROUTINE TIME_VARYING_DATA
   ELSE
       ALLOCATE(XX(NCT))
   ENDIF
+  ALLOCATE (CROW(MAX(8,NCT+1,NWD+1,NST+1,IMX+1)))
   
   ALLOCATE (NXQTR1(NTR), NXTTR1(NTR), NXCTR1(NTR), NXQIN1(NBR), NXTIN1(NBR), NXCIN1(NBR), NXQDT1(NBR), NXTDT1(NBR), NXCDT1(NBR))
   ALLOCATE (NXPR1(NBR),  NXTPR1(NBR), NXCPR1(NBR), NXEUH1(NBR), NXTUH1(NBR), NXCUH1(NBR), NXEDH1(NBR), NXTDH1(NBR), NXCDH1(NBR))
@@ -888,6 +892,50 @@ SUBROUTINE TIME_VARYING_DATA
     ENDDO
   ENDIF
   
+! Binary input caches (W2_INPUT_CACHE=on): later records of the single-line time series come from the
+! <file>.w2c sidecar; the header and the first two records of each file were read above
+
+  IF (WSHF .OR. IMX < 10) CACHED = INPUT_CACHE_ATTACH(WSH,1+IMX,2)
+  DO JW=1,NWB
+    IF (READ_RADIATION(JW)) THEN
+      CACHED = INPUT_CACHE_ATTACH(MET(JW),7,2)
+    ELSE
+      CACHED = INPUT_CACHE_ATTACH(MET(JW),6,2)
+    END IF
+  END DO
+  IF (NWD > 0) THEN
+    IF (WDQF .OR. NWD < 10) CACHED = INPUT_CACHE_ATTACH(WDQ,1+NWD,2)
+  END IF
+  IF (TRIBUTARIES) THEN
+    DO JT=1,NTR
+      CACHED = INPUT_CACHE_ATTACH(TRQ(JT),2,2)
+      CACHED = INPUT_CACHE_ATTACH(TRT(JT),2,2)
+      IF (TRIB_CONST(JT)) CACHED = INPUT_CACHE_ATTACH(TRC(JT),1+NACTR(JT),2)
+    END DO
+  END IF
+  DO JW=1,NWB
+    DO JB=BS(JW),BE(JW)
+      IF (UP_FLOW(JB) .AND. .NOT. INTERNAL_FLOW(JB) .AND. .NOT. DAM_INFLOW(JB)) THEN
+        CACHED = INPUT_CACHE_ATTACH(INQ(JB),2,2)
+        CACHED = INPUT_CACHE_ATTACH(INFT(JB),2,2)
+        IF (INFLOW_CONST(JB)) CACHED = INPUT_CACHE_ATTACH(INC(JB),1+NACIN(JB),2)
+      END IF
+      IF (DN_FLOW(JB) .AND. NSTR(JB) > 0) THEN
+        IF (OTQF(JB) .OR. NSTR(JB) < 10) CACHED = INPUT_CACHE_ATTACH(OTQ(JB),1+NSTR(JB),2)
+      END IF
+      IF (DIST_TRIBS(JB)) THEN
+        CACHED = INPUT_CACHE_ATTACH(DTQ(JB),2,2)
+        CACHED = INPUT_CACHE_ATTACH(DTT(JB),2,2)
+        IF (DTRIB_CONST(JB)) CACHED = INPUT_CACHE_ATTACH(DTC(JB),1+NACDT(JB),2)
+      END IF
+      IF (PRECIPITATION(JW)) THEN
+        CACHED = INPUT_CACHE_ATTACH(PRE(JB),2,2)
+        CACHED = INPUT_CACHE_ATTACH(PRT(JB),2,2)
+        IF (PRECIP_CONST(JB)) CACHED = INPUT_CACHE_ATTACH(PRC(JB),1+NACPR(JB),2)
+      END IF
+    END DO
+  END DO
+
   NOPEN         = NPT-1
   DYNAMIC_SHADE = SHADEI < 0
   NUNIT=NPT
@@ -904,7 +952,10 @@ ENTRY READ_INPUT_DATA (NXTVD)
 
   DO WHILE (JDAY >= NXWSC)
     WSC = WSCNX
-    IF(WSHF)THEN
+    IF(INPUT_CACHE_ACTIVE(WSH))THEN
+    CALL INPUT_CACHE_READ(WSH,CROW(1:1+IMX))
+    NXWSC = CROW(1); WSCNX(1:IMX) = CROW(2:1+IMX)
+    ELSE IF(WSHF)THEN
     READ (WSH,*) NXWSC,(WSCNX(I),I=1,IMX)
     ELSE
     READ (WSH,'(10F8.0:/(8X,9F8.0))') NXWSC,(WSCNX(I),I=1,IMX)
@@ -928,14 +979,22 @@ ENTRY READ_INPUT_DATA (NXTVD)
       IF (READ_RADIATION(JW)) THEN
         SRON(JW)  = SRONX(JW)
         SROO(JW)  = SRON(JW)
-        IF(METF(JW))THEN
+        IF(INPUT_CACHE_ACTIVE(MET(JW)))THEN
+        CALL INPUT_CACHE_READ(MET(JW),CROW(1:7))
+        NXMET1(JW) = CROW(1); TAIRNX(JW) = CROW(2); TDEWNX(JW)  = CROW(3); WINDNX(JW) = CROW(4)
+        PHINX(JW)  = CROW(5); CLOUDNX(JW) = CROW(6); SRONX(JW) = CROW(7)
+        ELSE IF(METF(JW))THEN
         READ (MET(JW),*) NXMET1(JW),TAIRNX(JW),TDEWNX(JW),WINDNX(JW),PHINX(JW),CLOUDNX(JW),SRONX(JW)    
         ELSE
         READ (MET(JW),'(7F8.0)') NXMET1(JW),TAIRNX(JW),TDEWNX(JW),WINDNX(JW),PHINX(JW),CLOUDNX(JW),SRONX(JW)
         ENDIF
         SRONX(JW) = SRONX(JW)*REFL
       ELSE
-        IF(METF(JW))THEN  
+        IF(INPUT_CACHE_ACTIVE(MET(JW)))THEN
+        CALL INPUT_CACHE_READ(MET(JW),CROW(1:6))
+        NXMET1(JW) = CROW(1); TAIRNX(JW) = CROW(2); TDEWNX(JW)  = CROW(3); WINDNX(JW) = CROW(4)
+        PHINX(JW)  = CROW(5); CLOUDNX(JW) = CROW(6)
+        ELSE IF(METF(JW))THEN
         READ (MET(JW),*) NXMET1(JW),TAIRNX(JW),TDEWNX(JW),WINDNX(JW),PHINX(JW),CLOUDNX(JW)  
         ELSE
         READ (MET(JW),'(6F8.0)') NXMET1(JW),TAIRNX(JW),TDEWNX(JW),WINDNX(JW),PHINX(JW),CLOUDNX(JW)
@@ -969,7 +1028,10 @@ ENTRY READ_INPUT_DATA (NXTVD)
         QWD(JWD)  = QWDNX(JWD)
         QWDO(JWD) = QWDNX(JWD)
       END DO
-      IF(WDQF)THEN
+      IF(INPUT_CACHE_ACTIVE(WDQ))THEN
+      CALL INPUT_CACHE_READ(WDQ,CROW(1:1+NWD))
+      NXQWD1 = CROW(1); QWDNX(1:NWD) = CROW(2:1+NWD)
+      ELSE IF(WDQF)THEN
       READ (WDQ,*) NXQWD1,(QWDNX(JWD),JWD=1,NWD)  
       ELSE
       READ (WDQ,'(10F8.0:/(8X,9F8.0))') NXQWD1,(QWDNX(JWD),JWD=1,NWD)
@@ -990,7 +1052,10 @@ ENTRY READ_INPUT_DATA (NXTVD)
         QTRO(JT)   = QTRNX(JT)
         NXQTR2(JT) = NXQTR1(JT)
         
-          IF(TRQF(JT))THEN
+          IF(INPUT_CACHE_ACTIVE(TRQ(JT)))THEN
+          CALL INPUT_CACHE_READ(TRQ(JT),CROW(1:2))
+          NXQTR1(JT) = CROW(1); QTRNX(JT) = CROW(2)
+          ELSE IF(TRQF(JT))THEN
           READ (TRQ(JT),*) NXQTR1(JT),QTRNX(JT)
           ELSE
         READ (TRQ(JT),'(2F8.0)') NXQTR1(JT),QTRNX(JT)
@@ -1009,7 +1074,10 @@ ENTRY READ_INPUT_DATA (NXTVD)
           TTRO(JT)   = TTRNX(JT)
           NXTTR2(JT) = NXTTR1(JT)
           
-          IF(TRTF(JT))THEN
+          IF(INPUT_CACHE_ACTIVE(TRT(JT)))THEN
+          CALL INPUT_CACHE_READ(TRT(JT),CROW(1:2))
+          NXTTR1(JT) = CROW(1); TTRNX(JT) = CROW(2)
+          ELSE IF(TRTF(JT))THEN
           READ (TRT(JT),*) NXTTR1(JT),TTRNX(JT)
           ELSE
           READ (TRT(JT),'(2F8.0)') NXTTR1(JT),TTRNX(JT)
@@ -1028,7 +1096,10 @@ ENTRY READ_INPUT_DATA (NXTVD)
           CTR(TRCN(1:NACTR(JT),JT),JT)  = CTRNX(TRCN(1:NACTR(JT),JT),JT)
           CTRO(TRCN(1:NACTR(JT),JT),JT) = CTRNX(TRCN(1:NACTR(JT),JT),JT)
           NXCTR2(JT)                    = NXCTR1(JT)
-          IF(TRCF(JT))THEN
+          IF(INPUT_CACHE_ACTIVE(TRC(JT)))THEN
+          CALL INPUT_CACHE_READ(TRC(JT),CROW(1:1+NACTR(JT)))
+          NXCTR1(JT) = CROW(1); CTRNX(TRCN(1:NACTR(JT),JT),JT) = CROW(2:1+NACTR(JT))
+          ELSE IF(TRCF(JT))THEN
           READ (TRC(JT),*) NXCTR1(JT),(CTRNX(TRCN(JAC,JT),JT),JAC=1,NACTR(JT))
           ELSE
           READ (TRC(JT),'(1000F8.0)') NXCTR1(JT),(CTRNX(TRCN(JAC,JT),JT),JAC=1,NACTR(JT))
@@ -1053,7 +1124,10 @@ ENTRY READ_INPUT_DATA (NXTVD)
             QINO(JB)   = QINNX(JB)
             NXQIN2(JB) = NXQIN1(JB)
             
-          IF(INQF(JB))THEN
+          IF(INPUT_CACHE_ACTIVE(INQ(JB)))THEN
+          CALL INPUT_CACHE_READ(INQ(JB),CROW(1:2))
+          NXQIN1(JB) = CROW(1); QINNX(JB) = CROW(2)
+          ELSE IF(INQF(JB))THEN
           READ (INQ(JB),*) NXQIN1(JB),QINNX(JB)
           ELSE
             READ (INQ(JB),'(2F8.0)') NXQIN1(JB),QINNX(JB)
@@ -1070,7 +1144,10 @@ ENTRY READ_INPUT_DATA (NXTVD)
             TINO(JB)   = TINNX(JB)
             NXTIN2(JB) = NXTIN1(JB)
             
-          IF(INTF(JB))THEN
+          IF(INPUT_CACHE_ACTIVE(INFT(JB)))THEN
+          CALL INPUT_CACHE_READ(INFT(JB),CROW(1:2))
+          NXTIN1(JB) = CROW(1); TINNX(JB) = CROW(2)
+          ELSE IF(INTF(JB))THEN
           READ (INFT(JB),*) NXTIN1(JB),TINNX(JB)
           ELSE
             READ (INFT(JB),'(2F8.0)') NXTIN1(JB),TINNX(JB)
@@ -1087,7 +1164,10 @@ ENTRY READ_INPUT_DATA (NXTVD)
               CIND(INCN(1:NACIN(JB),JB),JB) = CINNX(INCN(1:NACIN(JB),JB),JB)
               CINO(INCN(1:NACIN(JB),JB),JB) = CINNX(INCN(1:NACIN(JB),JB),JB)
               NXCIN2(JB)                    = NXCIN1(JB)
-              IF(INCF(JB))THEN
+              IF(INPUT_CACHE_ACTIVE(INC(JB)))THEN
+              CALL INPUT_CACHE_READ(INC(JB),CROW(1:1+NACIN(JB)))
+              NXCIN1(JB) = CROW(1); CINNX(INCN(1:NACIN(JB),JB),JB) = CROW(2:1+NACIN(JB))
+              ELSE IF(INCF(JB))THEN
               READ (INC(JB),*) NXCIN1(JB),(CINNX(INCN(JAC,JB),JB),JAC=1,NACIN(JB))    
               ELSE
               READ (INC(JB),'(1000F8.0)') NXCIN1(JB),(CINNX(INCN(JAC,JB),JB),JAC=1,NACIN(JB))
@@ -1105,7 +1185,10 @@ ENTRY READ_INPUT_DATA (NXTVD)
           QSTR(1:NSTR(JB),JB)  = QSTRNX(1:NSTR(JB),JB)
           QSTRO(1:NSTR(JB),JB) = QSTRNX(1:NSTR(JB),JB)
           NXQOT2(JB)           = NXQOT1(JB)
-          IF(OTQF(JB))THEN
+          IF(INPUT_CACHE_ACTIVE(OTQ(JB)))THEN
+          CALL INPUT_CACHE_READ(OTQ(JB),CROW(1:1+NSTR(JB)))
+          NXQOT1(JB) = CROW(1); QSTRNX(1:NSTR(JB),JB) = CROW(2:1+NSTR(JB))
+          ELSE IF(OTQF(JB))THEN
           READ (OTQ(JB),*) NXQOT1(JB),(QSTRNX(JS,JB),JS=1,NSTR(JB))
           ELSE
           READ (OTQ(JB),'(10F8.0:/(8X,9F8.0))') NXQOT1(JB),(QSTRNX(JS,JB),JS=1,NSTR(JB))
@@ -1138,7 +1221,10 @@ ENTRY READ_INPUT_DATA (NXTVD)
           QDTRO(JB)  = QDTRNX(JB)
           NXQDT2(JB) = NXQDT1(JB)
           
-          IF(DTQF(JB))THEN
+          IF(INPUT_CACHE_ACTIVE(DTQ(JB)))THEN
+          CALL INPUT_CACHE_READ(DTQ(JB),CROW(1:2))
+          NXQDT1(JB) = CROW(1); QDTRNX(JB) = CROW(2)
+          ELSE IF(DTQF(JB))THEN
           READ (DTQ(JB),*) NXQDT1(JB),QDTRNX(JB)
           ELSE
           READ (DTQ(JB),'(2F8.0)') NXQDT1(JB),QDTRNX(JB)
@@ -1155,7 +1241,10 @@ ENTRY READ_INPUT_DATA (NXTVD)
           TDTRO(JB)  = TDTRNX(JB)
           NXTDT2(JB) = NXTDT1(JB)
           
-          IF(DTTF(JB))THEN
+          IF(INPUT_CACHE_ACTIVE(DTT(JB)))THEN
+          CALL INPUT_CACHE_READ(DTT(JB),CROW(1:2))
+          NXTDT1(JB) = CROW(1); TDTRNX(JB) = CROW(2)
+          ELSE IF(DTTF(JB))THEN
           READ (DTT(JB),*) NXTDT1(JB),TDTRNX(JB)
           ELSE
           READ (DTT(JB),'(2F8.0)') NXTDT1(JB),TDTRNX(JB)
@@ -1172,7 +1261,10 @@ ENTRY READ_INPUT_DATA (NXTVD)
             CDTR(DTCN(1:NACDT(JB),JB),JB)  = CDTRNX(DTCN(1:NACDT(JB),JB),JB)
             CDTRO(DTCN(1:NACDT(JB),JB),JB) = CDTRNX(DTCN(1:NACDT(JB),JB),JB)
             NXCDT2(JB)                     = NXCDT1(JB)
-            IF(DTCF(JB))THEN
+            IF(INPUT_CACHE_ACTIVE(DTC(JB)))THEN
+            CALL INPUT_CACHE_READ(DTC(JB),CROW(1:1+NACDT(JB)))
+            NXCDT1(JB) = CROW(1); CDTRNX(DTCN(1:NACDT(JB),JB),JB) = CROW(2:1+NACDT(JB))
+            ELSE IF(DTCF(JB))THEN
             READ (DTC(JB),*) NXCDT1(JB),(CDTRNX(DTCN(JAC,JB),JB),JAC=1,NACDT(JB))   
                 ELSE
             READ (DTC(JB),'(1000F8.0)') NXCDT1(JB),(CDTRNX(DTCN(JAC,JB),JB),JAC=1,NACDT(JB))
@@ -1189,7 +1281,10 @@ ENTRY READ_INPUT_DATA (NXTVD)
           PR(JB)    = PRNX(JB)
           NXPR2(JB) = NXPR1(JB)
           
-          IF(PRQF(JB))THEN
+          IF(INPUT_CACHE_ACTIVE(PRE(JB)))THEN
+          CALL INPUT_CACHE_READ(PRE(JB),CROW(1:2))
+          NXPR1(JB) = CROW(1); PRNX(JB) = CROW(2)
+          ELSE IF(PRQF(JB))THEN
           READ (PRE(JB),*) NXPR1(JB),PRNX(JB)
           ELSE
           READ (PRE(JB),'(2F8.0)') NXPR1(JB),PRNX(JB)
@@ -1205,7 +1300,10 @@ ENTRY READ_INPUT_DATA (NXTVD)
           TPR(JB)    = TPRNX(JB)
           NXTPR2(JB) = NXTPR1(JB)
           
-          IF(PRTF(JB))THEN
+          IF(INPUT_CACHE_ACTIVE(PRT(JB)))THEN
+          CALL INPUT_CACHE_READ(PRT(JB),CROW(1:2))
+          NXTPR1(JB) = CROW(1); TPRNX(JB) = CROW(2)
+          ELSE IF(PRTF(JB))THEN
           READ (PRT(JB),*) NXTPR1(JB),TPRNX(JB)
           ELSE
           READ (PRT(JB),'(2F8.0)') NXTPR1(JB),TPRNX(JB)
@@ -1221,7 +1319,10 @@ ENTRY READ_INPUT_DATA (NXTVD)
           DO WHILE (JDAY >= NXCPR1(JB))
             CPR(PRCN(1:NACPR(JB),JB),JB) = CPRNX(PRCN(1:NACPR(JB),JB),JB)
             NXCPR2(JB)                   = NXCPR1(JB)
-            IF(PRCF(JB))THEN
+            IF(INPUT_CACHE_ACTIVE(PRC(JB)))THEN
+            CALL INPUT_CACHE_READ(PRC(JB),CROW(1:1+NACPR(JB)))
+            NXCPR1(JB) = CROW(1); CPRNX(PRCN(1:NACPR(JB),JB),JB) = CROW(2:1+NACPR(JB))
+            ELSE IF(PRCF(JB))THEN
             READ (PRC(JB),*) NXCPR1(JB),(CPRNX(PRCN(JAC,JB),JB),JAC=1,NACPR(JB))   
                 ELSE
             READ (PRC(JB),'(1000F8.0)') NXCPR1(JB),(CPRNX(PRCN(JAC,JB),JB),JAC=1,NACPR(JB))
@@ -22,12 +22,15 @@ INTEGER(4) FUNCTION CE_QUAL_W2 (DLG)
 #ifdef CLI_ONLY
   USE PROGRESSCLI
   USE DIAGNOSTICSCLI
+  USE FIELDSNAPCLI, ONLY: FIELD_SNAPSHOT_WRITE
+  USE RUNCTLCLI,    ONLY: RUN_CONTROL_INIT, RUN_CONTROL_POLL
 #endif
   USE MACROPHYTEC; USE POROSITYC; USE ZOOPLANKTONC  
   Use CEMAVars
   USE INITIALVELOCITY; USE ENVIRPMOD
   USE BIOENERGETICS
   USE BUILDVERSION
+  USE HEATSOLVERCLI, ONLY: HEAT_SOLVER_RESTORE
   IMPLICIT NONE
  ! include "omp_lib.h"      ! OPENMP directive to adjust the # of processors TOGGLE FOR DEBUG
 
@@ -100,6 +103,9 @@ close(10)
     GO TO 240
   END IF
 
+#ifdef CLI_ONLY
+CALL RUN_CONTROL_INIT()                                           ! W2_RESUME=on: restart from rso.opt
+#endif
 CALL INPUT
 !SP CEMA
 Call CEMA_W2_Input
@@ -180,6 +186,7 @@ Call CEMA_W2_Input
     ENDIF
     IF(NPI > 0)READ(RSI)YS,VS,VST,YST,DTP,QOLD
     READ(RSI)TPOUT,TPTRIB,TPDTRIB,TPWD,TPPR,TPIN,TP_SEDSOD_PO4,PFLUXIN,TNOUT,TNTRIB,TNDTRIB,TNWD,TNPR,TNIN,TN_SEDSOD_NH4,NFLUXIN    ! TP_SEDBURIAL,TN_SEDBURIAL,
+    CALL HEAT_SOLVER_RESTORE (RSI,IMX)
     CLOSE (RSI)
   END IF
 #ifndef CLI_ONLY
@@ -1377,6 +1384,9 @@ IF(HABTATC  == '      ON')CALL FISHHABITAT(iopenfish)
 IF(AERATEC  == '      ON' .and. oxygen_demand)CALL AERATEOUTPUT
 IF(RESTART_IN)IOPENFISH=1
 IF(ENVIRPC  == '      ON')CALL ENVIRP
+#ifdef CLI_ONLY
+CALL FIELD_SNAPSHOT_WRITE()                                       ! W2_FIELD_SNAPSHOT=on: fields for api/habitat.py
+#endif
 iopenfish=1
 ENDIF                                                             ! OUTPUT AT FREQUENCY OF TSR FILES
 
@@ -1384,6 +1394,7 @@ ENDIF                                                             ! OUTPUT AT FR
 CALL OUTPUTA
 #ifdef CLI_ONLY
 CALL CHECK_NAN_AND_DUMP('after OUTPUTA')
+CALL RUN_CONTROL_POLL()                                           ! stop file: exit through STOP_PUSHED with rso.opt
 #endif
 !**** Screen output
 DO JW=1,NWB